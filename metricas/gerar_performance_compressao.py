@@ -0,0 +1,222 @@
+"""
+Benchmark de compressão de embeddings (int8 / PQ) para o RAG.
+
+Compara a busca float32 exata com os modos comprimidos do `EmbeddingIndex`:
+memória economizada, latência por consulta, recall@k contra a busca exata e,
+quando as consultas vêm do benchmark de `metricas/baseline_retrieval.py`, as
+métricas de IR (recall@5, MRR, nDCG@5) de cada modo.
+"""
+
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from metricas.baseline_retrieval import (
+    aggregate_results,
+    default_retrieval_benchmark,
+    evaluate_case,
+)
+from metricas.utils import (
+    configure_logging,
+    get_base_parser,
+    print_summary_box,
+    save_results_csv,
+    save_summary_csv,
+)
+from src.config.settings import get_settings
+from src.models.rag_models import ChunkORM
+from src.rag.models import Chunk, ChunkMetadata
+from src.rag.services.embedding_service import EmbeddingService
+from src.rag.storage.embedding_index import EmbeddingIndex
+from src.storage.factory import create_repository
+
+log = structlog.get_logger(__name__)
+
+MODES = ("none", "int8", "pq")
+
+
+def _build_index(ids: list[str], rows: np.ndarray, mode: str) -> EmbeddingIndex:
+    """Create a standalone index over the corpus rows with the given compression."""
+    compression = get_settings().rag.compression.model_copy(update={"mode": mode})
+    index = EmbeddingIndex(compression_config=compression)
+    index.clear()
+    index.upsert(zip(ids, rows, strict=True))
+    index.rebuild_derived()
+    return index
+
+
+async def _load_chunks(session: AsyncSession, chunk_ids: list[str]) -> dict[str, Chunk]:
+    """Hydrate chunks for IR evaluation."""
+    stmt = select(ChunkORM).where(ChunkORM.id.in_(chunk_ids))
+    orms = (await session.execute(stmt)).scalars().all()
+    return {
+        orm.id: Chunk(
+            chunk_id=orm.id,
+            documento_id=orm.documento_id,
+            texto=orm.texto,
+            metadados=ChunkMetadata.model_validate_json(orm.metadados),
+            token_count=orm.token_count,
+            posicao_documento=0.0,
+        )
+        for orm in orms
+    }
+
+
+async def _benchmark_queries(
+    rows: np.ndarray,
+    num_queries: int,
+    offline: bool,
+) -> tuple[list[np.ndarray], list[Any]]:
+    """Embed benchmark cases, or perturb corpus rows when offline."""
+    if not offline:
+        cases = default_retrieval_benchmark()[:num_queries]
+        try:
+            embeddings = await EmbeddingService().embed_batch([case.query for case in cases])
+            return [np.asarray(e, dtype=np.float32) for e in embeddings], cases
+        except Exception as e:
+            log.warning("compression_benchmark_embedding_failed", error=str(e))
+
+    rng = np.random.default_rng(0)
+    picks = rng.choice(rows.shape[0], size=min(num_queries, rows.shape[0]), replace=False)
+    noise = 0.05 * rng.normal(size=(picks.size, rows.shape[1])).astype(np.float32)
+    return list(rows[picks] + noise), []
+
+
+async def check_compression_performance(
+    output_file: str = "metricas/performance_compressao.csv",
+    num_queries: int = 50,
+    k: int = 5,
+    offline: bool = False,
+) -> None:
+    """Benchmark compression modes and save results to CSV."""
+    async with create_repository() as repo, repo.async_session_maker() as session:
+        corpus = EmbeddingIndex()
+        await corpus.ensure_loaded(session)
+        ids, rows = corpus.live_rows()
+        if not ids:
+            log.error("compression_benchmark_empty_corpus")
+            return
+
+        queries, cases = await _benchmark_queries(rows, num_queries, offline)
+        log.info(
+            "compression_benchmark_started",
+            corpus_rows=len(ids),
+            queries=len(queries),
+            with_goldset=bool(cases),
+        )
+
+        exact_top: list[set[int]] = []
+        results: list[dict[str, Any]] = []
+        for mode in MODES:
+            started = time.perf_counter()
+            index = _build_index(ids, rows, mode)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            latencies: list[float] = []
+            recalls: list[float] = []
+            retrieved: list[list[str]] = []
+            for query_index, query in enumerate(queries):
+                start = time.perf_counter()
+                positions, _ = index.nearest(query, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                top = {int(position) for position in positions}
+                if mode == "none":
+                    exact_top.append(top)
+                recalls.append(
+                    len(top & exact_top[query_index]) / max(1, len(exact_top[query_index]))
+                )
+                retrieved.append([index.chunk_id_at(int(position)) for position in positions])
+
+            row: dict[str, Any] = {
+                "mode": mode,
+                "memory_mb": round(
+                    (index.memory_stats()["code_bytes"] or index.memory_stats()["float32_bytes"])
+                    / (1024 * 1024),
+                    3,
+                ),
+                "float32_mb": round(index.memory_stats()["float32_bytes"] / (1024 * 1024), 3),
+                "build_ms": round(build_ms, 2),
+                "avg_search_ms": round(statistics.mean(latencies), 3),
+                "p95_search_ms": round(float(np.percentile(latencies, 95)), 3),
+                f"recall_at_{k}_vs_exact": round(statistics.mean(recalls), 4),
+                "ir_recall_at_5": "",
+                "ir_mrr": "",
+                "ir_ndcg_at_5": "",
+            }
+
+            if cases:
+                chunks = await _load_chunks(
+                    session, sorted({cid for ids_ in retrieved for cid in ids_})
+                )
+                evaluated = [
+                    evaluate_case(case, [chunks[cid] for cid in ids_ if cid in chunks])
+                    for case, ids_ in zip(cases, retrieved, strict=True)
+                ]
+                overall = aggregate_results(evaluated)["overall"]
+                row["ir_recall_at_5"] = round(overall["recall_at_5"], 4)
+                row["ir_mrr"] = round(overall["mrr"], 4)
+                row["ir_ndcg_at_5"] = round(overall["ndcg_at_5"], 4)
+
+            results.append(row)
+
+    output_path = Path(output_file)
+    fieldnames = list(results[0].keys())
+    save_results_csv(output_path, results, fieldnames)
+
+    baseline = results[0]
+    metrics: list[tuple[str, Any]] = [("Vetores no corpus:", len(ids))]
+    summary_data: list[dict[str, Any]] = [{"metric": "corpus_rows", "value": len(ids)}]
+    for row in results[1:]:
+        mode = row["mode"]
+        memory_saved = (
+            1 - row["memory_mb"] / baseline["memory_mb"] if baseline["memory_mb"] else 0.0
+        )
+        speedup = baseline["avg_search_ms"] / row["avg_search_ms"] if row["avg_search_ms"] else 0.0
+        recall_lost = 1 - row[f"recall_at_{k}_vs_exact"]
+        metrics.extend(
+            [
+                ("", None),
+                (f"[{mode}] Memória economizada:", f"{memory_saved:.1%}"),
+                (f"[{mode}] Speedup da busca:", f"{speedup:.2f}x"),
+                (f"[{mode}] Recall@{k} perdido:", f"{recall_lost:.2%}"),
+            ]
+        )
+        summary_data.extend(
+            [
+                {"metric": f"{mode}_memory_saved_ratio", "value": f"{memory_saved:.4f}"},
+                {"metric": f"{mode}_search_speedup", "value": f"{speedup:.3f}"},
+                {"metric": f"{mode}_recall_at_{k}_lost", "value": f"{recall_lost:.4f}"},
+            ]
+        )
+    print_summary_box("COMPRESSÃO DE EMBEDDINGS", metrics)
+    save_summary_csv(output_path, summary_data)
+
+
+if __name__ == "__main__":
+    parser = get_base_parser("Benchmark de compressão de embeddings (int8/PQ)")
+    parser.add_argument("-n", "--queries", type=int, default=50, help="Número de consultas")
+    parser.add_argument("-k", "--top-k", type=int, default=5, help="k usado no recall@k")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Usar vetores do corpus com ruído em vez de embeddings da API",
+    )
+    args = parser.parse_args()
+
+    output_file = args.output or "metricas/performance_compressao.csv"
+    configure_logging(verbose=args.verbose, quiet=args.quiet)
+    asyncio.run(
+        check_compression_performance(
+            output_file=output_file,
+            num_queries=args.queries,
+            k=args.top_k,
+            offline=args.offline,
+        )
+    )
@@ -0,0 +1,72 @@
+"""promote hot metadata filter keys to indexed generated columns on rag_chunks
+
+Revision ID: 20260304_1000
+Revises: 20260303_2100
+Create Date: 2026-03-04 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "20260304_1000"
+down_revision: str | None = "20260303_2100"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Keep in sync with src.models.rag_models.PROMOTED_METADATA_KEYS
+PROMOTED_METADATA_COLUMNS = {
+    "documento": "VARCHAR",
+    "law_number": "VARCHAR",
+    "artigo": "VARCHAR",
+    "content_type": "VARCHAR",
+    "source_type": "VARCHAR",
+    "banca": "VARCHAR",
+    "valid_from": "VARCHAR",
+    "valid_to": "VARCHAR",
+    "is_exam_focus": "INTEGER",
+    "is_revoked": "INTEGER",
+    "marca_stf": "INTEGER",
+    "marca_stj": "INTEGER",
+    "marca_concurso": "INTEGER",
+}
+
+
+def upgrade() -> None:
+    """Add VIRTUAL json_extract columns plus B-tree indexes (SQLite only)."""
+    bind = op.get_bind()
+    if bind is None or bind.dialect.name != "sqlite":
+        return
+
+    # table_xinfo lists generated columns, which inspector/table_info hide
+    existing_columns = {
+        row[1] for row in bind.execute(sa.text("PRAGMA table_xinfo(rag_chunks)"))
+    }
+    existing_indexes = {idx["name"] for idx in sa.inspect(bind).get_indexes("rag_chunks")}
+
+    for key, column_type in PROMOTED_METADATA_COLUMNS.items():
+        column = f"meta_{key}"
+        if column not in existing_columns:
+            # VIRTUAL columns can be added in place; only the index stores values
+            op.execute(
+                f"ALTER TABLE rag_chunks ADD COLUMN {column} {column_type} "
+                f"GENERATED ALWAYS AS (json_extract(metadados, '$.{key}')) VIRTUAL"
+            )
+        index_name = f"ix_rag_chunks_{column}"
+        if index_name not in existing_indexes:
+            op.create_index(index_name, "rag_chunks", [column])
+
+
+def downgrade() -> None:
+    """Drop the promoted indexes and generated columns."""
+    bind = op.get_bind()
+    if bind is None or bind.dialect.name != "sqlite":
+        return
+
+    for key in PROMOTED_METADATA_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_rag_chunks_meta_{key}")
+        op.execute(f"ALTER TABLE rag_chunks DROP COLUMN meta_{key}")
@@ -0,0 +1,45 @@
+"""add rag_semantic_cache table for the persistent semantic cache tier
+
+Revision ID: 20260305_0900
+Revises: 20260304_1000
+Create Date: 2026-03-05 09:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260305_0900"
+down_revision: str | None = "20260304_1000"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create rag_semantic_cache for write-behind SemanticCache persistence."""
+    op.create_table(
+        "rag_semantic_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("scope", sa.String(length=64), nullable=True),
+        sa.Column("rag_context", sa.Text(), nullable=False),
+        sa.Column("llm_response", sa.Text(), nullable=False),
+        sa.Column("cached_at", sa.Float(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_rag_semantic_cache_cached_at", "rag_semantic_cache", ["cached_at"])
+    op.create_index("ix_rag_semantic_cache_expires_at", "rag_semantic_cache", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Drop rag_semantic_cache and its indexes."""
+    op.drop_index("ix_rag_semantic_cache_expires_at", table_name="rag_semantic_cache")
+    op.drop_index("ix_rag_semantic_cache_cached_at", table_name="rag_semantic_cache")
+    op.drop_table("rag_semantic_cache")
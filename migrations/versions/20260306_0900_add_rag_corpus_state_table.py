@@ -0,0 +1,40 @@
+"""add rag_corpus_state table holding the corpus generation counter
+
+Revision ID: 20260306_0900
+Revises: 20260305_0900
+Create Date: 2026-03-06 09:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260306_0900"
+down_revision: str | None = "20260305_0900"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create rag_corpus_state and seed generation 0."""
+    op.create_table(
+        "rag_corpus_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO rag_corpus_state (id, generation, updated_at) "
+        "VALUES (1, 0, CURRENT_TIMESTAMP)"
+    )
+
+
+def downgrade() -> None:
+    """Drop rag_corpus_state."""
+    op.drop_table("rag_corpus_state")
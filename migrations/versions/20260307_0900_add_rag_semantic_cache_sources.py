@@ -0,0 +1,34 @@
+"""add source tags to rag_semantic_cache for corpus-aware invalidation
+
+Revision ID: 20260307_0900
+Revises: 20260306_0900
+Create Date: 2026-03-07 09:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260307_0900"
+down_revision: str | None = "20260306_0900"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the cited-document tags and corpus generation of each entry."""
+    with op.batch_alter_table("rag_semantic_cache") as batch_op:
+        batch_op.add_column(sa.Column("sources", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("corpus_generation", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop the source tags."""
+    with op.batch_alter_table("rag_semantic_cache") as batch_op:
+        batch_op.drop_column("corpus_generation")
+        batch_op.drop_column("sources")
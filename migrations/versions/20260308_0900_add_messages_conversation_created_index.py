@@ -0,0 +1,34 @@
+"""add (conversation_id, created_at DESC) index on messages for newest-first history
+
+Revision ID: 20260308_0900
+Revises: 20260307_0900
+Create Date: 2026-03-08 09:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260308_0900"
+down_revision: str | None = "20260307_0900"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Index the newest-N history query of a conversation."""
+    op.create_index(
+        "ix_messages_conversation_id_created_at",
+        "messages",
+        ["conversation_id", sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Drop the history index."""
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
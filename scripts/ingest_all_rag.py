@@ -29,6 +29,7 @@ from src.config.settings import get_settings  # noqa: E402
 from src.models.rag_models import DocumentORM  # noqa: E402
 from src.rag.services.embedding_service import EmbeddingService  # noqa: E402
 from src.rag.services.ingestion_service import IngestionService  # noqa: E402
+from src.rag.storage.embedding_cache_store import get_embedding_cache_store  # noqa: E402
 from src.utils.log_events import LogEvents  # noqa: E402
 
 
@@ -252,7 +253,9 @@ async def main() -> None:
             )
 
             async with session_factory() as session:
-                embedding_service = EmbeddingService(api_key=api_key)
+                embedding_service = EmbeddingService(
+                    api_key=api_key, cache=get_embedding_cache_store()
+                )
                 ingestion_service = IngestionService(
                     session=session,
                     embedding_service=embedding_service,
@@ -35,6 +35,8 @@ from src.models.rag_models import ChunkORM, ContentLinkORM
 from src.rag.parser.cf_parser import CFContentClassifier
 from src.rag.services.embedding_service import EmbeddingService
 from src.rag.services.ingestion_service import IngestionService
+from src.rag.storage.corpus_state import bump_corpus_generation
+from src.rag.storage.embedding_cache_store import get_embedding_cache_store
 
 log = structlog.get_logger(__name__)
 
@@ -133,7 +135,7 @@ async def _run(
     async_session = async_sessionmaker(engine, expire_on_commit=False)
 
     async with async_session() as session:
-        embedding_service = EmbeddingService()
+        embedding_service = EmbeddingService(cache=get_embedding_cache_store())
         service = IngestionService(session=session, embedding_service=embedding_service)
 
         if dry_run:
@@ -168,6 +170,7 @@ async def _run(
                     sa_delete(ChunkORM).where(ChunkORM.documento_id == doc_orm.id)
                 )
                 await session.delete(doc_orm)
+                await bump_corpus_generation(session)
                 await session.commit()
                 print(f"Documento '{document_name}' removido para reindexação.")
 
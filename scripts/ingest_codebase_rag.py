@@ -37,6 +37,7 @@ from src.models.rag_models import DocumentORM  # noqa: E402
 from src.rag.parser.xml_parser import RepomixXMLParser  # noqa: E402
 from src.rag.services.code_ingestion_service import CodeIngestionService  # noqa: E402
 from src.rag.services.embedding_service import EmbeddingService  # noqa: E402
+from src.rag.storage.embedding_cache_store import get_embedding_cache_store  # noqa: E402
 
 log = structlog.get_logger(__name__)
 
@@ -130,7 +131,9 @@ async def main() -> None:
                         print()
 
                 # Ingest using the SAME session - if this fails, rollback undoes delete too
-                embedding_service = EmbeddingService(api_key=api_key)
+                embedding_service = EmbeddingService(
+                    api_key=api_key, cache=get_embedding_cache_store()
+                )
                 ingestion_service = CodeIngestionService(
                     session=session,
                     embedding_service=embedding_service,
@@ -30,6 +30,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config.settings import get_settings
 from src.rag.services.ingestion_service import IngestionService
 from src.rag.services.embedding_service import EmbeddingService
+from src.rag.storage.embedding_cache_store import get_embedding_cache_store  # noqa: E402
 
 
 async def main() -> None:
@@ -92,7 +93,7 @@ async def main() -> None:
     metrics_data = []
 
     async with async_session_maker() as session:
-        embedding_service = EmbeddingService(api_key=api_key)
+        embedding_service = EmbeddingService(api_key=api_key, cache=get_embedding_cache_store())
         ingestion_service = IngestionService(
             session=session,
             embedding_service=embedding_service,
@@ -29,6 +29,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config.settings import get_settings
 from src.rag.services.ingestion_service import IngestionService
 from src.rag.services.embedding_service import EmbeddingService
+from src.rag.storage.embedding_cache_store import get_embedding_cache_store  # noqa: E402
 
 
 async def main() -> None:
@@ -72,7 +73,7 @@ async def main() -> None:
 
     async with async_session_maker() as session:
         # Inicializar serviços com API key explícita
-        embedding_service = EmbeddingService(api_key=api_key)
+        embedding_service = EmbeddingService(api_key=api_key, cache=get_embedding_cache_store())
         ingestion_service = IngestionService(
             session=session,
             embedding_service=embedding_service,
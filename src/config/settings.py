@@ -31,6 +31,15 @@ class DiscordConfig(BaseModel):
     token: str | None = Field(None, description="Discord bot token")
     command_prefix: str = Field("!", description="Command prefix for bot commands")
     message_content_intent: bool = Field(default=True, description="Enable message content intent")
+    stream_responses: bool = Field(
+        default=True, description="Show !ask answers progressively while they are generated"
+    )
+    stream_edit_interval_seconds: float = Field(
+        default=1.0,
+        ge=0.2,
+        le=10.0,
+        description="Minimum time between edits of a streamed answer message",
+    )
 
 
 class GoogleConfig(BaseModel):
@@ -66,6 +75,56 @@ class DatabaseConfig(BaseModel):
 
     url: str = Field(default="sqlite:///data/botsalinha.db", description="Database connection URL")
     echo: bool = Field(default=False, description="Echo SQL statements")
+    pool_size: int = Field(
+        default=5,
+        ge=1,
+        le=50,
+        description="Connections kept open by the bot's shared RAG engine",
+    )
+    max_overflow: int = Field(
+        default=10,
+        ge=0,
+        le=100,
+        description="Extra connections the shared RAG engine may open under load",
+    )
+    message_write_behind: bool = Field(
+        default=True,
+        description="Persist conversation messages from a background queue in batches",
+    )
+    message_queue_size: int = Field(
+        default=1000,
+        ge=1,
+        le=100_000,
+        description="Messages waiting to be written before new writes wait for space",
+    )
+    message_batch_size: int = Field(
+        default=50,
+        ge=1,
+        le=1000,
+        description="Most messages inserted per transaction",
+    )
+    message_flush_interval_seconds: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=5.0,
+        description="How long a write waits for others to join its batch",
+    )
+    history_cache: bool = Field(
+        default=True,
+        description="Keep the recent history of active conversations in memory",
+    )
+    history_cache_max_mb: float = Field(
+        default=16.0,
+        ge=1.0,
+        le=1024.0,
+        description="Approximate memory cap of the history cache in MB",
+    )
+    history_cache_idle_seconds: float = Field(
+        default=1800.0,
+        ge=60.0,
+        le=86400.0,
+        description="Drop a conversation's cached history after this long without use",
+    )
     max_conversation_age_days: int = Field(
         default=30,
         ge=1,
@@ -94,7 +153,95 @@ class RAGCacheConfig(BaseModel):
     enabled: bool = Field(default=True, description="Enable semantic cache")
     max_memory_mb: int = Field(default=50, ge=10, le=500, description="Max memory for cache (MB)")
     ttl_seconds: int = Field(default=86400, ge=300, le=604800, description="Cache TTL (seconds)")
+    ttl_jitter_ratio: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=0.5,
+        description="Max fraction randomly taken off each entry's TTL to spread expirations",
+    )
+    stale_while_revalidate_seconds: int = Field(
+        default=3600,
+        ge=0,
+        le=604800,
+        description="Time past the TTL an entry is served while refreshed in the background",
+    )
     persist_to_db: bool = Field(default=False, description="Persist cache to database")
+    persist_max_disk_mb: int = Field(
+        default=200, ge=10, le=10240, description="Max on-disk size of the persisted cache (MB)"
+    )
+    persist_flush_interval_seconds: float = Field(
+        default=2.0, gt=0.0, le=60.0, description="Max delay before cache writes reach disk"
+    )
+    persist_batch_size: int = Field(
+        default=64, ge=1, le=10000, description="Pending cache writes that trigger a flush"
+    )
+    semantic_lookup_enabled: bool = Field(
+        default=True,
+        description="Match cached entries by query-embedding similarity after an exact miss",
+    )
+    semantic_threshold: float = Field(
+        default=0.93,
+        ge=0.80,
+        le=1.0,
+        description="Min cosine similarity between queries for a semantic cache hit",
+    )
+    semantic_audit_sample_rate: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of semantic hits re-checked against a fresh retrieval",
+    )
+    admission_policy: str = Field(
+        default="tinylfu",
+        description="Admission filter for entries that need evictions: none or tinylfu",
+    )
+    admission_sketch_width: int = Field(
+        default=16384,
+        ge=256,
+        le=1048576,
+        description="Counters per row of the TinyLFU frequency sketch",
+    )
+    shared_backend: str = Field(
+        default="none",
+        description="Cache tier shared across caches/processes: none, memory or sqlite",
+    )
+    shared_path: str = Field(
+        default="",
+        description="SQLite file of the shared tier (empty = next to the SQLite database)",
+    )
+    shared_max_entries: int = Field(
+        default=100000, ge=100, description="Max entries per namespace in the shared tier"
+    )
+
+    @field_validator("admission_policy")
+    @classmethod
+    def validate_admission_policy(cls, value: str) -> str:
+        """Validate cache admission policy."""
+        normalized = value.strip().lower()
+        allowed = {"none", "tinylfu"}
+        if normalized not in allowed:
+            raise ValidationError(
+                "RAG config inválida: cache.admission_policy fora do conjunto suportado.",
+                field="rag.cache.admission_policy",
+                value=value,
+                details={"allowed": sorted(allowed)},
+            )
+        return normalized
+
+    @field_validator("shared_backend")
+    @classmethod
+    def validate_shared_backend(cls, value: str) -> str:
+        """Validate shared cache backend."""
+        normalized = value.strip().lower()
+        allowed = {"none", "memory", "sqlite"}
+        if normalized not in allowed:
+            raise ValidationError(
+                "RAG config inválida: cache.shared_backend fora do conjunto suportado.",
+                field="rag.cache.shared_backend",
+                value=value,
+                details={"allowed": sorted(allowed)},
+            )
+        return normalized
 
 
 class ChromaConfig(BaseModel):
@@ -116,6 +263,124 @@ class ChromaConfig(BaseModel):
     )
 
 
+class EmbeddingSegmentsConfig(BaseModel):
+    """Memory-mapped embedding segment files for the SQLite vector store."""
+
+    enabled: bool = Field(default=False, description="Write and map embedding segments")
+    path: str = Field(
+        default="data/embedding_segments",
+        description="Directory holding segment files and manifest",
+    )
+
+
+class EmbeddingCacheConfig(BaseModel):
+    """Persistent content-addressed cache of embedding vectors."""
+
+    enabled: bool = Field(default=True, description="Reuse embeddings of previously seen texts")
+    path: str = Field(
+        default="data/embedding_cache.db",
+        description="SQLite file holding the cached float32 vectors",
+    )
+    max_entries: int = Field(
+        default=500000, ge=1000, description="Cached vectors kept before trimming the oldest"
+    )
+
+
+class ANNConfig(BaseModel):
+    """Approximate nearest-neighbour (IVF) index over the resident embedding matrix."""
+
+    enabled: bool = Field(default=False, description="Enable IVF approximate search")
+    min_rows: int = Field(
+        default=5000,
+        ge=1,
+        description="Corpus size below which the exact scan is always used",
+    )
+    n_lists: int = Field(
+        default=0,
+        ge=0,
+        le=65536,
+        description="Number of IVF lists (0 = sqrt of corpus size)",
+    )
+    nprobe: int = Field(default=8, ge=1, le=65536, description="IVF lists probed per query")
+    kmeans_iterations: int = Field(default=10, ge=1, le=100, description="k-means iterations")
+    train_sample_size: int = Field(
+        default=20000,
+        ge=100,
+        description="Maximum rows sampled to train centroids",
+    )
+    rebuild_drift_ratio: float = Field(
+        default=0.2,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of rows missing from the persisted index that forces retraining",
+    )
+    recall_sample_rate: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of queries also run exactly to measure recall@k",
+    )
+    index_path: str | None = Field(
+        default=None,
+        description="Persisted index path (default: <database file>.ivf.npz)",
+    )
+
+
+class VectorCompressionConfig(BaseModel):
+    """Compressed embedding codes scanned before an exact float32 re-rank."""
+
+    mode: str = Field(default="none", description="Compression mode: none|int8|pq")
+    pq_subvectors: int = Field(
+        default=96,
+        ge=1,
+        le=4096,
+        description="PQ sub-vectors per embedding (bytes per code)",
+    )
+    pq_iterations: int = Field(default=8, ge=1, le=50, description="k-means iterations per codebook")
+    pq_train_sample_size: int = Field(
+        default=10000,
+        ge=256,
+        description="Maximum rows sampled to train PQ codebooks",
+    )
+    rerank_factor: int = Field(
+        default=4,
+        ge=1,
+        le=100,
+        description="Approximate candidates re-ranked in float32 (k * factor)",
+    )
+    index_path: str | None = Field(
+        default=None,
+        description="Persisted quantizer path (default: <database file>.quantizer.npz)",
+    )
+
+    @field_validator("mode")
+    @classmethod
+    def validate_mode(cls, value: str) -> str:
+        """Validate compression mode."""
+        normalized = value.strip().lower()
+        allowed = {"none", "int8", "pq"}
+        if normalized not in allowed:
+            raise ValidationError(
+                "RAG config inválida: compression.mode fora do conjunto suportado.",
+                field="rag.compression.mode",
+                value=value,
+                details={"allowed": sorted(allowed)},
+            )
+        return normalized
+
+
+class LexicalIndexConfig(BaseModel):
+    """Corpus-level BM25 index used for lexical candidates and reranking."""
+
+    enabled: bool = Field(default=True, description="Build and use the BM25 lexical index")
+    k1: float = Field(default=1.5, ge=0.0, le=5.0, description="BM25 term-frequency saturation")
+    b: float = Field(default=0.75, ge=0.0, le=1.0, description="BM25 length normalization")
+    index_path: str = Field(
+        default="",
+        description="Persisted index file (empty = next to the SQLite database)",
+    )
+
+
 class SupabaseRAGConfig(BaseModel):
     """Supabase vector store configuration for RAG migration."""
 
@@ -299,6 +564,31 @@ class RAGConfig(BaseModel):
         default_factory=ChromaConfig,
         description="ChromaDB vector store configuration",
     )
+    # Embedding segment files (memory-mapped matrix shared across workers)
+    embedding_segments: EmbeddingSegmentsConfig = Field(
+        default_factory=EmbeddingSegmentsConfig,
+        description="Memory-mapped embedding segment configuration",
+    )
+    # Persistent embedding cache
+    embedding_cache: EmbeddingCacheConfig = Field(
+        default_factory=EmbeddingCacheConfig,
+        description="Persistent embedding cache configuration",
+    )
+    # Approximate nearest-neighbour index
+    ann: ANNConfig = Field(
+        default_factory=ANNConfig,
+        description="IVF approximate search configuration",
+    )
+    # Compressed embedding representation
+    compression: VectorCompressionConfig = Field(
+        default_factory=VectorCompressionConfig,
+        description="Embedding compression configuration",
+    )
+    # Corpus-level BM25 lexical index
+    lexical: LexicalIndexConfig = Field(
+        default_factory=LexicalIndexConfig,
+        description="BM25 lexical index configuration",
+    )
     # Supabase configuration
     supabase: SupabaseRAGConfig = Field(
         default_factory=SupabaseRAGConfig,
@@ -5,7 +5,11 @@ Wraps the Agno Agent class with proper abstractions and error handling.
 Integrates with RAG (Retrieval-Augmented Generation) for enhanced responses.
 """
 
+import asyncio
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Any
 
 import structlog
@@ -18,20 +22,42 @@ from ..rag import (
     ConfiancaCalculator,
     QueryService,
     RAGContext,
+    RAGRuntime,
     SemanticCache,
 )
 from ..rag.services.embedding_service import EmbeddingService
+from ..rag.storage.embedding_cache_store import get_embedding_cache_store
 from ..storage.repository import MessageRepository
 from ..tools.mcp_manager import MCPToolsManager
-from ..utils.errors import APIError, ConfigurationError
+from ..utils.errors import APIError, BotSalinhaError, ConfigurationError
 from ..utils.input_sanitizer import sanitize_user_input
 from ..utils.log_events import LogEvents
-from ..utils.metrics import track_error, track_provider_request, track_tokens
+from ..utils.metrics import (
+    track_error,
+    track_pipeline_stage,
+    track_provider_request,
+    track_time_to_first_token,
+    track_tokens,
+)
 from ..utils.retry import AsyncRetryConfig, async_retry
+from ..utils.single_flight import SingleFlight, SingleFlightStats
 from .provider_manager import ProviderManager
 
 log = structlog.get_logger()
 
+# Agno stream event carrying a piece of the answer (RunCompleted repeats the whole text)
+_RUN_CONTENT_EVENT = "RunContent"
+
+
+@dataclass(slots=True)
+class _CacheLookup:
+    """Outcome of the semantic cache fast path."""
+
+    answer: tuple[str, RAGContext] | None = None
+    cache_key: str | None = None
+    query_embedding: list[float] | None = None
+    cache_scope: str | None = None
+
 
 class AgentWrapper:
     """
@@ -47,6 +73,7 @@ class AgentWrapper:
         db_session: AsyncSession | None = None,
         enable_rag: bool | None = None,
         semantic_cache: SemanticCache | None = None,
+        rag_runtime: RAGRuntime | None = None,
     ) -> None:
         """
         Initialize the agent wrapper.
@@ -56,6 +83,9 @@ class AgentWrapper:
             db_session: Database session for RAG queries (optional)
             enable_rag: Force enable/disable RAG (defaults to settings)
             semantic_cache: Semantic cache for RAG responses (optional)
+            rag_runtime: Process-wide RAG resources; each request then uses a
+                pooled session of its own instead of `db_session`, and the
+                runtime's semantic cache unless `semantic_cache` is given
 
         Raises:
             ValueError: If repository is None
@@ -66,9 +96,15 @@ class AgentWrapper:
         self.settings = get_settings()
         self.repository = repository
         self.db_session = db_session
+        self._rag_runtime = rag_runtime
 
         # Store semantic cache
+        if semantic_cache is None and rag_runtime is not None:
+            semantic_cache = rag_runtime.semantic_cache
         self._semantic_cache = semantic_cache
+        self._generation_flight: SingleFlight[tuple[str, RAGContext | None]] = SingleFlight(
+            "generation"
+        )
 
         # Determine if RAG should be enabled
         if enable_rag is None:
@@ -83,23 +119,29 @@ class AgentWrapper:
             and self.enable_rag
         )
 
-        # Initialize RAG services if enabled and db_session provided
+        # Initialize RAG services if enabled and a session source is provided
         self._query_service: QueryService | None = None
         self._confianca_calculator: ConfiancaCalculator | None = None
 
-        if self.enable_rag and self.db_session is not None:
+        if self.enable_rag and (self.db_session is not None or self._rag_runtime is not None):
             try:
-                embedding_service = EmbeddingService()
-                self._query_service = QueryService(
-                    session=self.db_session,
-                    embedding_service=embedding_service,
-                )
+                if self._rag_runtime is not None:
+                    # Query services are built per request (_rag_scope); this
+                    # only surfaces embedding misconfiguration at startup
+                    _ = self._rag_runtime.embedding_service
+                else:
+                    embedding_service = EmbeddingService(cache=get_embedding_cache_store())
+                    self._query_service = QueryService(
+                        session=self.db_session,
+                        embedding_service=embedding_service,
+                    )
                 self._confianca_calculator = ConfiancaCalculator(
                     alta_threshold=self.settings.rag.confidence_threshold,
                 )
                 log.debug(
                     "rag_query_service_initialized",
                     enabled=True,
+                    per_request_sessions=self._rag_runtime is not None,
                     confidence_threshold=self.settings.rag.confidence_threshold,
                 )
             except Exception as e:
@@ -256,34 +298,322 @@ class AgentWrapper:
 
         # FAST PATH: Check semantic cache BEFORE loading history
         # This avoids expensive DB call on cache hits
-        cache_key = None
-        if self._use_semantic_cache and self._semantic_cache:
-            cache_key = self._semantic_cache.generate_key(
-                query=sanitized_prompt,
-                top_k=self.settings.rag.top_k,
-                min_similarity=self.settings.rag.min_similarity,
-                retrieval_mode=self.settings.rag.effective_retrieval_mode,
-                rerank_profile=self.settings.rag.effective_rerank_profile,
-                chunking_mode=self.settings.rag.effective_chunking_mode,
+        lookup = await self._lookup_cached_answer(
+            sanitized_prompt, conversation_id, user_id, guild_id
+        )
+        if lookup.answer is not None:
+            return lookup.answer
+
+        # SLOW PATH: concurrent identical questions share one retrieval and
+        # generation (keyed like the cache, whose answers are shared anyway)
+        return await self._run_generation(
+            lookup, sanitized_prompt, conversation_id, user_id, guild_id, e2e_start=e2e_start
+        )
+
+    async def stream_response_with_rag(
+        self,
+        prompt: str,
+        conversation_id: str,
+        user_id: str,
+        guild_id: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response with RAG context, yielding text as it is produced.
+
+        Cached answers are yielded whole. On a miss the LLM output is
+        yielded delta by delta while it is generated, and the complete
+        answer is cached as in generate_response_with_rag(). A caller that
+        joins an identical generation already in flight gets its answer in
+        one piece when it completes.
+
+        Args:
+            prompt: User's question/message
+            conversation_id: Conversation ID for context
+            user_id: Discord user ID
+            guild_id: Discord guild ID (optional)
+
+        Yields:
+            Pieces of the response text; their concatenation is the response
+
+        Raises:
+            APIError: If the API call fails
+            RetryExhaustedError: If all retries are exhausted
+        """
+        e2e_start = time.perf_counter()
+        sanitized_prompt = sanitize_user_input(prompt)
+
+        lookup = await self._lookup_cached_answer(
+            sanitized_prompt, conversation_id, user_id, guild_id
+        )
+        if lookup.answer is not None:
+            yield lookup.answer[0]
+            return
+
+        deltas: asyncio.Queue[str] = asyncio.Queue()
+        generation = asyncio.ensure_future(
+            self._run_generation(
+                lookup,
+                sanitized_prompt,
+                conversation_id,
+                user_id,
+                guild_id,
+                e2e_start=e2e_start,
+                on_delta=deltas.put_nowait,
+            )
+        )
+        streamed = False
+        try:
+            while True:
+                next_delta = asyncio.ensure_future(deltas.get())
+                await asyncio.wait({next_delta, generation}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_delta.done():
+                    next_delta.cancel()
+                    break
+                streamed = True
+                yield next_delta.result()
+            while not deltas.empty():
+                streamed = True
+                yield deltas.get_nowait()
+            response, _ = generation.result()
+            if not streamed:
+                # Joined a generation started without streaming to this caller
+                yield response
+        finally:
+            # Only this caller's wait is cancelled; a shared generation goes on
+            generation.cancel()
+
+    async def _lookup_cached_answer(
+        self,
+        sanitized_prompt: str,
+        conversation_id: str,
+        user_id: str,
+        guild_id: str | None,
+    ) -> _CacheLookup:
+        """
+        Serve the question from the semantic cache (exact key, then similar query).
+
+        Returns:
+            The cached answer, or on a miss the cache key and semantic-tier
+            inputs for storing the generated answer
+        """
+        lookup = _CacheLookup()
+        if not (self._use_semantic_cache and self._semantic_cache):
+            return lookup
+
+        cache_key = self._semantic_cache.generate_key(
+            query=sanitized_prompt,
+            top_k=self.settings.rag.top_k,
+            min_similarity=self.settings.rag.min_similarity,
+            retrieval_mode=self.settings.rag.effective_retrieval_mode,
+            rerank_profile=self.settings.rag.effective_rerank_profile,
+            chunking_mode=self.settings.rag.effective_chunking_mode,
+        )
+        lookup.cache_key = cache_key
+        async with self._rag_scope() as query_service:
+            if query_service is not None:
+                # Drop cached answers citing documents changed since the last request
+                await query_service.sync_semantic_cache()
+            cached = await self._semantic_cache.get(
+                cache_key,
+                # A stale answer is served now and regenerated in the background
+                refresh=lambda: self._generation_flight.run(
+                    cache_key,
+                    lambda: self._refresh_cached_answer(
+                        sanitized_prompt, conversation_id, user_id, guild_id, cache_key
+                    ),
+                ),
             )
-            cached = await self._semantic_cache.get(cache_key)
             if cached:
                 log.info(
                     "rag_cache_hit_fast_path",
                     conversation_id=conversation_id,
                     cache_key=cache_key[:16] + "...",  # Truncated for logging
+                    cache_stale=cached.is_expired(),
                     cached_response_length=len(cached.llm_response),
                 )
                 # Reconstruct RAGContext from cached data
-                cached_rag_context = RAGContext(**cached.rag_context_dict)
-                return cached.llm_response, cached_rag_context
+                lookup.answer = (cached.llm_response, RAGContext(**cached.rag_context_dict))
+                return lookup
 
-        # SLOW PATH: Load conversation history (only on cache miss)
-        history = await self.repository.get_conversation_history(
+            # Semantic tier: the same question asked in other words
+            lookup.query_embedding, lookup.cache_scope = await self._semantic_lookup_inputs(
+                sanitized_prompt, query_service
+            )
+        if lookup.query_embedding is not None and lookup.cache_scope is not None:
+            similar = await self._semantic_cache.get_similar(
+                lookup.query_embedding, lookup.cache_scope
+            )
+            if similar:
+                log.info(
+                    "rag_cache_hit_fast_path",
+                    conversation_id=conversation_id,
+                    cache_tier="semantic",
+                    cached_response_length=len(similar.llm_response),
+                )
+                lookup.answer = (similar.llm_response, RAGContext(**similar.rag_context_dict))
+        return lookup
+
+    async def _run_generation(
+        self,
+        lookup: _CacheLookup,
+        sanitized_prompt: str,
+        conversation_id: str,
+        user_id: str,
+        guild_id: str | None,
+        *,
+        e2e_start: float,
+        on_delta: Callable[[str], None] | None = None,
+    ) -> tuple[str, RAGContext | None]:
+        """Run the cache-miss path, coalesced with identical questions when cached."""
+
+        def generate() -> Awaitable[tuple[str, RAGContext | None]]:
+            return self._generate_uncached(
+                sanitized_prompt,
+                conversation_id,
+                user_id,
+                guild_id,
+                cache_key=lookup.cache_key,
+                query_embedding=lookup.query_embedding,
+                cache_scope=lookup.cache_scope,
+                e2e_start=e2e_start,
+                on_delta=on_delta,
+            )
+
+        if lookup.cache_key is None:
+            return await generate()
+        return await self._generation_flight.run(lookup.cache_key, generate)
+
+    @asynccontextmanager
+    async def _rag_scope(self) -> AsyncIterator[QueryService | None]:
+        """
+        QueryService for one request (None when RAG is off).
+
+        With a runtime, a pooled session is checked out for the scope and
+        returned on exit, so concurrent requests never share a session;
+        otherwise the service bound to `db_session` is reused.
+        """
+        if not self.enable_rag or self._rag_runtime is None:
+            yield self._query_service
+            return
+        async with self._rag_runtime.session() as session:
+            yield self._rag_runtime.query_service(session)
+
+    async def _semantic_lookup_inputs(
+        self, sanitized_prompt: str, query_service: QueryService | None
+    ) -> tuple[list[float] | None, str | None]:
+        """
+        Query embedding and scope for the semantic cache tier.
+
+        Returns:
+            (embedding, scope), or (None, None) when the tier is disabled or
+            the query could not be embedded
+        """
+        if not (self._semantic_cache and self._semantic_cache.semantic_enabled and query_service):
+            return None, None
+        try:
+            query_embedding = await query_service.embed_query(sanitized_prompt)
+        except Exception as e:
+            log.warning(
+                LogEvents.API_ERRO_GERAR_RESPOSTA,
+                error="Query embedding failed, skipping semantic cache lookup",
+                details=str(e),
+            )
+            return None, None
+        cache_scope = self._semantic_cache.scope_key(
+            query=sanitized_prompt,
+            top_k=self.settings.rag.top_k,
+            min_similarity=self.settings.rag.min_similarity,
+            retrieval_mode=self.settings.rag.effective_retrieval_mode,
+            rerank_profile=self.settings.rag.effective_rerank_profile,
+            chunking_mode=self.settings.rag.effective_chunking_mode,
+        )
+        return query_embedding, cache_scope
+
+    async def _refresh_cached_answer(
+        self,
+        sanitized_prompt: str,
+        conversation_id: str,
+        user_id: str,
+        guild_id: str | None,
+        cache_key: str,
+    ) -> tuple[str, RAGContext | None]:
+        """Regenerate a stale cached answer from a fresh retrieval (background task)."""
+        async with self._rag_scope() as query_service:
+            query_embedding, cache_scope = await self._semantic_lookup_inputs(
+                sanitized_prompt, query_service
+            )
+        return await self._generate_uncached(
+            sanitized_prompt,
             conversation_id,
-            max_runs=self.settings.history_runs,
+            user_id,
+            guild_id,
+            cache_key=cache_key,
+            query_embedding=query_embedding,
+            cache_scope=cache_scope,
+            e2e_start=time.perf_counter(),
+            revalidate=True,
         )
 
+    async def _generate_uncached(
+        self,
+        sanitized_prompt: str,
+        conversation_id: str,
+        user_id: str,
+        guild_id: str | None,
+        *,
+        cache_key: str | None,
+        query_embedding: list[float] | None,
+        cache_scope: str | None,
+        e2e_start: float,
+        revalidate: bool = False,
+        on_delta: Callable[[str], None] | None = None,
+    ) -> tuple[str, RAGContext | None]:
+        """
+        Load history, retrieve, generate and cache the answer (cache-miss path).
+
+        Args:
+            sanitized_prompt: Sanitized user question
+            conversation_id: Conversation ID for context
+            user_id: Discord user ID
+            guild_id: Discord guild ID (optional)
+            cache_key: Semantic cache key (None when the cache is disabled)
+            query_embedding: Query embedding computed for the semantic tier
+            cache_scope: Semantic cache scope for the query embedding
+            e2e_start: perf_counter() at request start
+            revalidate: Retrieve fresh instead of reusing cached RAG context
+                (refresh of a stale answer)
+            on_delta: Receives the answer piece by piece while it is generated
+
+        Returns:
+            Tuple of (response_text, rag_context)
+        """
+        # SLOW PATH: history (SQLite) and retrieval (embeddings + vector store)
+        # are independent waits; run them together, only the LLM call needs both
+        stages_start = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as stages:
+                history_stage = stages.create_task(
+                    self._load_history(conversation_id, sanitized_prompt)
+                )
+                retrieval_stage = stages.create_task(
+                    self._retrieval_stage(
+                        sanitized_prompt,
+                        query_embedding=query_embedding,
+                        revalidate=revalidate,
+                        tag_sources=bool(self._use_semantic_cache and cache_key),
+                    )
+                )
+        except ExceptionGroup as group:
+            # Surface the stage's own error (retrieval errors never get here),
+            # keeping any other stage's failure visible in the traceback
+            first, *others = group.exceptions
+            for other in others:
+                first.add_note(f"Concurrent context stage also failed: {other!r}")
+            raise first from None
+        history, history_load_ms = history_stage.result()
+        rag_context, rag_query_ms, cache_sources, retrieval_ms = retrieval_stage.result()
+        context_stages_ms = (time.perf_counter() - stages_start) * 1000
+
         log.info(
             "generating_response_with_rag",
             conversation_id=conversation_id,
@@ -294,44 +624,33 @@ class AgentWrapper:
             rag_enabled=self.enable_rag,
             semantic_cache_enabled=self._use_semantic_cache,
             cache_miss=bool(cache_key),
+            history_load_ms=round(history_load_ms, 2),
+            retrieval_ms=round(retrieval_ms, 2),
+            context_stages_ms=round(context_stages_ms, 2),
         )
 
-        # Perform RAG search if enabled (cache miss or no cache)
-        rag_context: RAGContext | None = None
-        rag_query_ms = 0.0
-
-        if self.enable_rag and self._query_service:
-            try:
-                rag_context = await self._query_service.query(
-                    query_text=sanitized_prompt,
-                    top_k=self.settings.rag.top_k,
-                    min_similarity=self.settings.rag.min_similarity,
-                )
-                # Extract RAG query timing from metadata
-                rag_query_ms = float(rag_context.retrieval_meta.get("total_query_duration_ms", 0))
-
-                log.info(
-                    LogEvents.RAG_BUSCA_CONCLUIDA,
-                    chunks_count=len(rag_context.chunks_usados),
-                    confidence=rag_context.confianca.value,
-                    sources_count=len(rag_context.fontes),
-                )
-            except Exception as e:
-                log.warning(
-                    LogEvents.API_ERRO_GERAR_RESPOSTA,
-                    error="RAG search failed, falling back to normal generation",
-                    details=str(e),
-                )
-                rag_context = None
-
         try:
             # Run generation with retry logic
+            first_token_at: list[float] = []
+
+            def emit(delta: str) -> None:
+                if not first_token_at:
+                    first_token_at.append(time.perf_counter())
+                    track_time_to_first_token("llm", first_token_at[0] - e2e_start)
+                on_delta(delta)  # type: ignore[misc]
+
             response, llm_generation_ms = await self._generate_with_retry(
-                sanitized_prompt, history, rag_context=rag_context
+                sanitized_prompt,
+                history,
+                rag_context=rag_context,
+                on_delta=emit if on_delta is not None else None,
             )
 
             # Calculate total E2E latency
             total_e2e_ms = (time.perf_counter() - e2e_start) * 1000
+            time_to_first_token_ms = (
+                (first_token_at[0] - e2e_start) * 1000 if first_token_at else None
+            )
 
             log.info(
                 "response_completed_with_rag",
@@ -339,7 +658,13 @@ class AgentWrapper:
                 response_length=len(response),
                 rag_confidence=rag_context.confianca.value if rag_context else None,
                 rag_query_ms=round(rag_query_ms, 2),
+                history_load_ms=round(history_load_ms, 2),
+                retrieval_ms=round(retrieval_ms, 2),
+                context_stages_ms=round(context_stages_ms, 2),
                 llm_generation_ms=round(llm_generation_ms, 2),
+                time_to_first_token_ms=(
+                    round(time_to_first_token_ms, 2) if time_to_first_token_ms is not None else None
+                ),
                 total_e2e_ms=round(total_e2e_ms, 2),
             )
 
@@ -349,6 +674,9 @@ class AgentWrapper:
                     cache_key,
                     rag_context=rag_context,
                     llm_response=response,
+                    query_embedding=query_embedding,
+                    scope=cache_scope,
+                    sources=cache_sources,
                 )
                 log.debug(
                     "rag_cache_set",
@@ -368,19 +696,133 @@ class AgentWrapper:
             )
             raise
 
+    async def _load_history(
+        self, conversation_id: str, sanitized_prompt: str
+    ) -> tuple[list[dict[str, Any]], float]:
+        """
+        Load the conversation history (pipeline stage).
+
+        Returns:
+            (history, history_load_ms); the current question is left out even
+            when the caller has already persisted it
+        """
+        started = time.perf_counter()
+        with track_pipeline_stage("history_load"):
+            history = await self.repository.get_conversation_history(
+                conversation_id,
+                max_runs=self.settings.history_runs,
+            )
+        # The question is saved concurrently with this load (ConversationService);
+        # it goes into the prompt as the current turn, never as history
+        if (
+            history
+            and history[-1]["role"] == "user"
+            and sanitize_user_input(history[-1]["content"]) == sanitized_prompt
+        ):
+            history = history[:-1]
+        return history, (time.perf_counter() - started) * 1000
+
+    async def _retrieval_stage(
+        self,
+        sanitized_prompt: str,
+        *,
+        query_embedding: list[float] | None,
+        revalidate: bool,
+        tag_sources: bool,
+    ) -> tuple[RAGContext | None, float, dict[int, str | None] | None, float]:
+        """
+        Run the RAG search when enabled (pipeline stage).
+
+        Returns:
+            _retrieve_context() results plus the stage's wall time in ms
+        """
+        if not self.enable_rag:
+            return None, 0.0, None, 0.0
+        started = time.perf_counter()
+        with track_pipeline_stage("retrieval"):
+            # The session goes back to the pool before the (slow) generation
+            async with self._rag_scope() as query_service:
+                if query_service is None:
+                    return None, 0.0, None, 0.0
+                rag_context, rag_query_ms, sources = await self._retrieve_context(
+                    query_service,
+                    sanitized_prompt,
+                    query_embedding=query_embedding,
+                    revalidate=revalidate,
+                    tag_sources=tag_sources,
+                )
+        return rag_context, rag_query_ms, sources, (time.perf_counter() - started) * 1000
+
+    async def _retrieve_context(
+        self,
+        query_service: QueryService,
+        sanitized_prompt: str,
+        *,
+        query_embedding: list[float] | None,
+        revalidate: bool,
+        tag_sources: bool,
+    ) -> tuple[RAGContext | None, float, dict[int, str | None] | None]:
+        """
+        Run the RAG search for a cache miss.
+
+        Returns:
+            (context, rag_query_ms, cited document versions); context is None
+            when the search failed and generation proceeds without RAG
+        """
+        try:
+            rag_context = await query_service.query(
+                query_text=sanitized_prompt,
+                top_k=self.settings.rag.top_k,
+                min_similarity=self.settings.rag.min_similarity,
+                query_embedding=query_embedding,
+                revalidate=revalidate,
+            )
+            # Extract RAG query timing from metadata
+            rag_query_ms = float(rag_context.retrieval_meta.get("total_query_duration_ms", 0))
+
+            log.info(
+                LogEvents.RAG_BUSCA_CONCLUIDA,
+                chunks_count=len(rag_context.chunks_usados),
+                confidence=rag_context.confianca.value,
+                sources_count=len(rag_context.fontes),
+            )
+        except Exception as e:
+            log.warning(
+                LogEvents.API_ERRO_GERAR_RESPOSTA,
+                error="RAG search failed, falling back to normal generation",
+                details=str(e),
+            )
+            return None, 0.0, None
+
+        # Tag the answer with the document versions it is built from
+        sources = await query_service.source_versions(rag_context) if tag_sources else None
+        return rag_context, rag_query_ms, sources
+
+    @property
+    def generation_flight_stats(self) -> SingleFlightStats:
+        """Counters of the coalesced cache-miss generation path."""
+        return self._generation_flight.stats
+
     async def _generate_with_retry(
         self,
         prompt: str,
         history: list[dict[str, Any]],
         rag_context: RAGContext | None = None,
+        on_delta: Callable[[str], None] | None = None,
     ) -> tuple[str, float]:
         """
         Generate response with retry logic.
 
+        With `on_delta` the response is streamed. Retries and provider
+        fallback then only happen before the first piece is emitted: text
+        already shown cannot be taken back, so a failure after that point
+        ends the generation.
+
         Args:
             prompt: User's prompt
             history: Conversation history
             rag_context: Optional RAG context for augmentation
+            on_delta: Receives the response piece by piece (enables streaming)
 
         Returns:
             Tuple of (generated_response, llm_generation_duration_ms)
@@ -389,6 +831,19 @@ class AgentWrapper:
             RetryExhaustedError: If all retries fail
         """
         generation_start = time.perf_counter()
+        streamed = False
+
+        def emit(delta: str) -> None:
+            nonlocal streamed
+            if not streamed:
+                streamed = True
+                log.info(
+                    "llm_first_token",
+                    llm_first_token_ms=round((time.perf_counter() - generation_start) * 1000, 2),
+                )
+            on_delta(delta)  # type: ignore[misc]
+
+        stream_to = emit if on_delta is not None else None
 
         # Get current provider from provider manager
         _ = self._provider_manager.get_current_provider()
@@ -420,28 +875,32 @@ class AgentWrapper:
             generation_start_inner = time.perf_counter()
             with track_provider_request(provider, model_id):
                 try:
-                    # Run the agent (async API) - arun returns RunOutput directly
-                    result = self.agent.arun(full_prompt)
-                    response = await result  # type: ignore[misc]
+                    content = await self._run_agent(full_prompt, stream_to)
 
-                    if not response or not response.content:
+                    if not content:
                         raise APIError("Empty response from AI provider")
 
                     # Track token usage (rough estimation)
                     estimated_prompt_tokens = len(full_prompt) // 4
-                    estimated_completion_tokens = len(response.content) // 4
+                    estimated_completion_tokens = len(content) // 4
                     track_tokens(provider, model_id, estimated_prompt_tokens, estimated_completion_tokens)
 
                     # Record success in provider manager
                     latency_ms = (time.perf_counter() - generation_start_inner) * 1000
                     self._provider_manager.record_success(provider, latency_ms)
 
-                    return response.content
+                    return content
 
                 except Exception as e:
                     # Record failure in provider manager
                     self._provider_manager.record_failure(provider, e)
 
+                    if streamed:
+                        # Part of the answer is already visible: neither retry nor fall back
+                        raise BotSalinhaError(
+                            "Response stream interrupted", details={"provider": provider}
+                        ) from e
+
                     # Try fallback provider if available
                     fallback_config = self._provider_manager.get_healthy_provider()
                     if fallback_config and fallback_config.provider != provider:
@@ -459,15 +918,14 @@ class AgentWrapper:
                         # Retry with fallback provider
                         generation_start_fallback = time.perf_counter()
                         with track_provider_request(fallback_config.provider, fallback_config.model_id):
-                            result = self.agent.arun(full_prompt)
-                            response = await result  # type: ignore[misc]
+                            content = await self._run_agent(full_prompt, stream_to)
 
-                            if not response or not response.content:
+                            if not content:
                                 raise APIError("Empty response from fallback AI provider") from None
 
                             # Track token usage for fallback
                             estimated_prompt_tokens = len(full_prompt) // 4
-                            estimated_completion_tokens = len(response.content) // 4
+                            estimated_completion_tokens = len(content) // 4
                             track_tokens(
                                 fallback_config.provider,
                                 fallback_config.model_id,
@@ -479,7 +937,7 @@ class AgentWrapper:
                             latency_ms = (time.perf_counter() - generation_start_fallback) * 1000
                             self._provider_manager.record_success(fallback_config.provider, latency_ms)
 
-                            return response.content
+                            return content
 
                     # No fallback available or fallback also failed
                     raise
@@ -487,11 +945,12 @@ class AgentWrapper:
         # Use retry config created in __init__
         # Type ignore: async_retry type signature doesn't properly support async functions
         try:
-            response_content = await async_retry(
-                _do_generate_with_fallback,
-                self._retry_config,
-                operation_name="ai_generate_with_fallback",
-            )  # type: ignore[arg-type]
+            with track_pipeline_stage("llm_generation"):
+                response_content = await async_retry(
+                    _do_generate_with_fallback,
+                    self._retry_config,
+                    operation_name="ai_generate_with_fallback",
+                )  # type: ignore[arg-type]
         except Exception as e:
             # Track error
             track_error(type(e).__name__, "agent")
@@ -509,6 +968,35 @@ class AgentWrapper:
 
         return response_content, llm_generation_duration_ms
 
+    async def _run_agent(
+        self, full_prompt: str, on_delta: Callable[[str], None] | None = None
+    ) -> str:
+        """
+        Run the agent once and return the response text.
+
+        Args:
+            full_prompt: Prompt with history and RAG context
+            on_delta: Receives the response piece by piece (streams the run)
+
+        Returns:
+            Response text ("" when the provider returned nothing)
+        """
+        if on_delta is None:
+            # Run the agent (async API) - arun returns RunOutput directly
+            result = self.agent.arun(full_prompt)
+            response = await result  # type: ignore[misc]
+            return response.content if response and response.content else ""
+
+        parts: list[str] = []
+        async for event in self.agent.arun(full_prompt, stream=True):  # type: ignore[union-attr]
+            if getattr(event, "event", None) != _RUN_CONTENT_EVENT:
+                continue
+            delta = getattr(event, "content", None)
+            if isinstance(delta, str) and delta:
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
     def _build_prompt(
         self,
         user_prompt: str,
@@ -534,9 +1022,7 @@ class AgentWrapper:
 
         # Build RAG augmentation if available
         rag_augmentation = ""
-        if rag_context and self._query_service and self._query_service.should_augment_prompt(
-            rag_context
-        ):
+        if rag_context and self._should_augment_prompt(rag_context):
             rag_augmentation = self._build_rag_augmentation(rag_context)
 
         # Reduce budget if RAG context is large
@@ -570,6 +1056,14 @@ class AgentWrapper:
 
         return full_prompt
 
+    def _should_augment_prompt(self, rag_context: RAGContext) -> bool:
+        """Whether the retrieved context is confident enough to go into the prompt."""
+        if self._query_service is not None:
+            return self._query_service.should_augment_prompt(rag_context)
+        return self._confianca_calculator is not None and self._confianca_calculator.should_use_rag(
+            rag_context.confianca
+        )
+
     def _build_rag_augmentation(self, rag_context: RAGContext) -> str:
         """
         Build RAG augmentation text for prompt injection.
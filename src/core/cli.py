@@ -31,6 +31,9 @@ from ..config.settings import get_settings, settings
 from ..config.yaml_config import yaml_config
 from ..rag.services.embedding_service import EmbeddingService
 from ..rag.services.ingestion_service import IngestionError, IngestionService
+from ..rag.storage.embedding_cache_store import get_embedding_cache_store
+from ..rag.storage.embedding_index import compact_embedding_segments
+from ..rag.storage.embedding_segments import EmbeddingSegmentStore
 from ..storage.factory import create_repository
 from ..storage.sqlite_repository import SQLiteRepository
 from ..utils.errors import BotSalinhaError
@@ -497,6 +500,32 @@ def db_clear() -> None:
     asyncio.run(_clear())
 
 
+@db_app.command("compact-embeddings")
+def db_compact_embeddings(
+    path: str = typer.Option(
+        None,
+        "--path",
+        "-p",
+        help="Diretório dos segmentos (padrão: rag.embedding_segments.path)",
+    ),
+) -> None:
+    """Compactar os segmentos de embeddings em um único arquivo mapeável."""
+    segments_path = path or get_settings().rag.embedding_segments.path
+    segment_store = EmbeddingSegmentStore(segments_path)
+
+    async def _compact() -> None:
+        async with create_repository() as repo, repo.async_session_maker() as session:
+            with console.status("[bold yellow]Compactando segmentos de embeddings..."):
+                rows = await compact_embedding_segments(session, segment_store)
+        console.print(f"[green]✓ Segmentos compactados:[/] {rows} vetores em {segments_path}")
+
+    try:
+        asyncio.run(_compact())
+    except Exception as e:
+        console.print(f"[red]Erro ao compactar segmentos:[/] {e}")
+        raise typer.Exit(code=1) from None
+
+
 # --- Config Subcommands ---
 @app.command("config")
 def config_check() -> None:
@@ -619,7 +648,9 @@ async def run_ingest(file_path: str, document_name: str) -> None:
         async with create_repository() as repo, repo.async_session_maker() as session:
             # Initialize embedding service
             with console.status("[bold yellow]Inicializando serviços..."):
-                embedding_service = EmbeddingService(api_key=api_key)
+                embedding_service = EmbeddingService(
+                    api_key=api_key, cache=get_embedding_cache_store()
+                )
                 ingestion_service = IngestionService(
                     session=session,
                     embedding_service=embedding_service,
@@ -7,6 +7,7 @@ and integration with the AI agent.
 
 import asyncio
 import time
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -14,19 +15,26 @@ import discord
 import structlog
 from discord.ext import commands
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config.settings import settings
+from ..models.conversation import Conversation
 from ..models.rag_models import DocumentORM
-from ..rag.services.embedding_service import EmbeddingService
 from ..rag.services.ingestion_service import IngestionService
+from ..rag.services.rag_runtime import RAGRuntime
 from ..services.conversation_service import ConversationService
+from ..storage.history_cache import CachedHistoryMessageRepository
+from ..storage.repository import MessageRepository
 from ..storage.repository_factory import get_configured_repository
+from ..storage.sqlite_repository import SQLiteRepository
+from ..storage.write_behind import WriteBehindMessageRepository
 from ..utils.errors import RateLimitError as BotRateLimitError
 from ..utils.log_events import LogEvents
 from ..utils.logger import bind_request_context
 from ..utils.message_splitter import MessageSplitter
+from ..utils.metrics import track_time_to_first_token
 from .agent import AgentWrapper
+from .streaming_reply import StreamingReply
 
 log = structlog.get_logger()
 
@@ -79,13 +87,26 @@ class BotSalinhaBot(commands.Bot):
 
         # Initialize components - use configured repository (Convex or SQLite)
         self.repository = get_configured_repository()
-        self.agent = AgentWrapper(repository=self.repository)
+        # New messages are committed in batches off the request path (SQLite)
+        self.message_writer: WriteBehindMessageRepository | None = None
+        if settings.database.message_write_behind and isinstance(
+            self.repository, SQLiteRepository
+        ):
+            self.message_writer = WriteBehindMessageRepository.from_settings(self.repository)
+        message_repository: MessageRepository = self.message_writer or self.repository
+        # Recent turns of active conversations are served from memory
+        if settings.database.history_cache:
+            message_repository = CachedHistoryMessageRepository.from_settings(message_repository)
+        # One engine/session pool, semantic cache and embedding service for
+        # every !ask, !fontes and !reindexar of this process
+        self.rag_runtime = RAGRuntime()
+        self.agent = AgentWrapper(repository=message_repository, rag_runtime=self.rag_runtime)
         self.message_splitter = MessageSplitter(max_length=DISCORD_MAX_MESSAGE_LENGTH)
 
         # Initialize service layer
         self.conversation_service = ConversationService(
             conversation_repo=self.repository,
-            message_repo=self.repository,
+            message_repo=message_repository,
             agent=self.agent,
             message_splitter=self.message_splitter,
         )
@@ -94,35 +115,16 @@ class BotSalinhaBot(commands.Bot):
 
         log.info("discord_bot_initialized", prefix=settings.discord.command_prefix)
 
-    @staticmethod
-    def _resolve_async_database_url() -> str:
-        """Retorna URL de banco compatível com SQLAlchemy async."""
-        db_url = str(settings.database.url)
-        if db_url.startswith("sqlite:///"):
-            return db_url.replace("sqlite:///", "sqlite+aiosqlite:///")
-        return db_url
-
     @staticmethod
     def _resolve_rag_documents_dir() -> Path:
         """Retorna diretório padrão de documentos DOCX do RAG."""
         return Path(__file__).resolve().parents[2] / "docs" / "plans" / "RAG"
 
     @asynccontextmanager
-    async def _rag_session(self) -> AsyncSession:
-        """Cria sessão isolada para operações RAG administrativas."""
-        db_url = self._resolve_async_database_url()
-        connect_args = {"check_same_thread": False} if db_url.startswith("sqlite+") else {}
-        engine = create_async_engine(
-            db_url,
-            echo=settings.database.echo,
-            connect_args=connect_args,
-        )
-        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-        try:
-            async with session_factory() as session:
-                yield session
-        finally:
-            await engine.dispose()
+    async def _rag_session(self) -> AsyncIterator[AsyncSession]:
+        """Sessão do pool compartilhado para operações RAG administrativas."""
+        async with self.rag_runtime.session() as session:
+            yield session
 
     async def setup_hook(self) -> None:
         """Called when the bot is setting up."""
@@ -134,6 +136,18 @@ class BotSalinhaBot(commands.Bot):
         else:
             log.info("using_cloud_backend_no_init_needed")
 
+    async def close(self) -> None:
+        """Close the Discord connection, then flush and release the RAG runtime."""
+        try:
+            await super().close()
+        finally:
+            await self.rag_runtime.close()
+
+    async def close_message_writer(self) -> None:
+        """Commit queued messages and stop the write-behind queue (shutdown cleanup)."""
+        if self.message_writer is not None:
+            await self.message_writer.close()
+
     async def on_ready(self) -> None:
         """Called when the bot is ready."""
         self._ready_event.set()
@@ -250,6 +264,10 @@ class BotSalinhaBot(commands.Bot):
                 channel_id=str(ctx.channel.id),
             )
 
+            if settings.discord.stream_responses:
+                await self._stream_answer(ctx, question, conversation)
+                return
+
             # Process question through service
             response_chunks = await self.conversation_service.process_question(
                 question=question,
@@ -274,6 +292,39 @@ class BotSalinhaBot(commands.Bot):
                 "Por favor, tente novamente."
             )
 
+    async def _stream_answer(
+        self, ctx: commands.Context, question: str, conversation: Conversation
+    ) -> None:
+        """Answer an !ask progressively: post early, then edit while the LLM writes."""
+        started = time.perf_counter()
+        reply = StreamingReply(
+            ctx.send,
+            max_length=DISCORD_MAX_MESSAGE_LENGTH,
+            edit_interval_seconds=settings.discord.stream_edit_interval_seconds,
+        )
+        async for delta in self.conversation_service.stream_question(
+            question=question,
+            conversation=conversation,
+            user_id=str(ctx.author.id),
+            guild_id=str(ctx.guild.id) if ctx.guild else None,
+            discord_message_id=str(ctx.message.id),
+        ):
+            await reply.push(delta)
+        await reply.finish()
+
+        time_to_first_token_ms = None
+        if reply.first_visible_at is not None:
+            track_time_to_first_token("visible", reply.first_visible_at - started)
+            time_to_first_token_ms = round((reply.first_visible_at - started) * 1000, 2)
+        log.info(
+            "ask_command_streamed",
+            conversation_id=conversation.id,
+            time_to_first_token_ms=time_to_first_token_ms,
+            total_e2e_ms=round((time.perf_counter() - started) * 1000, 2),
+            messages_sent=reply.messages_sent,
+            message_edits=reply.edits,
+        )
+
     @commands.command(name="ping")
     async def ping_command(self, ctx: commands.Context) -> None:
         """Check bot latency."""
@@ -418,7 +469,7 @@ class BotSalinhaBot(commands.Bot):
             async with self._rag_session() as session:
                 ingestion_service = IngestionService(
                     session=session,
-                    embedding_service=EmbeddingService(),
+                    embedding_service=self.rag_runtime.embedding_service,
                 )
 
                 if mode_normalized == "completo":
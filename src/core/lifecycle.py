@@ -7,7 +7,7 @@ for clean bot shutdown.
 
 import asyncio
 import signal
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
 from contextlib import asynccontextmanager, suppress
 
 import structlog
@@ -219,6 +219,7 @@ async def managed_lifecycle(
 async def run_with_lifecycle(
     start_coro: Callable[[], Awaitable[None]],
     shutdown_coro: Callable[[], Awaitable[None]] | None = None,
+    cleanup_tasks: Sequence[Callable[[], Awaitable[None]]] = (),
 ) -> None:
     """
     Run an application with proper lifecycle management.
@@ -226,12 +227,16 @@ async def run_with_lifecycle(
     Args:
         start_coro: Async function to start the application
         shutdown_coro: Optional async function for shutdown
+        cleanup_tasks: Async functions run after shutdown_coro and before the
+            repository is closed (e.g. flushing queued writes)
     """
     shutdown_manager = GracefulShutdown()
 
     # Register cleanup tasks
     if shutdown_coro:
         shutdown_manager.register_cleanup_task(shutdown_coro)
+    for task in cleanup_tasks:
+        shutdown_manager.register_cleanup_task(task)
 
     # Add repository cleanup
     async def cleanup_repository():
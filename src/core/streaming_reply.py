@@ -0,0 +1,122 @@
+"""
+Progressive delivery of a streamed response as Discord messages.
+
+Posts the first message as soon as there is a sentence to show, then edits
+it at a bounded rate while text arrives, continuing in new messages at the
+2000-character limit.
+"""
+
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ..utils.message_splitter import StreamingSplitter
+
+# End of the first sentence: punctuation followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?]\s|\n")
+
+
+class StreamingReply:
+    """
+    A Discord reply built from text deltas.
+
+    Nothing is posted until the text holds a complete sentence (or
+    `first_flush_chars` characters), so the user never sees a lone word.
+    After that the open message is edited at most once per
+    `edit_interval_seconds`, which keeps the channel well under Discord's
+    edit rate limit. When the text outgrows `max_length`, the open message
+    is finalized at a paragraph break (StreamingSplitter) and the rest
+    continues in a new one. `finish` applies whatever is still pending.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[Any]],
+        max_length: int = 2000,
+        edit_interval_seconds: float = 1.0,
+        first_flush_chars: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the reply.
+
+        Args:
+            send: Posts a new message and returns it (e.g. ctx.send); the
+                returned message must support `await message.edit(content=...)`
+            max_length: Maximum characters per message
+            edit_interval_seconds: Minimum time between edits of the open message
+            first_flush_chars: Post the first message at this length even
+                without a sentence end
+            clock: Time source (monotonic seconds)
+        """
+        self._send = send
+        self._splitter = StreamingSplitter(max_length)
+        self._edit_interval = edit_interval_seconds
+        self._first_flush_chars = first_flush_chars
+        self._clock = clock
+        self._message: Any = None
+        self._shown = ""
+        self._last_update = 0.0
+        self.first_visible_at: float | None = None
+        self.messages_sent = 0
+        self.edits = 0
+
+    async def push(self, delta: str) -> None:
+        """
+        Add generated text, updating Discord when due.
+
+        Args:
+            delta: Next piece of the response
+        """
+        for chunk in self._splitter.feed(delta):
+            await self._finalize(chunk)
+
+        # The splitter may hold one character past the limit while deciding where to cut
+        pending = self._splitter.pending[: self._splitter.max_length]
+        if not pending.strip() or pending == self._shown:
+            return
+        if self._message is None:
+            if self.messages_sent == 0 and not self._first_ready(pending):
+                return
+            await self._post(pending)
+        elif self._clock() - self._last_update >= self._edit_interval:
+            await self._edit(pending)
+
+    async def finish(self) -> None:
+        """Apply all remaining text (the response is complete)."""
+        for chunk in self._splitter.flush():
+            await self._finalize(chunk)
+
+    def _first_ready(self, text: str) -> bool:
+        """Whether the opening text is worth showing on its own."""
+        return len(text) >= self._first_flush_chars or _SENTENCE_END.search(text) is not None
+
+    async def _finalize(self, chunk: str) -> None:
+        """Give the open message its final text (posting it if needed) and close it."""
+        if self._message is None:
+            if chunk.strip():
+                await self._post(chunk)
+        elif chunk != self._shown:
+            await self._edit(chunk)
+        self._message = None
+        self._shown = ""
+
+    async def _post(self, text: str) -> None:
+        """Post a new message with `text`; it becomes the open message."""
+        self._message = await self._send(text)
+        self._shown = text
+        self._last_update = self._clock()
+        self.messages_sent += 1
+        if self.first_visible_at is None:
+            self.first_visible_at = time.perf_counter()
+
+    async def _edit(self, text: str) -> None:
+        """Replace the text of the open message."""
+        await self._message.edit(content=text)
+        self._shown = text
+        self._last_update = self._clock()
+        self.edits += 1
+
+
+__all__ = ["StreamingReply"]
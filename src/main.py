@@ -54,6 +54,8 @@ async def run_discord_bot() -> None:
     await run_with_lifecycle(
         start_coro=lambda: bot.start(settings.discord.token),
         shutdown_coro=shutdown_bot,
+        # Queued messages are committed before the repository closes
+        cleanup_tasks=[bot.close_message_writer],
     )
 
     log.info("botsalinha_stopped")
@@ -10,7 +10,7 @@ from typing import TYPE_CHECKING
 from uuid import uuid4
 
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 if TYPE_CHECKING:
@@ -136,6 +136,13 @@ def create_message_orm(base: type) -> type:
                 f"role={self.role!r})>"
             )
 
+    # Newest-first history reads of one conversation (see get_conversation_history)
+    Index(
+        "ix_messages_conversation_id_created_at",
+        MessageORMImpl.conversation_id,
+        MessageORMImpl.created_at.desc(),
+    )
+
     return MessageORMImpl
 
 
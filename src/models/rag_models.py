@@ -6,9 +6,20 @@ including documents and chunks storage.
 """
 
 from datetime import UTC, datetime
+from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, LargeBinary, String, Text
+from sqlalchemy import (
+    CheckConstraint,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .conversation import Base
@@ -18,6 +29,36 @@ RAG_CHUNKS_FTS_TABLE_NAME = "rag_chunks_fts"
 
 SOURCE_TYPES = ("lei_cf", "emenda_constitucional", "jurisprudencia", "comentario", "questao_prova")
 
+# Hot metadata filter keys exposed as indexed VIRTUAL generated columns
+# (`meta_<key>`) so filtered searches use B-tree lookups instead of parsing
+# the JSON of every row. Boolean flags map to Integer (json_extract yields 0/1).
+PROMOTED_METADATA_KEYS: dict[str, type[String] | type[Integer]] = {
+    "documento": String,
+    "law_number": String,
+    "artigo": String,
+    "content_type": String,
+    "source_type": String,
+    "banca": String,
+    "valid_from": String,
+    "valid_to": String,
+    "is_exam_focus": Integer,
+    "is_revoked": Integer,
+    "marca_stf": Integer,
+    "marca_stj": Integer,
+    "marca_concurso": Integer,
+}
+
+
+def _promoted_metadata_column(key: str) -> Any:
+    """Deferred, indexed generated column mirroring `metadados.<key>`."""
+    return mapped_column(
+        PROMOTED_METADATA_KEYS[key](),
+        Computed(f"json_extract(metadados, '$.{key}')", persisted=False),
+        nullable=True,
+        index=True,
+        deferred=True,
+    )
+
 
 class DocumentORM(Base):
     """
@@ -66,6 +107,8 @@ class ChunkORM(Base):
     """
 
     __tablename__ = RAG_CHUNKS_TABLE_NAME
+    # Never fetch the generated meta_* columns back after INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": False}
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     documento_id: Mapped[int] = mapped_column(
@@ -92,6 +135,19 @@ class ChunkORM(Base):
     embedding: Mapped[bytes | None] = mapped_column(
         LargeBinary, nullable=True, default=None
     )  # Serialized embedding (float32 array)
+    meta_documento: Mapped[str | None] = _promoted_metadata_column("documento")
+    meta_law_number: Mapped[str | None] = _promoted_metadata_column("law_number")
+    meta_artigo: Mapped[str | None] = _promoted_metadata_column("artigo")
+    meta_content_type: Mapped[str | None] = _promoted_metadata_column("content_type")
+    meta_source_type: Mapped[str | None] = _promoted_metadata_column("source_type")
+    meta_banca: Mapped[str | None] = _promoted_metadata_column("banca")
+    meta_valid_from: Mapped[str | None] = _promoted_metadata_column("valid_from")
+    meta_valid_to: Mapped[str | None] = _promoted_metadata_column("valid_to")
+    meta_is_exam_focus: Mapped[int | None] = _promoted_metadata_column("is_exam_focus")
+    meta_is_revoked: Mapped[int | None] = _promoted_metadata_column("is_revoked")
+    meta_marca_stf: Mapped[int | None] = _promoted_metadata_column("marca_stf")
+    meta_marca_stj: Mapped[int | None] = _promoted_metadata_column("marca_stj")
+    meta_marca_concurso: Mapped[int | None] = _promoted_metadata_column("marca_concurso")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(UTC),
@@ -147,11 +203,54 @@ class ContentLinkORM(Base):
         )
 
 
+class SemanticCacheEntryORM(Base):
+    """Persisted SemanticCache entry, written behind the in-memory cache."""
+
+    __tablename__ = "rag_semantic_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    scope: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    rag_context: Mapped[str] = mapped_column(Text, nullable=False)
+    llm_response: Mapped[str] = mapped_column(Text, nullable=False)
+    cached_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    # float32 query embedding for the semantic lookup tier
+    embedding: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # JSON {documento_id: document content_hash} of the documents cited
+    sources: Mapped[str | None] = mapped_column(Text, nullable=True)
+    corpus_generation: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<SemanticCacheEntryORM(key={self.key!r}, expires_at={self.expires_at!r})>"
+
+
+class CorpusStateORM(Base):
+    """Single-row corpus generation, bumped by every write to `rag_chunks`."""
+
+    __tablename__ = "rag_corpus_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<CorpusStateORM(generation={self.generation!r})>"
+
+
 __all__ = [
     "DocumentORM",
     "ChunkORM",
     "ContentLinkORM",
+    "SemanticCacheEntryORM",
+    "CorpusStateORM",
     "RAG_CHUNKS_TABLE_NAME",
     "RAG_CHUNKS_FTS_TABLE_NAME",
     "SOURCE_TYPES",
+    "PROMOTED_METADATA_KEYS",
 ]
@@ -14,6 +14,7 @@ from .services import (
     IngestionService,
     LRUCache,
     QueryService,
+    RAGRuntime,
     SemanticCache,
 )
 from .storage import HybridVectorStore, VectorStore, cosine_similarity
@@ -36,6 +37,7 @@ __all__ = [
     "CachedEmbeddingService",
     "LRUCache",
     "QueryService",
+    "RAGRuntime",
     "SemanticCache",
     "CacheStats",
     "CodeIngestionService",
@@ -5,6 +5,7 @@ from .code_ingestion_service import CodeIngestionResult, CodeIngestionService, D
 from .embedding_service import EMBEDDING_DIM, EmbeddingService
 from .ingestion_service import IngestionError, IngestionService
 from .query_service import QueryService
+from .rag_runtime import RAGRuntime
 from .semantic_cache import CachedResponse, CacheStats, SemanticCache
 
 __all__ = [
@@ -15,6 +16,7 @@ __all__ = [
     "IngestionService",
     "IngestionError",
     "QueryService",
+    "RAGRuntime",
     "CodeIngestionService",
     "CodeIngestionResult",
     "DocumentResult",
@@ -3,33 +3,43 @@
 from __future__ import annotations
 
 import hashlib
+from array import array
 from collections import OrderedDict
 from typing import Any
 
 import structlog
 
+from ..storage.cache_backend import CacheBackend, get_shared_backend
+from ..storage.embedding_cache_store import EmbeddingCacheStore, get_embedding_cache_store
 from .embedding_service import EMBEDDING_DIM, EmbeddingService
 
 log = structlog.get_logger(__name__)
 
+# Embeddings of a given model never change; the shared tier only needs a bound
+SHARED_TTL_SECONDS = 30 * 24 * 3600
+
 
 class LRUCache:
     """
     Simple LRU (Least Recently Used) cache implementation.
 
-    Evicts least recently used items when capacity is reached.
+    Evicts least recently used items when capacity is reached. With a shared
+    backend, in-process misses fall through to it and are promoted on hit.
     """
 
-    def __init__(self, max_size: int = 1000) -> None:
+    def __init__(self, max_size: int = 1000, shared: CacheBackend | None = None) -> None:
         """
         Initialize LRU cache.
 
         Args:
             max_size: Maximum number of items to store
+            shared: Optional shared tier consulted after an in-process miss
         """
         self._cache: OrderedDict[str, list[float]] = OrderedDict()
         self._max_size = max_size
+        self._shared = shared
         self._hits = 0
+        self._memory_hits = 0
         self._misses = 0
 
     def get(self, key: str) -> list[float] | None:
@@ -42,14 +52,21 @@ class LRUCache:
         Returns:
             Cached value or None if not found
         """
-        if key in self._cache:
-            # Move to end (most recently used)
-            self._cache.move_to_end(key)
-            self._hits += 1
-            return self._cache[key]
-
-        self._misses += 1
-        return None
+        value = self._get_local(key)
+        if value is None and self._shared is not None:
+            value = self._promote(key, self._shared.get(key))
+        if value is None:
+            self._misses += 1
+        return value
+
+    async def get_async(self, key: str) -> list[float] | None:
+        """Same as get(), reading the shared tier without blocking the event loop."""
+        value = self._get_local(key)
+        if value is None and self._shared is not None:
+            value = self._promote(key, await self._shared.get_async(key))
+        if value is None:
+            self._misses += 1
+        return value
 
     def set(self, key: str, value: list[float]) -> None:
         """
@@ -59,6 +76,37 @@ class LRUCache:
             key: Cache key
             value: Value to cache
         """
+        self._store_local(key, value)
+        if self._shared is not None:
+            self._shared.set(key, array("d", value).tobytes(), SHARED_TTL_SECONDS)
+
+    async def set_async(self, key: str, value: list[float]) -> None:
+        """Same as set(), writing the shared tier without blocking the event loop."""
+        self._store_local(key, value)
+        if self._shared is not None:
+            await self._shared.set_async(key, array("d", value).tobytes(), SHARED_TTL_SECONDS)
+
+    def _get_local(self, key: str) -> list[float] | None:
+        """Look up the in-process tier, counting a hit."""
+        if key not in self._cache:
+            return None
+        # Move to end (most recently used)
+        self._cache.move_to_end(key)
+        self._hits += 1
+        self._memory_hits += 1
+        return self._cache[key]
+
+    def _promote(self, key: str, payload: bytes | None) -> list[float] | None:
+        """Decode a shared-tier value into the in-process tier, counting a hit."""
+        if payload is None:
+            return None
+        value = array("d", payload).tolist()
+        self._store_local(key, value)
+        self._hits += 1
+        return value
+
+    def _store_local(self, key: str, value: list[float]) -> None:
+        """Insert into the in-process tier only."""
         if key in self._cache:
             # Update existing and move to end
             self._cache.move_to_end(key)
@@ -70,9 +118,10 @@ class LRUCache:
             self._cache.popitem(last=False)
 
     def clear(self) -> None:
-        """Clear all cached items."""
+        """Clear all cached items (the shared tier is left to other processes)."""
         self._cache.clear()
         self._hits = 0
+        self._memory_hits = 0
         self._misses = 0
 
     @property
@@ -90,14 +139,18 @@ class LRUCache:
     def stats(self) -> dict[str, Any]:
         """Cache statistics."""
         total = self._hits + self._misses
-        return {
+        stats: dict[str, Any] = {
             "size": self.size,
             "max_size": self._max_size,
             "hits": self._hits,
+            "memory_hits": self._memory_hits,
             "misses": self._misses,
             "hit_rate": self.hit_rate,
             "total_requests": total,
         }
+        if self._shared is not None:
+            stats["shared"] = self._shared.stats.as_dict()
+        return stats
 
 
 class CachedEmbeddingService:
@@ -106,6 +159,8 @@ class CachedEmbeddingService:
 
     Caches embeddings to avoid redundant API calls for identical texts.
     Useful for load testing and production scenarios with repeated queries.
+    The LRU keeps hot vectors in memory; below it, the persistent embedding
+    cache of the wrapped EmbeddingService serves texts seen by any process.
     """
 
     def __init__(
@@ -113,6 +168,8 @@ class CachedEmbeddingService:
         api_key: str | None = None,
         model: str | None = None,
         cache_size: int = 1000,
+        shared_backend: CacheBackend | None = None,
+        embedding_cache: EmbeddingCacheStore | None = None,
     ) -> None:
         """
         Initialize cached embedding service.
@@ -121,9 +178,17 @@ class CachedEmbeddingService:
             api_key: OpenAI API key (defaults to settings)
             model: Embedding model name (defaults to settings.rag.embedding_model)
             cache_size: Maximum number of embeddings to cache
+            shared_backend: Shared tier (defaults to settings.rag.cache.shared_backend)
+            embedding_cache: Persistent store (defaults to settings.rag.embedding_cache)
         """
-        self._embedding_service = EmbeddingService(api_key=api_key, model=model)
-        self._cache = LRUCache(max_size=cache_size)
+        self._persistent = embedding_cache or get_embedding_cache_store()
+        self._embedding_service = EmbeddingService(
+            api_key=api_key, model=model, cache=self._persistent
+        )
+        shared = shared_backend or get_shared_backend(
+            f"embeddings:{self._embedding_service._model}"
+        )
+        self._cache = LRUCache(max_size=cache_size, shared=shared)
 
         log.debug(
             "rag_cached_embedding_service_initialized",
@@ -165,7 +230,7 @@ class CachedEmbeddingService:
         cache_key = self._generate_cache_key(text)
 
         # Check cache
-        cached = self._cache.get(cache_key)
+        cached = await self._cache.get_async(cache_key)
         if cached is not None:
             log.debug(
                 "rag_embedding_cache_hit",
@@ -188,7 +253,7 @@ class CachedEmbeddingService:
         embedding = await self._embedding_service.embed_text(text)
 
         # Store in cache
-        self._cache.set(cache_key, embedding)
+        await self._cache.set_async(cache_key, embedding)
 
         return embedding
 
@@ -211,7 +276,7 @@ class CachedEmbeddingService:
         # Check cache for all texts
         cache_keys = [self._generate_cache_key(t) for t in texts]
         cached_results: list[list[float] | None] = [
-            self._cache.get(key) for key in cache_keys
+            await self._cache.get_async(key) for key in cache_keys
         ]
 
         # Identify cache misses
@@ -230,7 +295,7 @@ class CachedEmbeddingService:
             # Update cache and results
             for idx, embedding in zip(miss_indices, miss_embeddings, strict=False):
                 cached_results[idx] = embedding
-                self._cache.set(cache_keys[idx], embedding)
+                await self._cache.set_async(cache_keys[idx], embedding)
 
         # Fill in empty texts
         results = []
@@ -253,7 +318,10 @@ class CachedEmbeddingService:
     @property
     def cache_stats(self) -> dict[str, Any]:
         """Get cache statistics."""
-        return self._cache.stats
+        stats = self._cache.stats
+        if self._persistent is not None:
+            stats["persistent"] = self._persistent.stats.as_dict()
+        return stats
 
     @property
     def cache_hit_rate(self) -> float:
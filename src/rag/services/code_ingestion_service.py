@@ -15,6 +15,7 @@ from ...utils.log_events import LogEvents
 from ..models import Chunk
 from ..parser.code_chunker import CodeChunkExtractor
 from ..parser.xml_parser import RepomixXMLParser
+from ..storage.corpus_state import bump_corpus_generation
 from ..utils.code_metadata_extractor import CodeMetadataExtractor
 from .embedding_service import EmbeddingService
 from .ingestion_service import IngestionError, IngestionService
@@ -226,6 +227,7 @@ class CodeIngestionService(IngestionService):
             self._update_document_stats(document_orm, chunks)
 
             # Commit transaction
+            await bump_corpus_generation(self._session)
             await self._session.commit()
             await self._session.refresh(document_orm)
 
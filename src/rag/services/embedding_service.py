@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import math
 import re
 
@@ -14,6 +15,7 @@ from ...config.yaml_config import yaml_config
 from ...utils.errors import APIError
 from ...utils.log_events import LogEvents
 from ...utils.retry import async_retry_decorator
+from ..storage.embedding_cache_store import EmbeddingCacheStore
 
 log = structlog.get_logger(__name__)
 
@@ -29,15 +31,23 @@ class EmbeddingService:
 
     Uses the text-embedding-3-small model by default, which provides
     a good balance of performance and cost for Brazilian legal text.
+    With a cache store, texts embedded before (by this or another process)
+    are answered from disk and only the misses reach the API.
     """
 
-    def __init__(self, api_key: str | None = None, model: str | None = None) -> None:
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        cache: EmbeddingCacheStore | None = None,
+    ) -> None:
         """
         Initialize the embedding service.
 
         Args:
             api_key: OpenAI API key (defaults to settings)
             model: Embedding model name (defaults to settings.rag.embedding_model)
+            cache: Persistent embedding cache (see get_embedding_cache_store)
         """
         settings = get_settings()
 
@@ -49,6 +59,7 @@ class EmbeddingService:
 
         self._model = model or settings.rag.embedding_model
         self._client = AsyncOpenAI(api_key=self._api_key)
+        self._cache = cache
 
         provider, generation_model = self.get_generation_model_strategy()
         log.debug(
@@ -79,6 +90,12 @@ class EmbeddingService:
             )
             return [0.0] * EMBEDDING_DIM
 
+        if self._cache is not None:
+            # The store is a SQLite file: query it off the event loop
+            (cached,) = await asyncio.to_thread(self._cache.get_many, self._model, [text])
+            if cached is not None:
+                return cached
+
         try:
             embedding = await self._embed_text_with_auto_split(text)
             token_count = self.count_tokens(text, provider="openai", model=self._model)
@@ -91,6 +108,8 @@ class EmbeddingService:
                 event_name="rag_embedding_created",
             )
 
+            if self._cache is not None:
+                await asyncio.to_thread(self._cache.put_many, self._model, [(text, embedding)])
             return embedding
 
         except Exception as e:
@@ -129,6 +148,34 @@ class EmbeddingService:
         if not valid_texts:
             return [[0.0] * EMBEDDING_DIM for _ in texts]
 
+        embeddings: list[list[float]] = [[0.0] * EMBEDDING_DIM for _ in texts]
+
+        # Serve previously embedded texts from the cache; only misses go to the API
+        cache_hits = 0
+        if self._cache is not None:
+            cached = await asyncio.to_thread(
+                self._cache.get_many, self._model, [t for _, t in valid_texts]
+            )
+            misses: list[tuple[int, str]] = []
+            for (idx, text), vector in zip(valid_texts, cached, strict=True):
+                if vector is None:
+                    misses.append((idx, text))
+                else:
+                    embeddings[idx] = vector
+            cache_hits = len(valid_texts) - len(misses)
+            valid_texts = misses
+            if not valid_texts:
+                log.info(
+                    "rag_embedding_batch",
+                    model=self._model,
+                    total_texts=len(texts),
+                    valid_texts=cache_hits,
+                    cache_hits=cache_hits,
+                    token_estimate=0,
+                    event_name="rag_embedding_batch",
+                )
+                return embeddings
+
         # Estimate total tokens
         token_counts_by_index = {
             i: self.count_tokens(text=t, provider="openai", model=self._model)
@@ -151,7 +198,6 @@ class EmbeddingService:
         max_tokens_per_request = 200000  # noqa: N806
 
         try:
-            embeddings: list[list[float]] = [[0.0] * EMBEDDING_DIM for _ in texts]
             if regular_texts:
                 regular_total_tokens = sum(token_counts_by_index[idx] for idx, _ in regular_texts)
                 indices, texts_to_embed = zip(*regular_texts, strict=True)
@@ -222,11 +268,19 @@ class EmbeddingService:
             for idx, text in oversized_texts:
                 embeddings[idx] = await self._embed_text_with_auto_split(text)
 
+            if self._cache is not None:
+                await asyncio.to_thread(
+                    self._cache.put_many,
+                    self._model,
+                    [(text, embeddings[idx]) for idx, text in valid_texts],
+                )
+
             log.info(
                 "rag_embedding_batch",
                 model=self._model,
                 total_texts=len(texts),
-                valid_texts=len(valid_texts),
+                valid_texts=len(valid_texts) + cache_hits,
+                cache_hits=cache_hits,
                 token_estimate=total_tokens,
                 event_name="rag_embedding_batch",
             )
@@ -18,6 +18,14 @@ from ...utils.log_events import LogEvents
 from ..models import Chunk, Document
 from ..parser.chunker import ChunkExtractor
 from ..parser.docx_parser import DOCXParser
+from ..storage.corpus_state import bump_corpus_generation
+from ..storage.embedding_index import (
+    as_unit_vector,
+    get_embedding_index,
+    read_corpus_fingerprint,
+)
+from ..storage.embedding_segments import get_embedding_segment_store
+from ..storage.lexical_index import get_lexical_index
 from ..storage.vector_store import serialize_embedding
 from ..utils.metadata_extractor import MetadataExtractor
 from .embedding_service import EMBEDDING_DIM, EmbeddingService
@@ -55,6 +63,13 @@ class IngestionService:
         self._embedding_service = embedding_service
         self._metadata_extractor = MetadataExtractor()
         self._chunker = ChunkExtractor()
+        # Chunk changes awaiting commit before being published to the resident index
+        self._pending_index_removals: list[str] = []
+        self._pending_index_upserts: list[tuple[str, bytes | None]] = []
+        # On-disk embedding segments (None when disabled) and the corpus
+        # generation observed before the current transaction started writing
+        self._segment_store = get_embedding_segment_store()
+        self._segment_base_fingerprint: int | None = None
 
         log.debug(
             "rag_ingestion_service_initialized",
@@ -91,6 +106,9 @@ class IngestionService:
         )
 
         try:
+            if self._segment_store is not None:
+                self._segment_base_fingerprint = await read_corpus_fingerprint(self._session)
+
             # Step 1: Resolve document by real file content hash
             document_content_hash = self._compute_document_content_hash(file_path)
             document_orm, is_unchanged = await self._resolve_document_for_ingestion(
@@ -101,7 +119,11 @@ class IngestionService:
 
             if is_unchanged:
                 backfilled_chunks = await self._backfill_chunk_hashes(document_orm.id)
+                if self._pending_index_removals:
+                    # A superseded document at the same path was deleted
+                    await bump_corpus_generation(self._session)
                 await self._session.commit()
+                await self._publish_index_changes()
                 await self._session.refresh(document_orm)
                 log.info(
                     "rag_ingestion_progress",
@@ -196,7 +218,9 @@ class IngestionService:
             self._update_document_stats(document_orm, chunks)
 
             # Commit transaction
+            await bump_corpus_generation(self._session)
             await self._session.commit()
+            await self._publish_index_changes()
             await self._session.refresh(document_orm)
 
             log.info(
@@ -226,11 +250,13 @@ class IngestionService:
         except IngestionError:
             # Re-raise IngestionError as-is
             await self._session.rollback()
+            self._discard_index_changes()
             raise
 
         except Exception as e:
             # Wrap other exceptions
             await self._session.rollback()
+            self._discard_index_changes()
             msg = f"Failed to ingest document {document_name}: {e}"
             log.error(
                 "rag_ingestion_error",
@@ -260,6 +286,7 @@ class IngestionService:
 
         if document_by_hash is not None:
             if document_by_path is not None and document_by_path.id != document_by_hash.id:
+                self._pending_index_removals.extend(chunk.id for chunk in document_by_path.chunks)
                 await self._session.delete(document_by_path)
                 await self._session.flush()
             document_by_hash.nome = document_name
@@ -407,6 +434,12 @@ class IngestionService:
             self._session.add(link)
 
         await self._session.flush()
+
+        self._pending_index_removals.extend(existing_chunk.id for existing_chunk in existing_chunks)
+        self._pending_index_upserts.extend(
+            (chunk.chunk_id, embedding_blob)
+            for chunk, embedding_blob in zip(chunks, embedding_blobs, strict=True)
+        )
         return {
             "deleted_chunks": len(existing_chunks),
             "embedded_chunks": len(pending_embed_texts),
@@ -414,6 +447,45 @@ class IngestionService:
             "backfilled_hashes": backfilled_hashes,
         }
 
+    async def _publish_index_changes(self) -> None:
+        """Apply committed chunk changes to the resident indexes and their files."""
+        removals = self._pending_index_removals
+        upserts = self._pending_index_upserts
+        base_fingerprint = self._segment_base_fingerprint
+        self._discard_index_changes()
+        if not removals and not upserts:
+            return
+
+        await get_embedding_index(self._session).apply_changes(
+            self._session,
+            removed_ids=removals,
+            upserts=upserts,
+        )
+
+        if self._segment_store is not None and base_fingerprint is not None:
+            self._segment_store.append(
+                upserts=[
+                    (chunk_id, as_unit_vector(blob))
+                    for chunk_id, blob in upserts
+                    if blob is not None
+                ],
+                removed_ids=removals + [chunk_id for chunk_id, blob in upserts if blob is None],
+                previous_fingerprint=base_fingerprint,
+                fingerprint=await read_corpus_fingerprint(self._session),
+            )
+
+        # Tokenize the new chunks now so query processes load the persisted
+        # BM25 arrays instead of tokenizing on their first search
+        lexical_index = get_lexical_index(self._session)
+        if lexical_index is not None:
+            await lexical_index.ensure_loaded(self._session)
+
+    def _discard_index_changes(self) -> None:
+        """Forget index changes from a transaction that did not commit."""
+        self._pending_index_removals = []
+        self._pending_index_upserts = []
+        self._segment_base_fingerprint = None
+
     def _build_content_links(self, chunks: list[Chunk]) -> list[ContentLinkORM]:
         """Build explicit content links from parent-child metadata relationships."""
         chunk_ids = {chunk.chunk_id for chunk in chunks}
@@ -642,7 +714,11 @@ class IngestionService:
             delete_docs_stmt = delete(DocumentORM)
             await self._session.execute(delete_docs_stmt)
 
+            await bump_corpus_generation(self._session)
             await self._session.commit()
+            get_embedding_index(self._session).clear()
+            if self._segment_store is not None:
+                self._segment_store.reset(await read_corpus_fingerprint(self._session))
 
             log.info(
                 "rag_reindex_progress",
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import ast
+import json
 import time
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
 from typing import Any
 
 import structlog
@@ -18,8 +21,12 @@ from ...utils.metrics import (
     track_rag_query,
     track_similarity,
 )
+from ...utils.single_flight import SingleFlight, SingleFlightStats
 from ..models import RAGContext
+from ..storage.corpus_state import read_document_versions
+from ..storage.embedding_cache_store import get_embedding_cache_store
 from ..storage.hybrid_vector_store import HybridVectorStore
+from ..storage.lexical_index import get_lexical_index
 from ..storage.vector_store import VectorStore
 from ..utils.confianca_calculator import ConfiancaCalculator
 from ..utils.normalizer import (
@@ -28,6 +35,7 @@ from ..utils.normalizer import (
     rewrite_legal_query,
 )
 from ..utils.retrieval_ranker import (
+    TermCountsLookup,
     detect_query_type,
     rerank_hybrid_lite,
     resolve_rerank_weights,
@@ -56,6 +64,8 @@ class QueryService:
         vector_store: VectorStore | HybridVectorStore | None = None,
         confianca_calculator: ConfiancaCalculator | None = None,
         semantic_cache: SemanticCache | None = None,
+        query_flight: SingleFlight[RAGContext] | None = None,
+        flight_scope: Callable[[], AbstractAsyncContextManager[QueryService]] | None = None,
     ) -> None:
         """
         Initialize the query service.
@@ -66,20 +76,28 @@ class QueryService:
             vector_store: Optional vector store (will create if None)
             confianca_calculator: Optional confidence calculator (will create if None)
             semantic_cache: Optional semantic cache (will create if None)
+            query_flight: Single-flight group to share with other instances
+                (will create if None)
+            flight_scope: Opens a QueryService on a session of its own for
+                the shared execution of query(), so it outlives a cancelled
+                caller's session (None: run on this instance's session)
         """
         self._session = session
         self._settings = get_settings()
 
         # Initialize components
-        self._embedding_service = embedding_service or EmbeddingService()
+        self._embedding_service = embedding_service or EmbeddingService(
+            cache=get_embedding_cache_store()
+        )
         self._vector_store = vector_store or HybridVectorStore(session)
         self._confianca_calculator = confianca_calculator or ConfiancaCalculator(
             alta_threshold=self._settings.rag.confidence_threshold,
         )
-        self._semantic_cache = semantic_cache or SemanticCache(
-            max_memory_mb=50,
-            default_ttl_seconds=86400,  # 24 hours
+        self._semantic_cache = semantic_cache or SemanticCache.from_settings(
+            engine=session.bind if isinstance(session, AsyncSession) else None
         )
+        self._query_flight = query_flight or SingleFlight("rag_query")
+        self._flight_scope = flight_scope
         self._context_strategy = self._resolve_context_strategy()
 
         log.debug(
@@ -103,6 +121,8 @@ class QueryService:
         retrieval_mode: str | None = None,
         enable_rerank: bool | None = None,
         debug: bool = False,
+        query_embedding: list[float] | None = None,
+        revalidate: bool = False,
     ) -> RAGContext:
         """
         Perform semantic search and build RAG context.
@@ -116,6 +136,8 @@ class QueryService:
             retrieval_mode: Retrieval mode override (hybrid_lite|semantic_only)
             enable_rerank: Enable/disable reranking override
             debug: Include richer retrieval metadata
+            query_embedding: Precomputed embed_query() result (skips embedding)
+            revalidate: Skip the semantic cache and overwrite its entry
 
         Returns:
             RAGContext with retrieved chunks, similarities, confidence, and sources
@@ -123,6 +145,63 @@ class QueryService:
         Raises:
             APIError: If query fails
         """
+        # Concurrent identical queries share one execution
+        flight_key = json.dumps(
+            [
+                query_text,
+                top_k,
+                min_similarity,
+                documento_id,
+                filters,
+                retrieval_mode,
+                enable_rerank,
+                debug,
+                revalidate,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        query_kwargs: dict[str, Any] = {
+            "top_k": top_k,
+            "min_similarity": min_similarity,
+            "documento_id": documento_id,
+            "filters": filters,
+            "retrieval_mode": retrieval_mode,
+            "enable_rerank": enable_rerank,
+            "debug": debug,
+            "query_embedding": query_embedding,
+            "revalidate": revalidate,
+        }
+
+        async def shared_query() -> RAGContext:
+            # Followers await this work too: it must not run on the session of
+            # the caller that started it, which closes if that caller is cancelled
+            if self._flight_scope is None:
+                return await self._query(query_text, **query_kwargs)
+            async with self._flight_scope() as service:
+                return await service._query(query_text, **query_kwargs)
+
+        return await self._query_flight.run(flight_key, shared_query)
+
+    async def _query(
+        self,
+        query_text: str,
+        top_k: int | None = None,
+        min_similarity: float | None = None,
+        documento_id: int | None = None,
+        filters: dict[str, Any] | None = None,
+        retrieval_mode: str | None = None,
+        enable_rerank: bool | None = None,
+        debug: bool = False,
+        query_embedding: list[float] | None = None,
+        revalidate: bool = False,
+    ) -> RAGContext:
+        """
+        Run query() without coalescing.
+
+        With `revalidate`, the semantic cache is not read: the context is
+        retrieved fresh and stored over the (stale) cached entry.
+        """
         try:
             # Use defaults from settings
             top_k = top_k or self._settings.rag.top_k
@@ -138,6 +217,9 @@ class QueryService:
                 else self._settings.rag.rerank_enabled
             )
 
+            # Drop cached answers citing documents changed since the last query
+            await self.sync_semantic_cache()
+
             # FAST PATH: Check semantic cache for existing response
             cache_key = self._semantic_cache.generate_key(
                 query=query_text,
@@ -148,12 +230,29 @@ class QueryService:
                 chunking_mode=None,
             )
 
-            cached_response = await self._semantic_cache.get(cache_key)
+            cached_response = None
+            if not revalidate:
+                cached_response = await self._semantic_cache.get(
+                    cache_key,
+                    refresh=lambda: self._query(
+                        query_text,
+                        top_k=top_k,
+                        min_similarity=min_similarity,
+                        documento_id=documento_id,
+                        filters=filters,
+                        retrieval_mode=retrieval_mode,
+                        enable_rerank=enable_rerank,
+                        debug=debug,
+                        query_embedding=query_embedding,
+                        revalidate=True,
+                    ),
+                )
             if cached_response is not None:
-                # Cache hit - return cached context
+                # Cache hit - return cached context (a stale one is refreshing)
                 log.info(
                     LogEvents.RAG_BUSCA_CONCLUIDA,
                     cache_hit=True,
+                    cache_stale=cached_response.is_expired(),
                     cache_age_seconds=time.time() - cached_response.cached_at,
                     confidence=cached_response.rag_context_dict.get("confianca", {}).get("value", 0.0),
                     total_query_duration_ms=0.0,
@@ -189,48 +288,80 @@ class QueryService:
 
             # Step 1: Generate embedding for query (with metrics tracking)
             embed_start = time.perf_counter()
-            with track_rag_query("embedding"):
-                query_embedding = await self._embedding_service.embed_text(normalized_query)
+            if query_embedding is None:
+                with track_rag_query("embedding"):
+                    query_embedding = await self._embedding_service.embed_text(normalized_query)
             embedding_duration_ms = (time.perf_counter() - embed_start) * 1000
 
-            # Step 2: Search vector store (first-stage retrieval)
+            # Step 1.1: Semantic cache tier - an equivalent query answered before
+            cache_scope = None
+            audited_hit = None
+            if self._semantic_cache.semantic_enabled:
+                cache_scope = self._semantic_cache.scope_key(
+                    query=query_text,
+                    top_k=top_k,
+                    min_similarity=min_similarity,
+                    retrieval_mode=retrieval_mode,
+                    rerank_profile="default" if rerank_enabled else None,
+                    chunking_mode=None,
+                )
+                similar = (
+                    None
+                    if revalidate
+                    else await self._semantic_cache.get_similar(query_embedding, cache_scope)
+                )
+                if similar is not None:
+                    if not self._semantic_cache.should_audit():
+                        log.info(
+                            LogEvents.RAG_BUSCA_CONCLUIDA,
+                            cache_hit=True,
+                            cache_tier="semantic",
+                            cache_age_seconds=time.time() - similar.cached_at,
+                            embedding_duration_ms=round(embedding_duration_ms, 2),
+                            event_name="rag_query_service_semantic_cache_hit",
+                        )
+                        return RAGContext(**similar.rag_context_dict)
+                    # Audited hit: retrieve fresh and compare below
+                    audited_hit = similar
+
+            # Step 2: Search vector store (first-stage retrieval), once, down to
+            # the fallback threshold; the primary threshold is applied here
+            fallback_min_similarity = min(
+                min_similarity,
+                max(
+                    self._settings.rag.min_similarity_floor,
+                    min_similarity - self._settings.rag.min_similarity_fallback_delta,
+                ),
+            )
             search_start = time.perf_counter()
             with track_rag_query("vector_search"):
-                chunks_with_scores = await self._vector_store.search(
+                search_candidates = await self._vector_store.search(
                     query_embedding=query_embedding,
                     query_text=normalized_query,
                     limit=candidate_pool_size,
-                    min_similarity=min_similarity,
+                    min_similarity=fallback_min_similarity,
                     documento_id=documento_id,
                     filters=merged_filters,
                 )
             vector_search_duration_ms = (time.perf_counter() - search_start) * 1000
 
+            chunks_with_scores = [
+                (chunk, score) for chunk, score in search_candidates if score >= min_similarity
+            ]
             fallback_applied = False
+            fallback_candidates_added = 0
             effective_min_similarity = min_similarity
 
-            # Step 2.1: Dynamic fallback if retrieval is too sparse
-            if len(chunks_with_scores) < top_k:
-                fallback_min_similarity = max(
-                    self._settings.rag.min_similarity_floor,
-                    min_similarity - self._settings.rag.min_similarity_fallback_delta,
+            # Step 2.1: Dynamic fallback if retrieval is too sparse (no extra search)
+            if len(chunks_with_scores) < top_k and fallback_min_similarity < min_similarity:
+                fallback_candidates_added = len(search_candidates) - len(chunks_with_scores)
+                chunks_with_scores = sorted(
+                    search_candidates,
+                    key=lambda item: item[1],
+                    reverse=True,
                 )
-
-                if fallback_min_similarity < min_similarity:
-                    fallback_candidates = await self._vector_store.search(
-                        query_embedding=query_embedding,
-                        query_text=normalized_query,
-                        limit=candidate_pool_size,
-                        min_similarity=fallback_min_similarity,
-                        documento_id=documento_id,
-                        filters=merged_filters,
-                    )
-                    chunks_with_scores = self._merge_candidates(
-                        primary=chunks_with_scores,
-                        secondary=fallback_candidates,
-                    )
-                    effective_min_similarity = fallback_min_similarity
-                    fallback_applied = True
+                effective_min_similarity = fallback_min_similarity
+                fallback_applied = True
 
             # Step 2.2: Rerank candidates
             score_map = {
@@ -256,6 +387,7 @@ class QueryService:
                     alpha=rerank_weights.alpha,
                     beta=rerank_weights.beta,
                     gamma=rerank_weights.gamma,
+                    term_counts_lookup=await self._term_counts_lookup(),
                 )
                 chunks_with_scores = [
                     (chunk, score_map.get(chunk.chunk_id, breakdown.semantic_score))
@@ -306,6 +438,11 @@ class QueryService:
                 ),
                 "rerank_applied": rerank_applied,
                 "fallback_applied": fallback_applied,
+                "fallback_candidates_added": fallback_candidates_added,
+                # Search time the former second fallback pass would have repeated
+                "fallback_search_saved_ms": (
+                    round(vector_search_duration_ms, 2) if fallback_applied else 0.0
+                ),
                 "effective_min_similarity": effective_min_similarity,
                 "query_type_detected": query_type,
                 "filters_applied": sorted(merged_filters.keys()) if merged_filters else [],
@@ -352,12 +489,23 @@ class QueryService:
                 track_similarity(similarity)
             track_legal_query_type(query_type)
 
+            if audited_hit is not None:
+                consistent = self._semantic_cache.record_audit(audited_hit, context)
+                log.info(
+                    "rag_semantic_cache_audit",
+                    consistent=consistent,
+                    event_name="rag_semantic_cache_audit",
+                )
+
             # SLOW PATH: Store response in semantic cache for future queries
             await self._semantic_cache.set(
                 query_key=cache_key,
                 rag_context=context,
                 llm_response="",  # Will be populated by agent after generation
                 ttl_seconds=86400,  # 24 hours
+                query_embedding=query_embedding,
+                scope=cache_scope,
+                sources=await self.source_versions(context),
             )
 
             log.info(
@@ -373,6 +521,7 @@ class QueryService:
                 ),
                 rerank_applied=rerank_applied,
                 fallback_applied=fallback_applied,
+                fallback_candidates_added=fallback_candidates_added,
                 effective_min_similarity=effective_min_similarity,
                 query_type=query_type,
                 context_provider=self._context_strategy["provider"],
@@ -670,6 +819,54 @@ class QueryService:
             merged.setdefault(key, value)
         return merged
 
+    async def sync_semantic_cache(self) -> int:
+        """
+        Bring the semantic cache up to date with the corpus (see SemanticCache.sync_corpus).
+
+        Returns:
+            Number of cached entries invalidated
+        """
+        if not isinstance(self._session, AsyncSession):
+            return 0
+        return await self._semantic_cache.sync_corpus(self._session)
+
+    async def source_versions(self, context: RAGContext) -> dict[int, str | None]:
+        """
+        Content hash of each document cited by `context`, for tagging cache entries.
+
+        Hashes that cannot be read are reported as None, so the entry is
+        invalidated by the next corpus change instead of never.
+        """
+        documento_ids = {chunk.documento_id for chunk in context.chunks_usados}
+        if not documento_ids:
+            return {}
+        if isinstance(self._session, AsyncSession):
+            try:
+                versions = await read_document_versions(self._session, documento_ids)
+                return {doc_id: versions.get(doc_id) for doc_id in documento_ids}
+            except Exception as e:
+                log.warning(
+                    "rag_source_versions_failed",
+                    error=str(e),
+                    event_name="rag_source_versions_failed",
+                )
+        return dict.fromkeys(documento_ids)
+
+    async def _term_counts_lookup(self) -> TermCountsLookup | None:
+        """
+        Term counts computed at ingestion, so rerank skips per-query tokenization.
+
+        Returns None when the lexical index is disabled or no database session
+        is bound; the reranker then tokenizes (and caches) chunk text itself.
+        """
+        if not isinstance(self._session, AsyncSession):
+            return None
+        lexical_index = get_lexical_index(self._session)
+        if lexical_index is None:
+            return None
+        await lexical_index.ensure_loaded(self._session)
+        return lexical_index.term_counts
+
     def _resolve_context_strategy(self) -> dict[str, str | int | float]:
         """
         Resolve context assembly strategy based on provider/model.
@@ -793,22 +990,22 @@ class QueryService:
             "skipped_marginal": skipped_marginal,
         }
 
-    @staticmethod
-    def _merge_candidates(
-        primary: list[tuple[Any, float]],
-        secondary: list[tuple[Any, float]],
-    ) -> list[tuple[Any, float]]:
-        """
-        Merge candidates by chunk_id preserving highest semantic score.
-        """
-        merged: dict[str, tuple[Any, float]] = {}
-        for chunk, score in [*primary, *secondary]:
-            existing = merged.get(chunk.chunk_id)
-            if existing is None or score > existing[1]:
-                merged[chunk.chunk_id] = (chunk, score)
-        merged_list = list(merged.values())
-        merged_list.sort(key=lambda item: item[1], reverse=True)
-        return merged_list
+    async def embed_query(self, query_text: str) -> list[float]:
+        """
+        Embed a query exactly as query() does (legal rewrite, then normalization).
+
+        Lets callers run a semantic cache lookup before retrieval and pass the
+        embedding back through query(query_embedding=...).
+
+        Args:
+            query_text: User query text
+
+        Returns:
+            Query embedding
+        """
+        rewritten_query, _ = rewrite_legal_query(query_text)
+        with track_rag_query("embedding"):
+            return await self._embedding_service.embed_text(normalize_query_text(rewritten_query))
 
     def get_cache_stats(self) -> dict[str, Any]:
         """
@@ -822,11 +1019,40 @@ class QueryService:
             "cache_hits": stats.hits,
             "cache_misses": stats.misses,
             "cache_hit_rate": stats.hit_rate,
+            "cache_exact_hit_rate": stats.exact_hit_rate,
+            "cache_semantic_hit_rate": stats.semantic_hit_rate,
+            "cache_semantic_hits": stats.semantic_hits,
+            "cache_semantic_lookups": stats.semantic_lookups,
+            "cache_semantic_threshold": stats.semantic_threshold,
+            "cache_semantic_audits": stats.semantic_audits,
+            "cache_semantic_false_hits": stats.semantic_false_hits,
+            "cache_semantic_false_hit_rate": stats.false_hit_rate,
             "cache_evictions": stats.evictions,
             "cache_memory_mb": stats.current_memory_mb,
             "cache_entry_count": stats.entry_count,
+            "cache_lock_acquisitions": stats.lock_acquisitions,
+            "cache_lock_hold_ms_avg": stats.avg_lock_hold_ms,
+            "cache_lock_hold_ms_max": stats.lock_hold_ms_max,
+            "cache_shared_tier": stats.shared_tier,
+            "cache_shared_hits": stats.shared_hits,
+            "cache_shared_errors": stats.shared_errors,
+            "cache_shared_get_ms_avg": stats.shared_avg_get_ms,
+            "cache_stale_served": stats.stale_served,
+            "cache_refreshes": stats.refreshes,
+            "cache_refresh_failures": stats.refresh_failures,
+            "cache_admission_admits": stats.admission_admits,
+            "cache_admission_rejects": stats.admission_rejects,
+            "cache_corpus_generation": stats.corpus_generation,
+            "cache_corpus_invalidations": stats.corpus_invalidations,
+            "query_single_flight_calls": self._query_flight.stats.calls,
+            "query_single_flight_coalesced": self._query_flight.stats.coalesced,
         }
 
+    @property
+    def query_flight_stats(self) -> SingleFlightStats:
+        """Counters of query() coalescing."""
+        return self._query_flight.stats
+
     async def clear_cache(self) -> None:
         """Clear all entries from the semantic cache."""
         await self._semantic_cache.clear()
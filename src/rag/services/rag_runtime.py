@@ -0,0 +1,125 @@
+"""Process-wide RAG resources for long-running frontends (Discord bot)."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import structlog
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from ...config.settings import get_settings
+from ...utils.single_flight import SingleFlight
+from ..models import RAGContext
+from ..storage.embedding_cache_store import get_embedding_cache_store
+from .embedding_service import EmbeddingService
+from .query_service import QueryService
+from .semantic_cache import SemanticCache
+
+log = structlog.get_logger(__name__)
+
+
+def resolve_async_database_url(database_url: str) -> str:
+    """Return a URL usable by SQLAlchemy async (sqlite:/// -> sqlite+aiosqlite:///)."""
+    if database_url.startswith("sqlite:///"):
+        return database_url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    return database_url
+
+
+class RAGRuntime:
+    """
+    One engine, session pool, semantic cache and embedding service per process.
+
+    Requests open a short-lived session with `session()` (checked out from
+    the engine's pool) and build a `QueryService` on it with
+    `query_service()`. Those services are cheap and disposable; everything
+    worth keeping across requests (cache entries, embedding client, the
+    single-flight group coalescing identical queries) lives here. A query
+    shared through the flight group runs on a session of its own, so
+    cancelling the request that started it leaves the others unaffected.
+    """
+
+    def __init__(self, database_url: str | None = None) -> None:
+        """
+        Initialize the runtime; connections are opened on first use.
+
+        Args:
+            database_url: Database URL (defaults to settings.database.url)
+        """
+        settings = get_settings()
+        url = resolve_async_database_url(database_url or settings.database.url)
+        engine_kwargs: dict[str, object] = {"echo": settings.database.echo}
+        if url.startswith("sqlite+"):
+            engine_kwargs["connect_args"] = {"check_same_thread": False}
+        if ":memory:" not in url:
+            engine_kwargs["pool_size"] = settings.database.pool_size
+            engine_kwargs["max_overflow"] = settings.database.max_overflow
+        self._engine = create_async_engine(url, **engine_kwargs)
+        self._session_factory = async_sessionmaker(
+            self._engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self._semantic_cache = SemanticCache.from_settings(self._engine)
+        self._embedding_service: EmbeddingService | None = None
+        self._query_flight: SingleFlight[RAGContext] = SingleFlight("rag_query")
+
+        log.info(
+            "rag_runtime_initialized",
+            pool_size=engine_kwargs.get("pool_size"),
+            max_overflow=engine_kwargs.get("max_overflow"),
+            event_name="rag_runtime_initialized",
+        )
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Shared async engine."""
+        return self._engine
+
+    @property
+    def semantic_cache(self) -> SemanticCache:
+        """Semantic cache shared by every request of the process."""
+        return self._semantic_cache
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Embedding service shared by every request (created on first use)."""
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService(cache=get_embedding_cache_store())
+        return self._embedding_service
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """Session from the pool, returned to it on exit."""
+        async with self._session_factory() as session:
+            yield session
+
+    def query_service(self, session: AsyncSession) -> QueryService:
+        """QueryService for one request, sharing the process-wide components."""
+        return QueryService(
+            session=session,
+            embedding_service=self.embedding_service,
+            semantic_cache=self._semantic_cache,
+            query_flight=self._query_flight,
+            flight_scope=self._flight_query_service,
+        )
+
+    @asynccontextmanager
+    async def _flight_query_service(self) -> AsyncIterator[QueryService]:
+        """QueryService on a pooled session owned by one shared query execution."""
+        async with self.session() as session:
+            yield self.query_service(session)
+
+    async def close(self) -> None:
+        """Flush the semantic cache and close every pooled connection."""
+        try:
+            await self._semantic_cache.close()
+        finally:
+            await self._engine.dispose()
+        log.info("rag_runtime_closed", event_name="rag_runtime_closed")
+
+
+__all__ = ["RAGRuntime", "resolve_async_database_url"]
@@ -2,19 +2,57 @@
 Semantic cache for RAG responses to avoid redundant LLM calls.
 
 Implements an LRU cache with memory-based eviction to store RAG responses.
-Cache keys are generated from query embeddings and RAG parameters.
+Exact keys hash the query text and RAG parameters; an optional second tier
+matches cached entries by query-embedding cosine similarity. Entries past
+their (jittered) TTL can be served stale while a background task refreshes
+them.
 """
 
 import asyncio
 import hashlib
 import json
+import random
+import re
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
 from typing import Any
 
+import numpy as np
+import structlog
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
+from ...config.settings import get_settings
 from ..models import RAGContext
+from ..storage.cache_backend import CacheBackend, get_shared_backend
+from ..storage.corpus_state import read_corpus_generation, read_document_versions
+from ..storage.semantic_cache_store import PersistedEntry, SemanticCacheStore
+from ..utils.frequency_sketch import FrequencySketch
+from ..utils.normalizer import (
+    extract_legal_filters_from_query,
+    normalize_query_text,
+    rewrite_legal_query,
+)
+
+# Legal references that must match exactly for a semantic hit
+# (applied to normalized query text; "art. 5" and "artigo 5º" agree)
+_SCOPE_REFERENCE_PATTERNS = {
+    "artigo": re.compile(r"\bart(?:igo)?\.?\s*(\d+)"),
+    "paragrafo": re.compile(r"(?:§|\bparagrafo)\s*(\d+|unico)"),
+    "inciso": re.compile(r"\binciso\s+([ivxlcdm]+|\d+)\b"),
+}
+_SCOPE_FILTER_KEYS = ("law_number", "marca_stf", "marca_stj")
+
+# Jaccard overlap of chunk ids below which an audited semantic hit is false
+_AUDIT_MIN_OVERLAP = 0.5
+
+log = structlog.get_logger(__name__)
+
+# Recomputes a stale entry and stores it back with SemanticCache.set()
+RefreshCallback = Callable[[], Awaitable[Any]]
 
 
 class CachedResponse(BaseModel):
@@ -32,10 +70,24 @@ class CachedResponse(BaseModel):
         default=86400,  # 24 hours
         description="Time-to-live in seconds",
     )
+    sources: dict[str, str | None] = Field(
+        default_factory=dict,
+        description="Content hash of each cited document, keyed by documento_id",
+    )
+    corpus_generation: int | None = Field(
+        default=None,
+        description="Corpus generation the sources were read at",
+    )
+
+    def is_expired(self, grace_seconds: float = 0.0) -> bool:
+        """
+        Check if the cached response has expired.
 
-    def is_expired(self) -> bool:
-        """Check if the cached response has expired."""
-        return time.time() - self.cached_at > self.ttl_seconds
+        Args:
+            grace_seconds: Extra time past the TTL during which the entry
+                still counts as usable (stale but not dead)
+        """
+        return time.time() - self.cached_at > self.ttl_seconds + grace_seconds
 
     def size_bytes(self) -> int:
         """Estimate memory size in bytes."""
@@ -48,47 +100,299 @@ class CachedResponse(BaseModel):
 
 @dataclass
 class CacheStats:
-    """Cache statistics for monitoring."""
+    """
+    Cache statistics for monitoring.
+
+    `hits`/`misses` count exact-key lookups; semantic lookups run after an
+    exact miss, so `semantic_hits` are a subset of `misses`. Exact hits served
+    by the shared tier are counted in `hits` and in `shared_hits`. Entries
+    served past their TTL are counted in `hits` and in `stale_served`;
+    `refreshes` and `refresh_failures` count finished background refreshes.
+    `admission_admits`/`admission_rejects` count new entries that needed
+    evictions and won or lost against the LRU victims. `corpus_invalidations`
+    counts entries dropped because a document they cite changed.
+    """
 
     hits: int = 0
     misses: int = 0
+    semantic_lookups: int = 0
+    semantic_hits: int = 0
+    semantic_audits: int = 0
+    semantic_false_hits: int = 0
+    semantic_threshold: float | None = None
     evictions: int = 0
     current_memory_mb: float = 0.0
     entry_count: int = 0
+    lock_acquisitions: int = 0
+    lock_hold_ms_total: float = 0.0
+    lock_hold_ms_max: float = 0.0
+    persisted_loaded: int = 0
+    persist_pending: int = 0
+    persist_flushes: int = 0
+    shared_tier: str | None = None
+    shared_hits: int = 0
+    shared_errors: int = 0
+    shared_avg_get_ms: float = 0.0
+    stale_served: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    refreshes_inflight: int = 0
+    admission_admits: int = 0
+    admission_rejects: int = 0
+    corpus_generation: int | None = None
+    corpus_invalidations: int = 0
 
     @property
     def hit_rate(self) -> float:
-        """Calculate cache hit rate."""
+        """Calculate cache hit rate (exact and semantic hits)."""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return (self.hits + self.semantic_hits) / total
+
+    @property
+    def exact_hit_rate(self) -> float:
+        """Share of lookups answered by the exact key."""
         total = self.hits + self.misses
         if total == 0:
             return 0.0
         return self.hits / total
 
+    @property
+    def semantic_hit_rate(self) -> float:
+        """Share of lookups answered by embedding similarity."""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.semantic_hits / total
+
+    @property
+    def false_hit_rate(self) -> float:
+        """Share of audited semantic hits whose fresh retrieval disagreed."""
+        if self.semantic_audits == 0:
+            return 0.0
+        return self.semantic_false_hits / self.semantic_audits
+
+    @property
+    def avg_lock_hold_ms(self) -> float:
+        """Average time the cache lock was held per acquisition."""
+        if self.lock_acquisitions == 0:
+            return 0.0
+        return self.lock_hold_ms_total / self.lock_acquisitions
+
+
+class _QueryVectorIndex:
+    """
+    Unit-normalized query embeddings of cached entries, one row per key.
+
+    Rows are grouped by scope (RAG parameters plus legal references), and a
+    lookup is a single matrix-vector product masked to the query's scope.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty storage."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every row."""
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._row_scopes = np.zeros(0, dtype=np.int32)
+        self._keys: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._scope_ids: dict[str, int] = {}
+
+    def add(self, key: str, scope: str, vector: np.ndarray) -> None:
+        """Index `vector` for `key` (replacing any previous row)."""
+        self.remove(key)
+        if self._keys and vector.size != self._vectors.shape[1]:
+            return  # embedding model changed; only same-dimension rows are comparable
+        size = len(self._keys)
+        if size == self._vectors.shape[0] or vector.size != self._vectors.shape[1]:
+            capacity = max(64, size * 2)
+            vectors = np.zeros((capacity, vector.size), dtype=np.float32)
+            row_scopes = np.full(capacity, -1, dtype=np.int32)
+            if size:
+                vectors[:size] = self._vectors[:size]
+                row_scopes[:size] = self._row_scopes[:size]
+            self._vectors, self._row_scopes = vectors, row_scopes
+        self._vectors[size] = vector
+        self._row_scopes[size] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        self._keys.append(key)
+        self._positions[key] = size
+
+    def remove(self, key: str) -> None:
+        """Drop the row of `key`, moving the last row into its place."""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        last = len(self._keys) - 1
+        if position != last:
+            moved = self._keys[last]
+            self._vectors[position] = self._vectors[last]
+            self._row_scopes[position] = self._row_scopes[last]
+            self._keys[position] = moved
+            self._positions[moved] = position
+        self._keys.pop()
+
+    def best(self, vector: np.ndarray, scope: str) -> tuple[str, float] | None:
+        """Most similar key in `scope` and its cosine similarity."""
+        scope_id = self._scope_ids.get(scope)
+        size = len(self._keys)
+        if scope_id is None or size == 0 or vector.size != self._vectors.shape[1]:
+            return None
+        scores = self._vectors[:size] @ vector
+        scores[self._row_scopes[:size] != scope_id] = -np.inf
+        position = int(np.argmax(scores))
+        if not np.isfinite(scores[position]):
+            return None
+        return self._keys[position], float(scores[position])
+
+
+def _unit_vector(embedding: list[float] | np.ndarray) -> np.ndarray | None:
+    """float32 copy of `embedding` scaled to unit length (None when zero)."""
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+
+def _chunk_ids(rag_context_dict: dict[str, Any]) -> set[str]:
+    """Chunk ids cited by a serialized RAGContext."""
+    return {chunk["chunk_id"] for chunk in rag_context_dict.get("chunks_usados", [])}
+
 
 class SemanticCache:
     """
     LRU cache for semantic RAG responses with memory-based eviction.
 
     Cache entries are stored with memory tracking and evicted when the
-    memory budget is exceeded using LRU policy.
+    memory budget is exceeded using LRU policy. Entries are kept in an
+    OrderedDict in recency order (oldest first), so touch and eviction are
+    O(1); each entry's size is computed once at insert.
+
+    When `similarity_threshold` is set, entries stored with a query embedding
+    are also found by `get_similar`: the nearest cached query in the same
+    scope (RAG parameters and cited legal references) whose cosine similarity
+    reaches the threshold. A sample of those hits can be audited against a
+    fresh retrieval to measure false hits.
+
+    With a `store`, every insert is also written behind to SQLite, and the
+    first operation after startup loads the newest unexpired entries that fit
+    the memory budget, so a restarted process comes back warm.
+
+    With a `shared` backend, exact-key misses fall through to it (entries are
+    promoted into this process) and every insert is copied to it, so other
+    caches or worker processes on the same backend reuse the response.
+
+    TTLs are shortened by a random fraction up to `ttl_jitter`, so entries
+    cached together (e.g. by scripts/warm_semantic_cache.py) do not expire
+    together. For `stale_grace_seconds` past its TTL an entry is stale rather
+    than gone: `get` with a `refresh` callback returns it at once and runs
+    the callback in the background (once per key) to store a fresh answer.
+
+    With an `admission` sketch (TinyLFU), every exact lookup is counted, and
+    a new entry that only fits by evicting others is admitted only when it
+    was requested more often than each entry it would evict. A burst of
+    one-off questions then cannot flush the answers asked all day.
+
+    Entries stored with `sources` (the content hash of each cited document)
+    outlive reindexing: `sync_corpus` notices a new corpus generation and
+    drops only the entries citing a document whose content changed or that
+    no longer exists. Untagged entries are left to their TTL.
     """
 
-    def __init__(self, max_memory_mb: int = 50, default_ttl_seconds: int = 86400):
+    def __init__(
+        self,
+        max_memory_mb: int = 50,
+        default_ttl_seconds: int = 86400,
+        similarity_threshold: float | None = None,
+        audit_sample_rate: float = 0.0,
+        store: SemanticCacheStore | None = None,
+        shared: CacheBackend | None = None,
+        ttl_jitter: float = 0.0,
+        stale_grace_seconds: int = 0,
+        admission: FrequencySketch | None = None,
+    ):
         """
         Initialize the semantic cache.
 
         Args:
             max_memory_mb: Maximum memory budget in megabytes
             default_ttl_seconds: Default TTL for cache entries
+            similarity_threshold: Min cosine similarity for a semantic hit
+                (None disables the embedding tier)
+            audit_sample_rate: Fraction of semantic hits to audit
+            store: Optional write-behind persistence tier
+            shared: Optional shared tier for exact-key entries
+            ttl_jitter: Max fraction (0-1) randomly taken off each entry's TTL
+            stale_grace_seconds: How long past its TTL an entry may still be
+                served while it is refreshed
+            admission: Frequency sketch filtering entries that need evictions
+                (None admits every entry)
         """
         self._max_memory_bytes = max_memory_mb * 1024 * 1024
         self._default_ttl_seconds = default_ttl_seconds
-        self._cache: dict[str, CachedResponse] = {}
-        self._access_order: dict[str, float] = {}  # Track access time for LRU
+        self._cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._entry_sizes: dict[str, int] = {}
         self._current_memory_bytes = 0
+        self._similarity_threshold = similarity_threshold
+        self._audit_sample_rate = audit_sample_rate
+        self._query_index = _QueryVectorIndex()
+        self._store = store
+        self._store_loaded = store is None
+        self._shared = shared
+        self._ttl_jitter = ttl_jitter
+        self._stale_grace_seconds = stale_grace_seconds
+        self._refreshing: dict[str, asyncio.Task[None]] = {}
+        self._admission = admission
+        # Corpus generation and live document hashes seen by the last sync_corpus()
+        self._corpus_generation: int | None = None
+        self._live_hashes: frozenset[str] | None = None
         self._stats = CacheStats()
         self._lock = asyncio.Lock()
 
+    @classmethod
+    def from_settings(cls, engine: AsyncEngine | None = None) -> "SemanticCache":
+        """
+        Build a cache from `settings.rag.cache`.
+
+        Args:
+            engine: SQLite engine for the persistence tier; used only when
+                `persist_to_db` is enabled
+        """
+        config = get_settings().rag.cache
+        store = None
+        if config.persist_to_db and engine is not None and engine.dialect.name == "sqlite":
+            store = SemanticCacheStore(
+                engine,
+                max_disk_mb=config.persist_max_disk_mb,
+                flush_interval_seconds=config.persist_flush_interval_seconds,
+                batch_size=config.persist_batch_size,
+            )
+        return cls(
+            max_memory_mb=config.max_memory_mb,
+            default_ttl_seconds=config.ttl_seconds,
+            similarity_threshold=(
+                config.semantic_threshold if config.semantic_lookup_enabled else None
+            ),
+            audit_sample_rate=config.semantic_audit_sample_rate,
+            store=store,
+            shared=get_shared_backend("semantic"),
+            ttl_jitter=config.ttl_jitter_ratio,
+            stale_grace_seconds=config.stale_while_revalidate_seconds,
+            admission=(
+                FrequencySketch(width=config.admission_sketch_width)
+                if config.admission_policy == "tinylfu"
+                else None
+            ),
+        )
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether the embedding-similarity tier is active."""
+        return self._similarity_threshold is not None
+
     def generate_key(
         self,
         query: str,
@@ -124,40 +428,295 @@ class SemanticCache:
         key_string = json.dumps(key_data, sort_keys=True)
         return hashlib.sha256(key_string.encode("utf-8")).hexdigest()
 
-    async def get(self, query_key: str) -> CachedResponse | None:
+    def scope_key(
+        self,
+        query: str,
+        top_k: int,
+        min_similarity: float,
+        retrieval_mode: str | None = None,
+        rerank_profile: str | None = None,
+        chunking_mode: str | None = None,
+    ) -> str:
+        """
+        Generate the semantic-lookup scope for a query.
+
+        Same parameters as `generate_key`, but the query text is replaced by
+        the legal references it cites (article, paragraph, inciso, law number,
+        court), so near-identical questions about different provisions never
+        share an answer.
+
+        Returns:
+            SHA256 hash as hex string
+        """
+        normalized = normalize_query_text(rewrite_legal_query(query)[0])
+        filters = extract_legal_filters_from_query(normalized)
+        references: dict[str, Any] = {
+            name: sorted(set(pattern.findall(normalized)))
+            for name, pattern in _SCOPE_REFERENCE_PATTERNS.items()
+        }
+        references.update({key: filters.get(key) for key in _SCOPE_FILTER_KEYS})
+        key_data = {
+            "references": references,
+            "top_k": top_k,
+            "min_similarity": min_similarity,
+            "retrieval_mode": retrieval_mode,
+            "rerank_profile": rerank_profile,
+            "chunking_mode": chunking_mode,
+        }
+        key_string = json.dumps(key_data, sort_keys=True)
+        return hashlib.sha256(key_string.encode("utf-8")).hexdigest()
+
+    async def get(
+        self,
+        query_key: str,
+        refresh: RefreshCallback | None = None,
+    ) -> CachedResponse | None:
         """
         Get a cached response by key.
 
         Args:
             query_key: Cache key from generate_key()
+            refresh: Recomputes the answer and stores it with set(); when
+                given, a stale entry is returned and this runs in the
+                background (at most once per key at a time)
 
         Returns:
-            CachedResponse if found and not expired, None otherwise
+            CachedResponse if found and fresh (or stale with `refresh`),
+            None otherwise
         """
-        async with self._lock:
+        await self._load_persisted()
+        async with self._locked():
+            if self._admission is not None:
+                self._admission.increment(query_key)
             entry = self._cache.get(query_key)
 
-            if entry is None:
-                self._stats.misses += 1
+            if entry is not None and entry.is_expired(self._stale_grace_seconds):
+                # Remove entry past its grace period
+                self._remove_entry(query_key)
+                entry = None
+
+            if entry is not None or self._shared is None:
+                return self._serve(query_key, entry, refresh)
+
+        # Shared tier is read outside the lock
+        entry = await self._get_shared(query_key)
+        entry_size = entry.size_bytes() if entry is not None else 0
+        async with self._locked():
+            if entry is not None:
+                self._insert_entry(query_key, entry, entry_size, None, None)
+            served = self._serve(query_key, entry, refresh)
+            if served is not None:
+                self._stats.shared_hits += 1
+            return served
+
+    def _serve(
+        self,
+        query_key: str,
+        entry: CachedResponse | None,
+        refresh: RefreshCallback | None,
+    ) -> CachedResponse | None:
+        """Count and return a looked-up entry, refreshing it if stale (lock held)."""
+        if entry is None or (entry.is_expired() and refresh is None):
+            self._stats.misses += 1
+            return None
+
+        # Cache hit - move to the most recently used end (a shared-tier hit
+        # the admission filter turned away is served without being kept)
+        if query_key in self._cache:
+            self._cache.move_to_end(query_key)
+        self._stats.hits += 1
+        if entry.is_expired() and refresh is not None:
+            self._stats.stale_served += 1
+            self._start_refresh(query_key, refresh)
+        return entry
+
+    def _start_refresh(self, query_key: str, refresh: RefreshCallback) -> None:
+        """Run `refresh` in the background unless one is already running for the key."""
+        if query_key in self._refreshing:
+            return
+        self._refreshing[query_key] = asyncio.create_task(self._run_refresh(query_key, refresh))
+
+    async def _run_refresh(self, query_key: str, refresh: RefreshCallback) -> None:
+        """Await a refresh, recording its outcome."""
+        try:
+            await refresh()
+            self._stats.refreshes += 1
+        except Exception as e:
+            # The stale entry keeps being served until its grace period ends
+            self._stats.refresh_failures += 1
+            log.warning(
+                "rag_semantic_cache_refresh_failed",
+                cache_key=query_key[:16],
+                error=str(e),
+                event_name="rag_semantic_cache_refresh_failed",
+            )
+        finally:
+            self._refreshing.pop(query_key, None)
+
+    async def _get_shared(self, query_key: str) -> CachedResponse | None:
+        """Read a fresh or stale (within grace) entry from the shared tier."""
+        payload = await self._shared.get_async(query_key) if self._shared is not None else None
+        if payload is None:
+            return None
+        try:
+            entry = CachedResponse.model_validate_json(payload)
+        except ValueError:
+            return None
+        if entry.is_expired(self._stale_grace_seconds) or not self._is_current(entry):
+            return None
+        return entry
+
+    async def sync_corpus(self, session: AsyncSession) -> int:
+        """
+        Drop entries built from documents changed since the last sync.
+
+        Costs one primary-key read while the corpus generation is unchanged;
+        after ingestion or reindexing it reads every document's content hash
+        once and removes the entries whose cited hashes are gone. Entries
+        cited with an unknown hash are dropped on any change. Database
+        errors are logged and leave the cache as it was.
+
+        Args:
+            session: Database session to read the corpus state with
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            generation = await read_corpus_generation(session)
+            if generation == self._corpus_generation:
+                return 0
+            versions = await read_document_versions(session)
+        except Exception as e:
+            log.warning(
+                "rag_semantic_cache_corpus_sync_failed",
+                error=str(e),
+                event_name="rag_semantic_cache_corpus_sync_failed",
+            )
+            return 0
+
+        await self._load_persisted()
+        async with self._locked():
+            if generation == self._corpus_generation:
+                return 0
+            self._corpus_generation = generation
+            self._live_hashes = frozenset(h for h in versions.values() if h is not None)
+            stale = [key for key, entry in self._cache.items() if not self._is_current(entry)]
+            for query_key in stale:
+                self._remove_entry(query_key)
+            self._stats.corpus_invalidations += len(stale)
+
+        for query_key in stale:
+            if self._store is not None:
+                self._store.delete(query_key)
+            if self._shared is not None:
+                await self._shared.delete_async(query_key)
+        if stale:
+            log.info(
+                "rag_semantic_cache_corpus_invalidated",
+                corpus_generation=generation,
+                invalidated=len(stale),
+                event_name="rag_semantic_cache_corpus_invalidated",
+            )
+        return len(stale)
+
+    @property
+    def corpus_generation(self) -> int | None:
+        """Corpus generation seen by the last sync_corpus() (None before it)."""
+        return self._corpus_generation
+
+    def _is_current(self, entry: CachedResponse) -> bool:
+        """Whether every document cited by `entry` still has the content it was built from."""
+        if (
+            not entry.sources
+            or self._live_hashes is None
+            or entry.corpus_generation == self._corpus_generation
+        ):
+            return True
+        return all(
+            content_hash is not None and content_hash in self._live_hashes
+            for content_hash in entry.sources.values()
+        )
+
+    async def get_similar(
+        self,
+        query_embedding: list[float] | np.ndarray,
+        scope: str,
+    ) -> CachedResponse | None:
+        """
+        Find a cached response for a semantically equivalent query.
+
+        Args:
+            query_embedding: Embedding of the normalized query
+            scope: Scope from scope_key()
+
+        Returns:
+            CachedResponse of the nearest cached query in `scope` when its
+            cosine similarity reaches the threshold, None otherwise
+        """
+        if self._similarity_threshold is None:
+            return None
+        vector = _unit_vector(query_embedding)
+        if vector is None:
+            return None
+
+        await self._load_persisted()
+        async with self._locked():
+            self._stats.semantic_lookups += 1
+            best = self._query_index.best(vector, scope)
+            if best is None or best[1] < self._similarity_threshold:
                 return None
 
+            query_key = best[0]
+            entry = self._cache[query_key]
             if entry.is_expired():
-                # Remove expired entry
-                await self._remove_entry(query_key)
-                self._stats.misses += 1
+                # Stale entries are only served (and refreshed) by exact key
+                if entry.is_expired(self._stale_grace_seconds):
+                    self._remove_entry(query_key)
                 return None
 
-            # Cache hit - update access order for LRU
-            self._access_order[query_key] = time.time()
-            self._stats.hits += 1
+            self._cache.move_to_end(query_key)
+            if self._admission is not None:
+                self._admission.increment(query_key)
+            self._stats.semantic_hits += 1
             return entry
 
+    def should_audit(self) -> bool:
+        """Whether to verify this semantic hit against a fresh retrieval."""
+        return self._audit_sample_rate > 0 and random.random() < self._audit_sample_rate
+
+    def record_audit(self, cached: CachedResponse, fresh_context: RAGContext) -> bool:
+        """
+        Compare an audited semantic hit with the context retrieved fresh.
+
+        Args:
+            cached: Response returned by get_similar()
+            fresh_context: Context retrieved for the same query without cache
+
+        Returns:
+            True when both cite mostly the same chunks; False (a false hit)
+            otherwise
+        """
+        cached_ids = _chunk_ids(cached.rag_context_dict)
+        fresh_ids = {chunk.chunk_id for chunk in fresh_context.chunks_usados}
+        union = cached_ids | fresh_ids
+        overlap = len(cached_ids & fresh_ids) / len(union) if union else 1.0
+        consistent = overlap >= _AUDIT_MIN_OVERLAP
+
+        self._stats.semantic_audits += 1
+        if not consistent:
+            self._stats.semantic_false_hits += 1
+        return consistent
+
     async def set(
         self,
         query_key: str,
         rag_context: RAGContext,
         llm_response: str,
         ttl_seconds: int | None = None,
+        query_embedding: list[float] | np.ndarray | None = None,
+        scope: str | None = None,
+        sources: Mapping[int, str | None] | None = None,
     ) -> None:
         """
         Store a response in the cache.
@@ -166,51 +725,186 @@ class SemanticCache:
             query_key: Cache key from generate_key()
             rag_context: RAG context from query
             llm_response: LLM response text
-            ttl_seconds: Custom TTL (uses default if None)
+            ttl_seconds: Custom TTL (uses default if None), before jitter
+            query_embedding: Query embedding for semantic lookup (optional)
+            scope: Scope from scope_key(), required with query_embedding
+            sources: Content hash of each cited document by documento_id
+                (from read_document_versions); tags the entry for sync_corpus()
         """
-        async with self._lock:
-            # Remove existing entry if present
-            if query_key in self._cache:
-                await self._remove_entry(query_key)
-
-            # Create new cached response
-            # Use explicit None check to allow ttl_seconds=0
-            ttl = self._default_ttl_seconds if ttl_seconds is None else ttl_seconds
-            entry = CachedResponse(
-                rag_context_dict=rag_context.model_dump(),
-                llm_response=llm_response,
-                ttl_seconds=ttl,
+        # Create new cached response (serialized and sized outside the lock)
+        # Use explicit None check to allow ttl_seconds=0
+        ttl = self._default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl > 0 and self._ttl_jitter > 0:
+            ttl = int(ttl * (1.0 - random.random() * self._ttl_jitter))
+        entry = CachedResponse(
+            rag_context_dict=rag_context.model_dump(),
+            llm_response=llm_response,
+            ttl_seconds=ttl,
+            sources={str(doc_id): content_hash for doc_id, content_hash in (sources or {}).items()},
+            corpus_generation=self._corpus_generation if sources else None,
+        )
+        entry_size = entry.size_bytes()
+
+        vector = None
+        if self._similarity_threshold is not None and query_embedding is not None and scope:
+            vector = _unit_vector(query_embedding)
+            if vector is not None:
+                entry_size += vector.nbytes
+
+        await self._load_persisted()
+        async with self._locked():
+            admitted = self._insert_entry(query_key, entry, entry_size, vector, scope)
+
+        if self._shared is not None:
+            await self._shared.set_async(
+                query_key,
+                entry.model_dump_json().encode("utf-8"),
+                ttl + self._stale_grace_seconds,
             )
 
-            # Check if entry fits in memory budget
-            entry_size = entry.size_bytes()
+        if self._store is not None and admitted:
+            self._store.put(
+                PersistedEntry(
+                    key=query_key,
+                    scope=scope if vector is not None else None,
+                    rag_context_dict=entry.rag_context_dict,
+                    llm_response=entry.llm_response,
+                    cached_at=entry.cached_at,
+                    ttl_seconds=entry.ttl_seconds,
+                    size_bytes=entry_size,
+                    embedding=vector,
+                    sources=entry.sources or None,
+                    corpus_generation=entry.corpus_generation,
+                )
+            )
 
-            # Evict entries until we have space
-            while (
-                self._current_memory_bytes + entry_size > self._max_memory_bytes
-                and self._cache
-            ):
-                # Find LRU entry
-                lru_key = min(self._access_order.keys(), key=lambda k: self._access_order[k])
-                await self._remove_entry(lru_key)
-                self._stats.evictions += 1
+    async def close(self) -> None:
+        """Wait for running refreshes, then flush the persistence tier and stop its task."""
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        if self._store is not None:
+            await self._store.close()
 
-            # Add new entry
-            self._cache[query_key] = entry
-            self._access_order[query_key] = time.time()
-            self._current_memory_bytes += entry_size
+    def _insert_entry(
+        self,
+        query_key: str,
+        entry: CachedResponse,
+        entry_size: int,
+        vector: np.ndarray | None,
+        scope: str | None,
+        *,
+        contested: bool = True,
+    ) -> bool:
+        """
+        Add an entry, evicting LRU entries to fit it (lock must be held).
 
-            # Update stats
-            self._stats.current_memory_mb = self._current_memory_bytes / (1024 * 1024)
-            self._stats.entry_count = len(self._cache)
+        Returns:
+            False when the admission filter rejected the entry; entries
+            loaded with `contested=False` bypass the filter
+        """
+        # Remove existing entry if present
+        if query_key in self._cache:
+            self._remove_entry(query_key)
+        elif contested and self._admission is not None and not self._admit(query_key, entry_size):
+            self._stats.admission_rejects += 1
+            return False
+
+        # Evict entries until we have space
+        while self._current_memory_bytes + entry_size > self._max_memory_bytes and self._cache:
+            # Least recently used entry is first in order
+            lru_key = next(iter(self._cache))
+            self._remove_entry(lru_key)
+            self._stats.evictions += 1
+
+        # Add new entry
+        self._cache[query_key] = entry
+        self._entry_sizes[query_key] = entry_size
+        self._current_memory_bytes += entry_size
+        if vector is not None and scope:
+            self._query_index.add(query_key, scope, vector)
+
+        # Update stats
+        self._stats.current_memory_mb = self._current_memory_bytes / (1024 * 1024)
+        self._stats.entry_count = len(self._cache)
+        return True
+
+    def _admit(self, query_key: str, entry_size: int) -> bool:
+        """
+        TinyLFU decision for a new entry (lock must be held).
 
-    async def _remove_entry(self, query_key: str) -> None:
+        Entries that fit without evicting are always admitted. Otherwise the
+        candidate must be more frequent than every LRU victim that would make
+        room for it.
+        """
+        needed = self._current_memory_bytes + entry_size - self._max_memory_bytes
+        if needed <= 0 or self._admission is None:
+            return True
+        candidate_frequency = self._admission.estimate(query_key)
+        freed = 0
+        for victim_key in self._cache:
+            if self._admission.estimate(victim_key) >= candidate_frequency:
+                return False
+            freed += self._entry_sizes[victim_key]
+            if freed >= needed:
+                break
+        self._stats.admission_admits += 1
+        return True
+
+    async def _load_persisted(self) -> None:
+        """Warm the cache from the persistence tier on first use."""
+        if self._store_loaded:
+            return
+        async with self._locked():
+            if self._store_loaded or self._store is None:
+                return
+            self._store_loaded = True
+            try:
+                persisted = await self._store.load(self._max_memory_bytes)
+            except Exception:
+                # A broken persistence tier must not take the cache down
+                return
+
+            # Oldest first, so the newest entries end up most recently used
+            for item in reversed(persisted):
+                if item.key in self._cache:
+                    continue
+                vector = item.embedding if self._similarity_threshold is not None else None
+                self._insert_entry(
+                    item.key,
+                    CachedResponse(
+                        rag_context_dict=item.rag_context_dict,
+                        llm_response=item.llm_response,
+                        cached_at=item.cached_at,
+                        ttl_seconds=item.ttl_seconds,
+                        sources=item.sources or {},
+                        corpus_generation=item.corpus_generation,
+                    ),
+                    item.size_bytes,
+                    vector,
+                    item.scope,
+                    contested=False,
+                )
+            self._stats.persisted_loaded = len(persisted)
+
+    @asynccontextmanager
+    async def _locked(self) -> AsyncIterator[None]:
+        """Hold the cache lock, recording how long it was held."""
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                held_ms = (time.perf_counter() - started) * 1000
+                self._stats.lock_acquisitions += 1
+                self._stats.lock_hold_ms_total += held_ms
+                self._stats.lock_hold_ms_max = max(self._stats.lock_hold_ms_max, held_ms)
+
+    def _remove_entry(self, query_key: str) -> None:
         """Remove an entry from cache and update memory tracking."""
         if query_key in self._cache:
-            entry = self._cache[query_key]
-            self._current_memory_bytes -= entry.size_bytes()
             del self._cache[query_key]
-            del self._access_order[query_key]
+            self._current_memory_bytes -= self._entry_sizes.pop(query_key)
+            self._query_index.remove(query_key)
 
             # Ensure we don't go negative due to rounding errors
             if self._current_memory_bytes < 0:
@@ -227,21 +921,33 @@ class SemanticCache:
         Returns:
             CacheStats dataclass with current metrics
         """
-        return CacheStats(
-            hits=self._stats.hits,
-            misses=self._stats.misses,
-            evictions=self._stats.evictions,
-            current_memory_mb=self._stats.current_memory_mb,
-            entry_count=self._stats.entry_count,
+        shared_stats = self._shared.stats if self._shared is not None else None
+        return replace(
+            self._stats,
+            semantic_threshold=self._similarity_threshold,
+            persist_pending=self._store.pending_count if self._store is not None else 0,
+            persist_flushes=self._store.flushes if self._store is not None else 0,
+            shared_tier=shared_stats.tier if shared_stats is not None else None,
+            shared_errors=shared_stats.errors if shared_stats is not None else 0,
+            shared_avg_get_ms=shared_stats.avg_get_ms if shared_stats is not None else 0.0,
+            refreshes_inflight=len(self._refreshing),
+            corpus_generation=self._corpus_generation,
         )
 
     async def clear(self) -> None:
         """Clear all cache entries and reset stats."""
         async with self._lock:
             self._cache.clear()
-            self._access_order.clear()
+            self._entry_sizes.clear()
+            self._query_index.clear()
             self._current_memory_bytes = 0
             self._stats = CacheStats()
+            if self._admission is not None:
+                self._admission.clear()
+            if self._store is not None:
+                self._store.clear()
+            if self._shared is not None:
+                await self._shared.clear_async()
 
 
 __all__ = [
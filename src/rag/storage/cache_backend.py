@@ -0,0 +1,413 @@
+"""Pluggable key/value backends for the shared tier of the RAG caches."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ...config.settings import get_settings
+
+log = structlog.get_logger(__name__)
+
+# Bytes of the shared SQLite file mapped into memory for reads
+_SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+# Max wait for another process' write lock before giving up on an operation
+_SQLITE_BUSY_TIMEOUT_MS = 50
+# Entries removed per trim once a namespace outgrows max_entries
+_SQLITE_TRIM_SLACK = 0.1
+
+
+@dataclass(slots=True)
+class BackendStats:
+    """Per-tier counters of a cache backend."""
+
+    tier: str
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    errors: int = 0
+    get_ms_total: float = 0.0
+    get_ms_max: float = 0.0
+    set_ms_total: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Hits over lookups (0-1)."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    @property
+    def avg_get_ms(self) -> float:
+        """Mean lookup latency in milliseconds."""
+        total = self.hits + self.misses
+        return self.get_ms_total / total if total > 0 else 0.0
+
+    @property
+    def avg_set_ms(self) -> float:
+        """Mean write latency in milliseconds."""
+        return self.set_ms_total / self.sets if self.sets > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters plus derived rates, for stats endpoints and logs."""
+        return {
+            **asdict(self),
+            "hit_rate": self.hit_rate,
+            "avg_get_ms": self.avg_get_ms,
+            "avg_set_ms": self.avg_set_ms,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Byte-valued key/value store with per-entry TTL, scoped to one namespace.
+
+    Caches keep their own in-process tier and use a backend as the next tier,
+    so several caches (or several worker processes) can share entries.
+    Backend failures are counted and reported as misses: a broken shared tier
+    degrades to the in-process behaviour instead of failing the request.
+
+    Callers on the event loop use the `*_async` variants, which run tiers
+    doing blocking I/O (`blocking = True`) in a worker thread.
+    """
+
+    tier: str = "backend"
+    # Whether operations block on I/O (file or network) rather than memory
+    blocking: bool = False
+
+    def __init__(self, namespace: str) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            namespace: Keyspace of the owning cache (e.g. "semantic")
+        """
+        self.namespace = namespace
+        self._stats = BackendStats(tier=self.tier)
+
+    def get(self, key: str) -> bytes | None:
+        """Return the value for `key`, or None when missing or expired."""
+        start = time.perf_counter()
+        try:
+            value = self._get(key)
+        except Exception as e:
+            self._stats.errors += 1
+            value = None
+            log.warning(
+                "rag_cache_backend_error",
+                tier=self.tier,
+                namespace=self.namespace,
+                operation="get",
+                error=str(e),
+                event_name="rag_cache_backend_error",
+            )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats.get_ms_total += elapsed_ms
+        self._stats.get_ms_max = max(self._stats.get_ms_max, elapsed_ms)
+        if value is None:
+            self._stats.misses += 1
+        else:
+            self._stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Store `value` under `key` for `ttl_seconds`."""
+        if ttl_seconds <= 0:
+            return
+        start = time.perf_counter()
+        try:
+            self._set(key, value, time.time() + ttl_seconds)
+        except Exception as e:
+            self._stats.errors += 1
+            log.warning(
+                "rag_cache_backend_error",
+                tier=self.tier,
+                namespace=self.namespace,
+                operation="set",
+                error=str(e),
+                event_name="rag_cache_backend_error",
+            )
+            return
+        self._stats.sets += 1
+        self._stats.set_ms_total += (time.perf_counter() - start) * 1000
+
+    def delete(self, key: str) -> None:
+        """Remove `key` if present."""
+        try:
+            self._delete(key)
+        except Exception:
+            self._stats.errors += 1
+
+    def clear(self) -> None:
+        """Remove every entry of this namespace."""
+        try:
+            self._clear()
+        except Exception:
+            self._stats.errors += 1
+
+    async def get_async(self, key: str) -> bytes | None:
+        """Same as get(), without blocking the event loop."""
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Same as set(), without blocking the event loop."""
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value, ttl_seconds)
+        else:
+            self.set(key, value, ttl_seconds)
+
+    async def delete_async(self, key: str) -> None:
+        """Same as delete(), without blocking the event loop."""
+        if self.blocking:
+            await asyncio.to_thread(self.delete, key)
+        else:
+            self.delete(key)
+
+    async def clear_async(self) -> None:
+        """Same as clear(), without blocking the event loop."""
+        if self.blocking:
+            await asyncio.to_thread(self.clear)
+        else:
+            self.clear()
+
+    @property
+    def stats(self) -> BackendStats:
+        """Live counters of this tier."""
+        return self._stats
+
+    @abstractmethod
+    def _get(self, key: str) -> bytes | None:
+        """Read an unexpired value."""
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, expires_at: float) -> None:
+        """Write a value with an absolute expiry (epoch seconds)."""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Delete one key."""
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Delete the namespace."""
+
+
+class InProcessCacheBackend(CacheBackend):
+    """
+    Shared tier living in this process: an LRU dict bounded by entry count.
+
+    Lets every cache instance of the process (e.g. one SemanticCache per
+    QueryService) reuse the same entries, and stands in for a cross-process
+    backend in tests.
+    """
+
+    tier = "memory"
+
+    def __init__(self, namespace: str, max_entries: int = 100_000) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            namespace: Keyspace of the owning cache
+            max_entries: Entries kept before evicting the least recently used
+        """
+        super().__init__(namespace)
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    def _get(self, key: str) -> bytes | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: bytes, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cross-process tier in a local SQLite file (WAL mode, mmap reads).
+
+    Every worker or shard on the host opens the same file. WAL lets readers
+    proceed while one process writes, and the memory-mapped file makes warm
+    reads a page-cache lookup. Writes wait at most a few milliseconds for
+    another process' lock and otherwise count as errors.
+    """
+
+    tier = "sqlite"
+    blocking = True
+
+    def __init__(self, path: Path | str, namespace: str, max_entries: int = 100_000) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            path: SQLite file shared by all processes
+            namespace: Keyspace of the owning cache
+            max_entries: Entries kept in the namespace before trimming the
+                least recently written
+        """
+        super().__init__(namespace)
+        self._path = Path(path)
+        self._max_entries = max_entries
+        self._writes_since_trim = 0
+        self._lock = threading.Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self._path,
+            timeout=_SQLITE_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={_SQLITE_MMAP_BYTES}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rag_shared_cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " written_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rag_shared_cache_written_at"
+            " ON rag_shared_cache (namespace, written_at)"
+        )
+
+    def _get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM rag_shared_cache"
+                " WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def _set(self, key: str, value: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rag_shared_cache"
+                " (namespace, key, value, expires_at, written_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, expires_at, time.time()),
+            )
+            self._writes_since_trim += 1
+            if self._writes_since_trim >= max(1, int(self._max_entries * _SQLITE_TRIM_SLACK)):
+                self._writes_since_trim = 0
+                self._trim()
+
+    def _trim(self) -> None:
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        self._conn.execute(
+            "DELETE FROM rag_shared_cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        self._conn.execute(
+            "DELETE FROM rag_shared_cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM rag_shared_cache WHERE namespace = ?"
+            " ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self._max_entries),
+        )
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM rag_shared_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM rag_shared_cache WHERE namespace = ?", (self.namespace,)
+            )
+
+    def close(self) -> None:
+        """Close the connection to the shared file."""
+        with self._lock:
+            self._conn.close()
+
+
+_BACKENDS: dict[tuple[str, str, str], CacheBackend] = {}
+
+
+def _shared_cache_path() -> Path | None:
+    """Shared file from settings, defaulting to one next to the SQLite database."""
+    settings = get_settings()
+    if settings.rag.cache.shared_path:
+        return Path(settings.rag.cache.shared_path)
+    database = settings.database_path
+    if database is None:
+        return None
+    return Path(f"{database}.shared-cache.db")
+
+
+def get_shared_backend(namespace: str) -> CacheBackend | None:
+    """
+    Return the process-wide shared-tier backend for `namespace`.
+
+    Returns None when `rag.cache.shared_backend` is "none" (or "sqlite"
+    without a usable file path), in which case caches stay in-process only.
+    """
+    config = get_settings().rag.cache
+    if config.shared_backend == "none":
+        return None
+
+    path = _shared_cache_path() if config.shared_backend == "sqlite" else None
+    if config.shared_backend == "sqlite" and path is None:
+        log.warning(
+            "rag_cache_backend_unavailable",
+            tier="sqlite",
+            reason="no shared_path and the database is not a SQLite file",
+            event_name="rag_cache_backend_unavailable",
+        )
+        return None
+
+    slot = (config.shared_backend, str(path or ""), namespace)
+    backend = _BACKENDS.get(slot)
+    if backend is None:
+        if path is not None:
+            backend = SQLiteCacheBackend(path, namespace, max_entries=config.shared_max_entries)
+        else:
+            backend = InProcessCacheBackend(namespace, max_entries=config.shared_max_entries)
+        _BACKENDS[slot] = backend
+    return backend
+
+
+__all__ = [
+    "BackendStats",
+    "CacheBackend",
+    "InProcessCacheBackend",
+    "SQLiteCacheBackend",
+    "get_shared_backend",
+]
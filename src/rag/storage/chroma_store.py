@@ -3,9 +3,8 @@
 from __future__ import annotations
 
 import json
-import re
 from pathlib import Path
-from typing import Any
+from typing import Any, get_origin
 
 import chromadb
 import numpy as np
@@ -18,6 +17,7 @@ from ...models.rag_models import ChunkORM
 from ...utils.errors import APIError, BotSalinhaError
 from ...utils.log_events import LogEvents
 from ..models import Chunk, ChunkMetadata
+from .lexical_index import LexicalIndex, get_lexical_index
 
 log = structlog.get_logger(__name__)
 
@@ -25,15 +25,22 @@ log = structlog.get_logger(__name__)
 ChromaCollection = Any
 ChromaPersistentClient = Any
 
+# Max ids per `IN (...)` hydration query (stays under SQLite's variable limit)
+_HYDRATE_BATCH_SIZE = 500
 
-def _tokenize_lexical_query(query_text: str) -> list[str]:
-    """Tokenize query text for lexical retrieval, ignoring low-signal tokens."""
-    terms = [token.lower() for token in re.findall(r"[a-zA-Z0-9_]+", query_text)]
-    return [term for term in terms if len(term) >= 3]
+# Metadata fields that `add_embeddings` stores as JSON strings
+_LIST_METADATA_FIELDS = frozenset(
+    key
+    for key, field in ChunkMetadata.model_fields.items()
+    if get_origin(field.annotation) is list
+)
 
 
 def bm25_score(query: str, document: str, k1: float = 1.5, b: float = 0.75) -> float:
-    """Calculate BM25 score for query-document pair (simplified).
+    """Calculate BM25 score for a query-document pair without corpus statistics.
+
+    Standalone fallback for when no lexical index is available: the document
+    is its own corpus (its length is the average length, every term is unseen).
 
     Args:
         query: Query text
@@ -44,26 +51,7 @@ def bm25_score(query: str, document: str, k1: float = 1.5, b: float = 0.75) -> f
     Returns:
         BM25 score (higher is more relevant)
     """
-    query_terms = _tokenize_lexical_query(query)
-    doc_terms = _tokenize_lexical_query(document)
-    doc_len = len(doc_terms)
-
-    if doc_len == 0 or not query_terms:
-        return 0.0
-
-    # Simplified: use doc_len as avg_doc_len for single-doc scoring
-    avg_doc_len = doc_len
-
-    score = 0.0
-    for term in query_terms:
-        term_freq = doc_terms.count(term)
-        if term_freq > 0:
-            # Simplified IDF (assumes term appears in corpus)
-            idf = 1.0
-            tf = (term_freq * (k1 + 1)) / (term_freq + k1 * (1 - b + b * (doc_len / avg_doc_len)))
-            score += idf * tf
-
-    return score
+    return LexicalIndex(k1=k1, b=b).score_text(query, document)
 
 
 class ChromaStore:
@@ -247,49 +235,50 @@ class ChromaStore:
                 query_embeddings=[normalized_query_embedding],
                 where=where if where else None,
                 n_results=n_results,
+                include=["documents", "metadatas", "distances"],
             )
 
             if not results or not results["ids"] or not results["ids"][0]:
                 return []
 
-            chunks_with_scores: list[tuple[Chunk, float, str]] = []
-
             # Type narrowing: ensure we have the expected lists
             result_ids = results["ids"][0] if results["ids"] else []
             result_distances = results["distances"][0] if results.get("distances") else []
             result_documents = results["documents"][0] if results.get("documents") else None
+            result_metadatas = results["metadatas"][0] if results.get("metadatas") else None
 
+            # ChromaDB returns distance, convert to similarity
+            hits: list[tuple[int, str, float]] = []
             for i, chunk_id in enumerate(result_ids):
-                # ChromaDB returns distance, convert to similarity
                 if i >= len(result_distances):
                     break
-                distance = 1 - result_distances[i]
-                if distance < min_similarity:
-                    continue
-
-                # Fetch full chunk from SQLite ORM
-                stmt = select(ChunkORM).where(ChunkORM.id == chunk_id)
-                result = await self._session.execute(stmt)
-                chunk_orm = result.scalar_one_or_none()
+                similarity = 1 - result_distances[i]
+                if similarity >= min_similarity:
+                    hits.append((i, chunk_id, similarity))
+
+            # Trust the text and metadata stored in the collection; only hits
+            # without a usable payload are hydrated from SQLite.
+            payload_chunks: dict[str, Chunk] = {}
+            for i, chunk_id, _similarity in hits:
+                document = result_documents[i] if result_documents is not None else None
+                metadata = result_metadatas[i] if result_metadatas is not None else None
+                chunk = self._chunk_from_payload(chunk_id, document, metadata)
+                if chunk is not None:
+                    payload_chunks[chunk_id] = chunk
+
+            chunks_by_id = await self._hydrate_chunks(
+                [chunk_id for _i, chunk_id, _similarity in hits],
+                trusted=payload_chunks,
+            )
 
-                if not chunk_orm:
+            chunks_with_scores: list[tuple[Chunk, float, str]] = []
+            for i, chunk_id, similarity in hits:
+                chunk = chunks_by_id.get(chunk_id)
+                if chunk is None:
                     continue
-
-                metadata_dict = json.loads(chunk_orm.metadados)
-                chunk_meta = ChunkMetadata(**metadata_dict)
-
-                chunk = Chunk(
-                    chunk_id=chunk_orm.id,
-                    documento_id=chunk_orm.documento_id,
-                    texto=chunk_orm.texto,
-                    metadados=chunk_meta,
-                    token_count=chunk_orm.token_count,
-                    posicao_documento=0.0,
-                )
-
                 # Use stored document text or fetch from ORM
-                text = result_documents[i] if result_documents is not None else chunk_orm.texto
-                chunks_with_scores.append((chunk, distance, text))
+                text = result_documents[i] if result_documents is not None else chunk.texto
+                chunks_with_scores.append((chunk, similarity, text))
 
             # Apply BM25 reranking if hybrid search enabled and query text provided
             if (
@@ -297,7 +286,10 @@ class ChromaStore:
                 and query_text
                 and chunks_with_scores
             ):
-                chunks_with_scores = self._bm25_rerank(query_text, chunks_with_scores)
+                lexical_scores = await self._lexical_scores(query_text, chunks_with_scores)
+                chunks_with_scores = self._bm25_rerank(
+                    query_text, chunks_with_scores, lexical_scores
+                )
             else:
                 # Sort by vector similarity descending
                 chunks_with_scores.sort(key=lambda x: x[1], reverse=True)
@@ -322,6 +314,80 @@ class ChromaStore:
             )
             raise APIError(f"ChromaDB search failed: {e}") from e
 
+    async def _hydrate_chunks(
+        self, chunk_ids: list[str], trusted: dict[str, Chunk]
+    ) -> dict[str, Chunk]:
+        """Resolve search hits against SQLite with one `IN (...)` query per batch.
+
+        Chunks in `trusted` are only checked for existence (the collection is
+        never pruned, so stale entries must still be dropped); the others are
+        loaded and decoded from their ORM rows.
+        """
+        chunks_by_id: dict[str, Chunk] = {}
+        for start in range(0, len(chunk_ids), _HYDRATE_BATCH_SIZE):
+            batch = chunk_ids[start : start + _HYDRATE_BATCH_SIZE]
+            trusted_ids = [chunk_id for chunk_id in batch if chunk_id in trusted]
+            pending_ids = [chunk_id for chunk_id in batch if chunk_id not in trusted]
+
+            if trusted_ids:
+                result = await self._session.execute(
+                    select(ChunkORM.id).where(ChunkORM.id.in_(trusted_ids))
+                )
+                for chunk_id in result.scalars():
+                    chunks_by_id[chunk_id] = trusted[chunk_id]
+
+            if pending_ids:
+                result = await self._session.execute(
+                    select(ChunkORM).where(ChunkORM.id.in_(pending_ids))
+                )
+                for chunk_orm in result.scalars():
+                    chunks_by_id[chunk_orm.id] = Chunk(
+                        chunk_id=chunk_orm.id,
+                        documento_id=chunk_orm.documento_id,
+                        texto=chunk_orm.texto,
+                        metadados=ChunkMetadata(**json.loads(chunk_orm.metadados)),
+                        token_count=chunk_orm.token_count,
+                        posicao_documento=0.0,
+                    )
+        return chunks_by_id
+
+    @staticmethod
+    def _chunk_from_payload(
+        chunk_id: str, document: str | None, metadata: dict[str, Any] | None
+    ) -> Chunk | None:
+        """Rebuild a chunk from the document and metadata written by `add_embeddings`.
+
+        Returns None when the payload cannot be decoded losslessly (missing
+        fields, or extra metadata keys whose original type was not recorded).
+        """
+        if document is None or not metadata:
+            return None
+        if "documento_id" not in metadata or "token_count" not in metadata:
+            return None
+
+        fields = ChunkMetadata.model_fields
+        values: dict[str, Any] = {}
+        try:
+            for key, value in metadata.items():
+                if key in ("documento_id", "token_count"):
+                    continue
+                if key not in fields:
+                    return None
+                if key in _LIST_METADATA_FIELDS and isinstance(value, str):
+                    value = json.loads(value)
+                values[key] = value
+
+            return Chunk(
+                chunk_id=chunk_id,
+                documento_id=int(metadata["documento_id"]),
+                texto=document,
+                metadados=ChunkMetadata(**values),
+                token_count=int(metadata["token_count"]),
+                posicao_documento=0.0,
+            )
+        except (ValueError, TypeError):
+            return None
+
     @staticmethod
     def _normalize_query_embedding(
         query_embedding: list[float] | bytes | bytearray | memoryview | np.ndarray,
@@ -335,8 +401,28 @@ class ChromaStore:
 
         return [float(value) for value in query_embedding]
 
-    def _bm25_rerank(
+    async def _lexical_scores(
         self, query: str, chunks: list[tuple[Chunk, float, str]]
+    ) -> list[float]:
+        """BM25 scores from the corpus lexical index (standalone BM25 when disabled)."""
+        lexical_index = get_lexical_index(self._session)
+        if lexical_index is None:
+            return [bm25_score(query, text) for _chunk, _score, text in chunks]
+
+        await lexical_index.ensure_loaded(self._session)
+        indexed = lexical_index.score_chunks(query, [chunk.chunk_id for chunk, _, _ in chunks])
+        return [
+            indexed[chunk.chunk_id]
+            if chunk.chunk_id in indexed
+            else lexical_index.score_text(query, text)
+            for chunk, _score, text in chunks
+        ]
+
+    def _bm25_rerank(
+        self,
+        query: str,
+        chunks: list[tuple[Chunk, float, str]],
+        bm25_scores: list[float] | None = None,
     ) -> list[tuple[Chunk, float, str]]:
         """Rerank chunks using BM25 lexical score.
 
@@ -345,10 +431,8 @@ class ChromaStore:
         reranked: list[tuple[Chunk, float, str]] = []
 
         # Find max BM25 for normalization
-        bm25_scores: list[float] = []
-        for _chunk, _vector_score, text in chunks:
-            bm25 = bm25_score(query, text)
-            bm25_scores.append(bm25)
+        if bm25_scores is None:
+            bm25_scores = [bm25_score(query, text) for _chunk, _vector_score, text in chunks]
 
         max_bm25 = max(bm25_scores) if bm25_scores else 1.0
         if max_bm25 == 0:
@@ -0,0 +1,68 @@
+"""Corpus generation counter shared by every process using the database."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.rag_models import CorpusStateORM, DocumentORM
+
+_STATE_ID = 1
+
+
+async def read_corpus_generation(session: AsyncSession) -> int:
+    """
+    Read the current corpus generation (0 before the first write).
+
+    One primary-key lookup, cheap enough to run before every cached search.
+    """
+    stmt = select(CorpusStateORM.generation).where(CorpusStateORM.id == _STATE_ID)
+    generation = (await session.execute(stmt)).scalar_one_or_none()
+    return int(generation or 0)
+
+
+async def bump_corpus_generation(session: AsyncSession) -> None:
+    """
+    Increment the corpus generation inside the caller's transaction.
+
+    Call before committing any change to `rag_chunks`, so the new generation
+    becomes visible atomically with the rows that caused it.
+    """
+    result = await session.execute(
+        update(CorpusStateORM)
+        .where(CorpusStateORM.id == _STATE_ID)
+        .values(generation=CorpusStateORM.generation + 1)
+    )
+    if result.rowcount == 0:
+        session.add(CorpusStateORM(id=_STATE_ID, generation=1))
+        await session.flush()
+
+
+async def read_document_versions(
+    session: AsyncSession,
+    documento_ids: Iterable[int] | None = None,
+) -> dict[int, str | None]:
+    """
+    Read the content hash of documents, keyed by document id.
+
+    Args:
+        session: Database session
+        documento_ids: Documents to read (all documents when None)
+
+    Returns:
+        Content hash per existing document (None for documents ingested
+        without one); ids that no longer exist are absent
+    """
+    stmt = select(DocumentORM.id, DocumentORM.content_hash)
+    if documento_ids is not None:
+        ids = sorted(set(documento_ids))
+        if not ids:
+            return {}
+        stmt = stmt.where(DocumentORM.id.in_(ids))
+    rows = (await session.execute(stmt)).all()
+    return {int(row.id): row.content_hash for row in rows}
+
+
+__all__ = ["bump_corpus_generation", "read_corpus_generation", "read_document_versions"]
@@ -0,0 +1,256 @@
+"""Content-addressed, persistent cache of embedding vectors."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+
+from ...config.settings import get_settings
+
+log = structlog.get_logger(__name__)
+
+# Max wait for another process' write lock (ingestion vs. bot) before giving up
+_SQLITE_BUSY_TIMEOUT_MS = 200
+# Host parameters per IN (...) lookup; stays under SQLite's historical 999 limit
+_LOOKUP_CHUNK = 500
+# Entries removed per trim once the store outgrows max_entries
+_TRIM_SLACK = 0.1
+
+
+@dataclass(slots=True)
+class EmbeddingCacheStats:
+    """Counters of the persistent embedding cache."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Hits over lookups (0-1)."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters plus hit rate, for stats endpoints and logs."""
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for addressing: NFC, whitespace collapsed and trimmed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(text: str) -> bytes:
+    """SHA-256 of the normalized text (the model is a separate key column)."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingCacheStore:
+    """
+    Embeddings keyed by (model, normalized text hash) in a local SQLite file.
+
+    Vectors are stored as raw float32 blobs (6 KiB at 1536 dims), so the
+    store holds far more entries than an in-memory list of Python floats and
+    survives restarts. Every process on the host (bot, ingestion scripts)
+    opens the same file in WAL mode. Failures are counted and reported as
+    misses: a broken cache only costs the API round-trip it would have saved.
+    """
+
+    def __init__(self, path: Path | str, max_entries: int = 500_000) -> None:
+        """
+        Initialize the store; the file is opened on first use.
+
+        Args:
+            path: SQLite file shared by all processes
+            max_entries: Entries kept before trimming the least recently written
+        """
+        self._path = Path(path)
+        self._max_entries = max_entries
+        self._writes_since_trim = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._stats = EmbeddingCacheStats()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the file and create the table on first use (caller holds the lock)."""
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path,
+                timeout=_SQLITE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rag_embedding_cache ("
+                " model TEXT NOT NULL,"
+                " text_hash BLOB NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " written_at REAL NOT NULL,"
+                " PRIMARY KEY (model, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_rag_embedding_cache_written_at"
+                " ON rag_embedding_cache (written_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, texts: Sequence[str]) -> list[list[float] | None]:
+        """
+        Look up embeddings for `texts`, in one query per chunk of texts.
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up (duplicates allowed)
+
+        Returns:
+            One vector per text (same order), None for misses
+        """
+        hashes = [content_hash(text) for text in texts]
+        found: dict[bytes, list[float]] = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                unique = list(dict.fromkeys(hashes))
+                for start in range(0, len(unique), _LOOKUP_CHUNK):
+                    chunk = unique[start : start + _LOOKUP_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        "SELECT text_hash, vector FROM rag_embedding_cache"
+                        f" WHERE model = ? AND text_hash IN ({placeholders})",
+                        (model, *chunk),
+                    ).fetchall()
+                    for text_hash, vector in rows:
+                        found[text_hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+        except Exception as e:
+            self._stats.errors += 1
+            log.warning(
+                "rag_embedding_cache_error",
+                operation="get",
+                error=str(e),
+                event_name="rag_embedding_cache_error",
+            )
+
+        results = [found.get(text_hash) for text_hash in hashes]
+        hits = sum(1 for vector in results if vector is not None)
+        self._stats.hits += hits
+        self._stats.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, items: Sequence[tuple[str, Sequence[float]]]) -> None:
+        """
+        Store embeddings in a single transaction.
+
+        Args:
+            model: Embedding model name
+            items: (text, vector) pairs; zero vectors of blank texts are skipped
+        """
+        now = time.time()
+        rows = [
+            (
+                model,
+                content_hash(text),
+                len(vector),
+                np.asarray(vector, dtype=np.float32).tobytes(),
+                now,
+            )
+            for text, vector in items
+            if text and text.strip()
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO rag_embedding_cache"
+                        " (model, text_hash, dim, vector, written_at) VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._writes_since_trim += len(rows)
+                    if self._writes_since_trim >= max(1, int(self._max_entries * _TRIM_SLACK)):
+                        self._writes_since_trim = 0
+                        self._trim(conn)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            self._stats.errors += 1
+            log.warning(
+                "rag_embedding_cache_error",
+                operation="put",
+                error=str(e),
+                event_name="rag_embedding_cache_error",
+            )
+            return
+        self._stats.writes += len(rows)
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """Drop the oldest entries beyond max_entries."""
+        conn.execute(
+            "DELETE FROM rag_embedding_cache WHERE (model, text_hash) IN ("
+            " SELECT model, text_hash FROM rag_embedding_cache"
+            " ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+    @property
+    def stats(self) -> EmbeddingCacheStats:
+        """Live counters of this store."""
+        return self._stats
+
+    def close(self) -> None:
+        """Close the connection to the cache file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_STORES: dict[str, EmbeddingCacheStore] = {}
+
+
+def get_embedding_cache_store() -> EmbeddingCacheStore | None:
+    """
+    Return the process-wide embedding cache, or None when it is disabled.
+
+    Every EmbeddingService built with it (agent, query service, ingestion)
+    shares one connection and one set of counters.
+    """
+    config = get_settings().rag.embedding_cache
+    if not config.enabled:
+        return None
+    store = _STORES.get(config.path)
+    if store is None:
+        store = EmbeddingCacheStore(config.path, max_entries=config.max_entries)
+        _STORES[config.path] = store
+    return store
+
+
+__all__ = [
+    "EmbeddingCacheStats",
+    "EmbeddingCacheStore",
+    "content_hash",
+    "get_embedding_cache_store",
+    "normalize_text",
+]
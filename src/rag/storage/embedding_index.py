@@ -0,0 +1,1046 @@
+"""Process-resident embedding matrix for the SQLite vector store."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...config.settings import ANNConfig, VectorCompressionConfig, get_settings
+from ...models.rag_models import ChunkORM
+from .corpus_state import read_corpus_generation
+from .embedding_segments import (
+    CorpusFingerprint,
+    EmbeddingSegmentStore,
+    get_embedding_segment_store,
+)
+from .ivf_index import IVFPartition
+from .metadata_bitmaps import MetadataBitmaps
+from .quantization import VectorQuantizer, build_quantizer, load_quantizer, save_quantizer
+
+log = structlog.get_logger(__name__)
+
+EmbeddingPayload = bytes | bytearray | memoryview | list[float] | np.ndarray
+
+# Growth factor used when appending rows beyond the current matrix capacity
+_GROWTH_FACTOR = 1.5
+# Compact the matrix once tombstones exceed this fraction of allocated rows
+_COMPACTION_RATIO = 0.25
+# Chunk ids per `IN (...)` query when refreshing metadata bitmaps
+_METADATA_BATCH_SIZE = 500
+
+
+def as_unit_vector(embedding: EmbeddingPayload) -> np.ndarray:
+    """Convert a stored or in-memory embedding into a L2-normalized float32 row."""
+    if isinstance(embedding, (bytes, bytearray, memoryview)):
+        vector = np.frombuffer(embedding, dtype=np.float32).astype(np.float32, copy=True)
+    else:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1).copy()
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class EmbeddingIndex:
+    """
+    Pre-normalized float32 embedding matrix with a parallel chunk-id array.
+
+    The matrix is loaded once per database engine and kept in sync with
+    ingestion through incremental upserts/removals, so a search is a single
+    matrix-vector product over resident memory instead of a full table scan.
+    Removed rows become tombstones and are compacted in bulk.
+
+    When an `EmbeddingSegmentStore` in sync with the table is available, the
+    matrix is memory-mapped from its segment files instead of decoding blobs;
+    the mapping is copied into private memory only on the first local write.
+
+    With ANN enabled and enough rows, an `IVFPartition` assigns every row to an
+    inverted list; `nearest` scores only the probed lists exactly and falls back
+    to the full scan when the shortlist cannot fill `k` (e.g. narrow filters).
+
+    With compression enabled, rows are also encoded (int8 or PQ) and candidates
+    are ranked by asymmetric distance over the codes before a float32 re-rank.
+    The trained quantizer is persisted like the IVF partition, so restarts only
+    re-encode rows instead of retraining codebooks.
+    Combined with mapped segments, only re-ranked float32 pages become resident.
+
+    Boolean/categorical metadata (`BITMAP_KEYS`) is kept in `MetadataBitmaps`
+    aligned with the rows, so those filters become a row mask without SQL.
+    Rows written through `upsert` are re-read from `metadados` on the next
+    `ensure_loaded`.
+    """
+
+    def __init__(
+        self,
+        segment_store: EmbeddingSegmentStore | None = None,
+        ann_config: ANNConfig | None = None,
+        ann_path: Path | None = None,
+        compression_config: VectorCompressionConfig | None = None,
+        compression_path: Path | None = None,
+    ) -> None:
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            segment_store: Optional on-disk segments to load the matrix from
+            ann_config: Optional IVF configuration (None disables ANN search)
+            ann_path: Where the trained IVF partition is persisted
+            compression_config: Optional compressed-code configuration
+            compression_path: Where the trained quantizer is persisted
+        """
+        self._segment_store = segment_store
+        self._ann_config = ann_config
+        self._ann_path = ann_path
+        self._ivf: IVFPartition | None = None
+        self._ann_stats = {"queries": 0, "fallbacks": 0, "recall_samples": 0, "recall_sum": 0.0}
+        self._rng = np.random.default_rng()
+        self._compression_config = compression_config
+        self._compression_path = compression_path
+        self._quantizer: VectorQuantizer | None = None
+        self._codes = np.zeros((0, 0), dtype=np.int8)
+        self._bitmaps = MetadataBitmaps()
+        self._metadata_stale: set[str] = set()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._size = 0
+        self._dim: int | None = None
+        self._loaded = False
+        self._fingerprint: CorpusFingerprint | None = None
+        self._lock = asyncio.Lock()
+        # Row writes so far (a build run off the event loop is dropped if they change)
+        self._mutations = 0
+        # Whether a quantizer or IVF partition is being built in a worker thread
+        self._deriving = False
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the matrix has been loaded from the database."""
+        return self._loaded
+
+    @property
+    def dim(self) -> int | None:
+        """Embedding dimension, or None while the index is empty."""
+        return self._dim
+
+    @property
+    def size(self) -> int:
+        """Number of allocated rows (live rows plus tombstones)."""
+        return self._size
+
+    @property
+    def fingerprint(self) -> CorpusFingerprint | None:
+        """Corpus generation the loaded rows correspond to."""
+        return self._fingerprint
+
+    def __len__(self) -> int:
+        """Number of live rows."""
+        return len(self._positions)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """
+        Load the matrix on first use and reload it when the table changed externally.
+
+        Writers in this process keep the index in sync through `apply_changes`.
+        Writers in other processes (ingestion scripts, CLI) are detected through
+        the corpus generation, which every write to `rag_chunks` bumps; reading it
+        is a single primary-key lookup. Row counts or rowids would miss a document
+        re-ingested in place, since SQLite reuses the freed rowids.
+
+        The quantizer and the IVF partition are trained (or loaded) in a worker
+        thread so the event loop keeps serving; searches issued meanwhile use
+        the exact scan.
+        """
+        fingerprint = await read_corpus_fingerprint(session)
+        if (
+            self._loaded
+            and fingerprint == self._fingerprint
+            and (self._deriving or not self._derived_pending())
+            and not self._metadata_stale
+        ):
+            return
+
+        async with self._lock:
+            if self._loaded and fingerprint == self._fingerprint:
+                if self._metadata_stale:
+                    pending = list(self._metadata_stale)
+                    self._metadata_stale.difference_update(pending)
+                    await self._load_metadata(session, pending)
+                await self._prepare_compression_in_thread()
+                await self._prepare_ann_in_thread()
+                return
+            if not self._load_segments(fingerprint):
+                await self._load(session)
+            await self._load_metadata(session)
+            self._fingerprint = fingerprint
+            self._clear_compression()
+            await self._prepare_compression_in_thread()
+            self._clear_ann()
+            await self._prepare_ann_in_thread()
+
+    async def apply_changes(
+        self,
+        session: AsyncSession,
+        *,
+        removed_ids: Iterable[str] = (),
+        upserts: Iterable[tuple[str, EmbeddingPayload | None]] = (),
+    ) -> None:
+        """
+        Apply committed chunk changes to a loaded index.
+
+        No-op when the index was never loaded in this process. Each call publishes
+        one commit, which bumped the corpus generation once; when the generation
+        moved further, another process wrote meanwhile and the index is marked
+        stale so the next search reloads it.
+        """
+        if not self._loaded:
+            return
+        removed_ids = list(removed_ids)
+        upserts = list(upserts)
+        if not removed_ids and not upserts:
+            return
+
+        self.remove(removed_ids)
+        self.upsert(upserts)
+
+        fingerprint = await read_corpus_fingerprint(session)
+        if self._fingerprint is not None and fingerprint - self._fingerprint in (0, 1):
+            self._fingerprint = fingerprint
+        else:
+            log.warning(
+                "rag_embedding_index_out_of_sync",
+                index_generation=self._fingerprint,
+                corpus_generation=fingerprint,
+                event_name="rag_embedding_index_out_of_sync",
+            )
+            self.invalidate()
+
+    def upsert(self, items: Iterable[tuple[str, EmbeddingPayload | None]]) -> None:
+        """Insert or overwrite rows; items without embedding are removed instead."""
+        for chunk_id, embedding in items:
+            if embedding is None:
+                self.remove([chunk_id])
+                continue
+
+            vector = as_unit_vector(embedding)
+            if self._dim is None:
+                self._dim = int(vector.shape[0])
+                self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+            if vector.shape[0] != self._dim:
+                log.warning(
+                    "rag_embedding_index_dim_mismatch",
+                    chunk_id=chunk_id,
+                    expected_dim=self._dim,
+                    actual_dim=int(vector.shape[0]),
+                    event_name="rag_embedding_index_dim_mismatch",
+                )
+                continue
+
+            self._ensure_writable()
+            self._mutations += 1
+            position = self._positions.get(chunk_id)
+            if position is None:
+                position = self._append_row()
+                self._ids[position] = chunk_id
+                self._positions[chunk_id] = position
+                self._alive[position] = True
+            self._matrix[position] = vector
+            self._bitmaps.clear_row(position)
+            self._metadata_stale.add(chunk_id)
+            if self._ivf is not None:
+                self._lists[position] = self._ivf.assign(vector[np.newaxis, :])[0]
+            if self._quantizer is not None:
+                self._codes[position] = self._quantizer.encode(vector[np.newaxis, :])[0]
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """Tombstone rows by chunk id, compacting when too many accumulate."""
+        for chunk_id in chunk_ids:
+            position = self._positions.pop(chunk_id, None)
+            if position is None:
+                continue
+            self._ensure_writable()
+            self._mutations += 1
+            self._alive[position] = False
+            self._matrix[position] = 0.0
+            self._bitmaps.clear_row(position)
+            self._metadata_stale.discard(chunk_id)
+
+        if self._size and (self._size - len(self._positions)) > self._size * _COMPACTION_RATIO:
+            self._compact()
+
+    def clear(self) -> None:
+        """Drop all rows but keep the index marked as loaded (empty corpus)."""
+        self._reset_storage()
+
+    def invalidate(self) -> None:
+        """Force a full reload on next use."""
+        self._loaded = False
+        self._fingerprint = None
+
+    def position_of(self, chunk_id: str) -> int | None:
+        """Row position of a chunk id, or None when absent."""
+        return self._positions.get(chunk_id)
+
+    def chunk_id_at(self, position: int) -> str:
+        """Chunk id stored at a row position."""
+        return self._ids[position]
+
+    def mask_for(self, chunk_ids: Iterable[str]) -> np.ndarray:
+        """Build a boolean row mask selecting the given chunk ids."""
+        mask = np.zeros(self._size, dtype=bool)
+        positions = [
+            position
+            for position in (self._positions.get(chunk_id) for chunk_id in chunk_ids)
+            if position is not None
+        ]
+        if positions:
+            mask[np.asarray(positions, dtype=np.intp)] = True
+        return mask
+
+    def metadata_mask(self, filters: dict[str, Any]) -> np.ndarray:
+        """
+        Row mask for bitmap-answerable filters (see `split_bitmap_filters`).
+
+        Call after `ensure_loaded` so rows written since the last load are encoded.
+        """
+        return self._bitmaps.mask(filters, self._size)
+
+    def similarities(self, query_embedding: Any, mask: np.ndarray | None = None) -> np.ndarray:
+        """
+        Cosine similarity of the query against every row (one GEMV).
+
+        Tombstoned rows and rows outside `mask` score -inf.
+        """
+        if self._size == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        query_vector = self._query_vector(query_embedding)
+        scores = self._matrix[: self._size] @ query_vector
+        scores[~self._eligible(mask)] = -np.inf
+        return scores
+
+    def nearest(
+        self,
+        query_embedding: Any,
+        k: int,
+        mask: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best k eligible rows for the query, using IVF probing when available.
+
+        Candidates (the IVF shortlist, or every eligible row) are scored against
+        compressed codes when a quantizer is active, and the best `k *
+        rerank_factor` are re-scored exactly against the float32 rows. When the
+        IVF shortlist holds fewer than k eligible rows the search falls back to
+        the full scan.
+
+        Returns:
+            (positions, scores) sorted by score descending
+        """
+        empty = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32))
+        if self._size == 0 or k <= 0:
+            return empty
+
+        query_vector = self._query_vector(query_embedding)
+        eligible = self._eligible(mask)
+
+        candidates: np.ndarray | None = None
+        if self._ivf is not None and self._ann_config is not None:
+            probed_lists = self._ivf.probe(query_vector, self._ann_config.nprobe)
+            probed = np.zeros(self._ivf.n_lists, dtype=bool)
+            probed[probed_lists] = True
+            lists = self._lists[: self._size]
+            in_probed = np.where(lists >= 0, probed[np.maximum(lists, 0)], True)
+            shortlist = np.flatnonzero(eligible & in_probed)
+
+            self._ann_stats["queries"] += 1
+            if shortlist.size >= k:
+                candidates = shortlist
+            else:
+                self._ann_stats["fallbacks"] += 1
+
+        positions, scores = self._rank(query_vector, eligible, candidates, k)
+
+        approximate = candidates is not None or self._quantizer is not None
+        if (
+            approximate
+            and self._ann_config is not None
+            and self._rng.random() < self._ann_config.recall_sample_rate
+        ):
+            self._sample_recall(query_vector, eligible, positions, k)
+        return positions, scores
+
+    def score_chunks(
+        self,
+        query_embedding: Any,
+        chunk_ids: Iterable[str],
+        mask: np.ndarray | None = None,
+    ) -> dict[str, float]:
+        """Exact cosine scores for specific eligible chunk ids (e.g. lexical hits)."""
+        positions = [
+            position
+            for position in (self._positions.get(chunk_id) for chunk_id in chunk_ids)
+            if position is not None and (mask is None or mask[position])
+        ]
+        if not positions:
+            return {}
+
+        query_vector = self._query_vector(query_embedding)
+        rows = np.asarray(positions, dtype=np.intp)
+        scores = self._matrix[rows] @ query_vector
+        return {
+            self._ids[position]: float(score)
+            for position, score in zip(positions, scores, strict=True)
+        }
+
+    def ann_stats(self) -> dict[str, Any]:
+        """IVF usage counters and sampled recall@k against the exact scan."""
+        samples = self._ann_stats["recall_samples"]
+        return {
+            "active": self._ivf is not None,
+            "n_lists": self._ivf.n_lists if self._ivf is not None else 0,
+            "nprobe": self._ann_config.nprobe if self._ann_config is not None else 0,
+            "queries": self._ann_stats["queries"],
+            "fallbacks": self._ann_stats["fallbacks"],
+            "recall_samples": samples,
+            "mean_recall": self._ann_stats["recall_sum"] / samples if samples else None,
+        }
+
+    def rebuild_derived(self) -> None:
+        """Retrain compressed codes and the IVF partition for the current rows."""
+        self._prepare_compression()
+        self._prepare_ann()
+
+    def memory_stats(self) -> dict[str, Any]:
+        """Bytes held by float32 rows and compressed codes."""
+        return {
+            "rows": len(self),
+            "float32_bytes": int(self._size * (self._dim or 0) * 4),
+            "float32_mapped": isinstance(self._matrix, np.memmap),
+            "compression": (
+                self._compression_config.mode if self._quantizer is not None else "none"
+            ),
+            "code_bytes": (
+                int(self._size * self._quantizer.bytes_per_vector)
+                if self._quantizer is not None
+                else 0
+            ),
+        }
+
+    def live_rows(self) -> tuple[list[str], np.ndarray]:
+        """Live chunk ids and their (normalized) rows, in position order."""
+        live = np.flatnonzero(self._alive[: self._size])
+        return [self._ids[pos] for pos in live], np.ascontiguousarray(self._matrix[live])
+
+    @staticmethod
+    def top_positions(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k best finite scores, sorted descending."""
+        finite = np.flatnonzero(np.isfinite(scores))
+        if finite.size == 0 or k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        if finite.size > k:
+            partition = np.argpartition(scores[finite], -k)[-k:]
+            finite = finite[partition]
+        order = np.argsort(-scores[finite], kind="stable")
+        return finite[order]
+
+    async def _load(self, session: AsyncSession) -> None:
+        """Load every stored embedding (id + blob only, no ORM hydration)."""
+        stmt = select(ChunkORM.id, ChunkORM.embedding).where(ChunkORM.embedding.isnot(None))
+        rows = (await session.execute(stmt)).all()
+
+        self._reset_storage()
+        if rows:
+            dims: dict[int, int] = {}
+            for _, blob in rows:
+                row_dim = len(blob) // 4
+                dims[row_dim] = dims.get(row_dim, 0) + 1
+            self._dim = max(dims, key=lambda d: dims[d])
+            valid_rows = [
+                (chunk_id, blob) for chunk_id, blob in rows if len(blob) // 4 == self._dim
+            ]
+
+            matrix = np.frombuffer(
+                b"".join(blob for _, blob in valid_rows),
+                dtype=np.float32,
+            ).reshape(len(valid_rows), self._dim)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix = (matrix / norms).astype(np.float32)
+            self._ids = [str(chunk_id) for chunk_id, _ in valid_rows]
+            self._positions = {chunk_id: pos for pos, chunk_id in enumerate(self._ids)}
+            self._alive = np.ones(len(valid_rows), dtype=bool)
+            self._size = len(valid_rows)
+            self._bitmaps.resize(self._size)
+
+            skipped = len(rows) - len(valid_rows)
+            if skipped:
+                log.warning(
+                    "rag_embedding_index_dim_mismatch",
+                    skipped_rows=skipped,
+                    index_dim=self._dim,
+                    event_name="rag_embedding_index_dim_mismatch",
+                )
+
+        log.info(
+            "rag_embedding_index_loaded",
+            rows=self._size,
+            dim=self._dim,
+            memory_mb=round(self._matrix.nbytes / (1024 * 1024), 2),
+            event_name="rag_embedding_index_loaded",
+        )
+
+    async def _load_metadata(self, session: AsyncSession, chunk_ids: list[str] | None = None) -> None:
+        """Encode metadata bitmaps for the given rows (None = every row)."""
+        base = select(ChunkORM.id, ChunkORM.metadados).where(ChunkORM.embedding.isnot(None))
+        if chunk_ids is None:
+            statements = [base]
+        else:
+            statements = [
+                base.where(ChunkORM.id.in_(chunk_ids[start : start + _METADATA_BATCH_SIZE]))
+                for start in range(0, len(chunk_ids), _METADATA_BATCH_SIZE)
+            ]
+
+        for stmt in statements:
+            for chunk_id, metadados in (await session.execute(stmt)).all():
+                position = self._positions.get(chunk_id)
+                if position is None:
+                    continue
+                try:
+                    metadata = json.loads(metadados) if metadados else {}
+                except (TypeError, ValueError):
+                    metadata = {}
+                self._bitmaps.set_row(position, metadata if isinstance(metadata, dict) else {})
+
+    def _load_segments(self, fingerprint: CorpusFingerprint) -> bool:
+        """Map the matrix from segment files; False when they are absent or stale."""
+        if self._segment_store is None or self._segment_store.fingerprint() != fingerprint:
+            return False
+
+        snapshot = self._segment_store.load()
+        if snapshot is None:
+            return False
+
+        self._reset_storage()
+        if snapshot.ids:
+            self._dim = snapshot.dim
+            self._matrix = snapshot.matrix
+            self._ids = list(snapshot.ids)
+            self._positions = {chunk_id: pos for pos, chunk_id in enumerate(self._ids)}
+            self._alive = np.ones(len(self._ids), dtype=bool)
+            self._size = len(self._ids)
+            self._bitmaps.resize(self._size)
+
+        log.info(
+            "rag_embedding_index_mapped",
+            rows=self._size,
+            dim=self._dim,
+            zero_copy=snapshot.zero_copy,
+            path=str(self._segment_store.path),
+            event_name="rag_embedding_index_mapped",
+        )
+        return True
+
+    def _rank(
+        self,
+        query_vector: np.ndarray,
+        eligible: np.ndarray,
+        candidates: np.ndarray | None,
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k among candidates (None = every eligible row), exact float32 scores."""
+        if self._quantizer is not None and self._compression_config is not None:
+            if candidates is None:
+                approx = self._quantizer.scores(query_vector, self._codes[: self._size])
+                approx[~eligible] = -np.inf
+                shortlist = self.top_positions(approx, k * self._compression_config.rerank_factor)
+            else:
+                approx = self._quantizer.scores(query_vector, self._codes[candidates])
+                keep = self.top_positions(approx, k * self._compression_config.rerank_factor)
+                shortlist = candidates[keep]
+            candidates = shortlist
+
+        if candidates is not None:
+            exact = self._matrix[candidates] @ query_vector
+            order = self.top_positions(exact, k)
+            return candidates[order], exact[order]
+
+        scores = self._matrix[: self._size] @ query_vector
+        scores[~eligible] = -np.inf
+        positions = self.top_positions(scores, k)
+        return positions, scores[positions]
+
+    def _query_vector(self, query_embedding: Any) -> np.ndarray:
+        """Normalize the query and check it matches the index dimension."""
+        query_vector = as_unit_vector(query_embedding)
+        if query_vector.shape[0] != self._dim:
+            msg = (
+                f"Query embedding dimension {query_vector.shape[0]} does not match "
+                f"index dimension {self._dim}"
+            )
+            raise ValueError(msg)
+        return query_vector
+
+    def _eligible(self, mask: np.ndarray | None) -> np.ndarray:
+        """Live rows, optionally restricted to a filter mask."""
+        eligible = self._alive[: self._size]
+        if mask is not None:
+            eligible = eligible & mask
+        return eligible
+
+    def _sample_recall(
+        self,
+        query_vector: np.ndarray,
+        eligible: np.ndarray,
+        ann_positions: np.ndarray,
+        k: int,
+    ) -> None:
+        """Run the exact scan for this query and record recall@k of the IVF result."""
+        scores = self._matrix[: self._size] @ query_vector
+        scores[~eligible] = -np.inf
+        exact = self.top_positions(scores, k)
+        if exact.size == 0:
+            return
+        recall = np.intersect1d(exact, ann_positions).size / exact.size
+        self._ann_stats["recall_samples"] += 1
+        self._ann_stats["recall_sum"] += recall
+        log.debug(
+            "rag_ann_recall_sampled",
+            recall_at_k=round(recall, 4),
+            k=k,
+            event_name="rag_ann_recall_sampled",
+        )
+
+    def _derived_pending(self) -> bool:
+        """Whether an enabled IVF partition or quantizer still has to be built."""
+        return self._ann_pending() or self._compression_pending()
+
+    def _compression_pending(self) -> bool:
+        """Whether compression is enabled but no quantizer was trained yet."""
+        return (
+            self._quantizer is None
+            and self._compression_config is not None
+            and self._compression_config.mode != "none"
+            and len(self) > 0
+        )
+
+    def _prepare_compression(self) -> None:
+        """Attach a quantizer: reuse the persisted one or train and persist a new one."""
+        self._clear_compression()
+        if not self._compression_pending():
+            return
+        started = time.perf_counter()
+        _, matrix, live = self._live_snapshot()
+        built = self._build_codes(matrix, live, self._size)
+        if built is not None:
+            self._attach_codes(*built, live, started)
+
+    async def _prepare_compression_in_thread(self) -> None:
+        """
+        Same as `_prepare_compression`, with training and encoding in a worker thread.
+
+        Rows written while the thread runs make its codes stale; they are then
+        dropped and rebuilt (from the quantizer it persisted) on a later call.
+        """
+        if self._deriving or not self._compression_pending():
+            return
+        started = time.perf_counter()
+        mutations = self._mutations
+        _, matrix, live = self._live_snapshot()
+        self._deriving = True
+        try:
+            built = await asyncio.to_thread(self._build_codes, matrix, live, self._size)
+        finally:
+            self._deriving = False
+        if self._mutations != mutations:
+            log.info(
+                "rag_embedding_codes_superseded",
+                rows=int(live.size),
+                event_name="rag_embedding_codes_superseded",
+            )
+            return
+        if built is not None:
+            self._attach_codes(*built, live, started)
+
+    def _build_codes(
+        self,
+        matrix: np.ndarray,
+        live: np.ndarray,
+        size: int,
+    ) -> tuple[VectorQuantizer, np.ndarray, bool] | None:
+        """
+        Encode the first `size` rows, reusing the persisted quantizer when it fits.
+
+        Reads only the given snapshot (never the index's mutable state), so it
+        can run in a worker thread.
+
+        Returns:
+            (quantizer, codes sized to the matrix capacity, whether it was
+            trained), or None when the mode needs no quantizer
+        """
+        config = self._compression_config
+        if config is None:
+            msg = "Compression is not configured"
+            raise ValueError(msg)
+
+        quantizer: VectorQuantizer | None = None
+        if self._compression_path is not None:
+            quantizer = load_quantizer(
+                self._compression_path,
+                config.mode,
+                matrix.shape[1],
+                pq_subvectors=config.pq_subvectors,
+            )
+        trained = quantizer is None
+        if quantizer is None:
+            quantizer = build_quantizer(
+                config.mode,
+                matrix[live],
+                pq_subvectors=config.pq_subvectors,
+                pq_iterations=config.pq_iterations,
+                pq_train_sample_size=config.pq_train_sample_size,
+            )
+            if quantizer is None:
+                return None
+            if self._compression_path is not None:
+                try:
+                    save_quantizer(
+                        quantizer, self._compression_path, pq_subvectors=config.pq_subvectors
+                    )
+                except OSError as e:
+                    log.warning(
+                        "rag_quantizer_save_failed",
+                        path=str(self._compression_path),
+                        error=str(e),
+                        event_name="rag_quantizer_save_failed",
+                    )
+
+        codes = np.zeros((matrix.shape[0], quantizer.code_width), dtype=quantizer.code_dtype)
+        codes[:size] = quantizer.encode(matrix[:size])
+        return quantizer, codes, trained
+
+    def _attach_codes(
+        self,
+        quantizer: VectorQuantizer,
+        codes: np.ndarray,
+        trained: bool,
+        live: np.ndarray,
+        started: float,
+    ) -> None:
+        """Install a quantizer and the codes built for the current rows."""
+        self._quantizer = quantizer
+        self._codes = codes
+        log.info(
+            "rag_embedding_codes_ready",
+            mode=quantizer.mode,
+            rows=int(live.size),
+            bytes_per_vector=quantizer.bytes_per_vector,
+            code_mb=round(codes.nbytes / (1024 * 1024), 2),
+            trained=trained,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            event_name="rag_embedding_codes_ready",
+        )
+
+    def _clear_compression(self) -> None:
+        """Drop the quantizer and its codes."""
+        self._quantizer = None
+        self._codes = np.zeros((0, 0), dtype=np.int8)
+
+    def _ann_pending(self) -> bool:
+        """Whether ANN is enabled, the corpus is large enough and no partition exists."""
+        return (
+            self._ivf is None
+            and self._ann_config is not None
+            and self._ann_config.enabled
+            and len(self) >= self._ann_config.min_rows
+        )
+
+    def _prepare_ann(self) -> None:
+        """Attach an IVF partition: reuse the persisted one or train and persist a new one."""
+        self._clear_ann()
+        if not self._ann_pending():
+            return
+        started = time.perf_counter()
+        ids, matrix, live = self._live_snapshot()
+        partition, lists, trained = self._build_ann(ids, matrix, live)
+        self._attach_ann(partition, lists, live, trained, started)
+
+    async def _prepare_ann_in_thread(self) -> None:
+        """
+        Same as `_prepare_ann`, with the k-means work in a worker thread.
+
+        Rows written while the thread runs make its result stale; it is then
+        dropped and rebuilt (from the partition it persisted) on a later call.
+        """
+        if self._deriving or not self._ann_pending():
+            return
+        started = time.perf_counter()
+        mutations = self._mutations
+        ids, matrix, live = self._live_snapshot()
+        self._deriving = True
+        try:
+            partition, lists, trained = await asyncio.to_thread(
+                self._build_ann, ids, matrix, live
+            )
+        finally:
+            self._deriving = False
+        if self._mutations != mutations:
+            log.info(
+                "rag_ann_index_build_superseded",
+                rows=int(live.size),
+                event_name="rag_ann_index_build_superseded",
+            )
+            return
+        self._attach_ann(partition, lists, live, trained, started)
+
+    def _live_snapshot(self) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Ids of live rows, the matrix and the live row positions."""
+        live = np.flatnonzero(self._alive[: self._size])
+        return [self._ids[position] for position in live], self._matrix, live
+
+    def _build_ann(
+        self,
+        ids: list[str],
+        matrix: np.ndarray,
+        live: np.ndarray,
+    ) -> tuple[IVFPartition, np.ndarray, bool]:
+        """
+        Partition the live rows, reusing the persisted partition when it still fits.
+
+        Reads only the given snapshot (never the index's mutable state), so it
+        can run in a worker thread.
+
+        Returns:
+            (partition, list id of each live row, whether it was trained)
+        """
+        config = self._ann_config
+        if config is None:
+            msg = "ANN is not configured"
+            raise ValueError(msg)
+
+        lists = np.full(live.size, -1, dtype=np.int32)
+        partition: IVFPartition | None = None
+        loaded = IVFPartition.load(self._ann_path) if self._ann_path is not None else None
+        if loaded is not None and loaded[0].dim == matrix.shape[1]:
+            partition, assignments = loaded
+            missing = []
+            for row, chunk_id in enumerate(ids):
+                list_id = assignments.get(chunk_id)
+                if list_id is None or list_id >= partition.n_lists:
+                    missing.append(row)
+                else:
+                    lists[row] = list_id
+            if len(missing) > config.rebuild_drift_ratio * live.size:
+                partition = None
+            elif missing:
+                rows = np.asarray(missing, dtype=np.intp)
+                lists[rows] = partition.assign(matrix[live[rows]])
+
+        trained = partition is None
+        if partition is None:
+            rows = matrix[live]
+            n_lists = config.n_lists or max(1, round(float(np.sqrt(live.size))))
+            partition = IVFPartition.train(
+                rows,
+                n_lists,
+                iterations=config.kmeans_iterations,
+                sample_size=config.train_sample_size,
+            )
+            lists[:] = partition.assign(rows)
+            if self._ann_path is not None:
+                try:
+                    partition.save(self._ann_path, ids, lists)
+                except OSError as e:
+                    log.warning(
+                        "rag_ann_index_save_failed",
+                        path=str(self._ann_path),
+                        error=str(e),
+                        event_name="rag_ann_index_save_failed",
+                    )
+        return partition, lists, trained
+
+    def _attach_ann(
+        self,
+        partition: IVFPartition,
+        lists: np.ndarray,
+        live: np.ndarray,
+        trained: bool,
+        started: float,
+    ) -> None:
+        """Install a partition built for the current live rows."""
+        self._lists[live] = lists
+        self._ivf = partition
+        log.info(
+            "rag_ann_index_ready",
+            rows=int(live.size),
+            n_lists=partition.n_lists,
+            nprobe=self._ann_config.nprobe if self._ann_config is not None else 0,
+            trained=trained,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            event_name="rag_ann_index_ready",
+        )
+
+    def _clear_ann(self) -> None:
+        """Drop the IVF partition and size the row -> list array to the matrix."""
+        self._ivf = None
+        self._lists = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+
+    def _ensure_writable(self) -> None:
+        """Copy a read-only mapped matrix into private memory before mutating it."""
+        if not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix, dtype=np.float32)
+
+    def _reset_storage(self) -> None:
+        """Reset rows while keeping the index marked as loaded."""
+        self._mutations += 1
+        self._matrix = np.zeros((0, self._dim or 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._ivf = None
+        self._clear_compression()
+        self._bitmaps.reset()
+        self._metadata_stale.clear()
+        self._ids = []
+        self._positions = {}
+        self._size = 0
+        self._dim = None
+        self._loaded = True
+
+    def _append_row(self) -> int:
+        """Reserve a new row, growing the backing arrays geometrically."""
+        capacity = self._matrix.shape[0]
+        if self._size >= capacity:
+            new_capacity = max(16, int(capacity * _GROWTH_FACTOR) + 1)
+            matrix = np.zeros((new_capacity, self._dim or 0), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            alive = np.zeros(new_capacity, dtype=bool)
+            alive[: self._size] = self._alive[: self._size]
+            lists = np.full(new_capacity, -1, dtype=np.int32)
+            lists[: self._size] = self._lists[: self._size]
+            self._matrix = matrix
+            self._alive = alive
+            self._lists = lists
+            self._bitmaps.resize(new_capacity)
+            if self._quantizer is not None:
+                codes = np.zeros((new_capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+                codes[: self._size] = self._codes[: self._size]
+                self._codes = codes
+            self._ids.extend([""] * (new_capacity - len(self._ids)))
+
+        position = self._size
+        self._size += 1
+        return position
+
+    def _compact(self) -> None:
+        """Drop tombstoned rows and rebuild positions."""
+        live = np.flatnonzero(self._alive[: self._size])
+        self._matrix = np.ascontiguousarray(self._matrix[live])
+        self._alive = np.ones(live.size, dtype=bool)
+        self._lists = self._lists[live]
+        self._bitmaps.take(live)
+        if self._quantizer is not None:
+            self._codes = self._codes[live]
+        self._ids = [self._ids[pos] for pos in live]
+        self._positions = {chunk_id: pos for pos, chunk_id in enumerate(self._ids)}
+        self._size = int(live.size)
+
+
+async def read_corpus_fingerprint(session: AsyncSession) -> CorpusFingerprint:
+    """Read the fingerprint resident indexes and their files are validated against."""
+    return await read_corpus_generation(session)
+
+
+async def compact_embedding_segments(
+    session: AsyncSession,
+    segment_store: EmbeddingSegmentStore,
+) -> int:
+    """
+    Rebuild the segment files as a single segment from SQLite.
+
+    Drops superseded rows and tombstones, and brings stale segments (written
+    while segments were disabled or by a failed append) back in sync.
+
+    Returns:
+        Number of rows written
+    """
+    index = EmbeddingIndex()
+    await index.ensure_loaded(session)
+    ids, matrix = index.live_rows()
+    fingerprint = index.fingerprint
+    if fingerprint is None:
+        fingerprint = await read_corpus_fingerprint(session)
+    segment_store.rewrite(ids=ids, matrix=matrix, fingerprint=fingerprint)
+    return len(ids)
+
+
+def _database_sibling_path(engine: Any, suffix: str) -> Path | None:
+    """Path next to the SQLite database file, or None for other databases."""
+    url = getattr(engine, "url", None)
+    if url is None or url.get_backend_name() != "sqlite":
+        return None
+    database = url.database
+    if not database or database == ":memory:":
+        return None
+    return Path(f"{database}{suffix}")
+
+
+def _ann_index_path(engine: Any, config: ANNConfig) -> Path | None:
+    """Persist the IVF partition next to the SQLite database file."""
+    if config.index_path:
+        return Path(config.index_path)
+    return _database_sibling_path(engine, ".ivf.npz")
+
+
+def _compression_path(engine: Any, config: VectorCompressionConfig) -> Path | None:
+    """Persist the trained quantizer next to the SQLite database file."""
+    if config.index_path:
+        return Path(config.index_path)
+    return _database_sibling_path(engine, ".quantizer.npz")
+
+
+_INDEXES: WeakKeyDictionary[Any, EmbeddingIndex] = WeakKeyDictionary()
+
+
+def get_embedding_index(session: AsyncSession) -> EmbeddingIndex:
+    """
+    Return the process-wide embedding index for the session's database engine.
+
+    Indexes are keyed by engine so distinct databases (e.g. test fixtures) never
+    share rows, and are released when the engine is garbage collected.
+    """
+    bind = session.get_bind()
+    engine = getattr(bind, "engine", bind)
+    index = _INDEXES.get(engine)
+    if index is None:
+        rag_config = get_settings().rag
+        index = EmbeddingIndex(
+            segment_store=get_embedding_segment_store(),
+            ann_config=rag_config.ann,
+            ann_path=_ann_index_path(engine, rag_config.ann),
+            compression_config=rag_config.compression,
+            compression_path=_compression_path(engine, rag_config.compression),
+        )
+        _INDEXES[engine] = index
+    return index
+
+
+__all__ = [
+    "EmbeddingIndex",
+    "as_unit_vector",
+    "compact_embedding_segments",
+    "get_embedding_index",
+    "read_corpus_fingerprint",
+]
@@ -0,0 +1,335 @@
+"""Append-only, memory-mapped embedding segment files for the RAG corpus."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+
+from ...config.settings import get_settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: writers are not serialized
+    fcntl = None  # type: ignore[assignment]
+
+log = structlog.get_logger(__name__)
+
+SEGMENT_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+LOCK_FILE_NAME = "manifest.lock"
+
+# Corpus generation (see `corpus_state`) the files were written for
+CorpusFingerprint = int
+
+
+@dataclass(slots=True)
+class SegmentSnapshot:
+    """Live rows resolved from the segment files."""
+
+    ids: list[str]
+    matrix: np.ndarray
+    dim: int | None
+    zero_copy: bool
+
+
+class EmbeddingSegmentStore:
+    """
+    On-disk vector segments shared by every bot worker through the page cache.
+
+    Each segment is a contiguous raw float32 file (`segment_NNNNNN.f32`, rows
+    pre-normalized) plus an id sidecar (`segment_NNNNNN.ids.json`) whose list
+    position is the row offset. Segments are immutable once written; a manifest
+    records their order, the ids removed before each one, and the SQLite corpus
+    generation the files correspond to. SQLite remains the source of truth:
+    readers ignore the segments whenever that fingerprint no longer matches.
+
+    Writers in different processes (bot workers, ingestion scripts) take an
+    exclusive lock on `manifest.lock` around each manifest read-modify-write,
+    so concurrent appends never pick the same segment name or drop each
+    other's manifest entries. Readers need no lock: the manifest is replaced
+    atomically.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """
+        Initialize the segment store.
+
+        Args:
+            path: Directory holding segment files and the manifest
+        """
+        self._path = Path(path)
+
+    @property
+    def path(self) -> Path:
+        """Directory holding segment files."""
+        return self._path
+
+    def read_manifest(self) -> dict[str, Any] | None:
+        """Read the manifest, or None when no segment was ever written."""
+        manifest_path = self._path / MANIFEST_FILE_NAME
+        if not manifest_path.exists():
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(
+                "rag_embedding_segments_manifest_invalid",
+                path=str(manifest_path),
+                error=str(e),
+                event_name="rag_embedding_segments_manifest_invalid",
+            )
+            return None
+        if manifest.get("version") != SEGMENT_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def fingerprint(self) -> CorpusFingerprint | None:
+        """Corpus fingerprint the segments are valid for, or None when stale/absent."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        fingerprint = manifest.get("fingerprint")
+        # Manifests written before the generation was used hold [count, max_rowid]
+        return fingerprint if isinstance(fingerprint, int) else None
+
+    def append(
+        self,
+        *,
+        upserts: Iterable[tuple[str, np.ndarray]],
+        removed_ids: Iterable[str],
+        previous_fingerprint: CorpusFingerprint,
+        fingerprint: CorpusFingerprint,
+    ) -> None:
+        """
+        Append one segment with committed changes.
+
+        When the manifest was not in sync with `previous_fingerprint` (segments
+        missed earlier writes), the segment is still written but the manifest is
+        marked stale so readers fall back to SQLite until the next compaction.
+        """
+        with self._write_lock():
+            manifest = self.read_manifest()
+            if manifest is None:
+                manifest = self._empty_manifest(fingerprint=0)
+
+            rows = [
+                (chunk_id, np.asarray(vector, dtype=np.float32)) for chunk_id, vector in upserts
+            ]
+            removed = list(removed_ids)
+            dim = manifest.get("dim")
+            if rows:
+                row_dim = int(rows[0][1].shape[0])
+                if dim is None:
+                    dim = row_dim
+                rows = [(chunk_id, vector) for chunk_id, vector in rows if vector.shape[0] == dim]
+
+            in_sync = _same_fingerprint(manifest.get("fingerprint"), previous_fingerprint)
+            segment_name = self._next_segment_name(manifest)
+            self._write_segment(segment_name, rows)
+
+            manifest["dim"] = dim
+            manifest["segments"].append(
+                {"name": segment_name, "rows": len(rows), "removed": removed}
+            )
+            manifest["next_segment"] = int(manifest["next_segment"]) + 1
+            manifest["fingerprint"] = fingerprint if in_sync else None
+            self._write_manifest(manifest)
+
+        log.info(
+            "rag_embedding_segment_appended",
+            segment=segment_name,
+            rows=len(rows),
+            removed=len(removed),
+            in_sync=in_sync,
+            event_name="rag_embedding_segment_appended",
+        )
+
+    def rewrite(
+        self,
+        *,
+        ids: list[str],
+        matrix: np.ndarray,
+        fingerprint: CorpusFingerprint,
+    ) -> None:
+        """
+        Replace every segment with a single compacted one.
+
+        Old files are unlinked after the new manifest is in place; workers that
+        still map them keep reading the old inode until they reload.
+        """
+        with self._write_lock():
+            previous = self.read_manifest()
+            next_segment = int(previous["next_segment"]) if previous else 1
+
+            manifest = self._empty_manifest(fingerprint=fingerprint)
+            manifest["next_segment"] = next_segment
+            manifest["dim"] = int(matrix.shape[1]) if ids else None
+
+            segment_name = self._next_segment_name(manifest)
+            self._write_segment(segment_name, list(zip(ids, matrix, strict=True)))
+            manifest["segments"].append({"name": segment_name, "rows": len(ids), "removed": []})
+            manifest["next_segment"] = next_segment + 1
+            self._write_manifest(manifest)
+
+            if previous:
+                for segment in previous["segments"]:
+                    for file_path in self._segment_files(segment["name"]):
+                        file_path.unlink(missing_ok=True)
+
+        log.info(
+            "rag_embedding_segments_compacted",
+            segment=segment_name,
+            rows=len(ids),
+            event_name="rag_embedding_segments_compacted",
+        )
+
+    def load(self) -> SegmentSnapshot | None:
+        """
+        Resolve live rows across segments.
+
+        A single segment without superseded rows is returned as a read-only
+        `np.memmap` (zero-copy); otherwise live rows are gathered into memory.
+        """
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+
+        dim = manifest.get("dim")
+        segments: list[tuple[list[str], np.ndarray]] = []
+        live: dict[str, tuple[int, int]] = {}
+        for segment_index, segment in enumerate(manifest["segments"]):
+            for chunk_id in segment["removed"]:
+                live.pop(chunk_id, None)
+            ids, matrix = self._open_segment(segment["name"], int(segment["rows"]), dim)
+            segments.append((ids, matrix))
+            for row, chunk_id in enumerate(ids):
+                live[chunk_id] = (segment_index, row)
+
+        if not live or dim is None:
+            return SegmentSnapshot(
+                ids=[],
+                matrix=np.zeros((0, dim or 0), dtype=np.float32),
+                dim=dim,
+                zero_copy=False,
+            )
+
+        if len(segments) == 1 and len(live) == len(segments[0][0]):
+            ids, matrix = segments[0]
+            return SegmentSnapshot(ids=list(ids), matrix=matrix, dim=dim, zero_copy=True)
+
+        live_ids = list(live)
+        gathered = np.empty((len(live_ids), dim), dtype=np.float32)
+        for position, chunk_id in enumerate(live_ids):
+            segment_index, row = live[chunk_id]
+            gathered[position] = segments[segment_index][1][row]
+        return SegmentSnapshot(ids=live_ids, matrix=gathered, dim=dim, zero_copy=False)
+
+    def reset(self, fingerprint: CorpusFingerprint) -> None:
+        """Drop every segment (e.g. after a full reindex cleared the corpus)."""
+        self.rewrite(ids=[], matrix=np.zeros((0, 0), dtype=np.float32), fingerprint=fingerprint)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the cross-process manifest write lock."""
+        self._path.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with (self._path / LOCK_FILE_NAME).open("a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _empty_manifest(fingerprint: CorpusFingerprint | None) -> dict[str, Any]:
+        return {
+            "version": SEGMENT_FORMAT_VERSION,
+            "dim": None,
+            "fingerprint": fingerprint,
+            "segments": [],
+            "next_segment": 1,
+        }
+
+    @staticmethod
+    def _next_segment_name(manifest: dict[str, Any]) -> str:
+        return f"segment_{int(manifest['next_segment']):06d}"
+
+    def _segment_files(self, segment_name: str) -> tuple[Path, Path]:
+        return (
+            self._path / f"{segment_name}.f32",
+            self._path / f"{segment_name}.ids.json",
+        )
+
+    def _open_segment(
+        self,
+        segment_name: str,
+        rows: int,
+        dim: int | None,
+    ) -> tuple[list[str], np.ndarray]:
+        data_path, ids_path = self._segment_files(segment_name)
+        ids = json.loads(ids_path.read_text(encoding="utf-8"))
+        if rows == 0 or not dim:
+            return ids, np.zeros((0, dim or 0), dtype=np.float32)
+        matrix = np.memmap(data_path, dtype=np.float32, mode="r", shape=(rows, dim))
+        return ids, matrix
+
+    def _write_segment(self, segment_name: str, rows: list[tuple[str, np.ndarray]]) -> None:
+        self._path.mkdir(parents=True, exist_ok=True)
+        data_path, ids_path = self._segment_files(segment_name)
+        if rows:
+            matrix = np.ascontiguousarray(
+                np.vstack([vector for _, vector in rows]), dtype=np.float32
+            )
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        _atomic_write_bytes(data_path, matrix.tobytes())
+        _atomic_write_bytes(
+            ids_path,
+            json.dumps([chunk_id for chunk_id, _ in rows]).encode("utf-8"),
+        )
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        _atomic_write_bytes(
+            self._path / MANIFEST_FILE_NAME,
+            json.dumps(manifest, indent=2).encode("utf-8"),
+        )
+
+
+def _atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """Write a file atomically (temp file + rename) so readers never see partial data."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def _same_fingerprint(stored: Any, fingerprint: CorpusFingerprint) -> bool:
+    return isinstance(stored, int) and stored == fingerprint
+
+
+def get_embedding_segment_store() -> EmbeddingSegmentStore | None:
+    """Return the configured segment store, or None when segments are disabled."""
+    config = get_settings().rag.embedding_segments
+    if not config.enabled:
+        return None
+    return EmbeddingSegmentStore(config.path)
+
+
+__all__ = [
+    "CorpusFingerprint",
+    "EmbeddingSegmentStore",
+    "SegmentSnapshot",
+    "get_embedding_segment_store",
+]
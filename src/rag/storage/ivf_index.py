@@ -0,0 +1,174 @@
+"""Inverted-file (IVF) coarse quantizer for approximate nearest-neighbour search."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+log = structlog.get_logger(__name__)
+
+# Rows scored per matrix product while assigning rows to lists
+_ASSIGN_BATCH_ROWS = 8192
+
+
+class IVFPartition:
+    """
+    Spherical k-means partition of unit-norm embeddings.
+
+    Centroids are unit vectors; a row belongs to the centroid with the highest
+    inner product. A query probes the `nprobe` closest lists and only their rows
+    are scored, turning the O(N·d) scan into roughly O(N·d·nprobe/n_lists).
+    """
+
+    def __init__(self, centroids: np.ndarray) -> None:
+        """
+        Initialize the partition.
+
+        Args:
+            centroids: (n_lists, dim) matrix of unit-norm centroids
+        """
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+
+    @property
+    def n_lists(self) -> int:
+        """Number of inverted lists."""
+        return int(self._centroids.shape[0])
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension."""
+        return int(self._centroids.shape[1])
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        n_lists: int,
+        *,
+        iterations: int = 10,
+        sample_size: int = 20000,
+        seed: int = 0,
+    ) -> IVFPartition:
+        """
+        Train centroids with spherical k-means on a sample of rows.
+
+        Args:
+            matrix: (N, dim) unit-norm rows
+            n_lists: Requested number of lists (capped at the sample size)
+            iterations: Lloyd iterations
+            sample_size: Maximum rows used for training
+            seed: RNG seed, fixed so rebuilds are reproducible
+
+        Returns:
+            Trained partition
+        """
+        rng = np.random.default_rng(seed)
+        rows = matrix.shape[0]
+        if rows > sample_size:
+            sample = np.asarray(matrix[rng.choice(rows, size=sample_size, replace=False)])
+        else:
+            sample = np.asarray(matrix)
+        n_lists = max(1, min(n_lists, sample.shape[0]))
+
+        centroids = cls._seed_centroids(sample, n_lists, rng)
+        for _ in range(iterations):
+            assignments = cls._nearest(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts[non_empty])[:-1]))
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+
+            updated = centroids.copy()
+            updated[non_empty] = sums
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                # Reseed empty lists with random rows so no list stays dead
+                updated[empty] = sample[rng.choice(sample.shape[0], size=empty.size)]
+            norms = np.linalg.norm(updated, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (updated / norms).astype(np.float32)
+
+        return cls(centroids)
+
+    def assign(self, rows: np.ndarray) -> np.ndarray:
+        """Assign each row to its closest list."""
+        if rows.shape[0] == 0:
+            return np.zeros(0, dtype=np.int32)
+        return self._nearest(rows, self._centroids)
+
+    def probe(self, query_vector: np.ndarray, nprobe: int) -> np.ndarray:
+        """Lists to visit for a unit-norm query, best first."""
+        scores = self._centroids @ query_vector
+        nprobe = max(1, min(nprobe, self.n_lists))
+        if nprobe == self.n_lists:
+            return np.argsort(-scores)
+        top = np.argpartition(scores, -nprobe)[-nprobe:]
+        return top[np.argsort(-scores[top])]
+
+    def save(self, path: Path, ids: list[str], lists: np.ndarray) -> None:
+        """Persist centroids and row assignments atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                centroids=self._centroids,
+                ids=np.asarray(ids, dtype=np.str_),
+                lists=np.asarray(lists, dtype=np.int32),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple[IVFPartition, dict[str, int]] | None:
+        """Load a persisted partition and its id -> list map, or None if unusable."""
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                partition = cls(data["centroids"])
+                assignments = dict(zip(data["ids"].tolist(), data["lists"].tolist(), strict=True))
+        except (OSError, KeyError, ValueError) as e:
+            log.warning(
+                "rag_ann_index_load_failed",
+                path=str(path),
+                error=str(e),
+                event_name="rag_ann_index_load_failed",
+            )
+            return None
+        return partition, assignments
+
+    @staticmethod
+    def _seed_centroids(
+        sample: np.ndarray,
+        n_lists: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """k-means++ seeding with cosine distance (costs about one Lloyd iteration)."""
+        centroids = np.empty((n_lists, sample.shape[1]), dtype=np.float32)
+        centroids[0] = sample[rng.integers(sample.shape[0])]
+        best_similarity = sample @ centroids[0]
+        for index in range(1, n_lists):
+            distances = np.clip(1.0 - best_similarity.astype(np.float64), 0.0, None)
+            total = float(distances.sum())
+            if total > 0:
+                choice = rng.choice(sample.shape[0], p=distances / total)
+            else:
+                choice = rng.integers(sample.shape[0])
+            centroids[index] = sample[choice]
+            best_similarity = np.maximum(best_similarity, sample @ centroids[index])
+        return centroids
+
+    @staticmethod
+    def _nearest(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(rows.shape[0], dtype=np.int32)
+        for start in range(0, rows.shape[0], _ASSIGN_BATCH_ROWS):
+            block = np.asarray(rows[start : start + _ASSIGN_BATCH_ROWS])
+            assignments[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+
+__all__ = ["IVFPartition"]
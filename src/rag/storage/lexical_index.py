@@ -0,0 +1,405 @@
+"""Corpus-level BM25 index over Portuguese-normalized chunk text."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...config.settings import LexicalIndexConfig, get_settings
+from ...models.rag_models import ChunkORM
+from ..utils.retrieval_ranker import tokenize_ptbr
+from .embedding_index import read_corpus_fingerprint
+
+log = structlog.get_logger(__name__)
+
+LEXICAL_FORMAT_VERSION = 3
+
+# (hash of the text the terms were computed from, sorted term ids, term frequencies)
+_Entry = tuple[str, np.ndarray, np.ndarray]
+
+
+def _text_hash(text: str | None) -> str:
+    """Digest identifying the chunk text an entry was tokenized from."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LexicalIndex:
+    """
+    BM25 statistics and per-chunk term arrays for the embedded corpus.
+
+    Each chunk is tokenized once with `tokenize_ptbr` into sorted term ids and
+    term frequencies. Document frequencies, IDF, document lengths and a
+    term-major posting list are derived from those arrays, so scoring a query
+    is a few array lookups and never touches chunk text.
+
+    The arrays are persisted next to the database together with a hash of the
+    text each chunk was tokenized from; a process that finds the corpus changed
+    only tokenizes chunks whose text is new or differs from that hash (rowids
+    cannot tell, since SQLite reuses them when a document is re-ingested).
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, path: Path | None = None) -> None:
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            path: Where the term arrays are persisted (None keeps them in memory)
+        """
+        self._k1 = k1
+        self._b = b
+        self._path = path
+        self._vocab: dict[str, int] = {}
+        self._terms: list[str] = []
+        self._entries: dict[str, _Entry] = {}
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._length_norm = np.zeros(0, dtype=np.float32)
+        self._avg_doc_len = 0.0
+        self._post_ptr = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.float32)
+        self._loaded = False
+        self._fingerprint: int | None = None
+        self._file_fingerprint: int | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index has been synced with the database."""
+        return self._loaded
+
+    @property
+    def avg_doc_len(self) -> float:
+        """Mean token count of indexed chunks."""
+        return self._avg_doc_len
+
+    def __len__(self) -> int:
+        """Number of indexed chunks."""
+        return len(self._ids)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """
+        Sync the index with the table on first use and whenever it changed.
+
+        Uses the same corpus-generation fingerprint as the embedding index;
+        on mismatch, chunks are matched by (id, text hash) and only new or
+        edited texts are tokenized. The persisted file is rewritten when it is
+        behind the table.
+        """
+        fingerprint = await read_corpus_fingerprint(session)
+        if self._loaded and fingerprint == self._fingerprint:
+            return
+
+        async with self._lock:
+            if self._loaded and fingerprint == self._fingerprint:
+                return
+
+            started = time.perf_counter()
+            if not self._loaded and self._path is not None:
+                self._load_file(self._path)
+            removed, tokenized = await self._sync(session)
+            self._rebuild()
+            self._fingerprint = fingerprint
+            self._loaded = True
+
+            if self._path is not None and fingerprint != self._file_fingerprint:
+                try:
+                    self._save_file(self._path, fingerprint)
+                    self._file_fingerprint = fingerprint
+                except OSError as e:
+                    log.warning(
+                        "rag_lexical_index_save_failed",
+                        path=str(self._path),
+                        error=str(e),
+                        event_name="rag_lexical_index_save_failed",
+                    )
+
+            log.info(
+                "rag_lexical_index_synced",
+                chunks=len(self._ids),
+                vocabulary=len(self._terms),
+                removed=removed,
+                tokenized=tokenized,
+                duration_ms=round((time.perf_counter() - started) * 1000, 2),
+                event_name="rag_lexical_index_synced",
+            )
+
+    def invalidate(self) -> None:
+        """Force a sync on next use."""
+        self._fingerprint = None
+
+    def scores(self, query_text: str) -> np.ndarray:
+        """BM25 score of every indexed chunk (position order) for the query."""
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        if not self._ids:
+            return scores
+
+        for term_id in self._query_term_ids(query_text):
+            start, end = self._post_ptr[term_id], self._post_ptr[term_id + 1]
+            if start == end:
+                continue
+            docs = self._post_docs[start:end]
+            tfs = self._post_tfs[start:end]
+            scores[docs] += self._idf[term_id] * tfs * (self._k1 + 1) / (tfs + self._length_norm[docs])
+        return scores
+
+    def search(self, query_text: str, limit: int) -> list[tuple[str, float]]:
+        """Best `limit` chunks by BM25 (ties broken by chunk id)."""
+        scores = self.scores(query_text)
+        matched = np.flatnonzero(scores > 0)
+        if matched.size == 0 or limit <= 0:
+            return []
+        if matched.size > limit:
+            threshold = np.partition(scores[matched], -limit)[-limit]
+            matched = matched[scores[matched] >= threshold]
+        ranked = sorted(matched.tolist(), key=lambda pos: (-float(scores[pos]), self._ids[pos]))
+        return [(self._ids[pos], float(scores[pos])) for pos in ranked[:limit]]
+
+    def score_chunks(self, query_text: str, chunk_ids: list[str]) -> dict[str, float]:
+        """BM25 scores for specific chunk ids; ids missing from the index are omitted."""
+        positions = [
+            (chunk_id, position)
+            for chunk_id, position in ((cid, self._positions.get(cid)) for cid in chunk_ids)
+            if position is not None
+        ]
+        if not positions:
+            return {}
+        scores = self.scores(query_text)
+        return {chunk_id: float(scores[position]) for chunk_id, position in positions}
+
+    def score_text(self, query_text: str, text: str) -> float:
+        """BM25 score of arbitrary text against the corpus statistics (unindexed chunks)."""
+        tokens = tokenize_ptbr(text)
+        if not tokens:
+            return 0.0
+
+        counts: dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        avg_doc_len = self._avg_doc_len or float(len(tokens))
+        norm = self._k1 * (1 - self._b + self._b * len(tokens) / avg_doc_len)
+
+        score = 0.0
+        for term in set(tokenize_ptbr(query_text)):
+            tf = counts.get(term)
+            if not tf:
+                continue
+            score += self._term_idf(term) * tf * (self._k1 + 1) / (tf + norm)
+        return score
+
+    def term_counts(self, chunk_id: str, text: str | None = None) -> dict[str, int] | None:
+        """
+        Term frequencies stored for a chunk, or None when it is not indexed.
+
+        When `text` is given, None is also returned unless the stored counts
+        were computed from that exact text (the index may lag an edit).
+        """
+        entry = self._entries.get(chunk_id)
+        if entry is None:
+            return None
+        text_hash, term_ids, tfs = entry
+        if text is not None and text_hash != _text_hash(text):
+            return None
+        return {self._terms[term_id]: int(tf) for term_id, tf in zip(term_ids, tfs, strict=True)}
+
+    def _term_idf(self, term: str) -> float:
+        """Okapi IDF (Lucene variant, always positive); unseen terms have df = 0."""
+        term_id = self._vocab.get(term)
+        df = int(self._df[term_id]) if term_id is not None and term_id < self._df.size else 0
+        return float(np.log1p((len(self._ids) - df + 0.5) / (df + 0.5)))
+
+    def _query_term_ids(self, query_text: str) -> list[int]:
+        """Distinct vocabulary ids of the query terms (unknown terms are dropped)."""
+        return sorted({self._vocab[t] for t in tokenize_ptbr(query_text) if t in self._vocab})
+
+    def _encode(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Tokenize text into sorted term ids and their frequencies."""
+        tokens = tokenize_ptbr(text or "")
+        ids = np.fromiter(
+            (self._term_id(token) for token in tokens),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+        term_ids, tfs = np.unique(ids, return_counts=True)
+        return term_ids.astype(np.int32), tfs.astype(np.int32)
+
+    def _term_id(self, term: str) -> int:
+        """Vocabulary id of a term, registering it when new."""
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._vocab[term] = term_id
+            self._terms.append(term)
+        return term_id
+
+    async def _sync(self, session: AsyncSession) -> tuple[int, int]:
+        """Drop entries whose (id, text hash) left the table and tokenize new texts."""
+        stmt = select(ChunkORM.id, ChunkORM.texto).where(ChunkORM.embedding.isnot(None))
+        current = {
+            str(chunk_id): (_text_hash(texto), texto)
+            for chunk_id, texto in (await session.execute(stmt)).all()
+        }
+
+        stale = [
+            chunk_id
+            for chunk_id, entry in self._entries.items()
+            if chunk_id not in current or current[chunk_id][0] != entry[0]
+        ]
+        for chunk_id in stale:
+            del self._entries[chunk_id]
+
+        pending = [chunk_id for chunk_id in current if chunk_id not in self._entries]
+        for chunk_id in pending:
+            text_hash, texto = current[chunk_id]
+            self._entries[chunk_id] = (text_hash, *self._encode(texto))
+        return len(stale), len(pending)
+
+    def _rebuild(self) -> None:
+        """Derive doc lengths, document frequencies, IDF and term-major postings."""
+        self._ids = list(self._entries)
+        self._positions = {chunk_id: pos for pos, chunk_id in enumerate(self._ids)}
+        n_docs = len(self._ids)
+        vocab_size = len(self._terms)
+
+        if n_docs:
+            entries = list(self._entries.values())
+            lengths = np.fromiter((entry[1].size for entry in entries), dtype=np.int64, count=n_docs)
+            term_ids = np.concatenate([entry[1] for entry in entries])
+            tfs = np.concatenate([entry[2] for entry in entries]).astype(np.float32)
+            doc_index = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+        else:
+            term_ids = np.zeros(0, dtype=np.int32)
+            tfs = np.zeros(0, dtype=np.float32)
+            doc_index = np.zeros(0, dtype=np.int32)
+
+        self._doc_len = np.bincount(doc_index, weights=tfs, minlength=n_docs).astype(np.float32)
+        self._avg_doc_len = float(self._doc_len.mean()) if n_docs else 0.0
+        self._length_norm = (
+            self._k1 * (1 - self._b + self._b * self._doc_len / self._avg_doc_len)
+            if self._avg_doc_len > 0
+            else np.full(n_docs, self._k1, dtype=np.float32)
+        ).astype(np.float32)
+
+        self._df = np.bincount(term_ids, minlength=vocab_size).astype(np.int32)
+        self._idf = np.log1p((n_docs - self._df + 0.5) / (self._df + 0.5)).astype(np.float32)
+
+        order = np.argsort(term_ids, kind="stable")
+        self._post_docs = doc_index[order]
+        self._post_tfs = tfs[order]
+        self._post_ptr = np.concatenate(([0], np.cumsum(self._df, dtype=np.int64)))
+
+    def _load_file(self, path: Path) -> None:
+        """Restore term arrays persisted by a previous sync (any fingerprint)."""
+        if not path.exists():
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != LEXICAL_FORMAT_VERSION:
+                    return
+                terms = data["terms"].tolist()
+                ids = data["ids"].tolist()
+                hashes = data["hashes"].tolist()
+                indptr = data["indptr"]
+                term_ids = data["term_ids"]
+                tfs = data["tfs"]
+                fingerprint = int(data["fingerprint"])
+        except (OSError, KeyError, ValueError) as e:
+            log.warning(
+                "rag_lexical_index_load_failed",
+                path=str(path),
+                error=str(e),
+                event_name="rag_lexical_index_load_failed",
+            )
+            return
+
+        self._terms = terms
+        self._vocab = {term: term_id for term_id, term in enumerate(terms)}
+        self._entries = {
+            chunk_id: (
+                text_hash,
+                term_ids[indptr[pos] : indptr[pos + 1]],
+                tfs[indptr[pos] : indptr[pos + 1]],
+            )
+            for pos, (chunk_id, text_hash) in enumerate(zip(ids, hashes, strict=True))
+        }
+        self._file_fingerprint = fingerprint
+
+    def _save_file(self, path: Path, fingerprint: int) -> None:
+        """Persist term arrays atomically."""
+        entries = list(self._entries.values())
+        lengths = [entry[1].size for entry in entries]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.asarray(LEXICAL_FORMAT_VERSION),
+                fingerprint=np.asarray(fingerprint, dtype=np.int64),
+                terms=np.asarray(self._terms, dtype=np.str_),
+                ids=np.asarray(list(self._entries), dtype=np.str_),
+                hashes=np.asarray([entry[0] for entry in entries], dtype=np.str_),
+                indptr=np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+                term_ids=(
+                    np.concatenate([entry[1] for entry in entries])
+                    if entries
+                    else np.zeros(0, dtype=np.int32)
+                ),
+                tfs=(
+                    np.concatenate([entry[2] for entry in entries])
+                    if entries
+                    else np.zeros(0, dtype=np.int32)
+                ),
+            )
+        os.replace(tmp_path, path)
+
+
+def _lexical_index_path(engine: Any, config: LexicalIndexConfig) -> Path | None:
+    """Persist the lexical index next to the SQLite database file."""
+    if config.index_path:
+        return Path(config.index_path)
+    url = getattr(engine, "url", None)
+    if url is None or url.get_backend_name() != "sqlite":
+        return None
+    database = url.database
+    if not database or database == ":memory:":
+        return None
+    return Path(f"{database}.lexical.npz")
+
+
+_INDEXES: WeakKeyDictionary[Any, LexicalIndex] = WeakKeyDictionary()
+
+
+def get_lexical_index(session: AsyncSession) -> LexicalIndex | None:
+    """
+    Return the process-wide lexical index for the session's database engine.
+
+    Returns None when the lexical index is disabled in settings.
+    """
+    config = get_settings().rag.lexical
+    if not config.enabled:
+        return None
+    bind = session.get_bind()
+    engine = getattr(bind, "engine", bind)
+    index = _INDEXES.get(engine)
+    if index is None:
+        index = LexicalIndex(k1=config.k1, b=config.b, path=_lexical_index_path(engine, config))
+        _INDEXES[engine] = index
+    return index
+
+
+__all__ = ["LexicalIndex", "get_lexical_index"]
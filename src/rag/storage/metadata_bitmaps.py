@@ -0,0 +1,177 @@
+"""Bitmap index over boolean and categorical chunk metadata, aligned with matrix rows."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+# Boolean markers answered from bitmaps instead of SQL
+BITMAP_FLAG_KEYS = ("marca_stf", "marca_stj", "marca_concurso", "is_revoked", "is_exam_focus")
+# Low-cardinality string keys answered from bitmaps (one posting per value)
+BITMAP_CATEGORY_KEYS = ("source_type",)
+BITMAP_KEYS = BITMAP_FLAG_KEYS + BITMAP_CATEGORY_KEYS
+
+# Row codes. Flags use FALSE/TRUE; categories use their vocabulary id (>= 0).
+_NULL = -1
+_FALSE = 0
+_TRUE = 1
+# Non-null value no bitmap filter can match (e.g. a flag stored as "sim")
+_OTHER = -2
+
+_NULL_SENTINELS = ("not_null", "is_null")
+
+
+def _flag_code(value: Any) -> int:
+    """Code a flag value the way SQLite compares `json_extract(...) = 0/1`."""
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return _TRUE if value else _FALSE
+    if isinstance(value, int | float) and value in (0, 1):
+        return _TRUE if value == 1 else _FALSE
+    return _OTHER
+
+
+def _compilable(key: str, value: Any) -> bool:
+    """Whether a single `key == value` condition can be answered from bitmaps."""
+    if key in BITMAP_FLAG_KEYS:
+        return isinstance(value, bool) or value in _NULL_SENTINELS
+    if key in BITMAP_CATEGORY_KEYS:
+        return isinstance(value, str)
+    return False
+
+
+def split_bitmap_filters(filters: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Split a `VectorStore.search` filter dict into (bitmap part, SQL part).
+
+    Top-level conditions are ANDed, so each one goes to bitmaps when its key and
+    value are supported. An `__or__` list goes to bitmaps only when every group
+    is fully supported; otherwise it stays in SQL (which also validates it).
+    Temporal range keys always stay in SQL.
+    """
+    bitmap_filters: dict[str, Any] = {}
+    sql_filters: dict[str, Any] = {}
+    for key, value in filters.items():
+        if key == "__or__":
+            supported = isinstance(value, list) and all(
+                isinstance(group, dict)
+                and all(_compilable(group_key, group_value) for group_key, group_value in group.items())
+                for group in value
+            )
+        else:
+            supported = _compilable(key, value)
+        (bitmap_filters if supported else sql_filters)[key] = value
+    return bitmap_filters, sql_filters
+
+
+class MetadataBitmaps:
+    """
+    Per-row codes for `BITMAP_KEYS`, stored column-wise next to the embedding matrix.
+
+    Each key is one contiguous int16 row of codes (null/false/true or a
+    vocabulary id), so a filter compiles into a handful of vectorized
+    comparisons. Masks per (key, value) are memoized until the next write,
+    which turns repeated filters into cached bitmaps ANDed/ORed together.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty storage."""
+        self._codes = np.full((len(BITMAP_KEYS), 0), _NULL, dtype=np.int16)
+        self._vocab: dict[str, dict[str, int]] = {key: {} for key in BITMAP_CATEGORY_KEYS}
+        self._masks: dict[tuple[str, Any], np.ndarray] = {}
+
+    def reset(self) -> None:
+        """Drop every row."""
+        self._codes = np.full((len(BITMAP_KEYS), 0), _NULL, dtype=np.int16)
+        self._vocab = {key: {} for key in BITMAP_CATEGORY_KEYS}
+        self._masks.clear()
+
+    def resize(self, capacity: int) -> None:
+        """Grow to `capacity` rows; new rows are null until set."""
+        codes = np.full((len(BITMAP_KEYS), capacity), _NULL, dtype=np.int16)
+        kept = min(capacity, self._codes.shape[1])
+        codes[:, :kept] = self._codes[:, :kept]
+        self._codes = codes
+        self._masks.clear()
+
+    def take(self, positions: np.ndarray) -> None:
+        """Keep only `positions`, in order (mirrors matrix compaction)."""
+        self._codes = np.ascontiguousarray(self._codes[:, positions])
+        self._masks.clear()
+
+    def set_row(self, position: int, metadata: dict[str, Any]) -> None:
+        """Encode the bitmap keys of one chunk's metadata."""
+        for column, key in enumerate(BITMAP_KEYS):
+            value = metadata.get(key)
+            if key in BITMAP_FLAG_KEYS:
+                code = _flag_code(value)
+            elif value is None:
+                code = _NULL
+            elif isinstance(value, str):
+                vocab = self._vocab[key]
+                code = vocab.setdefault(value, len(vocab))
+            else:
+                code = _OTHER
+            self._codes[column, position] = code
+        self._masks.clear()
+
+    def clear_row(self, position: int) -> None:
+        """Mark every key of a row as null."""
+        self._codes[:, position] = _NULL
+        self._masks.clear()
+
+    def mask(self, filters: dict[str, Any], size: int) -> np.ndarray:
+        """
+        Compile a bitmap filter dict (see `split_bitmap_filters`) into a row mask.
+
+        Semantics match the SQL path: top-level keys are ANDed, `__or__` groups
+        are ORed (each group ANDed), and "not_null"/"is_null" test presence.
+        """
+        result = np.ones(size, dtype=bool)
+        for key, value in filters.items():
+            if key == "__or__":
+                groups = [self._group_mask(group, size) for group in value if group]
+                if groups:
+                    result &= np.logical_or.reduce(groups)
+            else:
+                result &= self._condition_mask(key, value, size)
+        return result
+
+    def _group_mask(self, group: dict[str, Any], size: int) -> np.ndarray:
+        """AND of the conditions of one `__or__` group."""
+        result = np.ones(size, dtype=bool)
+        for key, value in group.items():
+            result &= self._condition_mask(key, value, size)
+        return result
+
+    def _condition_mask(self, key: str, value: Any, size: int) -> np.ndarray:
+        """Memoized bitmap of rows where `key` matches `value`."""
+        cache_key = (key, value)
+        cached = self._masks.get(cache_key)
+        if cached is not None and cached.shape[0] == size:
+            return cached
+
+        codes = self._codes[BITMAP_KEYS.index(key), :size]
+        if value == "not_null":
+            bitmap = codes != _NULL
+        elif value == "is_null":
+            bitmap = codes == _NULL
+        elif key in BITMAP_FLAG_KEYS:
+            bitmap = codes == (_TRUE if value else _FALSE)
+        else:
+            code = self._vocab[key].get(value)
+            bitmap = codes == code if code is not None else np.zeros(size, dtype=bool)
+
+        self._masks[cache_key] = bitmap
+        return bitmap
+
+
+__all__ = [
+    "BITMAP_CATEGORY_KEYS",
+    "BITMAP_FLAG_KEYS",
+    "BITMAP_KEYS",
+    "MetadataBitmaps",
+    "split_bitmap_filters",
+]
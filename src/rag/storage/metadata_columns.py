@@ -0,0 +1,54 @@
+"""Resolve metadata filter keys to indexed generated columns when available."""
+
+from __future__ import annotations
+
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import structlog
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.rag_models import PROMOTED_METADATA_KEYS, RAG_CHUNKS_TABLE_NAME, ChunkORM
+
+log = structlog.get_logger(__name__)
+
+_AVAILABLE_KEYS: WeakKeyDictionary[Any, frozenset[str]] = WeakKeyDictionary()
+
+
+async def promoted_filter_keys(session: AsyncSession) -> frozenset[str]:
+    """
+    Return the metadata keys whose `meta_<key>` column exists in this database.
+
+    Databases created before the promoting migration keep working through
+    `json_extract`; the probe runs once per engine.
+    """
+    bind = session.get_bind()
+    engine = getattr(bind, "engine", bind)
+    available = _AVAILABLE_KEYS.get(engine)
+    if available is None:
+        if engine.dialect.name != "sqlite":
+            available = frozenset()
+        else:
+            # table_xinfo (unlike table_info) lists generated columns
+            rows = await session.execute(text(f"PRAGMA table_xinfo({RAG_CHUNKS_TABLE_NAME})"))
+            columns = {row[1] for row in rows}
+            available = frozenset(key for key in PROMOTED_METADATA_KEYS if f"meta_{key}" in columns)
+        if len(available) < len(PROMOTED_METADATA_KEYS):
+            log.info(
+                "rag_promoted_metadata_columns_missing",
+                missing=sorted(set(PROMOTED_METADATA_KEYS) - available),
+                event_name="rag_promoted_metadata_columns_missing",
+            )
+        _AVAILABLE_KEYS[engine] = available
+    return available
+
+
+def metadata_value_expr(key: str, promoted: frozenset[str] = frozenset()) -> Any:
+    """SQL expression for `metadados.<key>`: the indexed column when promoted."""
+    if key in promoted:
+        return getattr(ChunkORM, f"meta_{key}")
+    return func.json_extract(ChunkORM.metadados, f"$.{key}")
+
+
+__all__ = ["metadata_value_expr", "promoted_filter_keys"]
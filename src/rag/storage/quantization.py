@@ -0,0 +1,346 @@
+"""Compressed embedding codes with asymmetric-distance scoring."""
+
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+log = structlog.get_logger(__name__)
+
+QUANTIZER_FORMAT_VERSION = 1
+
+# Rows decoded/scored per block to bound temporary memory during scans
+_SCAN_BLOCK_ROWS = 16384
+
+
+class VectorQuantizer(ABC):
+    """
+    Lossy code for unit-norm embedding rows.
+
+    Scoring is asymmetric: the query stays float32 and is compared against
+    compressed rows, so only the corpus side loses precision. Callers re-rank
+    the best approximate candidates with exact float32 rows.
+    """
+
+    # Compression mode this quantizer implements (`VectorCompressionConfig.mode`)
+    mode: str
+
+    @property
+    @abstractmethod
+    def parameters(self) -> np.ndarray:
+        """Trained parameters, enough to rebuild the quantizer."""
+
+    @property
+    @abstractmethod
+    def code_dtype(self) -> np.dtype:
+        """Dtype of one code element."""
+
+    @property
+    @abstractmethod
+    def code_width(self) -> int:
+        """Code elements per row."""
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """Memory used by one encoded row."""
+        return self.code_width * np.dtype(self.code_dtype).itemsize
+
+    @abstractmethod
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        """Encode (N, dim) float32 rows into (N, code_width) codes."""
+
+    @abstractmethod
+    def scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products between a float32 query and encoded rows."""
+
+
+class Int8Quantizer(VectorQuantizer):
+    """Symmetric per-dimension int8 scalar quantization (4x smaller than float32)."""
+
+    mode = "int8"
+
+    def __init__(self, scale: np.ndarray) -> None:
+        """
+        Initialize the quantizer.
+
+        Args:
+            scale: Per-dimension step so that `code * scale` approximates the value
+        """
+        self._scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def train(cls, matrix: np.ndarray) -> Int8Quantizer:
+        """Fit per-dimension scales to the observed value range."""
+        max_abs = np.max(np.abs(np.asarray(matrix)), axis=0).astype(np.float32)
+        max_abs[max_abs == 0] = 1.0
+        return cls(max_abs / 127.0)
+
+    @property
+    def parameters(self) -> np.ndarray:
+        """Per-dimension scales."""
+        return self._scale
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        """Dtype of one code element."""
+        return np.dtype(np.int8)
+
+    @property
+    def code_width(self) -> int:
+        """Code elements per row."""
+        return int(self._scale.shape[0])
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        """Encode rows by rounding to the nearest int8 step."""
+        codes = np.rint(np.asarray(rows, dtype=np.float32) / self._scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Fold the scales into the query, then scan codes block by block."""
+        weighted = (query_vector * self._scale).astype(np.float32)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCAN_BLOCK_ROWS):
+            block = codes[start : start + _SCAN_BLOCK_ROWS]
+            scores[start : start + block.shape[0]] = block.astype(np.float32) @ weighted
+        return scores
+
+
+class ProductQuantizer(VectorQuantizer):
+    """
+    Product quantization: one uint8 centroid id per sub-vector.
+
+    With 96 sub-vectors a 1536-d float32 row (6 KB) becomes 96 bytes. A query
+    is scored through per-subspace lookup tables (ADC), so the scan is a
+    gather-and-sum over codes instead of a float32 matrix product.
+    """
+
+    mode = "pq"
+
+    def __init__(self, codebooks: np.ndarray) -> None:
+        """
+        Initialize the quantizer.
+
+        Args:
+            codebooks: (subvectors, centroids, sub_dim) trained codebooks
+        """
+        self._codebooks = np.asarray(codebooks, dtype=np.float32)
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        subvectors: int,
+        *,
+        iterations: int = 8,
+        sample_size: int = 10000,
+        seed: int = 0,
+    ) -> ProductQuantizer:
+        """
+        Train one k-means codebook (up to 256 centroids) per sub-vector.
+
+        Args:
+            matrix: (N, dim) rows
+            subvectors: Requested sub-vector count (lowered to a divisor of dim)
+            iterations: Lloyd iterations per codebook
+            sample_size: Maximum rows used for training
+            seed: RNG seed, fixed so retraining is reproducible
+        """
+        rng = np.random.default_rng(seed)
+        rows, dim = matrix.shape
+        if rows > sample_size:
+            sample = np.asarray(matrix[rng.choice(rows, size=sample_size, replace=False)])
+        else:
+            sample = np.asarray(matrix)
+        sample = sample.astype(np.float32, copy=False)
+
+        subvectors = max(d for d in range(1, min(subvectors, dim) + 1) if dim % d == 0)
+        sub_dim = dim // subvectors
+        n_centroids = min(256, sample.shape[0])
+
+        codebooks = np.empty((subvectors, n_centroids, sub_dim), dtype=np.float32)
+        for sub in range(subvectors):
+            block = sample[:, sub * sub_dim : (sub + 1) * sub_dim]
+            codebooks[sub] = _euclidean_kmeans(block, n_centroids, iterations, rng)
+        return cls(codebooks)
+
+    @property
+    def parameters(self) -> np.ndarray:
+        """(subvectors, centroids, sub_dim) codebooks."""
+        return self._codebooks
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        """Dtype of one code element."""
+        return np.dtype(np.uint8)
+
+    @property
+    def code_width(self) -> int:
+        """Code elements per row."""
+        return int(self._codebooks.shape[0])
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        """Assign every sub-vector to its nearest centroid."""
+        rows = np.asarray(rows, dtype=np.float32)
+        subvectors, _, sub_dim = self._codebooks.shape
+        codes = np.empty((rows.shape[0], subvectors), dtype=np.uint8)
+        for sub in range(subvectors):
+            block = rows[:, sub * sub_dim : (sub + 1) * sub_dim]
+            codes[:, sub] = _nearest_centroid(block, self._codebooks[sub])
+        return codes
+
+    def scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Sum per-subspace lookup-table entries selected by each row's codes."""
+        subvectors, _, sub_dim = self._codebooks.shape
+        query_blocks = query_vector.reshape(subvectors, sub_dim)
+        lookup = np.einsum("scd,sd->sc", self._codebooks, query_blocks)
+        offsets = (np.arange(subvectors) * lookup.shape[1]).astype(np.intp)
+        flat_lookup = lookup.reshape(-1)
+
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCAN_BLOCK_ROWS):
+            block = codes[start : start + _SCAN_BLOCK_ROWS].astype(np.intp) + offsets
+            scores[start : start + block.shape[0]] = flat_lookup[block].sum(axis=1)
+        return scores
+
+
+def _nearest_centroid(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (squared Euclidean) for each row."""
+    half_norms = 0.5 * np.einsum("cd,cd->c", centroids, centroids)
+    nearest = np.empty(rows.shape[0], dtype=np.intp)
+    for start in range(0, rows.shape[0], _SCAN_BLOCK_ROWS):
+        block = rows[start : start + _SCAN_BLOCK_ROWS]
+        nearest[start : start + block.shape[0]] = np.argmax(
+            block @ centroids.T - half_norms, axis=1
+        )
+    return nearest
+
+
+def _euclidean_kmeans(
+    rows: np.ndarray,
+    n_centroids: int,
+    iterations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Plain Lloyd k-means used to train PQ codebooks."""
+    centroids = rows[rng.choice(rows.shape[0], size=n_centroids, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroid(rows, centroids)
+        counts = np.bincount(assignments, minlength=n_centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, rows)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, np.newaxis]
+        empty = np.flatnonzero(~non_empty)
+        if empty.size:
+            centroids[empty] = rows[rng.choice(rows.shape[0], size=empty.size)]
+    return centroids
+
+
+def build_quantizer(
+    mode: str,
+    matrix: np.ndarray,
+    *,
+    pq_subvectors: int = 96,
+    pq_iterations: int = 8,
+    pq_train_sample_size: int = 10000,
+) -> VectorQuantizer | None:
+    """
+    Train the quantizer selected by `mode` ("none", "int8" or "pq").
+
+    Returns:
+        Trained quantizer, or None for "none" or an empty matrix
+    """
+    if mode == "none" or matrix.shape[0] == 0:
+        return None
+    if mode == "int8":
+        return Int8Quantizer.train(matrix)
+    if mode == "pq":
+        return ProductQuantizer.train(
+            matrix,
+            pq_subvectors,
+            iterations=pq_iterations,
+            sample_size=pq_train_sample_size,
+        )
+    msg = f"Unsupported vector compression mode: {mode}"
+    raise ValueError(msg)
+
+
+def save_quantizer(quantizer: VectorQuantizer, path: Path, *, pq_subvectors: int) -> None:
+    """
+    Persist a trained quantizer atomically.
+
+    Args:
+        quantizer: Trained quantizer
+        path: Destination `.npz` file
+        pq_subvectors: Sub-vector count requested by the config it was trained for
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        np.savez(
+            handle,
+            version=np.asarray(QUANTIZER_FORMAT_VERSION),
+            mode=np.asarray(quantizer.mode),
+            pq_subvectors=np.asarray(pq_subvectors),
+            parameters=quantizer.parameters,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_quantizer(
+    path: Path,
+    mode: str,
+    dim: int,
+    *,
+    pq_subvectors: int,
+) -> VectorQuantizer | None:
+    """
+    Load a persisted quantizer, or None when absent or trained for another config.
+
+    Args:
+        path: File written by `save_quantizer`
+        mode: Configured compression mode
+        dim: Embedding dimension of the rows to encode
+        pq_subvectors: Configured PQ sub-vector count
+    """
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != QUANTIZER_FORMAT_VERSION or str(data["mode"]) != mode:
+                return None
+            saved_subvectors = int(data["pq_subvectors"])
+            parameters = data["parameters"]
+    except (OSError, KeyError, ValueError) as e:
+        log.warning(
+            "rag_quantizer_load_failed",
+            path=str(path),
+            error=str(e),
+            event_name="rag_quantizer_load_failed",
+        )
+        return None
+
+    if mode == "int8" and parameters.shape == (dim,):
+        return Int8Quantizer(parameters)
+    if (
+        mode == "pq"
+        and saved_subvectors == pq_subvectors
+        and parameters.ndim == 3
+        and parameters.shape[0] * parameters.shape[2] == dim
+    ):
+        return ProductQuantizer(parameters)
+    return None
+
+
+__all__ = [
+    "Int8Quantizer",
+    "ProductQuantizer",
+    "VectorQuantizer",
+    "build_quantizer",
+    "load_quantizer",
+    "save_quantizer",
+]
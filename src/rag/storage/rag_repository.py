@@ -5,8 +5,8 @@ Implementação do repositório responsável pelo RAG.
 """
 
 import json
+import re
 from hashlib import sha256
-from heapq import heappush, heapreplace
 from typing import Any
 
 import numpy as np
@@ -17,6 +17,9 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from ...models.rag_models import ChunkORM, DocumentORM
 from ...utils.errors import BotSalinhaError
 from ..models import Chunk, Document
+from .corpus_state import bump_corpus_generation
+from .embedding_index import get_embedding_index
+from .metadata_columns import metadata_value_expr, promoted_filter_keys
 
 logger = structlog.get_logger(__name__)
 
@@ -35,7 +38,8 @@ class RagRepository:
     delegando chamadas de I/O para implementações correspondentes.
     """
 
-    _SEARCH_BATCH_SIZE = 250
+    # Filter keys safe to embed in a JSON path for SQL pre-filtering
+    _SQL_FILTER_KEY = re.compile(r"^[A-Za-z0-9_]+$")
 
     def __init__(self, async_session_maker: async_sessionmaker[AsyncSession]) -> None:
         """
@@ -119,8 +123,13 @@ class RagRepository:
                     )
                     session.add(orm)
 
+                await bump_corpus_generation(session)
                 await session.commit()
                 await session.refresh(orm)
+                await get_embedding_index(session).apply_changes(
+                    session,
+                    upserts=[(chunk.chunk_id, embedding_bytes)],
+                )
 
                 return self._orm_to_chunk(orm)
 
@@ -219,7 +228,9 @@ class RagRepository:
                     return False
 
                 await session.delete(orm)
+                await bump_corpus_generation(session)
                 await session.commit()
+                await get_embedding_index(session).apply_changes(session, removed_ids=[chunk_id])
 
                 return True
 
@@ -250,60 +261,34 @@ class RagRepository:
                 return []
 
             async with self._async_session_maker() as session:
-                top_k_heap: list[tuple[float, int, ChunkORM]] = []
-                offset = 0
-                counter = 0
-
-                while True:
-                    stmt = (
-                        select(ChunkORM)
-                        .where(ChunkORM.embedding.isnot(None))
-                        .order_by(ChunkORM.id)
-                        .offset(offset)
-                        .limit(self._SEARCH_BATCH_SIZE)
-                    )
-                    result = await session.execute(stmt)
-                    orms = result.scalars().all()
-                    if not orms:
-                        break
-
-                    for orm in orms:
-                        # Apply filters if provided
-                        if filters:
-                            try:
-                                metadata = json.loads(orm.metadados)
-                            except json.JSONDecodeError as e:
-                                logger.warning(
-                                    "rag_repo_search_invalid_metadata",
-                                    chunk_id=orm.id,
-                                    metadados=orm.metadados,
-                                    error=str(e),
-                                )
-                                continue
-                            if not all(metadata.get(k) == v for k, v in filters.items()):
-                                continue
-
-                        if not orm.embedding:
-                            continue
-
-                        chunk_embedding = self._deserialize_embedding(orm.embedding)
-                        similarity = self._cosine_similarity(query_embedding, chunk_embedding)
-
-                        # Keep only top-k with min-heap
-                        heap_item = (similarity, counter, orm)
-                        counter += 1
-                        if len(top_k_heap) < limit:
-                            heappush(top_k_heap, heap_item)
-                        elif similarity > top_k_heap[0][0]:
-                            heapreplace(top_k_heap, heap_item)
-
-                    offset += self._SEARCH_BATCH_SIZE
-
-                if not top_k_heap:
+                # Resident embedding matrix shared with VectorStore (IVF when enabled)
+                index = get_embedding_index(session)
+                await index.ensure_loaded(session)
+                if len(index) == 0:
                     return []
 
-                chunks_with_scores = sorted(top_k_heap, key=lambda item: item[0], reverse=True)
-                return [(self._orm_to_chunk(orm), score) for score, _, orm in chunks_with_scores]
+                mask = None
+                if filters:
+                    allowed_ids = await self._filter_chunk_ids(session, filters)
+                    if not allowed_ids:
+                        return []
+                    mask = index.mask_for(allowed_ids)
+
+                positions, scores = index.nearest(query_embedding, limit, mask)
+                ranked = [
+                    (index.chunk_id_at(int(position)), float(score))
+                    for position, score in zip(positions, scores, strict=True)
+                ]
+                if not ranked:
+                    return []
+
+                stmt = select(ChunkORM).where(ChunkORM.id.in_([chunk_id for chunk_id, _ in ranked]))
+                orms = {orm.id: orm for orm in (await session.execute(stmt)).scalars()}
+                return [
+                    (self._orm_to_chunk(orms[chunk_id]), score)
+                    for chunk_id, score in ranked
+                    if chunk_id in orms
+                ]
 
         except Exception as e:
             logger.error("rag_repo_search_error", error=str(e))
@@ -388,8 +373,13 @@ class RagRepository:
                 if orm is None:
                     return False
 
+                chunk_ids_stmt = select(ChunkORM.id).where(ChunkORM.documento_id == document_id)
+                chunk_ids = (await session.execute(chunk_ids_stmt)).scalars().all()
+
                 await session.delete(orm)
+                await bump_corpus_generation(session)
                 await session.commit()
+                await get_embedding_index(session).apply_changes(session, removed_ids=chunk_ids)
 
                 return True
 
@@ -422,6 +412,40 @@ class RagRepository:
 
     # Helper methods
 
+    async def _filter_chunk_ids(
+        self,
+        session: AsyncSession,
+        filters: dict[str, Any],
+    ) -> list[str]:
+        """
+        Resolve chunk ids whose metadata equals every filter value.
+
+        Scalar filters are pushed to SQLite (indexed `meta_<key>` columns for
+        promoted keys, `json_extract` otherwise); the exact Python equality
+        check is then applied to the (blob-free) candidate rows.
+        """
+        promoted = await promoted_filter_keys(session)
+        stmt = select(ChunkORM.id, ChunkORM.metadados).where(ChunkORM.embedding.isnot(None))
+        for key, value in filters.items():
+            if self._SQL_FILTER_KEY.match(key) and isinstance(value, str | int | float | bool):
+                stmt = stmt.where(metadata_value_expr(key, promoted) == value)
+
+        allowed_ids: list[str] = []
+        for chunk_id, metadados in (await session.execute(stmt)).all():
+            try:
+                metadata = json.loads(metadados)
+            except json.JSONDecodeError as e:
+                logger.warning(
+                    "rag_repo_search_invalid_metadata",
+                    chunk_id=chunk_id,
+                    metadados=metadados,
+                    error=str(e),
+                )
+                continue
+            if all(metadata.get(k) == v for k, v in filters.items()):
+                allowed_ids.append(chunk_id)
+        return allowed_ids
+
     @staticmethod
     def _serialize_embedding(embedding: list[float]) -> bytes:
         """Convert embedding list to bytes (float32)."""
@@ -0,0 +1,306 @@
+"""Write-behind SQLite persistence for SemanticCache entries."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import structlog
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ...models.rag_models import SemanticCacheEntryORM
+
+log = structlog.get_logger(__name__)
+
+# Max keys per DELETE ... IN (...) statement
+_DELETE_BATCH_SIZE = 500
+
+
+@dataclass(slots=True)
+class PersistedEntry:
+    """A SemanticCache entry as stored on disk."""
+
+    key: str
+    scope: str | None
+    rag_context_dict: dict[str, Any]
+    llm_response: str
+    cached_at: float
+    ttl_seconds: int
+    size_bytes: int
+    embedding: np.ndarray | None = None
+    sources: dict[str, str | None] | None = None
+    corpus_generation: int | None = None
+
+    def to_row(self) -> dict[str, Any]:
+        """Column values for `rag_semantic_cache`."""
+        return {
+            "key": self.key,
+            "scope": self.scope,
+            "rag_context": json.dumps(self.rag_context_dict),
+            "llm_response": self.llm_response,
+            "cached_at": self.cached_at,
+            "expires_at": self.cached_at + self.ttl_seconds,
+            "size_bytes": self.size_bytes,
+            "embedding": (
+                self.embedding.astype(np.float32).tobytes() if self.embedding is not None else None
+            ),
+            "sources": json.dumps(self.sources) if self.sources is not None else None,
+            "corpus_generation": self.corpus_generation,
+        }
+
+    @classmethod
+    def from_row(cls, row: Any) -> PersistedEntry:
+        """Decode a `rag_semantic_cache` row."""
+        return cls(
+            key=row.key,
+            scope=row.scope,
+            rag_context_dict=json.loads(row.rag_context),
+            llm_response=row.llm_response,
+            cached_at=row.cached_at,
+            ttl_seconds=int(round(row.expires_at - row.cached_at)),
+            size_bytes=row.size_bytes,
+            embedding=(
+                np.frombuffer(row.embedding, dtype=np.float32).copy()
+                if row.embedding is not None
+                else None
+            ),
+            sources=json.loads(row.sources) if row.sources is not None else None,
+            corpus_generation=row.corpus_generation,
+        )
+
+
+class SemanticCacheStore:
+    """
+    Batched, write-behind persistence of cache entries in `rag_semantic_cache`.
+
+    `put`/`delete`/`clear` only record the change in memory (coalesced by key)
+    and wake a background task, so the request path never waits on SQLite.
+    The task flushes every `flush_interval_seconds`, or as soon as
+    `batch_size` changes are pending, in a single transaction that also drops
+    expired rows and trims the table to `max_disk_mb` (oldest first). It
+    exits once idle and is restarted by the next change.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        max_disk_mb: int = 200,
+        flush_interval_seconds: float = 2.0,
+        batch_size: int = 64,
+    ) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            engine: Async engine of the SQLite database holding the table
+            max_disk_mb: On-disk budget, measured as the sum of entry sizes
+            flush_interval_seconds: Max delay before a change is written
+            batch_size: Pending changes that trigger an immediate flush
+        """
+        self._engine = engine
+        self._max_disk_bytes = max_disk_mb * 1024 * 1024
+        self._flush_interval = flush_interval_seconds
+        self._batch_size = batch_size
+        # key -> entry to upsert, or None to delete
+        self._pending: dict[str, PersistedEntry | None] = {}
+        self._clear_pending = False
+        self._closing = False
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._flush_lock = asyncio.Lock()
+        self._table_ready = False
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def pending_count(self) -> int:
+        """Changes recorded but not yet written."""
+        return len(self._pending) + int(self._clear_pending)
+
+    def put(self, entry: PersistedEntry) -> None:
+        """Schedule an upsert of `entry`."""
+        self._pending[entry.key] = entry
+        self._schedule()
+
+    def delete(self, key: str) -> None:
+        """Schedule removal of `key`."""
+        self._pending[key] = None
+        self._schedule()
+
+    def clear(self) -> None:
+        """Schedule removal of every persisted entry."""
+        self._pending.clear()
+        self._clear_pending = True
+        self._schedule()
+
+    async def load(self, max_bytes: int) -> list[PersistedEntry]:
+        """
+        Read unexpired entries, newest first, until `max_bytes` is reached.
+
+        Args:
+            max_bytes: Memory budget of the cache being warmed
+
+        Returns:
+            Entries ordered from newest to oldest
+        """
+        await self._ensure_table()
+        entries: list[PersistedEntry] = []
+        loaded_bytes = 0
+        stmt = (
+            select(SemanticCacheEntryORM.__table__)
+            .where(SemanticCacheEntryORM.expires_at > time.time())
+            .order_by(SemanticCacheEntryORM.cached_at.desc())
+        )
+        async with self._engine.connect() as conn:
+            result = await conn.stream(stmt)
+            async for row in result:
+                if loaded_bytes + row.size_bytes > max_bytes:
+                    break
+                entries.append(PersistedEntry.from_row(row))
+                loaded_bytes += row.size_bytes
+            await result.close()
+        return entries
+
+    async def flush(self) -> int:
+        """
+        Write every pending change in one transaction.
+
+        Returns:
+            Number of changes written
+        """
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            clear, self._clear_pending = self._clear_pending, False
+            if not pending and not clear:
+                return 0
+
+            flush_start = time.perf_counter()
+            table = SemanticCacheEntryORM.__table__
+            rows = [entry.to_row() for entry in pending.values() if entry is not None]
+            deleted = [key for key, entry in pending.items() if entry is None]
+
+            try:
+                await self._ensure_table()
+                async with self._engine.begin() as conn:
+                    if clear:
+                        await conn.execute(delete(table))
+                    for start in range(0, len(deleted), _DELETE_BATCH_SIZE):
+                        batch = deleted[start : start + _DELETE_BATCH_SIZE]
+                        await conn.execute(delete(table).where(table.c.key.in_(batch)))
+                    if rows:
+                        stmt = sqlite_insert(table)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[table.c.key],
+                            set_={
+                                column.name: stmt.excluded[column.name]
+                                for column in table.columns
+                                if column.name != "key"
+                            },
+                        )
+                        await conn.execute(stmt, rows)
+                    await conn.execute(delete(table).where(table.c.expires_at <= time.time()))
+                    trimmed = await self._trim(conn)
+            except Exception:
+                # Keep the batch for the next flush; newer changes (or a newer
+                # clear) win over it
+                if not self._clear_pending:
+                    for key, entry in pending.items():
+                        self._pending.setdefault(key, entry)
+                    self._clear_pending = clear
+                raise
+
+            self.flushes += 1
+            self.rows_written += len(rows)
+            log.debug(
+                "rag_semantic_cache_flushed",
+                upserts=len(rows),
+                deletes=len(deleted),
+                cleared=clear,
+                trimmed=trimmed,
+                flush_ms=round((time.perf_counter() - flush_start) * 1000, 2),
+                event_name="rag_semantic_cache_flushed",
+            )
+            return len(pending) + int(clear)
+
+    async def close(self) -> None:
+        """Stop the background task after writing everything pending."""
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            with contextlib.suppress(Exception):
+                await self._task
+            self._task = None
+        await self.flush()
+        self._closing = False
+
+    def _schedule(self) -> None:
+        """Start the flush task if needed and wake it when a batch is full."""
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no loop yet; written by the next flush/close
+            self._task = loop.create_task(self._run())
+        if self.pending_count >= self._batch_size:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        """Flush periodically (or when woken) until nothing is pending."""
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_interval)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                log.warning(
+                    "rag_semantic_cache_flush_failed",
+                    error=str(e),
+                    pending=self.pending_count,
+                    event_name="rag_semantic_cache_flush_failed",
+                )
+                if self._closing:
+                    return
+                continue
+            if self._closing or not self.pending_count:
+                return
+
+    async def _trim(self, conn: AsyncConnection) -> int:
+        """Delete the oldest rows until the table fits the disk budget."""
+        table = SemanticCacheEntryORM.__table__
+        total = (await conn.execute(select(func.coalesce(func.sum(table.c.size_bytes), 0)))).scalar()
+        excess = int(total or 0) - self._max_disk_bytes
+        if excess <= 0:
+            return 0
+
+        victims: list[str] = []
+        result = await conn.execute(
+            select(table.c.key, table.c.size_bytes).order_by(table.c.cached_at.asc())
+        )
+        for key, size_bytes in result:
+            victims.append(key)
+            excess -= size_bytes
+            if excess <= 0:
+                break
+        for start in range(0, len(victims), _DELETE_BATCH_SIZE):
+            batch = victims[start : start + _DELETE_BATCH_SIZE]
+            await conn.execute(delete(table).where(table.c.key.in_(batch)))
+        return len(victims)
+
+    async def _ensure_table(self) -> None:
+        """Create `rag_semantic_cache` when migrations have not run."""
+        if self._table_ready:
+            return
+        async with self._engine.begin() as conn:
+            await conn.run_sync(SemanticCacheEntryORM.__table__.create, checkfirst=True)
+        self._table_ready = True
+
+
+__all__ = ["PersistedEntry", "SemanticCacheStore"]
@@ -6,17 +6,25 @@ import hashlib
 import json
 import re
 import time
+from collections import OrderedDict
 from typing import Any
+from weakref import WeakKeyDictionary
 
 import numpy as np
 import structlog
-from sqlalchemy import and_, case, func, or_, select, text
+from sqlalchemy import and_, case, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...models.rag_models import RAG_CHUNKS_FTS_TABLE_NAME, ChunkORM
 from ...utils.errors import APIError, BotSalinhaError
 from ...utils.log_events import LogEvents
 from ..models import Chunk, ChunkMetadata
+from .cache_backend import CacheBackend, get_shared_backend
+from .corpus_state import bump_corpus_generation, read_corpus_generation
+from .embedding_index import get_embedding_index
+from .lexical_index import get_lexical_index
+from .metadata_bitmaps import split_bitmap_filters
+from .metadata_columns import metadata_value_expr, promoted_filter_keys
 
 log = structlog.get_logger(__name__)
 
@@ -32,96 +40,201 @@ MAX_CACHE_SIZE = 1000  # Maximum number of cached queries
 
 class QueryResultCache:
     """
-    Simple LRU cache with TTL for vector search results.
+    LRU cache with TTL for vector search results.
 
-    Caches query results based on a hash of the query embedding and filters.
+    Keys hash the full query vector, every search parameter and the corpus
+    generation, so a hit is only possible for an identical search against an
+    unchanged corpus. Entries live in an OrderedDict in recency order, making
+    touch and eviction O(1) at any size. With a shared backend, local misses
+    fall through to it and are promoted.
     """
 
-    def __init__(self, max_size: int = MAX_CACHE_SIZE, ttl_seconds: int = CACHE_TTL_SECONDS):
+    def __init__(
+        self,
+        max_size: int = MAX_CACHE_SIZE,
+        ttl_seconds: int = CACHE_TTL_SECONDS,
+        shared: CacheBackend | None = None,
+    ):
         """
         Initialize the cache.
 
         Args:
             max_size: Maximum number of entries to store
             ttl_seconds: Time-to-live for cache entries in seconds
+            shared: Optional shared tier consulted after a local miss
         """
-        self._cache: dict[str, tuple[list[tuple[Chunk, float]], float]] = {}
-        self._access_times: dict[str, float] = {}
+        self._cache: OrderedDict[str, tuple[list[tuple[Chunk, float]], float]] = OrderedDict()
         self._max_size = max_size
         self._ttl_seconds = ttl_seconds
+        self._shared = shared
+        self._generation: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
 
-    def _generate_key(self, query_embedding: list[float], filters: dict[str, Any] | None, limit: int) -> str:
-        """Generate a cache key from query parameters."""
-        # Create a deterministic key from the query embedding and filters
-        embedding_hash = hashlib.sha256(json.dumps(query_embedding[:10]).encode()).hexdigest()[:16]
-        filters_hash = hashlib.sha256(json.dumps(sorted(filters.items()) if filters else {}, sort_keys=True).encode()).hexdigest()[:16]
-        return f"{embedding_hash}:{filters_hash}:{limit}"
-
-    def get(self, query_embedding: list[float], filters: dict[str, Any] | None, limit: int) -> list[tuple[Chunk, float]] | None:
+    @staticmethod
+    def make_key(
+        query_embedding: list[float],
+        *,
+        query_text: str | None,
+        limit: int,
+        min_similarity: float,
+        documento_id: int | None,
+        filters: dict[str, Any] | None,
+        candidate_limit: int | None,
+        generation: int,
+    ) -> str:
         """
-        Get cached results if available and not expired.
+        Build a cache key from the full search request.
 
         Args:
-            query_embedding: Query vector
-            filters: Metadata filters
+            query_embedding: Normalized query vector (hashed in full as float32)
+            query_text: Query text driving the lexical candidates
             limit: Result limit
+            min_similarity: Minimum similarity threshold
+            documento_id: Optional document filter
+            filters: Metadata filters
+            candidate_limit: Semantic candidates kept before ranking
+            generation: Corpus generation the results were computed from
 
         Returns:
-            Cached results or None if not found/expired
+            Hex digest identifying the request
         """
-        key = self._generate_key(query_embedding, filters, limit)
-        current_time = time.time()
+        digest = hashlib.sha256(np.asarray(query_embedding, dtype=np.float32).tobytes())
+        params = {
+            "query_text": query_text,
+            "limit": limit,
+            "min_similarity": min_similarity,
+            "documento_id": documento_id,
+            "filters": filters or {},
+            "candidate_limit": candidate_limit,
+            "generation": generation,
+        }
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
 
-        if key not in self._cache:
-            return None
+    def sync_generation(self, generation: int) -> None:
+        """
+        Drop local entries computed from an older corpus generation.
 
-        results, timestamp = self._cache[key]
+        Keys already embed the generation, so stale entries could never hit;
+        this only releases their memory as soon as ingestion moves on.
+        """
+        if self._generation is not None and generation != self._generation:
+            self._cache.clear()
+            self._invalidations += 1
+        self._generation = generation
 
-        # Check if expired
-        if current_time - timestamp > self._ttl_seconds:
-            del self._cache[key]
-            if key in self._access_times:
-                del self._access_times[key]
-            return None
+    def get(self, key: str) -> list[tuple[Chunk, float]] | None:
+        """
+        Get cached results if available and not expired.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached results or None if not found/expired
+        """
+        results = self._get_local(key)
+        if results is None and self._shared is not None:
+            results = self._promote(key, self._shared.get(key))
+        if results is None:
+            self._misses += 1
+        return results
 
-        # Update access time for LRU
-        self._access_times[key] = current_time
+    async def get_async(self, key: str) -> list[tuple[Chunk, float]] | None:
+        """Same as get(), reading the shared tier without blocking the event loop."""
+        results = self._get_local(key)
+        if results is None and self._shared is not None:
+            results = self._promote(key, await self._shared.get_async(key))
+        if results is None:
+            self._misses += 1
         return results
 
-    def put(self, query_embedding: list[float], filters: dict[str, Any] | None, limit: int, results: list[tuple[Chunk, float]]) -> None:
+    def put(self, key: str, results: list[tuple[Chunk, float]]) -> None:
         """
         Store results in cache.
 
         Args:
-            query_embedding: Query vector
-            filters: Metadata filters
-            limit: Result limit
+            key: Key from make_key()
             results: Search results to cache
         """
-        key = self._generate_key(query_embedding, filters, limit)
         current_time = time.time()
+        self._store_local(key, results, current_time)
+        if self._shared is not None:
+            self._shared.set(key, self._encode(results, current_time), self._ttl_seconds)
 
-        # Evict oldest entry if cache is full
-        if len(self._cache) >= self._max_size and key not in self._cache:
-            oldest_key = min(self._access_times.items(), key=lambda x: x[1])[0]
-            del self._cache[oldest_key]
-            del self._access_times[oldest_key]
+    async def put_async(self, key: str, results: list[tuple[Chunk, float]]) -> None:
+        """Same as put(), writing the shared tier without blocking the event loop."""
+        current_time = time.time()
+        self._store_local(key, results, current_time)
+        if self._shared is not None:
+            await self._shared.set_async(
+                key, self._encode(results, current_time), self._ttl_seconds
+            )
 
-        self._cache[key] = (results, current_time)
-        self._access_times[key] = current_time
+    def _get_local(self, key: str) -> list[tuple[Chunk, float]] | None:
+        """Look up the in-process tier, counting a hit and dropping an expired entry."""
+        item = self._cache.get(key)
+        if item is None:
+            return None
+        results, cached_at = item
+        if time.time() - cached_at > self._ttl_seconds:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        self._hits += 1
+        return results
+
+    def _promote(self, key: str, payload: bytes | None) -> list[tuple[Chunk, float]] | None:
+        """Decode a shared-tier value into the in-process tier, counting a hit."""
+        if payload is None:
+            return None
+        decoded = json.loads(payload)
+        results = [(Chunk.model_validate(chunk), score) for chunk, score in decoded["results"]]
+        # Keep the original timestamp so promotion does not extend the TTL
+        self._store_local(key, results, decoded["cached_at"])
+        self._hits += 1
+        return results
+
+    @staticmethod
+    def _encode(results: list[tuple[Chunk, float]], cached_at: float) -> bytes:
+        """Serialize results for the shared tier."""
+        return json.dumps(
+            {
+                "cached_at": cached_at,
+                "results": [[chunk.model_dump(mode="json"), score] for chunk, score in results],
+            }
+        ).encode()
+
+    def _store_local(self, key: str, results: list[tuple[Chunk, float]], cached_at: float) -> None:
+        """Insert into the in-process tier only, evicting the least recently used."""
+        self._cache[key] = (results, cached_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+            self._evictions += 1
 
     def clear(self) -> None:
         """Clear all cached entries."""
         self._cache.clear()
-        self._access_times.clear()
 
     def get_stats(self) -> dict[str, Any]:
         """Get cache statistics."""
-        return {
+        stats: dict[str, Any] = {
             "size": len(self._cache),
             "max_size": self._max_size,
             "ttl_seconds": self._ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+            "generation": self._generation,
         }
+        if self._shared is not None:
+            stats["shared"] = self._shared.stats.as_dict()
+        return stats
 
 
 def serialize_embedding(embedding: list[float]) -> bytes:
@@ -208,16 +321,37 @@ def batch_cosine_similarity(query_vector: list[float], embedding_matrix: np.ndar
     return dot_products / denominator
 
 
+_RESULT_CACHES: WeakKeyDictionary[Any, QueryResultCache] = WeakKeyDictionary()
+
+
+def get_query_result_cache(session: AsyncSession) -> QueryResultCache:
+    """
+    Return the process-wide query result cache for the session's database engine.
+
+    Vector stores are built per request, so the cache is keyed by engine (like the
+    embedding index) to outlive a single query without mixing distinct databases.
+    """
+    bind = session.get_bind()
+    engine = getattr(bind, "engine", bind)
+    cache = _RESULT_CACHES.get(engine)
+    if cache is None:
+        cache = QueryResultCache(shared=get_shared_backend("query_results"))
+        _RESULT_CACHES[engine] = cache
+    return cache
+
+
 class VectorStore:
     """
     Vector store for semantic search using SQLite backend.
 
-    Stores embeddings as BLOB in SQLite and performs cosine similarity
-    search in Python using numpy for vectorized operations.
+    Stores embeddings as BLOB in SQLite (source of truth) and searches a
+    process-resident, pre-normalized copy of them (`EmbeddingIndex`), so a query
+    is one matrix-vector product and full rows are hydrated only for the top-k.
     """
 
     # Whitelist of allowed metadata filter keys to prevent SQL injection
-    # Only these keys can be used in json_extract() queries
+    # Only these keys can be used in json_extract() queries; the hot ones are
+    # answered from indexed `meta_<key>` columns (see PROMOTED_METADATA_KEYS)
     _ALLOWED_FILTER_KEYS = {
         # Legal document fields
         "documento",
@@ -287,7 +421,7 @@ class VectorStore:
         """
         self._session = session
         self._fts5_capability_cache: bool | None = None
-        self._result_cache = QueryResultCache() if enable_cache else None
+        self._result_cache = get_query_result_cache(session) if enable_cache else None
 
     async def add_embeddings(self, chunks_with_embeddings: list[tuple[Chunk, list[float]]]) -> None:
         """
@@ -306,6 +440,7 @@ class VectorStore:
                 event_name="rag_vector_store_add_batch",
             )
 
+            updated: list[tuple[str, list[float]]] = []
             for chunk, embedding in chunks_with_embeddings:
                 # Fetch the chunk ORM object
                 stmt = select(ChunkORM).where(ChunkORM.id == chunk.chunk_id)
@@ -315,14 +450,23 @@ class VectorStore:
                 if chunk_orm:
                     # Update embedding
                     chunk_orm.embedding = serialize_embedding(embedding)
+                    updated.append((chunk.chunk_id, embedding))
                 else:
                     log.warning(
                         LogEvents.API_ERRO_GERAR_RESPOSTA,
                         error=f"Chunk {chunk.chunk_id} not found for embedding",
                     )
 
+            if updated:
+                await bump_corpus_generation(self._session)
             await self._session.commit()
 
+            # Keep the resident matrix in sync with committed rows
+            await get_embedding_index(self._session).apply_changes(
+                self._session,
+                upserts=updated,
+            )
+
             log.info(
                 LogEvents.RAG_CHUNKS_CRIADOS,
                 count=len(chunks_with_embeddings),
@@ -358,7 +502,7 @@ class VectorStore:
             min_similarity: Minimum similarity threshold
             documento_id: Optional filter by document ID
             filters: Optional metadata filters (artigo, tipo, etc.)
-            candidate_limit: Optional max rows fetched before vector scoring
+            candidate_limit: Optional number of semantic candidates kept before ranking
 
         Returns:
             List of (chunk, similarity_score) tuples, sorted by similarity descending
@@ -375,8 +519,21 @@ class VectorStore:
             normalized_query_embedding = self._normalize_query_embedding(query_embedding)
 
             # Check cache for repeated queries
+            cache_key: str | None = None
             if self._result_cache:
-                cached_results = self._result_cache.get(normalized_query_embedding, filters, limit)
+                generation = await read_corpus_generation(self._session)
+                self._result_cache.sync_generation(generation)
+                cache_key = QueryResultCache.make_key(
+                    normalized_query_embedding,
+                    query_text=query_text,
+                    limit=limit,
+                    min_similarity=min_similarity,
+                    documento_id=documento_id,
+                    filters=filters,
+                    candidate_limit=candidate_limit,
+                    generation=generation,
+                )
+                cached_results = await self._result_cache.get_async(cache_key)
                 if cached_results is not None:
                     log.debug(
                         LogEvents.RAG_BUSCA_INICIADA,
@@ -397,63 +554,51 @@ class VectorStore:
                 event_name="rag_vector_store_search",
             )
 
-            # Build base query
-            stmt = select(ChunkORM).where(ChunkORM.embedding.isnot(None))
-
-            # Apply document filter
-            if documento_id is not None:
-                stmt = stmt.where(ChunkORM.documento_id == documento_id)
-
-            # Apply metadata filters (JSON filtering)
-            if filters:
-                stmt = self._apply_metadata_filters(stmt, filters)
-
-            # Execute query for all eligible chunks.
-            # Candidate limiting is applied after semantic scoring to avoid
-            # losing relevant chunks due to physical table order.
-            result = await self._session.execute(stmt)
-            chunk_orms = result.scalars().all()
+            # Boolean/categorical filters are answered by the index bitmaps; the
+            # rest becomes a SQL statement, built first so invalid filter keys
+            # are rejected even when the corpus is empty.
+            bitmap_filters, sql_filters = split_bitmap_filters(filters) if filters else ({}, {})
+            filter_stmt = None
+            if documento_id is not None or sql_filters:
+                filter_stmt = select(ChunkORM.id).where(ChunkORM.embedding.isnot(None))
+                if documento_id is not None:
+                    filter_stmt = filter_stmt.where(ChunkORM.documento_id == documento_id)
+                if sql_filters:
+                    filter_stmt = self._apply_metadata_filters(
+                        filter_stmt,
+                        sql_filters,
+                        promoted=await promoted_filter_keys(self._session),
+                    )
 
-            if not chunk_orms:
+            # Resident, pre-normalized embedding matrix (loaded once per engine)
+            index = get_embedding_index(self._session)
+            await index.ensure_loaded(self._session)
+            if len(index) == 0:
                 return []
 
-            # OPTIMIZATION 2: Batch processing with vectorized similarity
-            # Collect all embeddings and compute similarities at once using numpy
-            embeddings_list: list[np.ndarray] = []
-            valid_chunk_orms: list[ChunkORM] = []
-
-            for chunk_orm in chunk_orms:
-                if chunk_orm.embedding:
-                    # Deserialize to numpy array directly (avoid intermediate list)
-                    embedding_array = np.frombuffer(chunk_orm.embedding, dtype=np.float32)
-                    embeddings_list.append(embedding_array)
-                    valid_chunk_orms.append(chunk_orm)
-
-            if not embeddings_list:
+            mask = index.metadata_mask(bitmap_filters) if bitmap_filters else None
+            if filter_stmt is not None:
+                allowed_ids = (await self._session.execute(filter_stmt)).scalars().all()
+                if not allowed_ids:
+                    return []
+                sql_mask = index.mask_for(allowed_ids)
+                mask = sql_mask if mask is None else mask & sql_mask
+            if mask is not None and not mask.any():
                 return []
 
-            # Stack embeddings into a 2D matrix for vectorized computation
-            embedding_matrix = np.vstack(embeddings_list)
-
-            # Vectorized cosine similarity computation
-            similarities = batch_cosine_similarity(normalized_query_embedding, embedding_matrix)
-
             semantic_candidate_limit = candidate_limit or (limit * CANDIDATE_MULTIPLIER)
             semantic_candidate_limit = max(1, semantic_candidate_limit)
 
-            # Rank all eligible chunks semantically (no physical-order bias)
-            semantic_ranked: list[tuple[ChunkORM, float]] = []
-            for idx, similarity in enumerate(similarities):
-                semantic_ranked.append((valid_chunk_orms[idx], float(similarity)))
-            semantic_ranked.sort(key=lambda x: x[1], reverse=True)
-            semantic_score_map_all = {
-                chunk_orm.id: score for chunk_orm, score in semantic_ranked
-            }
-
-            # Stage-1 semantic candidates
+            # Stage-1 semantic candidates: IVF shortlist re-scored exactly when the
+            # ANN index is active, otherwise one GEMV over the resident matrix
+            positions, scores = index.nearest(
+                normalized_query_embedding,
+                semantic_candidate_limit,
+                mask,
+            )
             candidate_scores: dict[str, float] = {
-                chunk_orm.id: score
-                for chunk_orm, score in semantic_ranked[:semantic_candidate_limit]
+                index.chunk_id_at(int(position)): float(score)
+                for position, score in zip(positions, scores, strict=True)
             }
 
             # Stage-1 lexical candidates (FTS5 when available, fallback otherwise)
@@ -463,39 +608,32 @@ class VectorStore:
                     query_text=query_text,
                     limit=lexical_candidate_limit,
                 )
-                for lexical_id in lexical_ids:
-                    # Respect semantic score map from full scan and avoid adding
-                    # rows outside current structured filters.
-                    if lexical_id in candidate_scores:
-                        continue
-                    score = semantic_score_map_all.get(lexical_id)
-                    if score is not None:
-                        candidate_scores[lexical_id] = score
+                # Exact semantic scores for lexical hits, restricted to the
+                # current structured filters.
+                candidate_scores.update(
+                    index.score_chunks(
+                        normalized_query_embedding,
+                        [chunk_id for chunk_id in lexical_ids if chunk_id not in candidate_scores],
+                        mask,
+                    )
+                )
 
             # Final ranking by semantic similarity from hybrid candidate union
-            result_map = {chunk_orm.id: chunk_orm for chunk_orm in valid_chunk_orms}
-            results = [
-                (result_map[chunk_id], score)
+            ranked = [
+                (chunk_id, score)
                 for chunk_id, score in candidate_scores.items()
-                if score >= min_similarity and chunk_id in result_map
+                if score >= min_similarity
+            ]
+            ranked.sort(key=lambda x: x[1], reverse=True)
+            ranked = ranked[:limit]
+
+            # Hydrate full rows only for the final top-k
+            chunks_by_id = await self._hydrate_chunks([chunk_id for chunk_id, _ in ranked])
+            chunks_with_scores: list[tuple[Chunk, float]] = [
+                (chunks_by_id[chunk_id], score)
+                for chunk_id, score in ranked
+                if chunk_id in chunks_by_id
             ]
-            results.sort(key=lambda x: x[1], reverse=True)
-            results = results[:limit]
-
-            # Convert to Pydantic models
-            chunks_with_scores: list[tuple[Chunk, float]] = []
-            for chunk_orm, score in results:
-                metadata = self._build_chunk_metadata(chunk_orm.metadados)
-
-                chunk = Chunk(
-                    chunk_id=chunk_orm.id,
-                    documento_id=chunk_orm.documento_id,
-                    texto=chunk_orm.texto,
-                    metadados=metadata,
-                    token_count=chunk_orm.token_count,
-                    posicao_documento=0.0,  # Not stored in ORM
-                )
-                chunks_with_scores.append((chunk, score))
 
             log.info(
                 LogEvents.RAG_BUSCA_CONCLUIDA,
@@ -507,8 +645,8 @@ class VectorStore:
             )
 
             # Cache results for future queries
-            if self._result_cache:
-                self._result_cache.put(normalized_query_embedding, filters, limit, chunks_with_scores)
+            if self._result_cache and cache_key is not None:
+                await self._result_cache.put_async(cache_key, chunks_with_scores)
 
             return chunks_with_scores
 
@@ -520,6 +658,47 @@ class VectorStore:
             )
             raise APIError(f"Vector search failed: {e}") from e
 
+    async def warm_up(self) -> int:
+        """
+        Load the resident embedding matrix ahead of the first search.
+
+        Returns:
+            Number of embeddings held in memory
+        """
+        index = get_embedding_index(self._session)
+        await index.ensure_loaded(self._session)
+        return len(index)
+
+    def get_ann_stats(self) -> dict[str, Any]:
+        """IVF usage counters and sampled recall@k for this database's index."""
+        return get_embedding_index(self._session).ann_stats()
+
+    async def _hydrate_chunks(self, chunk_ids: list[str]) -> dict[str, Chunk]:
+        """Load text and metadata for the given ids in one query (no embedding blobs)."""
+        if not chunk_ids:
+            return {}
+
+        stmt = select(
+            ChunkORM.id,
+            ChunkORM.documento_id,
+            ChunkORM.texto,
+            ChunkORM.metadados,
+            ChunkORM.token_count,
+        ).where(ChunkORM.id.in_(chunk_ids))
+        rows = (await self._session.execute(stmt)).all()
+
+        return {
+            row.id: Chunk(
+                chunk_id=row.id,
+                documento_id=row.documento_id,
+                texto=row.texto,
+                metadados=self._build_chunk_metadata(row.metadados),
+                token_count=row.token_count,
+                posicao_documento=0.0,  # Not stored in ORM
+            )
+            for row in rows
+        }
+
     @staticmethod
     def _normalize_query_embedding(
         query_embedding: list[float] | bytes | bytearray | memoryview | np.ndarray,
@@ -572,7 +751,7 @@ class VectorStore:
         return has_table
 
     async def _fetch_lexical_candidate_ids(self, query_text: str, limit: int) -> list[str]:
-        """Fetch lexical candidates using FTS5 when available, otherwise LIKE fallback."""
+        """Fetch lexical candidates using FTS5 when available, otherwise the BM25 index."""
         if await self.has_fts5_capability():
             fts_ids = await self._fetch_lexical_candidate_ids_fts5(
                 query_text=query_text,
@@ -611,7 +790,17 @@ class VectorStore:
         return [str(chunk_id) for chunk_id in result.scalars().all()]
 
     async def _fetch_lexical_candidate_ids_fallback(self, query_text: str, limit: int) -> list[str]:
-        """Fallback lexical retrieval using LIKE scoring when FTS5 is unavailable."""
+        """
+        Fallback lexical retrieval when FTS5 is unavailable.
+
+        Ranks by BM25 over the resident lexical index; LIKE scoring is used only
+        when the index is disabled.
+        """
+        lexical_index = get_lexical_index(self._session)
+        if lexical_index is not None:
+            await lexical_index.ensure_loaded(self._session)
+            return [chunk_id for chunk_id, _ in lexical_index.search(query_text, limit)]
+
         terms = self._tokenize_lexical_query(query_text)
         if not terms:
             return []
@@ -634,7 +823,12 @@ class VectorStore:
         terms = [token.lower() for token in re.findall(r"[a-zA-Z0-9_]+", query_text)]
         return [term for term in terms if len(term) >= 3]
 
-    def _apply_metadata_filters(self, stmt: Any, filters: dict[str, Any]) -> Any:
+    def _apply_metadata_filters(
+        self,
+        stmt: Any,
+        filters: dict[str, Any],
+        promoted: frozenset[str] = frozenset(),
+    ) -> Any:
         """
         Apply validated metadata filters to query statement.
 
@@ -642,6 +836,9 @@ class VectorStore:
         - {"artigo": "not_null"}
         - {"banca": "CESPE"}
         - {"__or__": [{"marca_stf": True}, {"marca_stj": True}]}
+
+        Keys in `promoted` are compared against their indexed generated column
+        instead of `json_extract`, so SQLite can narrow candidates by index.
         """
         or_filters = filters.get("__or__")
         if or_filters is not None:
@@ -665,7 +862,7 @@ class VectorStore:
                     )
                     raise BotSalinhaError(msg)
                 group_conditions = [
-                    self._build_filter_condition(key=key, value=value)
+                    self._build_filter_condition(key=key, value=value, promoted=promoted)
                     for key, value in group.items()
                 ]
                 if group_conditions:
@@ -677,17 +874,24 @@ class VectorStore:
         for key, value in filters.items():
             if key in self._RESERVED_FILTER_KEYS:
                 continue
-            stmt = stmt.where(self._build_filter_condition(key=key, value=value))
+            stmt = stmt.where(
+                self._build_filter_condition(key=key, value=value, promoted=promoted)
+            )
 
         # Temporal range filters
-        stmt = self._apply_temporal_filters(stmt, filters)
+        stmt = self._apply_temporal_filters(stmt, filters, promoted=promoted)
 
         return stmt
 
-    def _apply_temporal_filters(self, stmt: Any, filters: dict[str, Any]) -> Any:
+    def _apply_temporal_filters(
+        self,
+        stmt: Any,
+        filters: dict[str, Any],
+        promoted: frozenset[str] = frozenset(),
+    ) -> Any:
         """Apply optional temporal range filters in ISO date format."""
-        valid_from = func.json_extract(ChunkORM.metadados, "$.valid_from")
-        valid_to = func.json_extract(ChunkORM.metadados, "$.valid_to")
+        valid_from = metadata_value_expr("valid_from", promoted)
+        valid_to = metadata_value_expr("valid_to", promoted)
 
         valid_from_gte = filters.get("valid_from_gte")
         if isinstance(valid_from_gte, str):
@@ -707,7 +911,12 @@ class VectorStore:
 
         return stmt
 
-    def _build_filter_condition(self, key: str, value: Any) -> Any:
+    def _build_filter_condition(
+        self,
+        key: str,
+        value: Any,
+        promoted: frozenset[str] = frozenset(),
+    ) -> Any:
         """
         Build a safe SQLAlchemy condition for JSON metadata filtering.
         """
@@ -716,7 +925,7 @@ class VectorStore:
             msg = f"Invalid filter key '{key}'. Allowed keys: {allowed}"
             raise BotSalinhaError(msg)
 
-        json_value = func.json_extract(ChunkORM.metadados, f"$.{key}")
+        json_value = metadata_value_expr(key, promoted)
         if isinstance(value, str) and value == "not_null":
             return json_value.isnot(None)
         if isinstance(value, str) and value == "is_null":
@@ -810,6 +1019,7 @@ class VectorStore:
 __all__ = [
     "VectorStore",
     "cosine_similarity",
+    "get_query_result_cache",
     "serialize_embedding",
     "deserialize_embedding",
 ]
@@ -0,0 +1,80 @@
+"""Approximate access-frequency counting for cache admission (TinyLFU)."""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+
+# Counters saturate here (4-bit counters in the TinyLFU paper)
+_MAX_COUNT = 15
+# Most hash rows a single blake2b digest (64 bytes) can feed
+_MAX_DEPTH = 16
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of key frequencies with periodic aging.
+
+    Each key maps to one counter per row; its estimate is the smallest of
+    them. Increments only raise the counters holding that minimum
+    (conservative update), which keeps collisions from inflating estimates.
+    After `sample_size` increments every counter is halved, so the sketch
+    tracks recent popularity instead of all-time counts.
+    """
+
+    def __init__(self, width: int = 16384, depth: int = 4, sample_size: int | None = None):
+        """
+        Initialize the sketch.
+
+        Args:
+            width: Counters per row (rounded up to a power of two); size it
+                around the number of distinct keys the cache can hold
+            depth: Hash rows (1-16)
+            sample_size: Increments between agings (defaults to 10 * width)
+        """
+        if not 1 <= depth <= _MAX_DEPTH:
+            raise ValueError(f"depth must be between 1 and {_MAX_DEPTH}")
+        self._width = 1 << max(4, (max(width, 1) - 1).bit_length())
+        self._mask = np.uint32(self._width - 1)
+        self._depth = depth
+        self._rows = np.arange(depth)
+        self._table = np.zeros((depth, self._width), dtype=np.uint8)
+        self._sample_size = sample_size or 10 * self._width
+        self._additions = 0
+        self.resets = 0
+
+    def _indexes(self, key: str) -> np.ndarray:
+        """Counter position of `key` in each row."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self._depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) & self._mask
+
+    def increment(self, key: str) -> None:
+        """Record one access to `key`."""
+        indexes = self._indexes(key)
+        counters = self._table[self._rows, indexes]
+        smallest = counters.min()
+        if smallest < _MAX_COUNT:
+            rows = self._rows[counters == smallest]
+            self._table[rows, indexes[rows]] = smallest + 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+
+    def estimate(self, key: str) -> int:
+        """Estimated recent accesses to `key` (never below the true count before aging)."""
+        return int(self._table[self._rows, self._indexes(key)].min())
+
+    def _age(self) -> None:
+        """Halve every counter."""
+        self._table >>= 1
+        self._additions //= 2
+        self.resets += 1
+
+    def clear(self) -> None:
+        """Forget every count."""
+        self._table.fill(0)
+        self._additions = 0
+
+
+__all__ = ["FrequencySketch"]
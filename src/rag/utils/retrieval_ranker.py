@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import re
-from collections.abc import Iterable
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from functools import lru_cache
 
 from ..models import Chunk
 from .normalizer import normalize_query_text
@@ -14,6 +16,9 @@ _ARTICLE_PATTERN = re.compile(r"\bart\.?\s*(\d+[a-z]?)", re.IGNORECASE)
 _PARAGRAFO_PATTERN = re.compile(r"(?:§|par[aá]grafo)\s*(\d+|unico|único)", re.IGNORECASE)
 _INCISO_PATTERN = re.compile(r"\binciso\s+([ivxlcdm]+|\d+)\b", re.IGNORECASE)
 
+# Upper bound on chunk term-count entries kept by `chunk_terms`
+TERM_CACHE_SIZE = 4096
+
 _STOPWORDS = {
     "a",
     "ao",
@@ -62,6 +67,32 @@ class RerankWeights:
     gamma: float
 
 
+@dataclass(slots=True)
+class ChunkTerms:
+    """Term frequencies of a chunk text, as produced by `tokenize_ptbr`."""
+
+    counts: dict[str, int]
+    total: int
+
+
+@dataclass(slots=True)
+class QueryFeatures:
+    """Query-side rerank features, computed once per rerank call."""
+
+    normalized: str
+    tokens: frozenset[str]
+    articles: set[str]
+    paragrafos: set[str]
+    incisos: set[str]
+
+
+# Returns precomputed term counts for (chunk id, chunk text), or None when
+# unknown or computed from a different text
+TermCountsLookup = Callable[[str, str], dict[str, int] | None]
+
+_TERM_CACHE: OrderedDict[tuple[str, int], ChunkTerms] = OrderedDict()
+
+
 def tokenize_ptbr(text: str) -> list[str]:
     """
     Tokenize text for lexical matching in Portuguese legal queries.
@@ -77,6 +108,65 @@ def tokenize_ptbr(text: str) -> list[str]:
     return [t for t in tokens if len(t) > 1 and t not in _STOPWORDS]
 
 
+def chunk_terms(chunk: Chunk, lookup: TermCountsLookup | None = None) -> ChunkTerms:
+    """
+    Return the term frequencies of a chunk, tokenizing its text at most once.
+
+    Entries live in a bounded LRU keyed by chunk id and text hash, so an
+    edited chunk never reuses stale counts. On a miss, `lookup` (e.g. the
+    lexical index, which stores counts computed at ingestion) is tried before
+    falling back to `tokenize_ptbr`; it receives the chunk text and must
+    return None unless its counts were computed from that same text.
+
+    Args:
+        chunk: Candidate chunk.
+        lookup: Optional source of precomputed term counts by chunk id and text.
+
+    Returns:
+        Term counts and total token count of the chunk text.
+    """
+    key = (chunk.chunk_id, hash(chunk.texto))
+    cached = _TERM_CACHE.get(key)
+    if cached is not None:
+        _TERM_CACHE.move_to_end(key)
+        return cached
+
+    counts = lookup(chunk.chunk_id, chunk.texto) if lookup is not None else None
+    if counts is None:
+        counts = Counter(tokenize_ptbr(chunk.texto))
+    terms = ChunkTerms(counts=dict(counts), total=sum(counts.values()))
+
+    _TERM_CACHE[key] = terms
+    if len(_TERM_CACHE) > TERM_CACHE_SIZE:
+        _TERM_CACHE.popitem(last=False)
+    return terms
+
+
+def clear_term_cache() -> None:
+    """Drop every cached chunk term-count entry."""
+    _TERM_CACHE.clear()
+
+
+def query_features(query_text: str) -> QueryFeatures:
+    """
+    Extract the query tokens and legal references used by the reranker.
+
+    Args:
+        query_text: User query text.
+
+    Returns:
+        Normalized query, distinct tokens and article/paragraph/inciso refs.
+    """
+    normalized = normalize_query_text(query_text)
+    return QueryFeatures(
+        normalized=normalized,
+        tokens=frozenset(tokenize_ptbr(query_text)),
+        articles=_normalize_refs(_ARTICLE_PATTERN.findall(normalized)),
+        paragrafos=_normalize_refs(_PARAGRAFO_PATTERN.findall(normalized)),
+        incisos=_normalize_refs(_INCISO_PATTERN.findall(normalized)),
+    )
+
+
 def detect_query_type(query_text: str) -> str:
     """
     Detect broad legal query type for observability.
@@ -103,6 +193,7 @@ def rerank_hybrid_lite(
     alpha: float = 0.70,
     beta: float = 0.20,
     gamma: float = 0.10,
+    term_counts_lookup: TermCountsLookup | None = None,
 ) -> list[tuple[Chunk, RerankScore]]:
     """
     Re-rank candidates by combining semantic score, lexical score and metadata boost.
@@ -113,16 +204,17 @@ def rerank_hybrid_lite(
         alpha: Semantic score weight.
         beta: Lexical score weight.
         gamma: Metadata boost weight.
+        term_counts_lookup: Optional source of precomputed chunk term counts.
 
     Returns:
         Candidates sorted by final score (descending), with score breakdown.
     """
-    query_tokens = tokenize_ptbr(query_text)
+    features = query_features(query_text)
     reranked: list[tuple[Chunk, RerankScore]] = []
 
     for chunk, semantic_score in chunks_with_scores:
-        lexical_score = _lexical_score(query_tokens, chunk.texto)
-        metadata_boost = _metadata_boost(query_text, chunk)
+        lexical_score = _lexical_score(features.tokens, chunk_terms(chunk, term_counts_lookup))
+        metadata_boost = _metadata_boost(features, chunk)
         final_score = (
             alpha * float(semantic_score)
             + beta * float(lexical_score)
@@ -181,43 +273,37 @@ def resolve_rerank_weights(
     )
 
 
-def _lexical_score(query_tokens: list[str], chunk_text: str) -> float:
+def _lexical_score(query_tokens: frozenset[str], terms: ChunkTerms) -> float:
     """
     Compute a lightweight lexical score in [0, 1].
 
     Score favors both query coverage and term frequency in chunk text.
     """
-    if not query_tokens:
-        return 0.0
-
-    chunk_tokens = tokenize_ptbr(chunk_text)
-    if not chunk_tokens:
+    if not query_tokens or not terms.total:
         return 0.0
 
-    query_unique = set(query_tokens)
-    chunk_set = set(chunk_tokens)
-    matched_terms = query_unique.intersection(chunk_set)
+    matched_terms = query_tokens.intersection(terms.counts)
     if not matched_terms:
         return 0.0
 
-    coverage = len(matched_terms) / max(len(query_unique), 1)
-    frequency = sum(chunk_tokens.count(term) for term in matched_terms) / max(len(chunk_tokens), 1)
+    coverage = len(matched_terms) / len(query_tokens)
+    frequency = sum(terms.counts[term] for term in matched_terms) / terms.total
     # Frequency is typically small; scale to keep score in [0, 1].
     frequency_scaled = min(frequency * 8.0, 1.0)
     return min(0.7 * coverage + 0.3 * frequency_scaled, 1.0)
 
 
-def _metadata_boost(query_text: str, chunk: Chunk) -> float:
+def _metadata_boost(features: QueryFeatures, chunk: Chunk) -> float:
     """
     Compute metadata alignment boost in [0, 1].
     """
-    normalized_query = normalize_query_text(query_text)
+    normalized_query = features.normalized
     metadata = chunk.metadados
     boost = 0.0
 
-    query_articles = _normalize_refs(_ARTICLE_PATTERN.findall(normalized_query))
-    query_paragrafos = _normalize_refs(_PARAGRAFO_PATTERN.findall(normalized_query))
-    query_incisos = _normalize_refs(_INCISO_PATTERN.findall(normalized_query))
+    query_articles = features.articles
+    query_paragrafos = features.paragrafos
+    query_incisos = features.incisos
 
     chunk_artigo = _normalize_ref(metadata.artigo)
     chunk_paragrafo = _normalize_ref(metadata.paragrafo)
@@ -254,6 +340,7 @@ def _normalize_refs(refs: Iterable[str]) -> set[str]:
     return {_normalize_ref(ref) for ref in refs if _normalize_ref(ref)}
 
 
+@lru_cache(maxsize=1024)
 def _normalize_ref(ref: str | None) -> str:
     if not ref:
         return ""
@@ -262,10 +349,15 @@ def _normalize_ref(ref: str | None) -> str:
 
 
 __all__ = [
+    "ChunkTerms",
+    "QueryFeatures",
     "RerankScore",
     "RerankWeights",
     "detect_query_type",
     "rerank_hybrid_lite",
+    "chunk_terms",
+    "clear_term_cache",
+    "query_features",
     "resolve_rerank_weights",
     "tokenize_ptbr",
 ]
@@ -5,11 +5,16 @@ Encapsulates the logic for managing conversations, messages,
 and AI agent interactions.
 """
 
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
 import structlog
 
 from ..models.conversation import Conversation
 from ..storage.repository import ConversationRepository, MessageRepository
 from ..utils.message_splitter import MessageSplitter
+from ..utils.metrics import track_pipeline_stage
 
 log = structlog.get_logger()
 
@@ -81,8 +86,8 @@ class ConversationService:
         Process a user question and return the response.
 
         This method:
-        1. Saves the user's question
-        2. Generates an AI response
+        1. Saves the user's question, concurrently with step 2
+        2. Generates an AI response (RAG-augmented; cached answers skip the LLM)
         3. Saves the AI response
         4. Splits the response if needed
 
@@ -96,21 +101,88 @@ class ConversationService:
         Returns:
             List of message chunks (split for Discord's character limit)
         """
-        # Save user message
+        # Save user message while the answer is prepared (the agent leaves the
+        # question out of the history whether or not the save has landed)
+        save_user_message = asyncio.create_task(
+            self._save_user_message(conversation, question, discord_message_id)
+        )
+        try:
+            # Generate response (semantic cache fast path, then RAG + LLM)
+            response, _rag_context = await self.agent.generate_response_with_rag(
+                prompt=question,
+                conversation_id=conversation.id,
+                user_id=user_id,
+                guild_id=guild_id,
+            )
+        except BaseException:
+            # The question is kept even when generation fails
+            await self._settle_user_message_save(save_user_message, conversation.id)
+            raise
+        user_message_save_ms = await save_user_message
+
+        # Save assistant message (after the question, preserving their order)
         await self.agent.save_message(
             conversation_id=conversation.id,
-            role="user",
-            content=question,
-            discord_message_id=discord_message_id,
+            role="assistant",
+            content=response,
         )
 
-        # Generate response
-        response = await self.agent.generate_response(
-            prompt=question,
+        log.info(
+            "question_processed",
             conversation_id=conversation.id,
             user_id=user_id,
-            guild_id=guild_id,
+            question_length=len(question),
+            response_length=len(response),
+            user_message_save_ms=round(user_message_save_ms, 2),
+        )
+
+        # Split for Discord
+        return self.message_splitter.split(response)
+
+    async def stream_question(
+        self,
+        question: str,
+        conversation: Conversation,
+        user_id: str,
+        guild_id: str | None,
+        discord_message_id: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Process a user question, yielding the response while it is generated.
+
+        Same steps as process_question(), but the response is yielded in
+        pieces as the LLM produces them (a cached answer arrives in one
+        piece) and is saved once complete. Splitting is left to the caller,
+        which renders the pieces progressively.
+
+        Args:
+            question: User's question
+            conversation: Conversation instance
+            user_id: Discord user ID
+            guild_id: Discord guild ID
+            discord_message_id: Discord message ID for the user's message
+
+        Yields:
+            Pieces of the response text
+        """
+        save_user_message = asyncio.create_task(
+            self._save_user_message(conversation, question, discord_message_id)
         )
+        parts: list[str] = []
+        try:
+            async for delta in self.agent.stream_response_with_rag(
+                prompt=question,
+                conversation_id=conversation.id,
+                user_id=user_id,
+                guild_id=guild_id,
+            ):
+                parts.append(delta)
+                yield delta
+        except BaseException:
+            await self._settle_user_message_save(save_user_message, conversation.id)
+            raise
+        user_message_save_ms = await save_user_message
+        response = "".join(parts)
 
         # Save assistant message
         await self.agent.save_message(
@@ -125,10 +197,46 @@ class ConversationService:
             user_id=user_id,
             question_length=len(question),
             response_length=len(response),
+            user_message_save_ms=round(user_message_save_ms, 2),
+            streamed=True,
         )
 
-        # Split for Discord
-        return self.message_splitter.split(response)
+    async def _save_user_message(
+        self,
+        conversation: Conversation,
+        question: str,
+        discord_message_id: str | None,
+    ) -> float:
+        """Persist the user's question; returns the time it took in ms."""
+        started = time.perf_counter()
+        with track_pipeline_stage("user_message_save"):
+            await self.agent.save_message(
+                conversation_id=conversation.id,
+                role="user",
+                content=question,
+                discord_message_id=discord_message_id,
+            )
+        return (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    async def _settle_user_message_save(
+        save_user_message: asyncio.Task[float],
+        conversation_id: str,
+    ) -> None:
+        """
+        Wait for the user message save after generation failed.
+
+        A failed save is logged instead of raised, so the caller re-raises
+        the generation error rather than the save error.
+        """
+        try:
+            await save_user_message
+        except Exception as e:
+            log.warning(
+                "user_message_save_failed",
+                conversation_id=conversation_id,
+                error=str(e),
+            )
 
     async def clear_conversation(
         self,
@@ -154,6 +262,8 @@ class ConversationService:
 
         for conv in conversations:
             if conv.channel_id == channel_id:
+                # Also drops messages still queued for writing (write-behind)
+                await self.message_repo.delete_conversation_messages(conv.id)
                 await self.conversation_repo.delete_conversation(conv.id)
                 log.info(
                     "conversation_cleared",
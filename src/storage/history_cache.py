@@ -0,0 +1,331 @@
+"""
+In-memory history of active conversations.
+
+Keeps the last exchanges of each conversation so building the LLM context
+does not query the database on every turn.
+"""
+
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from ..config.settings import settings
+from ..models.message import Message, MessageCreate, MessageRole, MessageUpdate
+from .repository import MessageRepository
+
+# Roles kept in the history (the ones the LLM context is built from)
+_HISTORY_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
+# Approximate per-message bookkeeping cost (dict, tuple, deque slot)
+_MESSAGE_OVERHEAD_BYTES = 200
+
+
+@dataclass(slots=True)
+class _ConversationHistory:
+    """Ring buffer of one conversation's newest messages."""
+
+    messages: deque[tuple[str, str]]
+    size_bytes: int = 0
+    last_access: float = 0.0
+
+
+@dataclass(slots=True)
+class HistoryCacheStats:
+    """Counters of a history cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    idle_evictions: int = 0
+    conversations: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of history reads served from memory."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+def _message_size(content: str) -> int:
+    """Approximate memory held for one cached message."""
+    return len(content.encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+
+
+class ConversationHistoryCache:
+    """
+    Last `max_messages` user/assistant messages of active conversations.
+
+    A conversation enters the cache when its history is first loaded from
+    the database; after that every new message is appended to its ring
+    buffer, so the buffer always equals the newest rows. Conversations idle
+    for `idle_seconds` are dropped, and the least recently used ones go
+    when the total content exceeds `max_bytes`.
+
+    A load racing a write of the same conversation could store a history
+    missing that write, so such loads are discarded (the next read loads
+    again).
+    """
+
+    def __init__(
+        self,
+        max_messages: int,
+        max_bytes: int = 16 * 1024 * 1024,
+        idle_seconds: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_messages: Messages kept per conversation (2 per history run)
+            max_bytes: Approximate memory cap across all conversations
+            idle_seconds: Drop conversations not read or written for this long
+            clock: Time source (monotonic seconds)
+        """
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        # Least recently used first
+        self._entries: OrderedDict[str, _ConversationHistory] = OrderedDict()
+        self._size_bytes = 0
+        # Conversations with loads in flight, and those written to meanwhile
+        self._loading: dict[str, int] = {}
+        self._stale_loads: set[str] = set()
+        self._stats = HistoryCacheStats()
+
+    @property
+    def max_messages(self) -> int:
+        """Messages kept per conversation."""
+        return self._max_messages
+
+    @property
+    def stats(self) -> HistoryCacheStats:
+        """Current counters (conversation count and size refreshed on access)."""
+        self._stats.conversations = len(self._entries)
+        self._stats.size_bytes = self._size_bytes
+        return self._stats
+
+    def get(self, conversation_id: str, max_messages: int) -> list[dict[str, Any]] | None:
+        """
+        Return the newest `max_messages` messages, or None when not cached.
+
+        Args:
+            conversation_id: Conversation ID
+            max_messages: Messages wanted (at most the cache's max_messages)
+
+        Returns:
+            History in LLM format, oldest first, or None on a miss
+        """
+        self._evict_idle()
+        entry = self._entries.get(conversation_id)
+        if entry is None or max_messages > self._max_messages:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        entry.last_access = self._clock()
+        self._entries.move_to_end(conversation_id)
+        kept = list(entry.messages)[-max_messages:] if max_messages > 0 else []
+        return [{"role": role, "content": content} for role, content in kept]
+
+    def begin_load(self, conversation_id: str) -> None:
+        """Mark a database load of the conversation as started."""
+        self._loading[conversation_id] = self._loading.get(conversation_id, 0) + 1
+
+    def finish_load(self, conversation_id: str, history: list[dict[str, Any]] | None) -> None:
+        """
+        Store a loaded history (None: the load failed) and end the load.
+
+        Args:
+            conversation_id: Conversation ID
+            history: Newest `max_messages` messages in LLM format, oldest first
+        """
+        remaining = self._loading.get(conversation_id, 1) - 1
+        stale = conversation_id in self._stale_loads
+        if remaining > 0:
+            self._loading[conversation_id] = remaining
+        else:
+            self._loading.pop(conversation_id, None)
+            self._stale_loads.discard(conversation_id)
+        if history is None or stale or conversation_id in self._entries:
+            return
+
+        entry = _ConversationHistory(messages=deque(maxlen=self._max_messages))
+        self._entries[conversation_id] = entry
+        for message in history[-self._max_messages :]:
+            self._push(entry, message["role"], message["content"])
+        entry.last_access = self._clock()
+        self._enforce_memory_cap()
+
+    def append(self, conversation_id: str, role: MessageRole, content: str) -> None:
+        """
+        Record a new message of a conversation.
+
+        Only conversations already in the cache are updated; others are
+        loaded from the database on their next read.
+        """
+        if role not in _HISTORY_ROLES:
+            return
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            if conversation_id in self._loading:
+                self._stale_loads.add(conversation_id)
+            return
+        self._push(entry, role.value, content)
+        entry.last_access = self._clock()
+        self._entries.move_to_end(conversation_id)
+        self._enforce_memory_cap()
+
+    def discard(self, conversation_id: str | None = None) -> None:
+        """Forget one conversation, or every conversation when None."""
+        if conversation_id is None:
+            self._entries.clear()
+            self._size_bytes = 0
+            self._stale_loads.update(self._loading)
+            return
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self._size_bytes -= entry.size_bytes
+        if conversation_id in self._loading:
+            self._stale_loads.add(conversation_id)
+
+    def _push(self, entry: _ConversationHistory, role: str, content: str) -> None:
+        """Append to a ring buffer, accounting for the message it pushes out."""
+        if len(entry.messages) == entry.messages.maxlen:
+            _, dropped = entry.messages[0]
+            entry.size_bytes -= _message_size(dropped)
+            self._size_bytes -= _message_size(dropped)
+        entry.messages.append((role, content))
+        entry.size_bytes += _message_size(content)
+        self._size_bytes += _message_size(content)
+
+    def _evict_idle(self) -> None:
+        """Drop conversations idle for longer than idle_seconds."""
+        cutoff = self._clock() - self._idle_seconds
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.last_access > cutoff:
+                break
+            self._entries.popitem(last=False)
+            self._size_bytes -= entry.size_bytes
+            self._stats.idle_evictions += 1
+
+    def _enforce_memory_cap(self) -> None:
+        """Drop least recently used conversations until under max_bytes."""
+        self._evict_idle()
+        while self._size_bytes > self._max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._size_bytes -= entry.size_bytes
+            self._stats.evictions += 1
+
+
+class CachedHistoryMessageRepository(MessageRepository):
+    """
+    Message repository serving conversation history from a ConversationHistoryCache.
+
+    Writes go to the wrapped repository and are appended to the cache;
+    history reads are answered from memory once a conversation has been
+    loaded. Every other call is passed through.
+    """
+
+    def __init__(self, repository: MessageRepository, cache: ConversationHistoryCache) -> None:
+        """
+        Initialize the repository.
+
+        Args:
+            repository: Repository holding the messages
+            cache: History cache kept in sync with the writes made here
+        """
+        self._repository = repository
+        self._cache = cache
+
+    @classmethod
+    def from_settings(cls, repository: MessageRepository) -> "CachedHistoryMessageRepository":
+        """Wrap `repository` with a cache sized from settings."""
+        cache = ConversationHistoryCache(
+            max_messages=settings.history_runs * 2,
+            max_bytes=int(settings.database.history_cache_max_mb * 1024 * 1024),
+            idle_seconds=settings.database.history_cache_idle_seconds,
+        )
+        return cls(repository, cache)
+
+    @property
+    def cache(self) -> ConversationHistoryCache:
+        """The history cache."""
+        return self._cache
+
+    async def create_message(self, message: MessageCreate) -> Message:
+        """Create a message and append it to its conversation's cached history."""
+        created = await self._repository.create_message(message)
+        self._cache.append(created.conversation_id, created.role, created.content)
+        return created
+
+    async def get_conversation_history(
+        self,
+        conversation_id: str,
+        max_runs: int = 3,
+    ) -> list[dict[str, Any]]:
+        """Get conversation history, from memory when the conversation is cached."""
+        history = self._cache.get(conversation_id, max_runs * 2)
+        if history is not None:
+            return history
+        if max_runs * 2 > self._cache.max_messages:
+            # More than the cache keeps: read through without caching
+            return await self._repository.get_conversation_history(conversation_id, max_runs)
+
+        self._cache.begin_load(conversation_id)
+        loaded: list[dict[str, Any]] | None = None
+        try:
+            loaded = await self._repository.get_conversation_history(
+                conversation_id, self._cache.max_messages // 2
+            )
+        finally:
+            self._cache.finish_load(conversation_id, loaded)
+        return loaded[-(max_runs * 2) :] if max_runs > 0 else []
+
+    async def get_message_by_id(self, message_id: str) -> Message | None:
+        """Get a message by ID."""
+        return await self._repository.get_message_by_id(message_id)
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        limit: int | None = None,
+        role: MessageRole | None = None,
+    ) -> list[Message]:
+        """Get messages for a conversation."""
+        return await self._repository.get_conversation_messages(
+            conversation_id, limit=limit, role=role
+        )
+
+    async def update_message(self, message_id: str, updates: MessageUpdate) -> Message | None:
+        """Update a message, dropping its conversation's cached history."""
+        updated = await self._repository.update_message(message_id, updates)
+        if updated is not None:
+            self._cache.discard(updated.conversation_id)
+        return updated
+
+    async def delete_message(self, message_id: str) -> bool:
+        """Delete a message, dropping the cached histories (its conversation is unknown)."""
+        deleted = await self._repository.delete_message(message_id)
+        if deleted:
+            self._cache.discard()
+        return deleted
+
+    async def delete_conversation_messages(self, conversation_id: str) -> int:
+        """Delete all messages in a conversation and its cached history."""
+        try:
+            return await self._repository.delete_conversation_messages(conversation_id)
+        finally:
+            # After the delete: a read racing it could otherwise re-cache the
+            # old rows (a failed delete may still have removed some)
+            self._cache.discard(conversation_id)
+
+
+__all__ = [
+    "CachedHistoryMessageRepository",
+    "ConversationHistoryCache",
+    "HistoryCacheStats",
+]
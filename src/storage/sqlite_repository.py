@@ -5,11 +5,13 @@ Implements conversation and message repositories using SQLAlchemy with SQLite.
 Uses async patterns and proper connection management.
 """
 
+from collections.abc import Iterable, Sequence
 from datetime import UTC, datetime, timedelta
 from typing import Any
+from uuid import uuid4
 
 import structlog
-from sqlalchemy import delete, select, text
+from sqlalchemy import delete, insert, select, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -35,6 +37,29 @@ log = structlog.get_logger()
 # Create MessageORM with the correct base
 MessageORM = create_message_orm(Base)
 
+# Roles that make up LLM history
+_HISTORY_ROLES = (MessageRole.USER.value, MessageRole.ASSISTANT.value)
+
+
+def format_history(messages: Iterable[Message], max_runs: int) -> list[dict[str, Any]]:
+    """
+    Format messages (oldest first) as LLM context, keeping the last max_runs pairs.
+
+    Args:
+        messages: Conversation messages in chronological order
+        max_runs: Maximum number of user-assistant pairs to return
+
+    Returns:
+        List of messages in format [{"role": "user/assistant", "content": "..."}]
+    """
+    history = [
+        {"role": msg.role.value, "content": msg.content}
+        for msg in messages
+        if msg.role in (MessageRole.USER, MessageRole.ASSISTANT)
+    ]
+    # Keep last max_runs pairs (2 messages per run)
+    return history[-(max_runs * 2) :]
+
 
 class SQLiteRepository(ConversationRepository, MessageRepository):
     """
@@ -279,19 +304,48 @@ class SQLiteRepository(ConversationRepository, MessageRepository):
             Created message with generated ID and timestamp
         """
         async with self.async_session_maker() as session:
+            # ID and timestamp are set here, so no refresh (SELECT) is needed
             orm = MessageORM(
+                id=str(uuid4()),
                 conversation_id=message.conversation_id,
                 role=message.role.value,
                 content=message.content,
                 discord_message_id=message.discord_message_id,
+                created_at=datetime.now(UTC),
                 meta_data=message.meta_data,
             )
             session.add(orm)
             await session.commit()
-            await session.refresh(orm)
 
             return Message.model_validate(orm)
 
+    async def create_messages(self, messages: Sequence[Message]) -> None:
+        """
+        Insert already-built messages (IDs and timestamps set) in one transaction.
+
+        Args:
+            messages: Messages to insert
+        """
+        if not messages:
+            return
+        async with self.async_session_maker() as session:
+            await session.execute(
+                insert(MessageORM),
+                [
+                    {
+                        "id": message.id,
+                        "conversation_id": message.conversation_id,
+                        "role": message.role.value,
+                        "content": message.content,
+                        "discord_message_id": message.discord_message_id,
+                        "created_at": message.created_at,
+                        "meta_data": message.meta_data,
+                    }
+                    for message in messages
+                ],
+            )
+            await session.commit()
+
     async def get_message_by_id(self, message_id: str) -> Message | None:
         async with self.async_session_maker() as session:
             stmt = select(MessageORM).where(MessageORM.id == message_id)
@@ -343,26 +397,47 @@ class SQLiteRepository(ConversationRepository, MessageRepository):
         Returns:
             List of messages in format [{"role": "user/assistant", "content": "..."}]
         """
-        messages = await self.get_conversation_messages(
-            conversation_id,
-            limit=max_runs * 2 + 10,  # Get extra, then filter
-        )
+        # Newest 2 * max_runs user/assistant rows, served by the
+        # (conversation_id, created_at DESC) index; no ORM/Pydantic objects
+        async with self.async_session_maker() as session:
+            stmt = (
+                select(MessageORM.role, MessageORM.content)
+                .where(
+                    MessageORM.conversation_id == conversation_id,
+                    MessageORM.role.in_(_HISTORY_ROLES),
+                )
+                .order_by(MessageORM.created_at.desc())
+                .limit(max_runs * 2)
+            )
+            rows = (await session.execute(stmt)).all()
 
-        # Convert to LLM format
-        history = []
-        for msg in messages:
-            if msg.role in (MessageRole.USER, MessageRole.ASSISTANT):
-                history.append({"role": msg.role.value, "content": msg.content})
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
 
-        # Limit to max_runs pairs
-        # Keep system messages, then truncate user/assistant pairs
-        system_messages = [m for m in history if m["role"] == "system"]
-        user_assistant = [m for m in history if m["role"] != "system"]
+    async def get_recent_messages(self, conversation_id: str, limit: int) -> list[Message]:
+        """
+        Get the newest user/assistant messages of a conversation.
 
-        # Keep last max_runs pairs (2 messages per run)
-        user_assistant = user_assistant[-(max_runs * 2) :]
+        Args:
+            conversation_id: Unique conversation identifier
+            limit: Maximum number of messages
+
+        Returns:
+            Up to `limit` messages, oldest first
+        """
+        async with self.async_session_maker() as session:
+            stmt = (
+                select(MessageORM)
+                .where(
+                    MessageORM.conversation_id == conversation_id,
+                    MessageORM.role.in_(_HISTORY_ROLES),
+                )
+                .order_by(MessageORM.created_at.desc())
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            orms = result.scalars().all()
 
-        return system_messages + user_assistant
+            return [Message.model_validate(orm) for orm in reversed(orms)]
 
     async def update_message(self, message_id: str, updates: MessageUpdate) -> Message | None:
         async with self.async_session_maker() as session:
@@ -457,6 +532,7 @@ def reset_repository() -> None:
 __all__ = [
     "SQLiteRepository",
     "MessageORM",
+    "format_history",
     "get_repository",
     "set_repository",
     "reset_repository",
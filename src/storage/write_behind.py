@@ -0,0 +1,273 @@
+"""
+Write-behind persistence of conversation messages.
+
+Takes message inserts off the request path: writes are acknowledged at once
+and committed in batches by a background task, while reads still see them.
+"""
+
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+import structlog
+
+from ..config.settings import settings
+from ..models.message import Message, MessageCreate, MessageRole, MessageUpdate
+from ..utils.metrics import track_error, track_message_flush, track_message_queue_depth
+from .repository import MessageRepository
+from .sqlite_repository import SQLiteRepository, format_history
+
+log = structlog.get_logger()
+
+# Attempts per batch before its messages are given up (and logged)
+_MAX_WRITE_ATTEMPTS = 3
+# Wait before retrying a failed batch (multiplied by the attempt number)
+_RETRY_DELAY_SECONDS = 0.5
+
+
+@dataclass(slots=True)
+class WriteBehindStats:
+    """Counters of one write-behind queue."""
+
+    enqueued: int = 0
+    committed: int = 0
+    batches: int = 0
+    dropped: int = 0
+
+
+class WriteBehindMessageRepository(MessageRepository):
+    """
+    Message repository that persists new messages from a bounded queue.
+
+    `create_message` assigns the ID and timestamp itself and returns without
+    touching the database; a background task inserts queued messages in
+    batches of up to `batch_size`, one transaction each. Until a message is
+    committed it is kept in memory and merged into reads, so history loads
+    see it. When the queue is full, writers wait for room. `flush` waits for
+    everything queued to be committed; `close` (registered as a shutdown
+    cleanup task) flushes and stops the writer.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval_seconds: float = 0.05,
+    ) -> None:
+        """
+        Initialize the write-behind repository.
+
+        Args:
+            repository: Repository the messages are committed to
+            queue_size: Messages waiting to be written before writers wait
+            batch_size: Most messages inserted per transaction
+            flush_interval_seconds: How long a write waits for others to join
+                its batch
+        """
+        self._repository = repository
+        self._queue: asyncio.Queue[tuple[Message, float]] = asyncio.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_seconds
+        # Accepted but not yet committed, by ID (insertion order = enqueue order)
+        self._unflushed: dict[str, Message] = {}
+        self._writer: asyncio.Task[None] | None = None
+        self._closed = False
+        self._stats = WriteBehindStats()
+
+    @classmethod
+    def from_settings(cls, repository: SQLiteRepository) -> "WriteBehindMessageRepository":
+        """Create a write-behind repository configured from settings.database."""
+        return cls(
+            repository,
+            queue_size=settings.database.message_queue_size,
+            batch_size=settings.database.message_batch_size,
+            flush_interval_seconds=settings.database.message_flush_interval_seconds,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Messages accepted but not yet committed."""
+        return len(self._unflushed)
+
+    @property
+    def stats(self) -> WriteBehindStats:
+        """Live counters of this queue."""
+        return self._stats
+
+    async def create_message(self, message: MessageCreate) -> Message:
+        """
+        Accept a message for writing; it is committed in the background.
+
+        Args:
+            message: Message creation data
+
+        Returns:
+            The message with its (final) ID and timestamp
+        """
+        if self._closed:
+            return await self._repository.create_message(message)
+
+        stored = Message(
+            id=str(uuid4()),
+            conversation_id=message.conversation_id,
+            role=message.role,
+            content=message.content,
+            discord_message_id=message.discord_message_id,
+            meta_data=message.meta_data,
+            created_at=datetime.now(UTC),
+        )
+        self._unflushed[stored.id] = stored
+        self._stats.enqueued += 1
+        track_message_queue_depth(len(self._unflushed))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._run_writer())
+        # Waits only when the queue is full
+        await self._queue.put((stored, time.perf_counter()))
+        return stored
+
+    async def flush(self) -> None:
+        """Wait until every accepted message has been committed (or given up)."""
+        if self._writer is not None and not self._writer.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Flush pending messages and stop the writer; later writes go straight through."""
+        self._closed = True
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer
+            self._writer = None
+        log.info(
+            "message_write_behind_closed",
+            committed=self._stats.committed,
+            batches=self._stats.batches,
+            dropped=self._stats.dropped,
+        )
+
+    async def _run_writer(self) -> None:
+        """Commit queued messages in batches, forever."""
+        while True:
+            batch = [await self._queue.get()]
+            if self._flush_interval > 0 and self._queue.qsize() < self._batch_size - 1:
+                # Let writes arriving right behind this one share its transaction
+                await asyncio.sleep(self._flush_interval)
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: list[tuple[Message, float]]) -> None:
+        """Insert one batch, retrying transient failures."""
+        messages = [message for message, _ in batch]
+        oldest_enqueued_at = min(enqueued_at for _, enqueued_at in batch)
+        try:
+            for attempt in range(1, _MAX_WRITE_ATTEMPTS + 1):
+                try:
+                    await self._repository.create_messages(messages)
+                except Exception as e:
+                    if attempt == _MAX_WRITE_ATTEMPTS:
+                        self._stats.dropped += len(messages)
+                        track_error(type(e).__name__, "storage")
+                        log.error(
+                            "message_write_behind_batch_dropped",
+                            batch_size=len(messages),
+                            conversation_ids=sorted({m.conversation_id for m in messages}),
+                            error_type=type(e).__name__,
+                            error_message=str(e),
+                        )
+                        return
+                    log.warning(
+                        "message_write_behind_flush_failed",
+                        attempt=attempt,
+                        batch_size=len(messages),
+                        error_type=type(e).__name__,
+                    )
+                    await asyncio.sleep(_RETRY_DELAY_SECONDS * attempt)
+                else:
+                    self._stats.committed += len(messages)
+                    self._stats.batches += 1
+                    track_message_flush(len(messages), time.perf_counter() - oldest_enqueued_at)
+                    return
+        finally:
+            for message in messages:
+                self._unflushed.pop(message.id, None)
+            track_message_queue_depth(len(self._unflushed))
+
+    def _pending_for(self, conversation_id: str, role: MessageRole | None = None) -> list[Message]:
+        """Uncommitted messages of a conversation, oldest first."""
+        return [
+            message
+            for message in self._unflushed.values()
+            if message.conversation_id == conversation_id and (role is None or message.role == role)
+        ]
+
+    async def get_message_by_id(self, message_id: str) -> Message | None:
+        """Get a message by ID, including uncommitted ones."""
+        pending = self._unflushed.get(message_id)
+        if pending is not None:
+            return pending
+        return await self._repository.get_message_by_id(message_id)
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        limit: int | None = None,
+        role: MessageRole | None = None,
+    ) -> list[Message]:
+        """Get messages for a conversation; uncommitted ones come after the stored ones."""
+        # Taken before the read: a message committed meanwhile is then in one
+        # of the two lists at least (duplicates are removed by ID)
+        pending = self._pending_for(conversation_id, role)
+        stored = await self._repository.get_conversation_messages(
+            conversation_id, limit=limit, role=role
+        )
+        if not pending:
+            return stored
+        stored_ids = {message.id for message in stored}
+        merged = stored + [message for message in pending if message.id not in stored_ids]
+        return merged[:limit] if limit is not None else merged
+
+    async def get_conversation_history(
+        self,
+        conversation_id: str,
+        max_runs: int = 3,
+    ) -> list[dict[str, Any]]:
+        """Get conversation history formatted for LLM context, uncommitted turns included."""
+        pending = self._pending_for(conversation_id)
+        if not pending:
+            return await self._repository.get_conversation_history(conversation_id, max_runs)
+        stored = await self._repository.get_recent_messages(conversation_id, limit=max_runs * 2)
+        stored_ids = {message.id for message in stored}
+        messages = stored + [message for message in pending if message.id not in stored_ids]
+        return format_history(messages, max_runs)
+
+    async def update_message(self, message_id: str, updates: MessageUpdate) -> Message | None:
+        """Update a message (committing it first if it is still queued)."""
+        if message_id in self._unflushed:
+            await self.flush()
+        return await self._repository.update_message(message_id, updates)
+
+    async def delete_message(self, message_id: str) -> bool:
+        """Delete a message (committing it first if it is still queued)."""
+        if message_id in self._unflushed:
+            await self.flush()
+        return await self._repository.delete_message(message_id)
+
+    async def delete_conversation_messages(self, conversation_id: str) -> int:
+        """Delete all messages in a conversation, queued ones included."""
+        if self._pending_for(conversation_id):
+            await self.flush()
+        return await self._repository.delete_conversation_messages(conversation_id)
+
+
+__all__ = ["WriteBehindMessageRepository", "WriteBehindStats"]
@@ -113,8 +113,74 @@ class MessageSplitter:
         return len(self.split(message))
 
 
+class StreamingSplitter:
+    """
+    Incremental counterpart of MessageSplitter for text that arrives in pieces.
+
+    Text is fed as it is generated; a chunk is sealed only once the buffer
+    outgrows the limit, so sealed chunks never change. Like `split`, a chunk
+    ends at the last paragraph break that fits, or at the limit when there
+    is none.
+    """
+
+    def __init__(self, max_length: int = 2000) -> None:
+        """
+        Initialize the splitter.
+
+        Args:
+            max_length: Maximum characters per message (default: Discord's 2000)
+        """
+        if max_length <= 0:
+            raise ValueError("max_length must be positive")
+        self.max_length = max_length
+        self._buffer = ""
+
+    @property
+    def pending(self) -> str:
+        """Text of the chunk still being filled."""
+        return self._buffer
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Add text, returning the chunks it completed.
+
+        Args:
+            text: Next piece of the message
+
+        Returns:
+            Chunks sealed by this piece (usually none), each <= max_length
+        """
+        self._buffer += text
+        return self._seal(final=False)
+
+    def flush(self) -> list[str]:
+        """Seal and return everything pending (the message is complete)."""
+        sealed = self._seal(final=True)
+        if self._buffer:
+            sealed.append(self._buffer)
+            self._buffer = ""
+        return sealed
+
+    def _seal(self, final: bool) -> list[str]:
+        """Cut full chunks off the buffer."""
+        sealed: list[str] = []
+        # Until the message ends, wait for two characters past the limit: a
+        # paragraph break right at the limit still belongs to this chunk
+        reserve = 0 if final else 1
+        while len(self._buffer) > self.max_length + reserve:
+            # A paragraph break at index <= max_length leaves a chunk that fits
+            cut = self._buffer.rfind("\n\n", 1, self.max_length + 2)
+            if cut > 0:
+                sealed.append(self._buffer[:cut])
+                self._buffer = self._buffer[cut + 2 :]
+            else:
+                sealed.append(self._buffer[: self.max_length])
+                self._buffer = self._buffer[self.max_length :]
+        return sealed
+
+
 # Default instance for common use
 default_splitter = MessageSplitter()
 
 
-__all__ = ["MessageSplitter", "default_splitter"]
+__all__ = ["MessageSplitter", "StreamingSplitter", "default_splitter"]
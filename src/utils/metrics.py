@@ -139,6 +139,13 @@ if PROMETHEUS_AVAILABLE:
         buckets=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
     )
 
+    # Single-flight deduplication of concurrent identical work
+    rag_single_flight_total = Counter(
+        "botsalinha_rag_single_flight_total",
+        "Calls through single-flight groups",
+        ["operation", "role"],  # operation: rag_query, generation; role: leader, coalesced
+    )
+
 
 # =============================================================================
 # Legal Domain Metrics
@@ -203,6 +210,31 @@ if PROMETHEUS_AVAILABLE:
     )
 
 
+# =============================================================================
+# Storage Metrics
+# =============================================================================
+
+if PROMETHEUS_AVAILABLE:
+    # Messages accepted but not yet committed (write-behind queue)
+    storage_message_queue_depth = Gauge(
+        "botsalinha_storage_message_queue_depth",
+        "Messages waiting in the write-behind queue",
+    )
+
+    storage_message_batch_size = Histogram(
+        "botsalinha_storage_message_batch_size",
+        "Messages inserted per write-behind transaction",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    )
+
+    # From enqueue of a batch's oldest message until its transaction commits
+    storage_message_flush_latency_seconds = Histogram(
+        "botsalinha_storage_message_flush_latency_seconds",
+        "Time from enqueue to commit of write-behind messages",
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    )
+
+
 # =============================================================================
 # System Metrics
 # =============================================================================
@@ -216,6 +248,22 @@ if PROMETHEUS_AVAILABLE:
         buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
     )
 
+    # Time until the first generated text (stage: llm) / first Discord message (stage: visible)
+    system_time_to_first_token_seconds = Histogram(
+        "botsalinha_system_time_to_first_token_seconds",
+        "Time from request start to the first token",
+        ["stage"],  # stage: llm, visible
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0),
+    )
+
+    # Duration of each stage of the answer pipeline (stages may overlap)
+    system_pipeline_stage_duration_seconds = Histogram(
+        "botsalinha_system_pipeline_stage_duration_seconds",
+        "Duration of one answer pipeline stage",
+        ["stage"],  # stage: user_message_save, history_load, retrieval, llm_generation
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+    )
+
     # Error tracking
     system_errors_total = Counter(
         "botsalinha_system_errors_total",
@@ -284,6 +332,27 @@ def track_rag_query(component: str = "total") -> Iterator[None]:
         rag_query_duration_seconds.labels(component=component).observe(duration)
 
 
+@contextmanager
+def track_pipeline_stage(stage: str) -> Iterator[None]:
+    """
+    Context manager to track one stage of the answer pipeline.
+
+    Usage:
+        with track_pipeline_stage("history_load"):
+            history = await repository.get_conversation_history(...)
+    """
+    if not PROMETHEUS_AVAILABLE:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start_time
+        system_pipeline_stage_duration_seconds.labels(stage=stage).observe(duration)
+
+
 def track_cache_hit(cache_type: str) -> None:
     """
     Record a cache hit.
@@ -306,6 +375,20 @@ def track_cache_miss(cache_type: str) -> None:
         rag_cache_misses_total.labels(cache_type=cache_type).inc()
 
 
+def track_single_flight(operation: str, coalesced: bool) -> None:
+    """
+    Record a call through a single-flight group.
+
+    Args:
+        operation: Deduplicated operation (rag_query, generation)
+        coalesced: Whether the call joined work already in flight
+    """
+    if PROMETHEUS_AVAILABLE:
+        rag_single_flight_total.labels(
+            operation=operation, role="coalesced" if coalesced else "leader"
+        ).inc()
+
+
 def track_confidence(confidence: str) -> None:
     """
     Record RAG confidence level.
@@ -351,6 +434,42 @@ def track_discord_command(command: str, status: str = "success") -> None:
         discord_commands_total.labels(command=command, status=status).inc()
 
 
+def track_message_queue_depth(depth: int) -> None:
+    """
+    Record the number of messages waiting in the write-behind queue.
+
+    Args:
+        depth: Messages accepted but not yet committed
+    """
+    if PROMETHEUS_AVAILABLE:
+        storage_message_queue_depth.set(depth)
+
+
+def track_message_flush(batch_size: int, latency_seconds: float) -> None:
+    """
+    Record one committed write-behind batch.
+
+    Args:
+        batch_size: Messages in the batch
+        latency_seconds: Time from enqueue of its oldest message to commit
+    """
+    if PROMETHEUS_AVAILABLE:
+        storage_message_batch_size.observe(batch_size)
+        storage_message_flush_latency_seconds.observe(latency_seconds)
+
+
+def track_time_to_first_token(stage: str, seconds: float) -> None:
+    """
+    Record the time from request start to the first token.
+
+    Args:
+        stage: Where the token was observed (llm: generated, visible: shown on Discord)
+        seconds: Elapsed time in seconds
+    """
+    if PROMETHEUS_AVAILABLE:
+        system_time_to_first_token_seconds.labels(stage=stage).observe(seconds)
+
+
 def track_error(error_type: str, component: str) -> None:
     """
     Record system error.
@@ -423,12 +542,19 @@ __all__ = [
     "track_rag_query",
     "track_cache_hit",
     "track_cache_miss",
+    "track_single_flight",
     "track_confidence",
     "track_similarity",
     # Legal metrics
     "track_legal_query_type",
     # Discord metrics
     "track_discord_command",
+    # Storage metrics
+    "track_message_queue_depth",
+    "track_message_flush",
+    # System metrics
+    "track_time_to_first_token",
+    "track_pipeline_stage",
     # Error tracking
     "track_error",
 ]
@@ -0,0 +1,94 @@
+"""Single-flight deduplication of concurrent identical async work."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from .metrics import track_single_flight
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    """Counters of one single-flight group."""
+
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    failures: int = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        """Share of calls that reused work already in flight."""
+        return self.coalesced / self.calls if self.calls > 0 else 0.0
+
+
+class SingleFlight[T]:
+    """
+    Run at most one execution per key at a time; concurrent callers share it.
+
+    The first caller for a key starts the work as its own task; callers
+    arriving while it runs await the same task. Every caller waits through
+    `asyncio.shield`, so cancelling one of them (a timed-out command) neither
+    cancels the work nor the other waiters. Results are not kept once the
+    task finishes; caching them is the caller's job.
+    """
+
+    def __init__(self, operation: str) -> None:
+        """
+        Initialize the group.
+
+        Args:
+            operation: Name reported in logs and metrics (e.g. "rag_query")
+        """
+        self._operation = operation
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+        self._stats = SingleFlightStats()
+
+    async def run(self, key: str, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of `work()`, shared with concurrent calls for `key`.
+
+        Args:
+            key: Identity of the work (e.g. a semantic cache key)
+            work: Coroutine factory, only called when nothing is in flight
+
+        Returns:
+            The result of the (possibly shared) execution
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        self._stats.calls += 1
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self._stats.executions += 1
+        else:
+            self._stats.coalesced += 1
+        track_single_flight(self._operation, coalesced=coalesced)
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task[T]) -> None:
+        """Forget a finished execution so the next call starts fresh."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            self._stats.failures += 1
+
+    @property
+    def inflight(self) -> int:
+        """Executions currently running."""
+        return len(self._inflight)
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        """Live counters of this group."""
+        return self._stats
+
+
+__all__ = ["SingleFlight", "SingleFlightStats"]
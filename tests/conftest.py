@@ -264,15 +264,30 @@ def mock_gemini_api():
     """
     Mock the AI agent response for testing.
 
-    This fixture mocks AgentWrapper.generate_response to return a predictable response
+    This fixture mocks AgentWrapper.generate_response, generate_response_with_rag
+    and stream_response_with_rag (the !ask paths) to return a predictable response
     without making actual API calls.
     """
     from unittest.mock import AsyncMock, patch
 
     mock_response = "Esta é uma resposta de teste do BotSalinha sobre direito brasileiro. No Brasil, o princípio da legalidade é fundamental e está estabelecido no artigo 37 da Constituição Federal."
 
-    with patch(
-        "src.core.agent.AgentWrapper.generate_response", new=AsyncMock(return_value=mock_response)
+    async def mock_stream(self, *args, **kwargs):
+        # Two deltas, split after the first sentence, like a streamed generation
+        first_sentence_end = mock_response.index(". ") + 2
+        yield mock_response[:first_sentence_end]
+        yield mock_response[first_sentence_end:]
+
+    with (
+        patch(
+            "src.core.agent.AgentWrapper.generate_response",
+            new=AsyncMock(return_value=mock_response),
+        ),
+        patch(
+            "src.core.agent.AgentWrapper.generate_response_with_rag",
+            new=AsyncMock(return_value=(mock_response, None)),
+        ),
+        patch("src.core.agent.AgentWrapper.stream_response_with_rag", new=mock_stream),
     ):
         yield
 
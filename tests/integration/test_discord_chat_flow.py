@@ -175,8 +175,8 @@ class TestRateLimitingIntegration:
         # Act - Send multiple messages rapidly
         with (
             patch(
-                "src.core.discord.AgentWrapper.generate_response",
-                new=AsyncMock(return_value="Resposta teste"),
+                "src.core.discord.AgentWrapper.generate_response_with_rag",
+                new=AsyncMock(return_value=("Resposta teste", None)),
             ),
         ):
             # First two should succeed
@@ -345,8 +345,8 @@ class TestConversationHistory:
         with (
             patch.object(BotSalinhaBot, "user", new_callable=PropertyMock) as mock_user,
             patch(
-                "src.core.discord.AgentWrapper.generate_response",
-                new=AsyncMock(return_value="Resposta 1 sobre ICMS"),
+                "src.core.discord.AgentWrapper.generate_response_with_rag",
+                new=AsyncMock(return_value=("Resposta 1 sobre ICMS", None)),
             ),
         ):
             mock_user.return_value.id = 12345
@@ -370,8 +370,8 @@ class TestConversationHistory:
         with (
             patch.object(BotSalinhaBot, "user", new_callable=PropertyMock) as mock_user,
             patch(
-                "src.core.discord.AgentWrapper.generate_response",
-                new=AsyncMock(return_value="Resposta 2 sobre IPI"),
+                "src.core.discord.AgentWrapper.generate_response_with_rag",
+                new=AsyncMock(return_value=("Resposta 2 sobre IPI", None)),
             ),
         ):
             mock_user.return_value.id = 12345
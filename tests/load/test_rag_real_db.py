@@ -287,6 +287,7 @@ async def test_rag_cache_size_impact(
     Critérios de Sucesso:
     - Cache de 100 itens tem hit rate > 20%
     - Cache de 1000 itens tem hit rate significativamente maior
+    - Sob workload Zipfiano, admissão TinyLFU tem hit rate >= LRU puro
     """
     from src.rag import CachedEmbeddingService, QueryService
     from unittest.mock import AsyncMock, patch
@@ -341,5 +342,52 @@ async def test_rag_cache_size_impact(
     assert hit_rates[50] >= 0.15, f"Hit rate too low for cache_size=50: {hit_rates[50]:.2%}"
     assert hit_rates[500] >= hit_rates[50], "Larger cache should have better hit rate"
 
+    # Admission policy under a Zipfian workload with one-off questions:
+    # plain LRU vs TinyLFU in front of the same memory budget
+    import json
+
+    from src.rag.models import ConfiancaLevel, RAGContext
+    from src.rag.services.semantic_cache import CachedResponse, SemanticCache
+    from src.rag.utils.frequency_sketch import FrequencySketch
+
+    context = RAGContext(
+        chunks_usados=[],
+        similaridades=[],
+        confianca=ConfiancaLevel.SEM_RAG,
+        fontes=[],
+    )
+    answer = "Resposta jurídica de referência. " * 20
+    entry_size = CachedResponse(
+        rag_context_dict=context.model_dump(), llm_response=answer
+    ).size_bytes()
+    workload = generator.get_zipf_query_batch(5000, exponent=1.1, one_off_ratio=0.4)
+
+    zipf_hit_rates: dict[str, dict[int, float]] = {"lru": {}, "tinylfu": {}}
+    for entries in (10, 25, 50):
+        for policy in zipf_hit_rates:
+            cache = SemanticCache(
+                max_memory_mb=(entry_size * entries) / (1024 * 1024),
+                admission=FrequencySketch(width=1024) if policy == "tinylfu" else None,
+            )
+            for query in workload:
+                key = cache.generate_key(query, 5, 0.4)
+                if await cache.get(key) is None:
+                    await cache.set(key, context, answer)
+            zipf_hit_rates[policy][entries] = cache.get_stats().hit_rate
+
+    (load_test_report_dir / "cache_admission_zipf.json").write_text(
+        json.dumps(
+            {"cache_size_hit_rates": hit_rates, "zipf_hit_rates": zipf_hit_rates},
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    for entries, lru_rate in zipf_hit_rates["lru"].items():
+        tinylfu_rate = zipf_hit_rates["tinylfu"][entries]
+        assert tinylfu_rate >= lru_rate, (
+            f"TinyLFU should not lose to LRU at {entries} entries: "
+            f"{tinylfu_rate:.2%} < {lru_rate:.2%}"
+        )
+
 
 __all__ = []
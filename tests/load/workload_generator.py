@@ -212,6 +212,37 @@ class LegalWorkloadGenerator:
             queries.append(self.get_random_query())
         return queries
 
+    def get_zipf_query_batch(
+        self,
+        count: int,
+        exponent: float = 1.1,
+        one_off_ratio: float = 0.3,
+    ) -> list[str]:
+        """
+        Gera lote de queries com popularidade Zipfiana e cauda longa.
+
+        A i-ésima query mais popular de GENERAL_QUERIES é sorteada com peso
+        1 / i**exponent; uma fração `one_off_ratio` do lote são perguntas
+        únicas, feitas uma só vez (a cauda longa do tráfego real).
+
+        Args:
+            count: Número de queries a gerar
+            exponent: Expoente da distribuição de Zipf (> 0)
+            one_off_ratio: Fração de queries únicas (0-1)
+
+        Returns:
+            Lista de queries
+        """
+        popular = self.GENERAL_QUERIES
+        weights = [1.0 / (rank**exponent) for rank in range(1, len(popular) + 1)]
+        queries = []
+        for i in range(count):
+            if random.random() < one_off_ratio:
+                queries.append(f"{self.get_random_query()} (caso concreto {i})")
+            else:
+                queries.append(random.choices(popular, weights=weights)[0])
+        return queries
+
     def get_user_session_queries(self, query_count: int) -> list[str]:
         """
         Simula uma sessão de usuário com múltiplas queries.
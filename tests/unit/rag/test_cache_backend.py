@@ -0,0 +1,194 @@
+"""Unit tests for the shared cache tier backends."""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.rag.models import Chunk, ChunkMetadata, ConfiancaLevel, RAGContext
+from src.rag.services.cached_embedding_service import LRUCache
+from src.rag.services.semantic_cache import SemanticCache
+from src.rag.storage.cache_backend import (
+    CacheBackend,
+    InProcessCacheBackend,
+    SQLiteCacheBackend,
+)
+from src.rag.storage.vector_store import QueryResultCache
+
+
+class _BrokenBackend(CacheBackend):
+    tier = "broken"
+
+    def _get(self, key: str) -> bytes | None:
+        raise OSError("disk I/O error")
+
+    def _set(self, key: str, value: bytes, expires_at: float) -> None:
+        raise OSError("disk I/O error")
+
+    def _delete(self, key: str) -> None:
+        raise OSError("disk I/O error")
+
+    def _clear(self) -> None:
+        raise OSError("disk I/O error")
+
+
+def _chunk(chunk_id: str) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        documento_id=1,
+        texto="Art. 5º Todos são iguais perante a lei.",
+        metadados=ChunkMetadata(documento="CF/88", artigo="5"),
+        token_count=10,
+        posicao_documento=0.1,
+    )
+
+
+@pytest.mark.unit
+class TestBackends:
+    """Test TTL, eviction and per-tier metrics of each backend."""
+
+    def test_in_process_ttl_lru_and_stats(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Expired and least recently used entries are dropped; lookups are metered."""
+        backend = InProcessCacheBackend("test", max_entries=2)
+        backend.set("a", b"1", ttl_seconds=60)
+        backend.set("b", b"2", ttl_seconds=60)
+        assert backend.get("a") == b"1"
+        backend.set("c", b"3", ttl_seconds=60)
+
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 120)
+        assert backend.get("a") is None
+
+        stats = backend.stats.as_dict()
+        assert stats["tier"] == "memory"
+        assert (stats["hits"], stats["misses"], stats["sets"]) == (2, 2, 3)
+        assert stats["avg_get_ms"] >= 0.0
+
+    def test_sqlite_is_shared_between_connections(self, tmp_path: Path) -> None:
+        """Two backends on one file (two processes) see each other's writes."""
+        path = tmp_path / "shared.db"
+        writer = SQLiteCacheBackend(path, "semantic")
+        reader = SQLiteCacheBackend(path, "semantic")
+        other_namespace = SQLiteCacheBackend(path, "embeddings")
+
+        writer.set("k", b"payload", ttl_seconds=60)
+        writer.set("gone", b"payload", ttl_seconds=-1)
+        assert reader.get("k") == b"payload"
+        assert reader.get("gone") is None
+        assert other_namespace.get("k") is None
+
+        reader.clear()
+        assert writer.get("k") is None
+        for backend in (writer, reader, other_namespace):
+            backend.close()
+
+    def test_sqlite_trims_oldest_beyond_max_entries(self, tmp_path: Path) -> None:
+        """A namespace past max_entries keeps only the newest writes."""
+        backend = SQLiteCacheBackend(tmp_path / "shared.db", "q", max_entries=10)
+        for i in range(25):
+            backend.set(f"k{i}", b"x", ttl_seconds=60)
+
+        assert backend.get("k0") is None
+        assert backend.get("k24") == b"x"
+        backend.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_async_calls_run_off_the_event_loop(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The SQLite tier is queried from a worker thread; memory stays inline."""
+        threads: list[int] = []
+        sqlite_get = SQLiteCacheBackend._get
+
+        def recording_get(self: SQLiteCacheBackend, key: str) -> bytes | None:
+            threads.append(threading.get_ident())
+            return sqlite_get(self, key)
+
+        monkeypatch.setattr(SQLiteCacheBackend, "_get", recording_get)
+        backend = SQLiteCacheBackend(tmp_path / "shared.db", "semantic")
+        await backend.set_async("k", b"payload", ttl_seconds=60)
+
+        assert await backend.get_async("k") == b"payload"
+        assert threads and threads[0] != threading.get_ident()
+        await backend.clear_async()
+        assert await backend.get_async("k") is None
+        backend.close()
+        assert InProcessCacheBackend.blocking is False
+
+    def test_failures_degrade_to_misses(self) -> None:
+        """Backend errors are counted and never raised to the caller."""
+        backend = _BrokenBackend("test")
+        backend.set("k", b"v", ttl_seconds=60)
+        assert backend.get("k") is None
+        backend.clear()
+        assert backend.stats.errors == 3
+        assert backend.stats.misses == 1
+
+
+@pytest.mark.unit
+class TestSharedTierCaches:
+    """Test the caches reading through a shared backend."""
+
+    @pytest.mark.asyncio
+    async def test_semantic_caches_share_entries(self) -> None:
+        """A response cached by one SemanticCache is served by another."""
+        shared = InProcessCacheBackend("semantic")
+        first = SemanticCache(max_memory_mb=10, shared=shared)
+        second = SemanticCache(max_memory_mb=10, shared=shared)
+        context = RAGContext(
+            chunks_usados=[_chunk("c1")],
+            similaridades=[0.9],
+            confianca=ConfiancaLevel.ALTA,
+            fontes=["CF/88"],
+        )
+        key = first.generate_key("o que diz o art. 5?", 5, 0.4)
+        await first.set(key, context, "resposta")
+
+        cached = await second.get(key)
+        assert cached is not None
+        assert cached.llm_response == "resposta"
+        assert await second.get(key) is not None
+
+        stats = second.get_stats()
+        assert (stats.hits, stats.shared_hits, stats.shared_tier) == (2, 1, "memory")
+
+    def test_embedding_lru_round_trips_exact_floats(self) -> None:
+        """Embeddings come back from the shared tier bit-for-bit."""
+        shared = InProcessCacheBackend("embeddings")
+        vector = [0.1, 1 / 3, -2.5e-8]
+        LRUCache(max_size=10, shared=shared).set("k", vector)
+
+        cache = LRUCache(max_size=10, shared=shared)
+        assert cache.get("k") == vector
+        assert cache.stats["memory_hits"] == 0
+        assert cache.get("k") == vector
+        assert cache.stats["memory_hits"] == 1
+        assert cache.stats["shared"]["hits"] == 1
+
+    def test_query_result_cache_reads_through(self) -> None:
+        """Search results stored by one cache are rebuilt by another."""
+        shared = InProcessCacheBackend("query_results")
+        key = QueryResultCache.make_key(
+            [0.5] * 16,
+            query_text="art. 5",
+            limit=3,
+            min_similarity=0.6,
+            documento_id=None,
+            filters={"artigo": "5"},
+            candidate_limit=None,
+            generation=0,
+        )
+        QueryResultCache(shared=shared).put(key, [(_chunk("c1"), 0.8)])
+
+        cache = QueryResultCache(shared=shared)
+        results = cache.get(key)
+        assert results is not None
+        assert results[0][0].chunk_id == "c1"
+        assert results[0][1] == pytest.approx(0.8)
+        assert cache.get_stats()["hits"] == 1
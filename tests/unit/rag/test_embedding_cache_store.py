@@ -0,0 +1,123 @@
+"""Unit tests for the persistent embedding cache."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.rag.services.embedding_service import EmbeddingService
+from src.rag.storage.embedding_cache_store import EmbeddingCacheStore, content_hash
+
+
+def _fake_client() -> tuple[SimpleNamespace, AsyncMock]:
+    async def fake_create(input: list[str] | str, model: str) -> SimpleNamespace:  # noqa: A002
+        inputs = [input] if isinstance(input, str) else input
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(len(text)), 0.5]) for text in inputs]
+        )
+
+    create_mock = AsyncMock(side_effect=fake_create)
+    return SimpleNamespace(embeddings=SimpleNamespace(create=create_mock)), create_mock
+
+
+@pytest.mark.unit
+class TestEmbeddingCacheStore:
+    """Test addressing, persistence and trimming of the store."""
+
+    def test_round_trip_across_instances(self, tmp_path: Path) -> None:
+        """Vectors written by one store are read by another on the same file."""
+        path = tmp_path / "embeddings.db"
+        writer = EmbeddingCacheStore(path)
+        writer.put_many("model-a", [("Art. 5º  da CF", [0.25, -1.5]), ("   ", [0.0, 0.0])])
+        writer.close()
+
+        reader = EmbeddingCacheStore(path)
+        hit, blank, other_model = (
+            reader.get_many("model-a", ["Art. 5º da CF ", "   "])
+            + reader.get_many("model-b", ["Art. 5º da CF"])
+        )
+        assert hit == [0.25, -1.5]
+        assert blank is None
+        assert other_model is None
+        assert (reader.stats.hits, reader.stats.misses) == (1, 2)
+        reader.close()
+
+    def test_content_hash_normalizes_whitespace_only(self) -> None:
+        """Spacing differences share a key; case differences do not."""
+        assert content_hash(" art.\n5 ") == content_hash("art. 5")
+        assert content_hash("Art. 5") != content_hash("art. 5")
+
+    def test_trims_oldest_beyond_max_entries(self, tmp_path: Path) -> None:
+        """The store keeps only the newest writes once past max_entries."""
+        store = EmbeddingCacheStore(tmp_path / "embeddings.db", max_entries=10)
+        for i in range(25):
+            store.put_many("m", [(f"texto {i}", [float(i)])])
+
+        assert store.get_many("m", ["texto 0", "texto 24"]) == [None, [24.0]]
+        store.close()
+
+
+@pytest.mark.unit
+class TestEmbeddingServiceWithCache:
+    """Test that EmbeddingService only sends cache misses to the API."""
+
+    @pytest.mark.asyncio
+    async def test_batch_sends_only_misses(self, tmp_path: Path) -> None:
+        """A batch is split into cached hits and one API request for the misses."""
+        store = EmbeddingCacheStore(tmp_path / "embeddings.db")
+        service = EmbeddingService(api_key="test-key", cache=store)
+        service._client, create_mock = _fake_client()
+
+        first = await service.embed_batch(["alpha", "beta"])
+        second = await service.embed_batch(["beta", "", "gamma", "alpha"])
+
+        assert second[0] == first[1]
+        assert second[2] == [5.0, 0.5]
+        assert second[3] == first[0]
+        assert all(value == 0.0 for value in second[1])
+        assert create_mock.await_count == 2
+        assert create_mock.await_args.kwargs["input"] == ["gamma"]
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_embed_text_reuses_batch_entries(self, tmp_path: Path) -> None:
+        """A question embedded during ingestion never reaches the API again."""
+        store = EmbeddingCacheStore(tmp_path / "embeddings.db")
+        ingestion = EmbeddingService(api_key="test-key", cache=store)
+        ingestion._client, _ = _fake_client()
+        await ingestion.embed_batch(["o que diz o art. 5?"])
+
+        query = EmbeddingService(api_key="test-key", cache=store)
+        query._client, create_mock = _fake_client()
+        assert await query.embed_text("o que diz o  art. 5?") == [19.0, 0.5]
+        create_mock.assert_not_awaited()
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_store_is_queried_off_the_event_loop(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """SQLite reads and writes of the store run in worker threads."""
+        store = EmbeddingCacheStore(tmp_path / "embeddings.db")
+        threads: list[int] = []
+        for name in ("get_many", "put_many"):
+            method = getattr(store, name)
+
+            def recording(*args, _method=method, **kwargs):
+                threads.append(threading.get_ident())
+                return _method(*args, **kwargs)
+
+            monkeypatch.setattr(store, name, recording)
+        service = EmbeddingService(api_key="test-key", cache=store)
+        service._client, _ = _fake_client()
+
+        await service.embed_text("art. 5")
+        await service.embed_batch(["art. 5", "art. 6"])
+
+        assert len(threads) == 4
+        assert threading.get_ident() not in threads
+        store.close()
@@ -0,0 +1,183 @@
+"""Unit tests for memory-mapped embedding segment files."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.conversation import Base
+from src.models.rag_models import ChunkORM, DocumentORM
+from src.rag.storage.embedding_index import (
+    EmbeddingIndex,
+    compact_embedding_segments,
+    read_corpus_fingerprint,
+)
+from src.rag.storage.embedding_segments import EmbeddingSegmentStore
+from src.rag.storage.vector_store import serialize_embedding
+
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncSession:
+    """Create isolated in-memory DB session."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+    await engine.dispose()
+
+
+async def _add_chunks(session: AsyncSession, vectors: dict[str, list[float]]) -> None:
+    doc = DocumentORM(nome="SEG", arquivo_origem="seg.docx", chunk_count=len(vectors))
+    session.add(doc)
+    await session.flush()
+    for chunk_id, vector in vectors.items():
+        session.add(
+            ChunkORM(
+                id=chunk_id,
+                documento_id=doc.id,
+                texto=f"Texto {chunk_id}",
+                metadados=json.dumps({"documento": "SEG"}),
+                token_count=5,
+                embedding=serialize_embedding(vector),
+            )
+        )
+    await session.commit()
+
+
+class TestEmbeddingSegmentStore:
+    """Test segment append, resolution and compaction."""
+
+    def test_append_resolves_last_writer_and_removals(self, tmp_path: Path) -> None:
+        """Later segments override earlier rows and removals drop them."""
+        store = EmbeddingSegmentStore(tmp_path)
+        store.append(
+            upserts=[("a", np.array([1.0, 0.0])), ("b", np.array([0.0, 1.0]))],
+            removed_ids=[],
+            previous_fingerprint=0,
+            fingerprint=1,
+        )
+        store.append(
+            upserts=[("a", np.array([0.6, 0.8]))],
+            removed_ids=["b"],
+            previous_fingerprint=1,
+            fingerprint=2,
+        )
+
+        snapshot = store.load()
+        assert snapshot is not None
+        assert snapshot.ids == ["a"]
+        assert snapshot.zero_copy is False
+        np.testing.assert_allclose(snapshot.matrix[0], [0.6, 0.8], rtol=1e-6)
+        assert store.fingerprint() == 2
+
+    def test_out_of_sync_append_marks_manifest_stale(self, tmp_path: Path) -> None:
+        """Appending on top of segments that missed writes invalidates them."""
+        store = EmbeddingSegmentStore(tmp_path)
+        store.append(
+            upserts=[("a", np.array([1.0, 0.0]))],
+            removed_ids=[],
+            previous_fingerprint=0,
+            fingerprint=1,
+        )
+        store.append(
+            upserts=[("c", np.array([0.0, 1.0]))],
+            removed_ids=[],
+            previous_fingerprint=5,
+            fingerprint=6,
+        )
+
+        assert store.fingerprint() is None
+
+    def test_concurrent_appends_keep_every_segment(self, tmp_path: Path) -> None:
+        """Writers serialized by the manifest lock never reuse a segment name."""
+
+        def append(n: int) -> None:
+            EmbeddingSegmentStore(tmp_path).append(
+                upserts=[(f"c{n}", np.array([1.0, float(n)]))],
+                removed_ids=[],
+                previous_fingerprint=0,
+                fingerprint=1,
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(append, range(16)))
+
+        manifest = EmbeddingSegmentStore(tmp_path).read_manifest()
+        assert manifest is not None
+        assert len({segment["name"] for segment in manifest["segments"]}) == 16
+        snapshot = EmbeddingSegmentStore(tmp_path).load()
+        assert snapshot is not None
+        assert sorted(snapshot.ids) == sorted(f"c{n}" for n in range(16))
+
+    def test_rewrite_is_zero_copy_and_removes_old_files(self, tmp_path: Path) -> None:
+        """A compacted store maps one segment read-only and drops old files."""
+        store = EmbeddingSegmentStore(tmp_path)
+        store.append(
+            upserts=[("a", np.array([1.0, 0.0]))],
+            removed_ids=[],
+            previous_fingerprint=0,
+            fingerprint=1,
+        )
+        matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        store.rewrite(ids=["a", "b"], matrix=matrix, fingerprint=2)
+
+        snapshot = store.load()
+        assert snapshot is not None
+        assert snapshot.zero_copy is True
+        assert isinstance(snapshot.matrix, np.memmap)
+        assert snapshot.ids == ["a", "b"]
+        assert not (tmp_path / "segment_000001.f32").exists()
+
+
+class TestEmbeddingIndexSegments:
+    """Test loading the resident index from segment files."""
+
+    @pytest.mark.asyncio
+    async def test_index_maps_compacted_segments(
+        self, db_session: AsyncSession, tmp_path: Path
+    ) -> None:
+        """Compaction from SQLite lets a fresh index map rows instead of decoding blobs."""
+        await _add_chunks(db_session, {"a": [3.0, 0.0], "b": [0.0, 2.0]})
+        store = EmbeddingSegmentStore(tmp_path)
+        assert await compact_embedding_segments(db_session, store) == 2
+        assert store.fingerprint() == await read_corpus_fingerprint(db_session)
+
+        index = EmbeddingIndex(segment_store=store)
+        await index.ensure_loaded(db_session)
+        scores = index.similarities([1.0, 0.0])
+        assert index.chunk_id_at(int(index.top_positions(scores, 1)[0])) == "a"
+        assert not index._matrix.flags.writeable
+
+        index.upsert([("b", [1.0, 1.0])])
+        assert index._matrix.flags.writeable
+        assert store.load().matrix[1][0] == pytest.approx(0.0)
+
+    @pytest.mark.asyncio
+    async def test_index_ignores_stale_segments(
+        self, db_session: AsyncSession, tmp_path: Path
+    ) -> None:
+        """Segments whose fingerprint does not match the table fall back to SQLite."""
+        store = EmbeddingSegmentStore(tmp_path)
+        store.rewrite(
+            ids=["ghost"],
+            matrix=np.array([[1.0, 0.0]], dtype=np.float32),
+            fingerprint=1,
+        )
+        await _add_chunks(db_session, {"a": [1.0, 0.0], "b": [0.0, 1.0]})
+
+        index = EmbeddingIndex(segment_store=store)
+        await index.ensure_loaded(db_session)
+        assert index.position_of("ghost") is None
+        assert len(index) == 2
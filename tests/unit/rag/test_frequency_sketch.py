@@ -0,0 +1,47 @@
+"""Unit tests for the TinyLFU frequency sketch."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.rag.utils.frequency_sketch import FrequencySketch
+
+
+@pytest.mark.unit
+class TestFrequencySketch:
+    """Test estimates, saturation and aging."""
+
+    def test_estimates_track_counts(self) -> None:
+        """Frequent keys estimate higher than rare and unseen keys."""
+        sketch = FrequencySketch(width=1024)
+        for _ in range(5):
+            sketch.increment("art. 5 da CF")
+        sketch.increment("pergunta rara")
+
+        assert sketch.estimate("art. 5 da CF") == 5
+        assert sketch.estimate("pergunta rara") == 1
+        assert sketch.estimate("nunca vista") == 0
+
+    def test_counters_saturate(self) -> None:
+        """Counters stop at 15 instead of wrapping around."""
+        sketch = FrequencySketch(width=1024, sample_size=10_000)
+        for _ in range(40):
+            sketch.increment("popular")
+        assert sketch.estimate("popular") == 15
+
+    def test_aging_halves_counts(self) -> None:
+        """Every sample_size increments all counters are halved."""
+        sketch = FrequencySketch(width=1024, sample_size=8)
+        for _ in range(8):
+            sketch.increment("k")
+
+        assert sketch.resets == 1
+        assert sketch.estimate("k") == 4
+
+        sketch.clear()
+        assert sketch.estimate("k") == 0
+
+    def test_rejects_invalid_depth(self) -> None:
+        """Depth is bounded by the digest size."""
+        with pytest.raises(ValueError):
+            FrequencySketch(depth=17)
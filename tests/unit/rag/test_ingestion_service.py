@@ -0,0 +1,83 @@
+"""Unit tests for IngestionService corpus bookkeeping."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.models.rag_models import ChunkORM, DocumentORM
+from src.rag.services.ingestion_service import RAG_SCHEMA_VERSION, IngestionService
+from src.rag.storage.corpus_state import read_corpus_generation
+from src.rag.storage.embedding_index import get_embedding_index
+from src.rag.storage.vector_store import serialize_embedding
+
+
+@pytest.mark.unit
+class TestUnchangedDocumentIngestion:
+    """Test re-ingesting a file whose content is already in the corpus."""
+
+    @pytest.mark.asyncio
+    async def test_superseded_path_document_bumps_generation(
+        self, db_session, tmp_path: Path
+    ) -> None:
+        """Deleting the document previously stored at the path is a corpus change."""
+        file_path = tmp_path / "cf88.docx"
+        file_path.write_bytes(b"conteudo da CF/88")
+        content_hash = hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+        current = DocumentORM(
+            nome="CF/88",
+            arquivo_origem="antigo/cf88.docx",
+            content_hash=content_hash,
+            schema_version=RAG_SCHEMA_VERSION,
+            chunk_count=1,
+        )
+        superseded = DocumentORM(
+            nome="CF/88 (antiga)",
+            arquivo_origem=str(file_path),
+            content_hash="hash-antigo",
+            schema_version=RAG_SCHEMA_VERSION,
+            chunk_count=1,
+        )
+        db_session.add_all([current, superseded])
+        await db_session.flush()
+        db_session.add_all(
+            [
+                ChunkORM(
+                    id="chunk-atual",
+                    documento_id=current.id,
+                    texto="Art. 5 todos sao iguais",
+                    metadados=json.dumps({"documento": "CF/88"}),
+                    token_count=5,
+                    embedding=serialize_embedding([1.0, 0.0]),
+                ),
+                ChunkORM(
+                    id="chunk-antigo",
+                    documento_id=superseded.id,
+                    texto="Art. 5 redacao antiga",
+                    metadados=json.dumps({"documento": "CF/88"}),
+                    token_count=5,
+                    embedding=serialize_embedding([0.0, 1.0]),
+                ),
+            ]
+        )
+        await db_session.commit()
+        current_id = current.id
+        # Resolve documents (and their chunks) from the database, as a new run would
+        db_session.expunge_all()
+        index = get_embedding_index(db_session)
+        await index.ensure_loaded(db_session)
+        generation = await read_corpus_generation(db_session)
+
+        service = IngestionService(db_session, embedding_service=MagicMock(model="test-model"))
+        document = await service.ingest_document(str(file_path), "CF/88")
+
+        assert document.id == current_id
+        assert await read_corpus_generation(db_session) == generation + 1
+        assert index.fingerprint == generation + 1
+        assert index.position_of("chunk-antigo") is None
+        assert index.position_of("chunk-atual") is not None
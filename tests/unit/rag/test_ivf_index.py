@@ -0,0 +1,133 @@
+"""Unit tests for the IVF approximate nearest-neighbour index."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.config.settings import ANNConfig
+from src.rag.storage.embedding_index import EmbeddingIndex
+from src.rag.storage.ivf_index import IVFPartition
+
+
+def _clustered_rows(n_clusters: int = 8, per_cluster: int = 40, dim: int = 16) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(n_clusters, dim))
+    rows = np.repeat(centers, per_cluster, axis=0) + 0.05 * rng.normal(
+        size=(n_clusters * per_cluster, dim)
+    )
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows.astype(np.float32)
+
+
+def _index_with_ann(rows: np.ndarray, config: ANNConfig, path: Path | None) -> EmbeddingIndex:
+    index = EmbeddingIndex(ann_config=config, ann_path=path)
+    index.clear()
+    index.upsert([(f"c{i}", row) for i, row in enumerate(rows)])
+    index.rebuild_derived()
+    return index
+
+
+class TestIVFPartition:
+    """Test centroid training and probing."""
+
+    def test_train_separates_clusters(self) -> None:
+        """Rows of the same cluster land in the same list."""
+        rows = _clustered_rows()
+        partition = IVFPartition.train(rows, 8, iterations=10)
+        assignments = partition.assign(rows)
+
+        assert partition.n_lists == 8
+        for cluster in range(8):
+            members = assignments[cluster * 40 : (cluster + 1) * 40]
+            assert np.unique(members).size == 1
+
+    def test_save_and_load_roundtrip(self, tmp_path: Path) -> None:
+        """Persisted centroids and assignments are restored."""
+        rows = _clustered_rows()
+        partition = IVFPartition.train(rows, 4)
+        path = tmp_path / "db.sqlite.ivf.npz"
+        partition.save(path, ["a", "b"], np.array([1, 3]))
+
+        loaded = IVFPartition.load(path)
+        assert loaded is not None
+        restored, assignments = loaded
+        assert restored.n_lists == 4
+        assert assignments == {"a": 1, "b": 3}
+
+
+class TestEmbeddingIndexANN:
+    """Test IVF-backed nearest search on the resident index."""
+
+    def test_nearest_matches_exact_scan(self, tmp_path: Path) -> None:
+        """Probed search returns the exact top-k on well-separated data."""
+        rows = _clustered_rows()
+        config = ANNConfig(enabled=True, min_rows=10, n_lists=8, nprobe=2, recall_sample_rate=1.0)
+        index = _index_with_ann(rows, config, tmp_path / "ivf.npz")
+
+        query = rows[5] + 0.01
+        positions, scores = index.nearest(query, 10)
+        exact = index.top_positions(index.similarities(query), 10)
+
+        assert set(positions.tolist()) == set(exact.tolist())
+        assert scores[0] >= scores[-1]
+        stats = index.ann_stats()
+        assert stats["active"] is True
+        assert stats["fallbacks"] == 0
+        assert stats["mean_recall"] == 1.0
+
+    def test_persisted_partition_is_reused(self, tmp_path: Path) -> None:
+        """A second index loads centroids from disk instead of retraining."""
+        rows = _clustered_rows()
+        path = tmp_path / "ivf.npz"
+        config = ANNConfig(enabled=True, min_rows=10, n_lists=8)
+        _index_with_ann(rows, config, path)
+        assert path.exists()
+
+        saved_centroids = IVFPartition.load(path)[0]._centroids.copy()
+        second = _index_with_ann(rows, config, path)
+        np.testing.assert_array_equal(second._ivf._centroids, saved_centroids)
+
+    def test_narrow_filter_falls_back_to_exact_scan(self) -> None:
+        """A shortlist smaller than k triggers the exact scan over the mask."""
+        rows = _clustered_rows()
+        config = ANNConfig(enabled=True, min_rows=10, n_lists=8, nprobe=1)
+        index = _index_with_ann(rows, config, None)
+
+        far_ids = [f"c{i}" for i in range(300, 303)]
+        positions, _ = index.nearest(rows[0], 3, mask=index.mask_for(far_ids))
+
+        assert sorted(index.chunk_id_at(int(p)) for p in positions) == far_ids
+        assert index.ann_stats()["fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_partition_is_trained_off_the_event_loop(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """k-means training runs in a worker thread, not on the event loop."""
+        rows = _clustered_rows()
+        index = EmbeddingIndex(ann_config=ANNConfig(enabled=True, min_rows=10, n_lists=8))
+        index.clear()
+        index.upsert([(f"c{i}", row) for i, row in enumerate(rows)])
+
+        train_threads: list[int] = []
+        train = IVFPartition.train
+
+        def recording_train(*args, **kwargs) -> IVFPartition:
+            train_threads.append(threading.get_ident())
+            return train(*args, **kwargs)
+
+        monkeypatch.setattr(IVFPartition, "train", recording_train)
+        await index._prepare_ann_in_thread()
+
+        assert train_threads and train_threads[0] != threading.get_ident()
+        assert index.ann_stats()["active"] is True
+
+    def test_small_corpus_stays_exact(self) -> None:
+        """Below min_rows no partition is built."""
+        rows = _clustered_rows()
+        index = _index_with_ann(rows, ANNConfig(enabled=True, min_rows=10_000), None)
+        assert index.ann_stats()["active"] is False
@@ -0,0 +1,165 @@
+"""Unit tests for the corpus-level BM25 lexical index."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.conversation import Base
+from src.models.rag_models import ChunkORM, DocumentORM
+from src.rag.storage import lexical_index as lexical_module
+from src.rag.storage.corpus_state import bump_corpus_generation
+from src.rag.storage.lexical_index import LexicalIndex
+from src.rag.storage.vector_store import serialize_embedding
+
+TEXTS = {
+    "c1": "O direito de propriedade é garantido pela Constituição.",
+    "c2": "A propriedade atenderá a sua função social.",
+    "c3": "Habeas corpus contra prisão ilegal. Habeas corpus preventivo.",
+}
+
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncSession:
+    """In-memory database with three embedded chunks."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        doc = DocumentORM(nome="CF", arquivo_origem="cf.docx", chunk_count=3, token_count=30)
+        session.add(doc)
+        await session.flush()
+        session.add_all(
+            [
+                ChunkORM(
+                    id=chunk_id,
+                    documento_id=doc.id,
+                    texto=texto,
+                    metadados=json.dumps({"documento": "CF"}),
+                    token_count=10,
+                    embedding=serialize_embedding([1.0, 0.0]),
+                )
+                for chunk_id, texto in TEXTS.items()
+            ]
+        )
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.unit
+class TestLexicalIndex:
+    """Test BM25 statistics, scoring and persistence."""
+
+    @pytest.mark.asyncio
+    async def test_idf_favors_rare_terms(self, db_session: AsyncSession) -> None:
+        """A term in one chunk outweighs a term shared by two chunks."""
+        index = LexicalIndex()
+        await index.ensure_loaded(db_session)
+
+        assert len(index) == 3
+        ranked = index.search("propriedade constituicao", limit=3)
+        assert [chunk_id for chunk_id, _ in ranked] == ["c1", "c2"]
+
+        scores = index.score_chunks("habeas corpus", ["c1", "c3", "missing"])
+        assert scores["c1"] == 0.0
+        assert scores["c3"] > 0.0
+        assert "missing" not in scores
+        assert index.term_counts("c3")["habeas"] == 2
+        assert index.term_counts("c3", TEXTS["c3"])["habeas"] == 2
+        assert index.term_counts("c3", "Texto editado depois da indexação.") is None
+
+    @pytest.mark.asyncio
+    async def test_score_text_uses_corpus_statistics(self, db_session: AsyncSession) -> None:
+        """Unindexed text is scored with the corpus IDF and average length."""
+        index = LexicalIndex()
+        await index.ensure_loaded(db_session)
+
+        rare = index.score_text("constituicao", "texto sobre a constituição")
+        common = index.score_text("propriedade", "texto sobre a propriedade")
+        assert rare > common > 0.0
+        assert index.score_text("inexistente", "texto sobre a propriedade") == 0.0
+
+    @pytest.mark.asyncio
+    async def test_persisted_arrays_skip_tokenization(
+        self,
+        db_session: AsyncSession,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """A second process reuses the file and only tokenizes new rows."""
+        path = tmp_path / "botsalinha.db.lexical.npz"
+        await LexicalIndex(path=path).ensure_loaded(db_session)
+        assert path.exists()
+
+        tokenized: list[str] = []
+        original = lexical_module.tokenize_ptbr
+
+        def counting_tokenize(value: str) -> list[str]:
+            tokenized.append(value)
+            return original(value)
+
+        monkeypatch.setattr(lexical_module, "tokenize_ptbr", counting_tokenize)
+
+        await db_session.execute(text("DELETE FROM rag_chunks WHERE id = 'c2'"))
+        db_session.add(
+            ChunkORM(
+                id="c4",
+                documento_id=1,
+                texto="Mandado de segurança coletivo.",
+                metadados=json.dumps({"documento": "CF"}),
+                token_count=10,
+                embedding=serialize_embedding([0.0, 1.0]),
+            )
+        )
+        await db_session.commit()
+
+        index = LexicalIndex(path=path)
+        await index.ensure_loaded(db_session)
+
+        assert tokenized == ["Mandado de segurança coletivo."]
+        assert len(index) == 3
+        assert index.term_counts("c2") is None
+        assert [chunk_id for chunk_id, _ in index.search("mandado seguranca", 5)] == ["c4"]
+
+    @pytest.mark.asyncio
+    async def test_reingested_text_is_retokenized(
+        self, db_session: AsyncSession, tmp_path: Path
+    ) -> None:
+        """A chunk re-inserted under its id (same rowid and count) with new text is re-indexed."""
+        path = tmp_path / "botsalinha.db.lexical.npz"
+        index = LexicalIndex(path=path)
+        await index.ensure_loaded(db_session)
+
+        # Re-ingestion deletes the document's chunks and re-inserts the same ids
+        await db_session.execute(text("DELETE FROM rag_chunks WHERE id = 'c3'"))
+        db_session.add(
+            ChunkORM(
+                id="c3",
+                documento_id=1,
+                texto="Mandado de injunção por omissão legislativa.",
+                metadados=json.dumps({"documento": "CF"}),
+                token_count=10,
+                embedding=serialize_embedding([1.0, 0.0]),
+            )
+        )
+        await bump_corpus_generation(db_session)
+        await db_session.commit()
+
+        await index.ensure_loaded(db_session)
+        assert [chunk_id for chunk_id, _ in index.search("mandado injuncao", 5)] == ["c3"]
+        assert index.search("habeas corpus", 5) == []
+
+        restarted = LexicalIndex(path=path)
+        await restarted.ensure_loaded(db_session)
+        assert restarted.term_counts("c3")["injuncao"] == 1
+        assert "habeas" not in restarted.term_counts("c3")
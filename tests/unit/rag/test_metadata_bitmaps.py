@@ -0,0 +1,99 @@
+"""Unit tests for the metadata bitmap index used to mask vector search."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.rag.storage.embedding_index import EmbeddingIndex
+from src.rag.storage.metadata_bitmaps import MetadataBitmaps, split_bitmap_filters
+
+ROWS = [
+    {"marca_stf": True, "marca_stj": False, "source_type": "jurisprudencia"},
+    {"marca_stf": False, "marca_stj": True, "source_type": "jurisprudencia"},
+    {"marca_stf": False, "is_revoked": True, "source_type": "lei_cf"},
+    {"documento": "sem marcas"},
+]
+
+
+def _bitmaps() -> MetadataBitmaps:
+    bitmaps = MetadataBitmaps()
+    bitmaps.resize(len(ROWS))
+    for position, metadata in enumerate(ROWS):
+        bitmaps.set_row(position, metadata)
+    return bitmaps
+
+
+class TestSplitBitmapFilters:
+    """Test which filters are answered by bitmaps and which stay in SQL."""
+
+    def test_splits_supported_keys(self) -> None:
+        """Flags and categories go to bitmaps; other keys and ranges stay in SQL."""
+        bitmap_filters, sql_filters = split_bitmap_filters(
+            {
+                "marca_stf": True,
+                "source_type": "lei_cf",
+                "artigo": "5",
+                "valid_from_gte": "2020-01-01",
+            }
+        )
+        assert bitmap_filters == {"marca_stf": True, "source_type": "lei_cf"}
+        assert sql_filters == {"artigo": "5", "valid_from_gte": "2020-01-01"}
+
+    def test_or_group_needs_every_key_supported(self) -> None:
+        """A mixed __or__ list is left to SQL as a whole."""
+        supported = {"__or__": [{"marca_stf": True}, {"marca_stj": True}]}
+        mixed = {"__or__": [{"marca_stf": True}, {"banca": "FGV"}]}
+
+        assert split_bitmap_filters(supported) == (supported, {})
+        assert split_bitmap_filters(mixed) == ({}, mixed)
+        assert split_bitmap_filters({"__or__": "bad"}) == ({}, {"__or__": "bad"})
+
+
+class TestMetadataBitmaps:
+    """Test mask compilation semantics."""
+
+    def test_flag_and_category_masks(self) -> None:
+        """Boolean, categorical and null-sentinel filters match the SQL semantics."""
+        bitmaps = _bitmaps()
+        size = len(ROWS)
+
+        assert bitmaps.mask({"marca_stf": True}, size).tolist() == [True, False, False, False]
+        assert bitmaps.mask({"marca_stf": False}, size).tolist() == [False, True, True, False]
+        assert bitmaps.mask({"is_revoked": "not_null"}, size).tolist() == [
+            False,
+            False,
+            True,
+            False,
+        ]
+        assert bitmaps.mask({"source_type": "is_null"}, size).tolist() == [
+            False,
+            False,
+            False,
+            True,
+        ]
+        assert not bitmaps.mask({"source_type": "comentario"}, size).any()
+
+    def test_or_groups_and_top_level_conditions(self) -> None:
+        """__or__ groups are ORed and ANDed with the remaining conditions."""
+        bitmaps = _bitmaps()
+        mask = bitmaps.mask(
+            {
+                "__or__": [{"marca_stf": True}, {"marca_stj": True, "source_type": "lei_cf"}],
+                "source_type": "jurisprudencia",
+            },
+            len(ROWS),
+        )
+        assert mask.tolist() == [True, False, False, False]
+
+    def test_rows_stay_aligned_after_compaction(self) -> None:
+        """Compacting the embedding matrix keeps bitmap rows aligned with chunk ids."""
+        index = EmbeddingIndex()
+        index.clear()
+        index.upsert([(f"c{i}", np.eye(4, dtype=np.float32)[i]) for i in range(4)])
+        for i, metadata in enumerate(ROWS):
+            index._bitmaps.set_row(index.position_of(f"c{i}"), metadata)
+
+        index.remove(["c0", "c1"])
+        mask = index.metadata_mask({"source_type": "lei_cf"})
+
+        assert [index.chunk_id_at(pos) for pos in np.flatnonzero(mask)] == ["c2"]
@@ -0,0 +1,137 @@
+"""Unit tests for compressed embedding codes."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.config.settings import VectorCompressionConfig
+from src.rag.storage.embedding_index import EmbeddingIndex
+from src.rag.storage.quantization import (
+    Int8Quantizer,
+    ProductQuantizer,
+    build_quantizer,
+    load_quantizer,
+    save_quantizer,
+)
+from src.utils.errors import BotSalinhaError
+
+
+def _unit_rows(rows: int = 600, dim: int = 32) -> np.ndarray:
+    matrix = np.random.default_rng(3).normal(size=(rows, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestQuantizers:
+    """Test int8 and product quantization scoring."""
+
+    def test_int8_scores_track_exact_inner_products(self) -> None:
+        """Asymmetric int8 scores stay within quantization error of float32."""
+        matrix = _unit_rows()
+        quantizer = Int8Quantizer.train(matrix)
+        codes = quantizer.encode(matrix)
+
+        query = matrix[0]
+        approx = quantizer.scores(query, codes)
+        np.testing.assert_allclose(approx, matrix @ query, atol=0.02)
+        assert quantizer.bytes_per_vector == 32
+
+    def test_pq_codes_are_one_byte_per_subvector(self) -> None:
+        """PQ compresses each row to `subvectors` uint8 codes and ranks the self-match first."""
+        matrix = _unit_rows()
+        quantizer = ProductQuantizer.train(matrix, 8, iterations=5)
+        codes = quantizer.encode(matrix)
+
+        assert codes.shape == (600, 8)
+        assert codes.dtype == np.uint8
+        approx = quantizer.scores(matrix[10], codes)
+        assert 10 in np.argsort(-approx)[:20]
+
+    def test_pq_subvectors_snap_to_divisor(self) -> None:
+        """A sub-vector count that does not divide dim is lowered to a divisor."""
+        quantizer = build_quantizer("pq", _unit_rows(dim=30), pq_subvectors=8, pq_iterations=2)
+        assert quantizer is not None
+        assert quantizer.code_width == 6
+
+    def test_saved_quantizer_roundtrip(self, tmp_path: Path) -> None:
+        """Persisted codebooks encode identically; another config is not reused."""
+        matrix = _unit_rows()
+        quantizer = ProductQuantizer.train(matrix, 8, iterations=5)
+        path = tmp_path / "db.sqlite.quantizer.npz"
+        save_quantizer(quantizer, path, pq_subvectors=8)
+
+        restored = load_quantizer(path, "pq", 32, pq_subvectors=8)
+        assert isinstance(restored, ProductQuantizer)
+        np.testing.assert_array_equal(restored.encode(matrix), quantizer.encode(matrix))
+        assert load_quantizer(path, "pq", 32, pq_subvectors=4) is None
+        assert load_quantizer(path, "int8", 32, pq_subvectors=8) is None
+        assert load_quantizer(tmp_path / "missing.npz", "pq", 32, pq_subvectors=8) is None
+
+    def test_invalid_mode_rejected_by_config(self) -> None:
+        """Unknown compression modes fail validation."""
+        with pytest.raises(BotSalinhaError):
+            VectorCompressionConfig(mode="fp4")
+
+
+class TestEmbeddingIndexCompression:
+    """Test compressed scanning with float32 re-rank on the resident index."""
+
+    @pytest.mark.parametrize("mode", ["int8", "pq"])
+    def test_nearest_reranks_with_exact_scores(self, mode: str) -> None:
+        """Returned scores are exact cosine values and the top hit is preserved."""
+        matrix = _unit_rows()
+        config = VectorCompressionConfig(mode=mode, pq_subvectors=8, rerank_factor=10)
+        index = EmbeddingIndex(compression_config=config)
+        index.clear()
+        index.upsert([(f"c{i}", row) for i, row in enumerate(matrix)])
+        index.rebuild_derived()
+
+        positions, scores = index.nearest(matrix[42], 5)
+
+        assert index.chunk_id_at(int(positions[0])) == "c42"
+        np.testing.assert_allclose(scores, matrix[positions] @ matrix[42], rtol=1e-5)
+        stats = index.memory_stats()
+        assert stats["compression"] == mode
+        assert stats["code_bytes"] < stats["float32_bytes"]
+
+    def test_upserts_after_training_are_encoded(self) -> None:
+        """Rows added after training get codes and are searchable."""
+        matrix = _unit_rows()
+        index = EmbeddingIndex(compression_config=VectorCompressionConfig(mode="int8"))
+        index.clear()
+        index.upsert([(f"c{i}", row) for i, row in enumerate(matrix[:100])])
+        index.rebuild_derived()
+        index.upsert([(f"c{i}", row) for i, row in enumerate(matrix[100:], start=100)])
+
+        positions, _ = index.nearest(matrix[500], 1)
+        assert index.chunk_id_at(int(positions[0])) == "c500"
+
+    @pytest.mark.asyncio
+    async def test_codes_are_built_off_the_event_loop_and_reused(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Codebooks are trained in a worker thread once, then loaded from disk."""
+        matrix = _unit_rows()
+        config = VectorCompressionConfig(mode="pq", pq_subvectors=8)
+        path = tmp_path / "db.sqlite.quantizer.npz"
+        train_threads: list[int] = []
+        train = ProductQuantizer.train
+
+        def recording_train(*args, **kwargs) -> ProductQuantizer:
+            train_threads.append(threading.get_ident())
+            return train(*args, **kwargs)
+
+        monkeypatch.setattr(ProductQuantizer, "train", recording_train)
+        for _ in range(2):
+            index = EmbeddingIndex(compression_config=config, compression_path=path)
+            index.clear()
+            index.upsert([(f"c{i}", row) for i, row in enumerate(matrix)])
+            await index._prepare_compression_in_thread()
+            assert index.memory_stats()["compression"] == "pq"
+
+        assert len(train_threads) == 1
+        assert train_threads[0] != threading.get_ident()
+        assert path.exists()
@@ -179,11 +179,40 @@ async def test_query_service_applies_similarity_fallback(monkeypatch: pytest.Mon
 
     context = await service.query("pergunta sem muitos matches", top_k=2, min_similarity=0.4)
 
-    assert len(vector_store.calls) == 2
-    assert vector_store.calls[0]["min_similarity"] == 0.4
-    assert vector_store.calls[1]["min_similarity"] == pytest.approx(0.32, abs=1e-6)
+    # Single pass down to the fallback threshold; the primary cut happens in the service
+    assert len(vector_store.calls) == 1
+    assert vector_store.calls[0]["min_similarity"] == pytest.approx(0.32, abs=1e-6)
     assert context.retrieval_meta.get("fallback_applied") is True
+    assert context.retrieval_meta.get("fallback_candidates_added") == 1
     assert context.retrieval_meta.get("effective_min_similarity") == pytest.approx(0.32, abs=1e-6)
+    assert [chunk.chunk_id for chunk in context.chunks_usados] == ["low"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_query_service_filters_below_threshold_without_fallback(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Candidates between the fallback and primary thresholds are dropped when enough pass."""
+    monkeypatch.setattr("src.rag.services.query_service.get_settings", _fake_settings)
+
+    candidates = [
+        (_chunk("high", "texto relevante"), 0.60),
+        (_chunk("low", "texto com match fraco"), 0.35),
+    ]
+    vector_store = _FakeVectorStore(candidates=candidates)
+    service = QueryService(
+        session=SimpleNamespace(),
+        embedding_service=_FakeEmbeddingService(),
+        vector_store=vector_store,
+    )
+
+    context = await service.query("pergunta com match", top_k=1, min_similarity=0.4)
+
+    assert len(vector_store.calls) == 1
+    assert [chunk.chunk_id for chunk in context.chunks_usados] == ["high"]
+    assert context.retrieval_meta.get("fallback_applied") is False
+    assert context.retrieval_meta.get("fallback_search_saved_ms") == 0.0
 
 
 @pytest.mark.unit
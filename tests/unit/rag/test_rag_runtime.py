@@ -0,0 +1,81 @@
+"""Unit tests for the process-wide RAG runtime."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.config.settings import get_settings
+from src.rag.services.query_service import QueryService
+from src.rag.services.rag_runtime import RAGRuntime, resolve_async_database_url
+
+
+@pytest.fixture
+def runtime_settings(monkeypatch: pytest.MonkeyPatch):
+    """Minimal settings for building embedding services."""
+    monkeypatch.setenv("BOTSALINHA_DISCORD__TOKEN", "test_token")
+    monkeypatch.setenv("BOTSALINHA_OPENAI__API_KEY", "test_key")
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+@pytest.mark.unit
+class TestRAGRuntime:
+    """Test sharing of process-wide components across request scopes."""
+
+    def test_sqlite_url_is_made_async(self) -> None:
+        """Plain SQLite URLs get the aiosqlite driver; others are kept."""
+        assert resolve_async_database_url("sqlite:///data/bot.db") == (
+            "sqlite+aiosqlite:///data/bot.db"
+        )
+        assert resolve_async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+    @pytest.mark.asyncio
+    async def test_request_scopes_share_cache_embeddings_and_flight(self, runtime_settings) -> None:
+        """Each request has its own session but the same cache, embedder and flight group."""
+        runtime = RAGRuntime("sqlite+aiosqlite:///:memory:")
+        async with runtime.session() as first_session, runtime.session() as second_session:
+            first = runtime.query_service(first_session)
+            second = runtime.query_service(second_session)
+
+            assert first_session is not second_session
+            assert first._semantic_cache is second._semantic_cache is runtime.semantic_cache
+            assert first._embedding_service is second._embedding_service
+            assert first._query_flight is second._query_flight
+        await runtime.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_break_coalesced_query(
+        self, runtime_settings, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The shared execution runs on its own session, not on the leader's."""
+        runtime = RAGRuntime("sqlite+aiosqlite:///:memory:")
+        release = asyncio.Event()
+        request_sessions: list[object] = []
+
+        async def fake_query(self: QueryService, query_text: str, **kwargs: object) -> object:
+            await release.wait()
+            return self._session
+
+        monkeypatch.setattr(QueryService, "_query", fake_query)
+
+        async def ask() -> object:
+            async with runtime.session() as session:
+                request_sessions.append(session)
+                return await runtime.query_service(session).query("o que diz o art. 5?")
+
+        leader = asyncio.create_task(ask())
+        follower = asyncio.create_task(ask())
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        flight_session = await follower
+        assert leader.cancelled()
+        assert len(request_sessions) == 2
+        assert flight_session not in request_sessions
+        assert runtime.query_service(request_sessions[1])._query_flight.stats.coalesced == 1
+        await runtime.close()
@@ -0,0 +1,139 @@
+"""Unit tests and a micro-benchmark for the hybrid-lite reranker."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.rag.models import Chunk, ChunkMetadata
+from src.rag.utils import retrieval_ranker as ranker_module
+from src.rag.utils.retrieval_ranker import (
+    chunk_terms,
+    clear_term_cache,
+    query_features,
+    rerank_hybrid_lite,
+    tokenize_ptbr,
+)
+
+QUERY = "STF art. 5 inciso XI inviolabilidade do domicílio"
+
+
+def _chunk(chunk_id: str, text: str, *, artigo: str | None = None) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        documento_id=1,
+        texto=text,
+        metadados=ChunkMetadata(documento="CF/88", artigo=artigo, marca_stf=artigo is None),
+        token_count=50,
+        posicao_documento=0.5,
+    )
+
+
+def _candidates(size: int) -> list[tuple[Chunk, float]]:
+    return [
+        (
+            _chunk(
+                f"c{i}",
+                f"Art. {i}º A casa é asilo inviolável do indivíduo, ninguém nela podendo "
+                f"penetrar sem consentimento do morador, salvo em flagrante delito {i}.",
+                artigo=str(i) if i % 2 else None,
+            ),
+            0.5 + i / (size * 10),
+        )
+        for i in range(size)
+    ]
+
+
+def _reference_lexical_score(query_text: str, chunk_text: str) -> float:
+    """Lexical score computed from raw token lists, as before term caching."""
+    query_tokens = tokenize_ptbr(query_text)
+    chunk_tokens = tokenize_ptbr(chunk_text)
+    matched = set(query_tokens) & set(chunk_tokens)
+    if not query_tokens or not matched:
+        return 0.0
+    coverage = len(matched) / len(set(query_tokens))
+    frequency = sum(chunk_tokens.count(term) for term in matched) / len(chunk_tokens)
+    return min(0.7 * coverage + 0.3 * min(frequency * 8.0, 1.0), 1.0)
+
+
+@pytest.fixture(autouse=True)
+def _empty_term_cache():
+    clear_term_cache()
+    yield
+    clear_term_cache()
+
+
+@pytest.mark.unit
+class TestRerankTermCache:
+    """Test cached chunk terms and per-query features."""
+
+    def test_cached_terms_match_raw_tokenization(self) -> None:
+        """Scores from cached term counts equal scores over raw tokens."""
+        candidates = _candidates(8)
+        reranked = rerank_hybrid_lite(QUERY, candidates)
+
+        for chunk, breakdown in reranked:
+            assert breakdown.lexical_score == pytest.approx(
+                _reference_lexical_score(QUERY, chunk.texto)
+            )
+        assert reranked[0][0].metadados.artigo == "5"
+
+    def test_chunk_text_is_tokenized_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Repeated reranks reuse cached terms; edited text is re-tokenized."""
+        tokenized: list[str] = []
+        original = ranker_module.tokenize_ptbr
+
+        def counting_tokenize(value: str) -> list[str]:
+            tokenized.append(value)
+            return original(value)
+
+        monkeypatch.setattr(ranker_module, "tokenize_ptbr", counting_tokenize)
+        candidates = _candidates(4)
+
+        rerank_hybrid_lite(QUERY, candidates)
+        rerank_hybrid_lite("domicilio", candidates)
+        # One tokenization per chunk plus one per query
+        assert len(tokenized) == 4 + 2
+
+        edited = _chunk("c0", "Texto alterado do domicílio.")
+        assert chunk_terms(edited).counts == {"texto": 1, "alterado": 1, "domicilio": 1}
+
+    def test_lookup_supplies_precomputed_counts(self) -> None:
+        """Counts from the lookup are used instead of tokenizing the chunk."""
+        chunk = _chunk("c1", "texto ignorado")
+        terms = chunk_terms(chunk, lambda chunk_id, texto: {"domicilio": 3, "casa": 1})
+        assert terms.total == 4
+
+        # A lookup that cannot vouch for the current text falls back to tokenizing it
+        edited = _chunk("c1", "Texto do domicílio.")
+        assert chunk_terms(edited, lambda chunk_id, texto: None).counts == {
+            "texto": 1,
+            "domicilio": 1,
+        }
+
+        features = query_features(QUERY)
+        assert features.articles == {"5"}
+        assert features.incisos == {"xi"}
+        assert "domicilio" in features.tokens
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+def test_rerank_per_candidate_cost(latency_benchmark) -> None:
+    """Micro-benchmark: warm rerank cost per candidate stays well under cold cost."""
+    candidates = _candidates(60)
+    rounds = 20
+
+    latency_benchmark.start("cold")
+    for _ in range(rounds):
+        clear_term_cache()
+        rerank_hybrid_lite(QUERY, candidates)
+    cold_ms = latency_benchmark.end("cold") / (rounds * len(candidates))
+
+    rerank_hybrid_lite(QUERY, candidates)
+    latency_benchmark.start("warm")
+    for _ in range(rounds):
+        rerank_hybrid_lite(QUERY, candidates)
+    warm_ms = latency_benchmark.end("warm") / (rounds * len(candidates))
+
+    assert warm_ms < cold_ms
+    assert warm_ms < 0.5, f"Rerank cost per candidate too high: {warm_ms:.4f}ms"
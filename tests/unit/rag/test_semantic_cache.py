@@ -5,8 +5,12 @@ import time
 
 import pytest
 
+from src.models.rag_models import DocumentORM
 from src.rag.models import Chunk, ChunkMetadata, ConfiancaLevel, RAGContext
 from src.rag.services.semantic_cache import CachedResponse, CacheStats, SemanticCache
+from src.rag.storage.cache_backend import InProcessCacheBackend
+from src.rag.storage.corpus_state import bump_corpus_generation, read_document_versions
+from src.rag.utils.frequency_sketch import FrequencySketch
 
 
 @pytest.fixture
@@ -260,3 +264,339 @@ class TestSemanticCache:
         # All should be found
         assert all(r is not None for r in results)
         assert cache.get_stats().entry_count == 20
+
+    @pytest.mark.asyncio
+    async def test_lru_keeps_recently_read_entries(self, sample_rag_context, monkeypatch):
+        """Eviction drops the least recently used entry and sizes each entry once."""
+        sized: list[str] = []
+        original_size = CachedResponse.size_bytes
+
+        def counting_size(self):
+            sized.append(self.llm_response)
+            return original_size(self)
+
+        monkeypatch.setattr(CachedResponse, "size_bytes", counting_size)
+
+        entry_size = CachedResponse(
+            rag_context_dict=sample_rag_context.model_dump(), llm_response="r0"
+        ).size_bytes()
+        sized.clear()
+        lru_cache = SemanticCache(max_memory_mb=(entry_size * 2.5) / (1024 * 1024))
+
+        await lru_cache.set("k0", sample_rag_context, "r0")
+        await lru_cache.set("k1", sample_rag_context, "r1")
+        assert await lru_cache.get("k0") is not None
+        await lru_cache.set("k2", sample_rag_context, "r2")
+
+        assert await lru_cache.get("k1") is None
+        assert await lru_cache.get("k0") is not None
+        assert await lru_cache.get("k2") is not None
+        assert sized == ["r0", "r1", "r2"]
+
+        stats = lru_cache.get_stats()
+        assert stats.evictions == 1
+        assert stats.lock_acquisitions == 7
+        assert stats.lock_hold_ms_max >= stats.avg_lock_hold_ms > 0.0
+
+
+class TestSemanticLookup:
+    """Test the embedding-similarity tier of SemanticCache."""
+
+    @pytest.fixture
+    def semantic_cache(self):
+        """Cache with the semantic tier enabled."""
+        return SemanticCache(max_memory_mb=1, similarity_threshold=0.9)
+
+    def test_scope_ignores_wording_but_not_references(self, semantic_cache):
+        """Paraphrases share a scope; a different article does not."""
+        scope = semantic_cache.scope_key("O que diz o art. 5 da CF?", 5, 0.4)
+
+        assert semantic_cache.scope_key("o que diz o artigo 5º da constituição", 5, 0.4) == scope
+        assert semantic_cache.scope_key("o que diz o artigo 6º da constituição", 5, 0.4) != scope
+        assert semantic_cache.scope_key("O que diz o art. 5 da CF?", 3, 0.4) != scope
+
+    @pytest.mark.asyncio
+    async def test_similar_query_hits_within_scope(self, semantic_cache, sample_rag_context):
+        """Nearest cached query above the threshold is returned; others miss."""
+        scope = semantic_cache.scope_key("art. 5 da CF", 5, 0.4)
+        other_scope = semantic_cache.scope_key("art. 6 da CF", 5, 0.4)
+        await semantic_cache.set(
+            "k1",
+            sample_rag_context,
+            "resposta art. 5",
+            query_embedding=[1.0, 0.0, 0.0],
+            scope=scope,
+        )
+
+        hit = await semantic_cache.get_similar([0.98, 0.1, 0.0], scope)
+        assert hit is not None
+        assert hit.llm_response == "resposta art. 5"
+        assert await semantic_cache.get_similar([0.0, 1.0, 0.0], scope) is None
+        assert await semantic_cache.get_similar([1.0, 0.0, 0.0], other_scope) is None
+
+        stats = semantic_cache.get_stats()
+        assert stats.semantic_lookups == 3
+        assert stats.semantic_hits == 1
+        assert stats.semantic_threshold == 0.9
+
+    @pytest.mark.asyncio
+    async def test_removed_entries_leave_the_index(self, semantic_cache, sample_rag_context):
+        """Overwritten and cleared entries are no longer found by similarity."""
+        scope = semantic_cache.scope_key("habeas corpus", 5, 0.4)
+        await semantic_cache.set(
+            "k1", sample_rag_context, "r1", query_embedding=[1.0, 0.0], scope=scope
+        )
+        await semantic_cache.set("k1", sample_rag_context, "r1 sem embedding")
+        assert await semantic_cache.get_similar([1.0, 0.0], scope) is None
+
+        await semantic_cache.set(
+            "k2", sample_rag_context, "r2", query_embedding=[0.0, 1.0], scope=scope
+        )
+        await semantic_cache.clear()
+        assert await semantic_cache.get_similar([0.0, 1.0], scope) is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_threshold(self, sample_rag_context):
+        """A cache without threshold never answers by similarity."""
+        cache = SemanticCache(max_memory_mb=1)
+        scope = cache.scope_key("habeas corpus", 5, 0.4)
+        await cache.set("k1", sample_rag_context, "r1", query_embedding=[1.0], scope=scope)
+
+        assert cache.semantic_enabled is False
+        assert await cache.get_similar([1.0], scope) is None
+        assert cache.get_stats().semantic_lookups == 0
+
+    def test_audit_counts_false_hits(self, semantic_cache, sample_rag_context):
+        """Audits compare cited chunk ids between cached and fresh contexts."""
+        cached = CachedResponse(
+            rag_context_dict=sample_rag_context.model_dump(), llm_response="r"
+        )
+        different = sample_rag_context.model_copy(update={"chunks_usados": []})
+
+        assert semantic_cache.record_audit(cached, sample_rag_context) is True
+        assert semantic_cache.record_audit(cached, different) is False
+
+        stats = semantic_cache.get_stats()
+        assert stats.semantic_audits == 2
+        assert stats.semantic_false_hits == 1
+        assert stats.false_hit_rate == 0.5
+
+
+class TestStaleWhileRevalidate:
+    """Test soft expiry, background refresh and TTL jitter."""
+
+    @pytest.fixture
+    def swr_cache(self):
+        """Cache whose entries stay usable for 60s past their TTL."""
+        return SemanticCache(max_memory_mb=1, default_ttl_seconds=100, stale_grace_seconds=60)
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_served_and_refreshed_once(
+        self, swr_cache, sample_rag_context, monkeypatch
+    ):
+        """Concurrent readers get the stale answer; one refresh stores a new one."""
+        await swr_cache.set("k", sample_rag_context, "antiga")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 130)
+
+        refreshed = asyncio.Event()
+
+        async def refresh():
+            await refreshed.wait()
+            await swr_cache.set("k", sample_rag_context, "nova")
+
+        first = await swr_cache.get("k", refresh=refresh)
+        second = await swr_cache.get("k", refresh=refresh)
+        assert first.llm_response == second.llm_response == "antiga"
+        assert swr_cache.get_stats().refreshes_inflight == 1
+
+        refreshed.set()
+        await swr_cache.close()
+        monkeypatch.undo()
+
+        assert (await swr_cache.get("k")).llm_response == "nova"
+        stats = swr_cache.get_stats()
+        assert (stats.hits, stats.stale_served, stats.refreshes) == (3, 2, 1)
+        assert stats.refreshes_inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_stale_without_refresh_and_past_grace_miss(
+        self, swr_cache, sample_rag_context, monkeypatch
+    ):
+        """Without a refresh callback a stale entry misses; past grace it is dropped."""
+        await swr_cache.set("k", sample_rag_context, "antiga")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 130)
+        assert await swr_cache.get("k") is None
+        assert swr_cache.get_stats().entry_count == 1
+
+        monkeypatch.setattr(time, "time", lambda: now + 200)
+        refresh_calls = []
+
+        async def refresh():
+            refresh_calls.append(1)
+
+        assert await swr_cache.get("k", refresh=refresh) is None
+        assert swr_cache.get_stats().entry_count == 0
+        assert refresh_calls == []
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_is_counted(self, swr_cache, sample_rag_context, monkeypatch):
+        """A failing refresh leaves the stale entry in place."""
+        await swr_cache.set("k", sample_rag_context, "antiga")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 130)
+
+        async def refresh():
+            raise RuntimeError("provider down")
+
+        assert await swr_cache.get("k", refresh=refresh) is not None
+        await swr_cache.close()
+
+        stats = swr_cache.get_stats()
+        assert (stats.refreshes, stats.refresh_failures) == (0, 1)
+        assert (await swr_cache.get("k", refresh=refresh)).llm_response == "antiga"
+        await swr_cache.close()
+
+    @pytest.mark.asyncio
+    async def test_ttl_jitter_spreads_expirations(self, sample_rag_context):
+        """Jittered TTLs stay within (1 - jitter) * ttl and the configured TTL."""
+        cache = SemanticCache(max_memory_mb=1, default_ttl_seconds=1000, ttl_jitter=0.2)
+        for i in range(50):
+            await cache.set(f"k{i}", sample_rag_context, "r")
+
+        ttls = {(await cache.get(f"k{i}")).ttl_seconds for i in range(50)}
+        assert all(800 <= ttl <= 1000 for ttl in ttls)
+        assert len(ttls) > 1
+
+
+class TestAdmission:
+    """Test the TinyLFU admission filter of SemanticCache."""
+
+    @pytest.mark.asyncio
+    async def test_one_off_queries_do_not_evict_popular_answers(self, sample_rag_context):
+        """A full cache keeps frequently requested entries against a burst of new keys."""
+        entry_size = CachedResponse(
+            rag_context_dict=sample_rag_context.model_dump(), llm_response="r"
+        ).size_bytes()
+        cache = SemanticCache(
+            max_memory_mb=(entry_size * 2.5) / (1024 * 1024),
+            admission=FrequencySketch(width=1024),
+        )
+        for key in ("popular-1", "popular-2"):
+            for _ in range(3):
+                await cache.get(key)
+            await cache.set(key, sample_rag_context, "r")
+
+        for i in range(10):
+            unique = f"rara-{i}"
+            assert await cache.get(unique) is None
+            await cache.set(unique, sample_rag_context, "r")
+
+        assert await cache.get("popular-1") is not None
+        assert await cache.get("popular-2") is not None
+        stats = cache.get_stats()
+        assert stats.admission_rejects == 10
+        assert stats.evictions == 0
+
+    @pytest.mark.asyncio
+    async def test_more_frequent_candidate_is_admitted(self, sample_rag_context):
+        """A candidate requested more often than the LRU victim replaces it."""
+        entry_size = CachedResponse(
+            rag_context_dict=sample_rag_context.model_dump(), llm_response="r"
+        ).size_bytes()
+        cache = SemanticCache(
+            max_memory_mb=(entry_size * 1.5) / (1024 * 1024),
+            admission=FrequencySketch(width=1024),
+        )
+        await cache.get("antiga")
+        await cache.set("antiga", sample_rag_context, "r")
+        for _ in range(3):
+            await cache.get("nova")
+        await cache.set("nova", sample_rag_context, "r")
+
+        assert await cache.get("nova") is not None
+        assert await cache.get("antiga") is None
+        stats = cache.get_stats()
+        assert (stats.admission_admits, stats.admission_rejects, stats.evictions) == (1, 0, 1)
+
+    @pytest.mark.asyncio
+    async def test_rejected_shared_hit_is_still_served(self, sample_rag_context):
+        """A shared-tier entry the filter turns away is returned, not cached locally."""
+        entry_size = CachedResponse(
+            rag_context_dict=sample_rag_context.model_dump(), llm_response="r"
+        ).size_bytes()
+        shared = InProcessCacheBackend("semantic")
+        await SemanticCache(max_memory_mb=10, shared=shared).set("x", sample_rag_context, "r")
+        cache = SemanticCache(
+            max_memory_mb=(entry_size * 1.5) / (1024 * 1024),
+            admission=FrequencySketch(width=1024),
+            shared=shared,
+        )
+        for _ in range(3):
+            await cache.get("popular")
+        await cache.set("popular", sample_rag_context, "r")
+
+        served = await cache.get("x")
+
+        assert served is not None
+        assert served.llm_response == "r"
+        stats = cache.get_stats()
+        assert (stats.shared_hits, stats.admission_rejects, stats.entry_count) == (1, 1, 1)
+        assert await cache.get("popular") is not None
+
+
+@pytest.mark.unit
+class TestCorpusInvalidation:
+    """Test invalidation of entries citing re-ingested documents."""
+
+    @pytest.mark.asyncio
+    async def test_reingesting_one_document_drops_only_its_answers(
+        self, db_session, sample_rag_context
+    ):
+        """Answers citing other documents survive a corpus change."""
+        cf = DocumentORM(nome="CF/88", arquivo_origem="cf.docx", content_hash="cf-v1")
+        cp = DocumentORM(nome="CP", arquivo_origem="cp.docx", content_hash="cp-v1")
+        db_session.add_all([cf, cp])
+        await bump_corpus_generation(db_session)
+        await db_session.flush()
+
+        cache = SemanticCache(max_memory_mb=10)
+        assert await cache.sync_corpus(db_session) == 0
+        versions = await read_document_versions(db_session)
+        await cache.set("cf", sample_rag_context, "r", sources={cf.id: versions[cf.id]})
+        await cache.set("cp", sample_rag_context, "r", sources={cp.id: versions[cp.id]})
+        await cache.set("sem-fontes", sample_rag_context, "r")
+
+        cf.content_hash = "cf-v2"
+        await bump_corpus_generation(db_session)
+        await db_session.flush()
+
+        assert await cache.sync_corpus(db_session) == 1
+        assert await cache.get("cf") is None
+        assert await cache.get("cp") is not None
+        assert await cache.get("sem-fontes") is not None
+        assert cache.get_stats().corpus_invalidations == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_hash_and_deleted_document_invalidate(
+        self, db_session, sample_rag_context
+    ):
+        """Sources without a hash, or documents that are gone, drop the entry."""
+        doc = DocumentORM(nome="CLT", arquivo_origem="clt.docx", content_hash="clt-v1")
+        db_session.add(doc)
+        await bump_corpus_generation(db_session)
+        await db_session.flush()
+
+        cache = SemanticCache(max_memory_mb=10)
+        await cache.sync_corpus(db_session)
+        await cache.set("sem-hash", sample_rag_context, "r", sources={doc.id: None})
+        await cache.set("removido", sample_rag_context, "r", sources={doc.id + 1: "outro"})
+        await cache.set("atual", sample_rag_context, "r", sources={doc.id: "clt-v1"})
+
+        await bump_corpus_generation(db_session)
+        await db_session.flush()
+
+        assert await cache.sync_corpus(db_session) == 2
+        assert await cache.get("atual") is not None
+        assert await cache.sync_corpus(db_session) == 0
@@ -0,0 +1,123 @@
+"""Unit tests for the SQLite-backed SemanticCache persistence tier."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.rag.models import ConfiancaLevel, RAGContext
+from src.rag.services.semantic_cache import SemanticCache
+from src.rag.storage.semantic_cache_store import PersistedEntry, SemanticCacheStore
+
+
+def _context(query: str) -> RAGContext:
+    return RAGContext(
+        chunks_usados=[],
+        similaridades=[],
+        confianca=ConfiancaLevel.SEM_RAG,
+        fontes=[],
+        query_normalized=query,
+    )
+
+
+def _entry(key: str, cached_at: float, ttl: int = 3600, size: int = 1024) -> PersistedEntry:
+    return PersistedEntry(
+        key=key,
+        scope=None,
+        rag_context_dict=_context(key).model_dump(),
+        llm_response=f"resposta {key}",
+        cached_at=cached_at,
+        ttl_seconds=ttl,
+        size_bytes=size,
+    )
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path: Path) -> AsyncEngine:
+    """File-backed database, so separate connections see the same rows."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", echo=False)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.unit
+class TestSemanticCacheStore:
+    """Test write-behind persistence and warm restarts."""
+
+    @pytest.mark.asyncio
+    async def test_restarted_cache_is_warm(self, engine: AsyncEngine) -> None:
+        """Entries written by one cache are served by a new one on the same DB."""
+        cache = SemanticCache(
+            max_memory_mb=10,
+            similarity_threshold=0.9,
+            store=SemanticCacheStore(engine, flush_interval_seconds=60),
+        )
+        key = cache.generate_key("art. 5 da CF", 5, 0.4)
+        scope = cache.scope_key("art. 5 da CF", 5, 0.4)
+        await cache.set(
+            key,
+            _context("art. 5 da CF"),
+            "resposta",
+            query_embedding=[1.0, 0.0],
+            scope=scope,
+        )
+        assert cache.get_stats().persist_pending == 1
+        await cache.close()
+
+        restarted = SemanticCache(
+            max_memory_mb=10,
+            similarity_threshold=0.9,
+            store=SemanticCacheStore(engine),
+        )
+        cached = await restarted.get(key)
+        assert cached is not None
+        assert cached.llm_response == "resposta"
+        assert (await restarted.get_similar([0.99, 0.05], scope)) is not None
+        assert restarted.get_stats().persisted_loaded == 1
+
+    @pytest.mark.asyncio
+    async def test_load_skips_expired_and_respects_budget(self, engine: AsyncEngine) -> None:
+        """Expired rows are never loaded; the newest rows fill the budget first."""
+        store = SemanticCacheStore(engine)
+        now = time.time()
+        store.put(_entry("old", now - 30))
+        store.put(_entry("new", now - 10))
+        store.put(_entry("expired", now - 7200, ttl=3600))
+        await store.flush()
+
+        loaded = await store.load(max_bytes=1024)
+        assert [entry.key for entry in loaded] == ["new"]
+        assert [entry.key for entry in await store.load(max_bytes=10_000)] == ["new", "old"]
+
+    @pytest.mark.asyncio
+    async def test_disk_budget_trims_oldest(self, engine: AsyncEngine) -> None:
+        """Flushing past the disk budget deletes the oldest rows."""
+        store = SemanticCacheStore(engine, max_disk_mb=1)
+        now = time.time()
+        for i in range(3):
+            store.put(_entry(f"k{i}", now - 10 + i, size=400 * 1024))
+        store.delete("k1")
+        store.put(_entry("k3", now, size=400 * 1024))
+        assert await store.flush() == 4
+
+        loaded = await store.load(max_bytes=10 * 1024 * 1024)
+        assert [entry.key for entry in loaded] == ["k3", "k2"]
+        assert loaded[0].embedding is None
+
+    @pytest.mark.asyncio
+    async def test_embedding_round_trip(self, engine: AsyncEngine) -> None:
+        """Stored query vectors come back as float32 arrays."""
+        store = SemanticCacheStore(engine)
+        entry = _entry("vec", time.time())
+        entry.embedding = np.array([0.6, 0.8], dtype=np.float32)
+        store.put(entry)
+        await store.close()
+
+        (loaded,) = await store.load(max_bytes=10_000)
+        np.testing.assert_allclose(loaded.embedding, [0.6, 0.8])
+        assert loaded.ttl_seconds == 3600
@@ -6,17 +6,22 @@ import json
 
 import pytest
 import pytest_asyncio
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.models.conversation import Base
 from src.models.rag_models import ChunkORM, DocumentORM
 from src.rag.models import Chunk, ChunkMetadata
+from src.rag.storage.corpus_state import bump_corpus_generation, read_corpus_generation
+from src.rag.storage.embedding_index import EmbeddingIndex, get_embedding_index
+from src.rag.storage.metadata_columns import promoted_filter_keys
 from src.rag.storage.vector_store import (
+    QueryResultCache,
     VectorStore,
     cosine_similarity,
     deserialize_embedding,
+    get_query_result_cache,
     serialize_embedding,
 )
 from src.utils.errors import BotSalinhaError
@@ -579,3 +584,371 @@ class TestVectorStore:
         except Exception:
             await db_session.rollback()
             return False
+
+
+@pytest.mark.unit
+class TestEmbeddingIndex:
+    """Test the process-resident embedding matrix."""
+
+    def test_upsert_remove_and_top_positions(self) -> None:
+        """Rows are normalized, tombstoned on removal and ranked by cosine."""
+        index = EmbeddingIndex()
+        index.clear()
+        index.upsert(
+            [
+                ("a", [2.0, 0.0, 0.0]),
+                ("b", [0.0, 3.0, 0.0]),
+                ("c", [1.0, 1.0, 0.0]),
+            ]
+        )
+
+        scores = index.similarities([1.0, 0.0, 0.0])
+        ranked = [index.chunk_id_at(pos) for pos in index.top_positions(scores, 2)]
+        assert ranked == ["a", "c"]
+        assert scores[index.position_of("a")] == pytest.approx(1.0)
+
+        index.remove(["a"])
+        scores = index.similarities([1.0, 0.0, 0.0])
+        ranked = [index.chunk_id_at(pos) for pos in index.top_positions(scores, 3)]
+        assert ranked == ["c", "b"]
+        assert len(index) == 2
+
+    def test_mask_excludes_rows(self) -> None:
+        """Rows outside the mask score -inf and never reach top positions."""
+        index = EmbeddingIndex()
+        index.clear()
+        index.upsert([("a", [1.0, 0.0]), ("b", [0.0, 1.0])])
+
+        scores = index.similarities([1.0, 0.0], mask=index.mask_for(["b"]))
+        ranked = [index.chunk_id_at(pos) for pos in index.top_positions(scores, 5)]
+        assert ranked == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_search_reflects_incremental_changes(self, db_session: AsyncSession) -> None:
+        """Committed changes published through apply_changes are searchable without reload."""
+        vector_store = VectorStore(session=db_session, enable_cache=False)
+        doc = DocumentORM(nome="INC", arquivo_origem="inc.docx", chunk_count=1, token_count=10)
+        db_session.add(doc)
+        await db_session.flush()
+        db_session.add(
+            ChunkORM(
+                id="chunk-old",
+                documento_id=doc.id,
+                texto="Texto antigo",
+                metadados=json.dumps({"documento": "INC"}),
+                token_count=10,
+                embedding=serialize_embedding([1.0, 0.0, 0.0]),
+            )
+        )
+        await db_session.commit()
+        assert await vector_store.warm_up() == 1
+
+        index = get_embedding_index(db_session)
+        await db_session.execute(text("DELETE FROM rag_chunks WHERE id = 'chunk-old'"))
+        db_session.add(
+            ChunkORM(
+                id="chunk-new",
+                documento_id=doc.id,
+                texto="Texto novo",
+                metadados=json.dumps({"documento": "INC"}),
+                token_count=10,
+                embedding=serialize_embedding([0.0, 1.0, 0.0]),
+            )
+        )
+        await db_session.commit()
+        await index.apply_changes(
+            db_session,
+            removed_ids=["chunk-old"],
+            upserts=[("chunk-new", serialize_embedding([0.0, 1.0, 0.0]))],
+        )
+        assert index.loaded is True
+
+        results = await vector_store.search(
+            query_embedding=[0.0, 1.0, 0.0],
+            limit=5,
+            min_similarity=0.0,
+        )
+        assert [chunk.chunk_id for chunk, _ in results] == ["chunk-new"]
+
+    @pytest.mark.asyncio
+    async def test_in_place_rewrite_by_another_writer_reloads(
+        self, db_session: AsyncSession
+    ) -> None:
+        """A chunk deleted and re-inserted under its id (same rowid and count) is reloaded."""
+        doc = DocumentORM(nome="INP", arquivo_origem="inp.docx", chunk_count=1, token_count=10)
+        db_session.add(doc)
+        await db_session.flush()
+        db_session.add(
+            ChunkORM(
+                id="chunk-1",
+                documento_id=doc.id,
+                texto="Texto antigo",
+                metadados=json.dumps({"documento": "INP"}),
+                token_count=10,
+                embedding=serialize_embedding([1.0, 0.0]),
+            )
+        )
+        await db_session.commit()
+        index = EmbeddingIndex()
+        await index.ensure_loaded(db_session)
+
+        # Another process re-ingests the document: core DELETE, same id re-inserted
+        await db_session.execute(text("DELETE FROM rag_chunks WHERE id = 'chunk-1'"))
+        db_session.add(
+            ChunkORM(
+                id="chunk-1",
+                documento_id=doc.id,
+                texto="Texto novo",
+                metadados=json.dumps({"documento": "INP"}),
+                token_count=10,
+                embedding=serialize_embedding([0.0, 1.0]),
+            )
+        )
+        await bump_corpus_generation(db_session)
+        await db_session.commit()
+
+        await index.ensure_loaded(db_session)
+        scores = index.similarities([0.0, 1.0])
+        assert scores[index.position_of("chunk-1")] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_bitmap_filters_see_incremental_rows(self, db_session: AsyncSession) -> None:
+        """Rows added after the load are encoded before bitmap filters are applied."""
+        vector_store = VectorStore(session=db_session, enable_cache=False)
+        doc = DocumentORM(nome="BIT", arquivo_origem="bit.docx", chunk_count=2, token_count=20)
+        db_session.add(doc)
+        await db_session.flush()
+        db_session.add(
+            ChunkORM(
+                id="chunk-stf",
+                documento_id=doc.id,
+                texto="Tema STF",
+                metadados=json.dumps({"documento": "BIT", "marca_stf": True, "artigo": "5"}),
+                token_count=10,
+                embedding=serialize_embedding([1.0, 0.0, 0.0]),
+            )
+        )
+        await db_session.commit()
+        assert await vector_store.warm_up() == 1
+
+        db_session.add(
+            ChunkORM(
+                id="chunk-stf-new",
+                documento_id=doc.id,
+                texto="Tema STF novo",
+                metadados=json.dumps({"documento": "BIT", "marca_stf": True, "artigo": "6"}),
+                token_count=10,
+                embedding=serialize_embedding([0.0, 1.0, 0.0]),
+            )
+        )
+        await db_session.commit()
+        await get_embedding_index(db_session).apply_changes(
+            db_session,
+            upserts=[("chunk-stf-new", serialize_embedding([0.0, 1.0, 0.0]))],
+        )
+
+        results = await vector_store.search(
+            query_embedding=[0.0, 1.0, 0.0],
+            limit=5,
+            min_similarity=-1.0,
+            filters={"marca_stf": True},
+        )
+        assert {chunk.chunk_id for chunk, _ in results} == {"chunk-stf", "chunk-stf-new"}
+
+        # Bitmap and SQL conditions are ANDed
+        results = await vector_store.search(
+            query_embedding=[0.0, 1.0, 0.0],
+            limit=5,
+            min_similarity=-1.0,
+            filters={"marca_stf": True, "artigo": "5"},
+        )
+        assert [chunk.chunk_id for chunk, _ in results] == ["chunk-stf"]
+
+
+@pytest.mark.unit
+class TestPromotedMetadataFilters:
+    """Test filters answered from indexed generated metadata columns."""
+
+    async def _add_chunks(self, db_session: AsyncSession) -> None:
+        doc = DocumentORM(nome="CF", arquivo_origem="cf.docx", chunk_count=2, token_count=20)
+        db_session.add(doc)
+        await db_session.flush()
+        db_session.add_all(
+            [
+                ChunkORM(
+                    id="chunk-art5",
+                    documento_id=doc.id,
+                    texto="Art. 5 caput",
+                    metadados=json.dumps({"documento": "CF", "artigo": "5", "marca_stf": True}),
+                    token_count=10,
+                    embedding=serialize_embedding([0.3, 0.2, 0.1]),
+                ),
+                ChunkORM(
+                    id="chunk-art6",
+                    documento_id=doc.id,
+                    texto="Art. 6 caput",
+                    metadados=json.dumps({"documento": "CF", "artigo": "6", "banca": "FGV"}),
+                    token_count=10,
+                    embedding=serialize_embedding([0.3, 0.2, 0.1]),
+                ),
+            ]
+        )
+        await db_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_filter_uses_generated_column_index(self, db_session: AsyncSession) -> None:
+        """Promoted keys compile to indexed columns that SQLite searches by B-tree."""
+        await self._add_chunks(db_session)
+        promoted = await promoted_filter_keys(db_session)
+        assert {"artigo", "marca_stf", "valid_from"} <= promoted
+
+        stmt = VectorStore(session=db_session)._apply_metadata_filters(
+            select(ChunkORM.id), {"artigo": "5"}, promoted=promoted
+        )
+        sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        assert "json_extract" not in sql
+
+        plan = (await db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+        assert any("ix_rag_chunks_meta_artigo" in row[-1] for row in plan)
+
+        results = await VectorStore(session=db_session, enable_cache=False).search(
+            query_embedding=[0.3, 0.2, 0.1],
+            limit=5,
+            min_similarity=0.0,
+            filters={"artigo": "5", "marca_stf": True},
+        )
+        assert [chunk.chunk_id for chunk, _ in results] == ["chunk-art5"]
+
+    @pytest.mark.asyncio
+    async def test_missing_generated_column_falls_back_to_json_extract(self) -> None:
+        """Databases without a promoted column keep filtering through json_extract."""
+        engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(text("DROP INDEX ix_rag_chunks_meta_banca"))
+            await conn.execute(text("ALTER TABLE rag_chunks DROP COLUMN meta_banca"))
+
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            await self._add_chunks(session)
+            assert "banca" not in await promoted_filter_keys(session)
+
+            results = await VectorStore(session=session, enable_cache=False).search(
+                query_embedding=[0.3, 0.2, 0.1],
+                limit=5,
+                min_similarity=0.0,
+                filters={"banca": "FGV"},
+            )
+            assert [chunk.chunk_id for chunk, _ in results] == ["chunk-art6"]
+        await engine.dispose()
+
+
+@pytest.mark.unit
+class TestQueryResultCache:
+    """Test result-cache keying, LRU order and corpus-generation invalidation."""
+
+    @staticmethod
+    def _key(**overrides) -> str:
+        params = {
+            "query_text": "art. 5",
+            "limit": 5,
+            "min_similarity": 0.6,
+            "documento_id": None,
+            "filters": {"artigo": "5"},
+            "candidate_limit": None,
+            "generation": 0,
+        }
+        params.update(overrides)
+        embedding = params.pop("embedding", [0.1] * 12)
+        return QueryResultCache.make_key(embedding, **params)
+
+    def test_key_covers_every_search_parameter(self) -> None:
+        """Changing any parameter, or any vector component, changes the key."""
+        variants = [
+            {},
+            {"embedding": [0.1] * 11 + [0.2]},
+            {"query_text": "art. 6"},
+            {"limit": 10},
+            {"min_similarity": 0.5},
+            {"documento_id": 3},
+            {"filters": {"artigo": "6"}},
+            {"candidate_limit": 50},
+            {"generation": 1},
+        ]
+        keys = {self._key(**variant) for variant in variants}
+        assert len(keys) == len(variants)
+
+    def test_lru_evicts_least_recently_used(self) -> None:
+        """A read refreshes recency; the oldest untouched entry is evicted."""
+        cache = QueryResultCache(max_size=2)
+        cache.put("a", [])
+        cache.put("b", [])
+        assert cache.get("a") == []
+        cache.put("c", [])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == []
+        assert cache.get_stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_is_shared_per_engine(self, db_session: AsyncSession) -> None:
+        """Per-request stores on one engine reuse a cache; other engines get their own."""
+        first = VectorStore(session=db_session)
+        second = VectorStore(session=db_session)
+        assert first._result_cache is second._result_cache
+        assert first._result_cache is get_query_result_cache(db_session)
+
+        engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as other_session:
+            assert get_query_result_cache(other_session) is not first._result_cache
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_embedding_update_invalidates_results(self, db_session: AsyncSession) -> None:
+        """Writes bump the corpus generation, so cached results are never reused."""
+        doc = DocumentORM(nome="CF", arquivo_origem="cf.docx", chunk_count=2, token_count=20)
+        db_session.add(doc)
+        await db_session.flush()
+        chunks = {
+            chunk_id: Chunk(
+                chunk_id=chunk_id,
+                documento_id=doc.id,
+                texto=f"{chunk_id} caput",
+                metadados=ChunkMetadata(documento="CF"),
+                token_count=10,
+                posicao_documento=0.1,
+            )
+            for chunk_id in ("chunk-a", "chunk-b")
+        }
+        db_session.add_all(
+            [
+                ChunkORM(
+                    id=chunk_id,
+                    documento_id=doc.id,
+                    texto=chunk.texto,
+                    metadados=json.dumps({"documento": "CF"}),
+                    token_count=10,
+                )
+                for chunk_id, chunk in chunks.items()
+            ]
+        )
+        await db_session.commit()
+
+        store = VectorStore(session=db_session)
+        await store.add_embeddings([(chunk, [0.3, 0.2, 0.1]) for chunk in chunks.values()])
+        assert await read_corpus_generation(db_session) == 1
+
+        async def search() -> list[str]:
+            results = await store.search([0.3, 0.2, 0.1], limit=5, min_similarity=0.5)
+            return sorted(chunk.chunk_id for chunk, _ in results)
+
+        assert await search() == ["chunk-a", "chunk-b"]
+        assert await search() == ["chunk-a", "chunk-b"]
+        assert store._result_cache.get_stats()["hits"] == 1
+
+        await store.add_embeddings([(chunks["chunk-b"], [-0.3, -0.2, -0.1])])
+        assert await read_corpus_generation(db_session) == 2
+        assert await search() == ["chunk-a"]
+        stats = store._result_cache.get_stats()
+        assert (stats["hits"], stats["invalidations"]) == (1, 1)
@@ -5,6 +5,7 @@ Tests that cache hits skip expensive operations like loading conversation histor
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -13,6 +14,7 @@ from src.core.agent import AgentWrapper
 from src.rag import SemanticCache
 from src.rag.models import Chunk, ChunkMetadata, ConfiancaLevel, RAGContext
 from src.utils.retry import AsyncRetryConfig
+from src.utils.single_flight import SingleFlight
 
 
 @pytest.fixture
@@ -138,6 +140,7 @@ async def test_slow_path_cache_miss_loads_history(monkeypatch) -> None:
     wrapper._use_semantic_cache = True
     wrapper.enable_rag = False
     wrapper._query_service = None
+    wrapper._generation_flight = SingleFlight("generation")
 
     # Mock _generate_with_retry to avoid actual LLM call
     wrapper._generate_with_retry = AsyncMock(return_value=("LLM response", 100.0))
@@ -215,3 +218,198 @@ async def test_fast_path_logs_cache_hit_event(monkeypatch) -> None:
     # ASSERT: Got cached response and history was not loaded
     assert response == "Cached response"
     mock_repo.get_conversation_history.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_share_one_generation(monkeypatch) -> None:
+    """Identical questions arriving together run a single LLM generation."""
+    monkeypatch.setenv("BOTSALINHA_DISCORD__TOKEN", "test_token")
+    monkeypatch.setenv("BOTSALINHA_OPENAI__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_GOOGLE__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_DATABASE__URL", "sqlite+aiosqlite:///:memory:")
+
+    from src.config.settings import get_settings
+    get_settings.cache_clear()
+
+    mock_repo = MagicMock()
+    mock_repo.get_conversation_history = AsyncMock(return_value=[])
+
+    wrapper = AgentWrapper.__new__(AgentWrapper)
+    wrapper.settings = get_settings()
+    wrapper.repository = mock_repo
+    wrapper.db_session = None
+    wrapper._semantic_cache = SemanticCache(max_memory_mb=1, default_ttl_seconds=3600)
+    wrapper._use_semantic_cache = True
+    wrapper.enable_rag = False
+    wrapper._query_service = None
+    wrapper._generation_flight = SingleFlight("generation")
+
+    async def slow_generation(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return "LLM response", 10.0
+
+    wrapper._generate_with_retry = AsyncMock(side_effect=slow_generation)
+
+    results = await asyncio.gather(
+        *(
+            wrapper.generate_response_with_rag(
+                prompt="o que diz o art. 5?",
+                conversation_id=f"conv_{i}",
+                user_id=f"user_{i}",
+            )
+            for i in range(4)
+        )
+    )
+
+    assert [response for response, _ in results] == ["LLM response"] * 4
+    wrapper._generate_with_retry.assert_awaited_once()
+    assert wrapper.generation_flight_stats.coalesced == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_deltas_and_joined_callers_get_full_answer(monkeypatch) -> None:
+    """A streamed miss yields LLM deltas; an identical concurrent caller gets the whole text."""
+    monkeypatch.setenv("BOTSALINHA_DISCORD__TOKEN", "test_token")
+    monkeypatch.setenv("BOTSALINHA_OPENAI__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_GOOGLE__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_DATABASE__URL", "sqlite+aiosqlite:///:memory:")
+
+    from src.config.settings import get_settings
+    get_settings.cache_clear()
+
+    mock_repo = MagicMock()
+    mock_repo.get_conversation_history = AsyncMock(return_value=[])
+
+    wrapper = AgentWrapper.__new__(AgentWrapper)
+    wrapper.settings = get_settings()
+    wrapper.repository = mock_repo
+    wrapper.db_session = None
+    wrapper._semantic_cache = SemanticCache(max_memory_mb=1, default_ttl_seconds=3600)
+    wrapper._use_semantic_cache = True
+    wrapper.enable_rag = False
+    wrapper._query_service = None
+    wrapper._generation_flight = SingleFlight("generation")
+
+    async def streamed_generation(*args, on_delta=None, **kwargs):
+        for delta in ["O art. 5º ", "garante ", "direitos."]:
+            await asyncio.sleep(0.001)
+            if on_delta is not None:
+                on_delta(delta)
+        return "O art. 5º garante direitos.", 10.0
+
+    wrapper._generate_with_retry = AsyncMock(side_effect=streamed_generation)
+
+    stream = wrapper.stream_response_with_rag(
+        prompt="o que diz o art. 5?", conversation_id="conv_1", user_id="user_1"
+    )
+    streamed = [await anext(stream)]
+    # Asked again while the first generation is still streaming
+    joined, _ = await wrapper.generate_response_with_rag(
+        prompt="o que diz o art. 5?", conversation_id="conv_2", user_id="user_2"
+    )
+    streamed += [delta async for delta in stream]
+
+    assert streamed == ["O art. 5º ", "garante ", "direitos."]
+    assert joined == "O art. 5º garante direitos."
+    wrapper._generate_with_retry.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_loads_history_and_retrieves_concurrently(
+    monkeypatch, sample_rag_context
+) -> None:
+    """History and retrieval overlap; the already saved question is not history."""
+    monkeypatch.setenv("BOTSALINHA_DISCORD__TOKEN", "test_token")
+    monkeypatch.setenv("BOTSALINHA_OPENAI__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_GOOGLE__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_DATABASE__URL", "sqlite+aiosqlite:///:memory:")
+
+    from src.config.settings import get_settings
+    get_settings.cache_clear()
+
+    history_started = asyncio.Event()
+    retrieval_started = asyncio.Event()
+
+    async def load_history(*args, **kwargs):
+        history_started.set()
+        # Only completes if retrieval runs at the same time
+        await asyncio.wait_for(retrieval_started.wait(), timeout=1.0)
+        return [
+            {"role": "user", "content": "Pergunta anterior"},
+            {"role": "assistant", "content": "Resposta anterior"},
+            {"role": "user", "content": "o que diz o art. 5?"},
+        ]
+
+    async def query(*args, **kwargs):
+        retrieval_started.set()
+        await asyncio.wait_for(history_started.wait(), timeout=1.0)
+        return sample_rag_context
+
+    mock_repo = MagicMock()
+    mock_repo.get_conversation_history = AsyncMock(side_effect=load_history)
+    query_service = MagicMock()
+    query_service.query = AsyncMock(side_effect=query)
+
+    wrapper = AgentWrapper.__new__(AgentWrapper)
+    wrapper.settings = get_settings()
+    wrapper.repository = mock_repo
+    wrapper.db_session = None
+    wrapper._semantic_cache = None
+    wrapper._use_semantic_cache = False
+    wrapper.enable_rag = True
+    wrapper._rag_runtime = None
+    wrapper._query_service = query_service
+    wrapper._generation_flight = SingleFlight("generation")
+    wrapper._generate_with_retry = AsyncMock(return_value=("LLM response", 10.0))
+
+    response, rag_context = await wrapper.generate_response_with_rag(
+        prompt="o que diz o art. 5?",
+        conversation_id="test_conv",
+        user_id="test_user",
+    )
+
+    assert response == "LLM response"
+    assert rag_context is sample_rag_context
+    history = wrapper._generate_with_retry.await_args.args[1]
+    assert [message["content"] for message in history] == [
+        "Pergunta anterior",
+        "Resposta anterior",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_stage_failures_keep_every_error(monkeypatch) -> None:
+    """The first stage error is raised; the other one is kept as a note."""
+    monkeypatch.setenv("BOTSALINHA_DISCORD__TOKEN", "test_token")
+    monkeypatch.setenv("BOTSALINHA_OPENAI__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_GOOGLE__API_KEY", "test_key")
+    monkeypatch.setenv("BOTSALINHA_DATABASE__URL", "sqlite+aiosqlite:///:memory:")
+
+    from src.config.settings import get_settings
+    get_settings.cache_clear()
+
+    mock_repo = MagicMock()
+    mock_repo.get_conversation_history = AsyncMock(side_effect=RuntimeError("history down"))
+
+    wrapper = AgentWrapper.__new__(AgentWrapper)
+    wrapper.settings = get_settings()
+    wrapper.repository = mock_repo
+    wrapper.db_session = None
+    wrapper._semantic_cache = None
+    wrapper._use_semantic_cache = False
+    wrapper.enable_rag = True
+    wrapper._rag_runtime = None
+    wrapper._query_service = MagicMock()
+    wrapper._generation_flight = SingleFlight("generation")
+    wrapper._generate_with_retry = AsyncMock(return_value=("LLM response", 10.0))
+    wrapper._retrieval_stage = AsyncMock(side_effect=ValueError("retrieval bug"))
+
+    with pytest.raises(RuntimeError, match="history down") as excinfo:
+        await wrapper.generate_response_with_rag(
+            prompt="o que diz o art. 5?",
+            conversation_id="test_conv",
+            user_id="test_user",
+        )
+
+    assert any("retrieval bug" in note for note in excinfo.value.__notes__)
+    wrapper._generate_with_retry.assert_not_awaited()
@@ -175,6 +175,53 @@ class TestChromaStore:
         # First chunk should have higher score after reranking
         assert reranked[0][1] >= reranked[1][1]
 
+    @pytest.mark.asyncio
+    async def test_search_hydrates_hits_in_one_query(
+        self,
+        chroma_store: ChromaStore,
+        mock_session: AsyncMock,
+        mock_collection: MagicMock,
+    ) -> None:
+        """Hits with a stored payload are only checked for existence, in a single query."""
+        mock_collection.query.return_value = {
+            "ids": [["c1", "c2", "stale"]],
+            "distances": [[0.1, 0.2, 0.3]],
+            "documents": [["Texto um", "Texto dois", "Texto removido"]],
+            "metadatas": [
+                [
+                    {
+                        "documento_id": "1",
+                        "token_count": 12,
+                        "documento": "CF/88",
+                        "artigo": "5",
+                        "marca_stf": True,
+                        "linked_chunk_ids": '["c2"]',
+                    },
+                    {"documento_id": "1", "token_count": 8, "documento": "CF/88"},
+                    {"documento_id": "1", "token_count": 8, "documento": "CF/88"},
+                ]
+            ],
+        }
+        existing = MagicMock()
+        existing.scalars.return_value = ["c1", "c2"]
+        mock_session.execute.return_value = existing
+
+        results = await chroma_store.search([0.1, 0.2, 0.3], limit=5, min_similarity=0.5)
+
+        mock_session.execute.assert_awaited_once()
+        assert [chunk.chunk_id for chunk, _ in results] == ["c1", "c2"]
+        first = results[0][0]
+        assert first.texto == "Texto um"
+        assert first.token_count == 12
+        assert first.metadados.marca_stf is True
+        assert first.metadados.linked_chunk_ids == ["c2"]
+
+    def test_chunk_from_payload_rejects_unknown_keys(self) -> None:
+        """Extra metadata keys fall back to SQLite hydration."""
+        payload = {"documento_id": "1", "token_count": 3, "documento": "CF", "extra": "x"}
+        assert ChromaStore._chunk_from_payload("c1", "texto", payload) is None
+        assert ChromaStore._chunk_from_payload("c1", None, payload) is None
+
     @pytest.mark.asyncio
     async def test_count_chunks(
         self, chroma_store: ChromaStore, mock_collection: MagicMock
@@ -0,0 +1,64 @@
+"""Unit tests for the conversation service."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.conversation_service import ConversationService
+
+_CONVERSATION = SimpleNamespace(id="c1")
+
+
+def _service(agent: AsyncMock) -> ConversationService:
+    return ConversationService(AsyncMock(), AsyncMock(), agent)
+
+
+async def _failing_save(**kwargs) -> None:
+    if kwargs["role"] == "user":
+        raise OSError("database is locked")
+
+
+@pytest.mark.unit
+class TestConversationService:
+    """Test the concurrent user message save around generation."""
+
+    @pytest.mark.asyncio
+    async def test_generation_error_is_not_masked_by_save_error(self) -> None:
+        """When both fail, the generation error is the one raised."""
+        agent = AsyncMock()
+        agent.save_message.side_effect = _failing_save
+        agent.generate_response_with_rag.side_effect = RuntimeError("LLM unavailable")
+
+        with pytest.raises(RuntimeError, match="LLM unavailable"):
+            await _service(agent).process_question("Pergunta?", _CONVERSATION, "u1", None)
+        agent.save_message.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_streaming_generation_error_is_not_masked_by_save_error(self) -> None:
+        """The streaming path re-raises the generation error as well."""
+
+        async def failing_stream(**kwargs):
+            yield "Parcial"
+            raise RuntimeError("stream dropped")
+
+        agent = AsyncMock()
+        agent.save_message.side_effect = _failing_save
+        agent.stream_response_with_rag = failing_stream
+
+        stream = _service(agent).stream_question("Pergunta?", _CONVERSATION, "u1", None)
+        with pytest.raises(RuntimeError, match="stream dropped"):
+            async for _ in stream:
+                pass
+
+    @pytest.mark.asyncio
+    async def test_save_error_surfaces_after_successful_generation(self) -> None:
+        """Without a generation error, a failed question save is still raised."""
+        agent = AsyncMock()
+        agent.save_message.side_effect = _failing_save
+        agent.generate_response_with_rag.return_value = ("Resposta", None)
+
+        with pytest.raises(OSError, match="database is locked"):
+            await _service(agent).process_question("Pergunta?", _CONVERSATION, "u1", None)
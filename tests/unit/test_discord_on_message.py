@@ -304,8 +304,8 @@ class TestHandleChatMessageErrors:
         # Act & Assert - Should not crash, should log warning
         with (
             patch(
-                "src.core.discord.AgentWrapper.generate_response",
-                new=AsyncMock(return_value="A" * 3000),  # Long response that needs split
+                "src.core.discord.AgentWrapper.generate_response_with_rag",
+                new=AsyncMock(return_value=("A" * 3000, None)),  # Long response that needs split
             ),
             patch("src.core.discord.log"),
         ):
@@ -340,8 +340,8 @@ class TestHandleChatMessageErrors:
 
         # Act
         with patch(
-            "src.core.discord.AgentWrapper.generate_response",
-            new=AsyncMock(return_value="Resposta"),
+            "src.core.discord.AgentWrapper.generate_response_with_rag",
+            new=AsyncMock(return_value=("Resposta", None)),
         ) as mock_generate:
             await bot.on_message(message)
 
@@ -382,8 +382,8 @@ class TestHandleChatMessageErrors:
         with (
             patch.object(BotSalinhaBot, "user", new_callable=PropertyMock) as mock_user,
             patch(
-                "src.core.discord.AgentWrapper.generate_response",
-                new=AsyncMock(return_value="Resposta 1"),
+                "src.core.discord.AgentWrapper.generate_response_with_rag",
+                new=AsyncMock(return_value=("Resposta 1", None)),
             ),
         ):
             mock_user.return_value.id = 12345
@@ -427,8 +427,8 @@ class TestHandleChatMessageValidation:
 
         # Act
         with patch(
-            "src.core.discord.AgentWrapper.generate_response",
-            new=AsyncMock(return_value="Resposta"),
+            "src.core.discord.AgentWrapper.generate_response_with_rag",
+            new=AsyncMock(return_value=("Resposta", None)),
         ):
             await bot.on_message(message)
 
@@ -0,0 +1,161 @@
+"""Unit tests for the in-memory conversation history cache."""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.models.message import Message, MessageCreate, MessageRole
+from src.storage.history_cache import CachedHistoryMessageRepository, ConversationHistoryCache
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _turn(role: str, content: str) -> dict[str, str]:
+    return {"role": role, "content": content}
+
+
+def _stored(conversation_id: str, role: MessageRole, content: str) -> Message:
+    return Message(
+        id=f"{conversation_id}-{content}",
+        conversation_id=conversation_id,
+        role=role,
+        content=content,
+        created_at=datetime.now(UTC),
+    )
+
+
+@pytest.mark.unit
+class TestConversationHistoryCache:
+    """Test ring buffers, eviction and stale-load protection."""
+
+    def test_ring_buffer_keeps_newest_messages(self) -> None:
+        """Appends push the oldest message out of a full buffer."""
+        cache = ConversationHistoryCache(max_messages=4)
+        cache.begin_load("c1")
+        cache.finish_load("c1", [_turn("user", "Q1"), _turn("assistant", "A1")])
+
+        for n in (2, 3):
+            cache.append("c1", MessageRole.USER, f"Q{n}")
+            cache.append("c1", MessageRole.ASSISTANT, f"A{n}")
+        cache.append("c1", MessageRole.SYSTEM, "ignored")
+
+        assert cache.get("c1", 4) == [
+            _turn("user", "Q2"),
+            _turn("assistant", "A2"),
+            _turn("user", "Q3"),
+            _turn("assistant", "A3"),
+        ]
+        assert cache.get("c1", 2) == [_turn("user", "Q3"), _turn("assistant", "A3")]
+        assert cache.get("c1", 6) is None
+
+    def test_uncached_conversations_are_not_appended_to(self) -> None:
+        """A conversation only enters the cache through a load."""
+        cache = ConversationHistoryCache(max_messages=4)
+        cache.append("c1", MessageRole.USER, "Q1")
+
+        assert cache.get("c1", 2) is None
+        assert cache.stats.conversations == 0
+
+    def test_load_racing_a_write_is_discarded(self) -> None:
+        """A history read before a concurrent write would miss it, so it is not kept."""
+        cache = ConversationHistoryCache(max_messages=4)
+        cache.begin_load("c1")
+        cache.append("c1", MessageRole.USER, "Q2")
+        cache.finish_load("c1", [_turn("user", "Q1")])
+
+        assert cache.get("c1", 2) is None
+
+    def test_idle_and_memory_eviction(self) -> None:
+        """Idle conversations expire; over the cap the least recently used goes."""
+        clock = _FakeClock()
+        cache = ConversationHistoryCache(
+            max_messages=2, max_bytes=800, idle_seconds=60.0, clock=clock
+        )
+        for conversation_id in ("c1", "c2"):
+            cache.begin_load(conversation_id)
+            cache.finish_load(conversation_id, [_turn("user", conversation_id)])
+
+        clock.now = 30.0
+        assert cache.get("c1", 1) is not None
+        cache.begin_load("c3")
+        cache.finish_load("c3", [_turn("user", "c3"), _turn("assistant", "x" * 100)])
+        assert cache.get("c2", 1) is None
+        assert cache.stats.evictions == 1
+
+        clock.now = 100.0
+        assert cache.get("c1", 1) is None
+        assert cache.get("c3", 1) is None
+        assert cache.stats.idle_evictions == 2
+
+
+@pytest.mark.unit
+class TestCachedHistoryMessageRepository:
+    """Test that history reads stop hitting the wrapped repository."""
+
+    @pytest.mark.asyncio
+    async def test_history_is_loaded_once_then_kept_current(self) -> None:
+        """After the first read, new messages are served from memory."""
+        inner = AsyncMock()
+        inner.get_conversation_history.return_value = [
+            _turn("user", "Q1"),
+            _turn("assistant", "A1"),
+        ]
+        inner.create_message.side_effect = lambda message: _stored(
+            message.conversation_id, message.role, message.content
+        )
+        repository = CachedHistoryMessageRepository(inner, ConversationHistoryCache(6))
+
+        assert await repository.get_conversation_history("c1", max_runs=1) == [
+            _turn("user", "Q1"),
+            _turn("assistant", "A1"),
+        ]
+        inner.get_conversation_history.assert_awaited_once_with("c1", 3)
+
+        await repository.create_message(
+            MessageCreate(conversation_id="c1", role=MessageRole.USER, content="Q2")
+        )
+        assert await repository.get_conversation_history("c1", max_runs=3) == [
+            _turn("user", "Q1"),
+            _turn("assistant", "A1"),
+            _turn("user", "Q2"),
+        ]
+        assert inner.get_conversation_history.await_count == 1
+        assert repository.cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_deleting_a_conversation_drops_its_history(self) -> None:
+        """Cleared conversations are loaded from the repository again."""
+        inner = AsyncMock()
+        inner.get_conversation_history.return_value = [_turn("user", "Q1")]
+        repository = CachedHistoryMessageRepository(inner, ConversationHistoryCache(6))
+
+        await repository.get_conversation_history("c1")
+        await repository.delete_conversation_messages("c1")
+        inner.get_conversation_history.return_value = []
+
+        assert await repository.get_conversation_history("c1") == []
+        assert inner.get_conversation_history.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_history_loaded_during_a_delete_is_dropped(self) -> None:
+        """A read completing before the delete commits cannot keep the old rows."""
+        inner = AsyncMock()
+        inner.get_conversation_history.return_value = [_turn("user", "Q1")]
+        repository = CachedHistoryMessageRepository(inner, ConversationHistoryCache(6))
+
+        async def delete_with_concurrent_read(conversation_id: str) -> int:
+            await repository.get_conversation_history(conversation_id)
+            inner.get_conversation_history.return_value = []
+            return 1
+
+        inner.delete_conversation_messages.side_effect = delete_with_concurrent_read
+        assert await repository.delete_conversation_messages("c1") == 1
+
+        assert await repository.get_conversation_history("c1") == []
@@ -2,7 +2,7 @@
 
 import pytest
 
-from src.utils.message_splitter import MessageSplitter, default_splitter
+from src.utils.message_splitter import MessageSplitter, StreamingSplitter, default_splitter
 
 
 class TestMessageSplitter:
@@ -127,3 +127,41 @@ class TestMessageSplitterEdgeCases:
         result = splitter.split(message)
         assert len(result) == 1
         assert result[0] == message
+
+
+class TestStreamingSplitter:
+    """Tests for StreamingSplitter (incremental splitting of streamed text)."""
+
+    @pytest.mark.parametrize("piece_size", [1, 3, 7, 50])
+    def test_matches_split_for_any_piece_size(self, piece_size: int) -> None:
+        """Feeding text in pieces yields the same chunks as split() on the whole."""
+        message = "Para 1 texto\n\n" + "B" * 18 + "\n\nPara 3\n\nfinal " + "C" * 12
+        streaming = StreamingSplitter(max_length=20)
+
+        chunks: list[str] = []
+        for start in range(0, len(message), piece_size):
+            chunks.extend(streaming.feed(message[start : start + piece_size]))
+        chunks.extend(streaming.flush())
+
+        assert chunks == MessageSplitter(max_length=20).split(message)
+
+    def test_keeps_chunk_open_until_limit_is_passed(self) -> None:
+        """Nothing is sealed while the text still fits; pending holds it."""
+        splitter = StreamingSplitter(max_length=10)
+        assert splitter.feed("0123456789") == []
+        assert splitter.pending == "0123456789"
+        assert splitter.feed("\n\nAB") == ["0123456789"]
+        assert splitter.pending == "AB"
+        assert splitter.flush() == ["AB"]
+        assert splitter.pending == ""
+
+    def test_hard_splits_long_paragraph(self) -> None:
+        """A paragraph longer than the limit is cut at the limit."""
+        splitter = StreamingSplitter(max_length=10)
+        chunks = [chunk for char in "A" * 25 for chunk in splitter.feed(char)]
+        assert chunks + splitter.flush() == ["A" * 10, "A" * 10, "A" * 5]
+
+    def test_init_invalid_max_length(self) -> None:
+        """Should raise ValueError for non-positive max_length."""
+        with pytest.raises(ValueError, match="must be positive"):
+            StreamingSplitter(max_length=0)
@@ -0,0 +1,81 @@
+"""Unit tests for single-flight request coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    """Calls arriving while the work runs await the same result."""
+    flight: SingleFlight[int] = SingleFlight("test")
+    executions = 0
+    release = asyncio.Event()
+
+    async def work() -> int:
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return 42
+
+    waiters = [asyncio.create_task(flight.run("k", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.inflight == 1
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [42] * 5
+    assert executions == 1
+    assert (flight.stats.calls, flight.stats.executions, flight.stats.coalesced) == (5, 1, 4)
+    assert flight.inflight == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failure_reaches_every_waiter_and_is_not_cached() -> None:
+    """An exception is raised to all waiters; the next call runs again."""
+    flight: SingleFlight[str] = SingleFlight("test")
+    calls = 0
+
+    async def failing() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(
+        flight.run("k", failing), flight.run("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats.failures == 1
+
+    with pytest.raises(RuntimeError):
+        await flight.run("k", failing)
+    assert calls == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_work() -> None:
+    """A timed-out caller leaves the execution running for the others."""
+    flight: SingleFlight[str] = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def work() -> str:
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.run("k", work))
+    follower = asyncio.create_task(flight.run("k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "done"
+    assert leader.cancelled()
+    assert flight.stats.failures == 0
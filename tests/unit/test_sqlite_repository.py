@@ -355,6 +355,26 @@ class TestMessageRepository:
         # Should return only last pair (2 messages) with max_runs=1
         assert len(history) <= 2
 
+    @pytest.mark.asyncio
+    async def test_get_conversation_history_returns_newest_runs(
+        self, repository: SQLiteRepository
+    ) -> None:
+        """Long conversations yield their latest runs, oldest first."""
+        conv = await repository.create_conversation(
+            ConversationCreate(user_id="user1", guild_id="guild1", channel_id="ch1")
+        )
+        for i in range(20):
+            await repository.create_message(
+                MessageCreate(conversation_id=conv.id, role=MessageRole.USER, content=f"Q{i}")
+            )
+            await repository.create_message(
+                MessageCreate(conversation_id=conv.id, role=MessageRole.ASSISTANT, content=f"A{i}")
+            )
+
+        history = await repository.get_conversation_history(conv.id, max_runs=2)
+
+        assert [message["content"] for message in history] == ["Q18", "A18", "Q19", "A19"]
+
     @pytest.mark.asyncio
     async def test_delete_message(self, repository: SQLiteRepository) -> None:
         """Should delete a message."""
@@ -0,0 +1,105 @@
+"""Unit tests for progressive Discord replies."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.streaming_reply import StreamingReply
+
+
+class _FakeChannel:
+    """Records posted messages; each posted message records its edits."""
+
+    def __init__(self) -> None:
+        self.messages: list[AsyncMock] = []
+
+    async def send(self, content: str) -> AsyncMock:
+        message = AsyncMock()
+        message.content = content
+        self.messages.append(message)
+        return message
+
+    def texts(self) -> list[str]:
+        """Final text of every message (last edit, or the posted text)."""
+        return [
+            message.edit.await_args.kwargs["content"] if message.edit.await_args else message.content
+            for message in self.messages
+        ]
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+class TestStreamingReply:
+    """Test posting, rate-bounded editing and splitting of streamed replies."""
+
+    @pytest.mark.asyncio
+    async def test_first_post_waits_for_a_sentence(self) -> None:
+        """Single words are held back until the first sentence is complete."""
+        channel = _FakeChannel()
+        reply = StreamingReply(channel.send, clock=_FakeClock())
+
+        await reply.push("O princípio")
+        await reply.push(" da legalidade")
+        assert channel.messages == []
+
+        await reply.push(" rege a administração. Ele")
+        assert [message.content for message in channel.messages] == [
+            "O princípio da legalidade rege a administração. Ele"
+        ]
+        assert reply.first_visible_at is not None
+
+    @pytest.mark.asyncio
+    async def test_edits_are_rate_bounded(self) -> None:
+        """The open message is edited at most once per interval; finish applies the rest."""
+        channel = _FakeChannel()
+        clock = _FakeClock()
+        reply = StreamingReply(channel.send, edit_interval_seconds=1.0, clock=clock)
+
+        await reply.push("Primeira frase.\n")
+        for word in ["um ", "dois ", "três "]:
+            clock.now += 0.2
+            await reply.push(word)
+        assert reply.edits == 0
+
+        clock.now += 1.0
+        await reply.push("quatro")
+        assert reply.edits == 1
+
+        await reply.finish()
+        assert channel.texts() == ["Primeira frase.\num dois três quatro"]
+        assert (reply.messages_sent, reply.edits) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_long_reply_continues_in_new_messages(self) -> None:
+        """Text past the limit is finalized at a paragraph break and continued."""
+        channel = _FakeChannel()
+        reply = StreamingReply(channel.send, max_length=20, edit_interval_seconds=0.0)
+
+        text = "Artigo primeiro.\n\nArtigo segundo.\n\nFim."
+        for char in text:
+            await reply.push(char)
+        await reply.finish()
+
+        assert channel.texts() == ["Artigo primeiro.", "Artigo segundo.", "Fim."]
+        assert all(len(message.content) <= 20 for message in channel.messages)
+
+    @pytest.mark.asyncio
+    async def test_short_reply_is_posted_on_finish(self) -> None:
+        """A reply that never completes a sentence is still posted once."""
+        channel = _FakeChannel()
+        reply = StreamingReply(channel.send)
+
+        await reply.push("Sim")
+        await reply.finish()
+
+        assert channel.texts() == ["Sim"]
+        assert reply.edits == 0
@@ -0,0 +1,125 @@
+"""Unit tests for write-behind message persistence."""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.conversation import Base, ConversationCreate
+from src.models.message import MessageCreate, MessageRole
+from src.storage import write_behind
+from src.storage.sqlite_repository import SQLiteRepository
+from src.storage.write_behind import WriteBehindMessageRepository
+
+
+@pytest_asyncio.fixture
+async def repository():
+    """Create a fresh in-memory repository for each test."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+    )
+    async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    repo = SQLiteRepository.__new__(SQLiteRepository)
+    repo.engine = engine
+    repo.async_session_maker = async_session_maker
+
+    yield repo
+
+    await engine.dispose()
+
+
+async def _conversation_id(repository: SQLiteRepository) -> str:
+    conversation = await repository.create_conversation(
+        ConversationCreate(user_id="user123", guild_id="guild456", channel_id="channel789")
+    )
+    return conversation.id
+
+
+def _message(conversation_id: str, role: MessageRole, content: str) -> MessageCreate:
+    return MessageCreate(conversation_id=conversation_id, role=role, content=content)
+
+
+@pytest.mark.unit
+class TestWriteBehindMessageRepository:
+    """Test batching, read-your-writes and shutdown flushing."""
+
+    @pytest.mark.asyncio
+    async def test_reads_see_queued_messages_before_commit(
+        self, repository: SQLiteRepository
+    ) -> None:
+        """History includes queued messages; both are committed in one batch."""
+        conversation_id = await _conversation_id(repository)
+        writer = WriteBehindMessageRepository(repository, flush_interval_seconds=0.01)
+
+        question = await writer.create_message(
+            _message(conversation_id, MessageRole.USER, "O que é habeas corpus?")
+        )
+        await writer.create_message(
+            _message(conversation_id, MessageRole.ASSISTANT, "É uma ação constitucional.")
+        )
+
+        assert await repository.get_conversation_messages(conversation_id) == []
+        assert await writer.get_conversation_history(conversation_id) == [
+            {"role": "user", "content": "O que é habeas corpus?"},
+            {"role": "assistant", "content": "É uma ação constitucional."},
+        ]
+        assert await writer.get_message_by_id(question.id) == question
+
+        await writer.flush()
+
+        stored = await repository.get_conversation_messages(conversation_id)
+        assert [message.content for message in stored] == [
+            "O que é habeas corpus?",
+            "É uma ação constitucional.",
+        ]
+        assert writer.pending == 0
+        assert (writer.stats.committed, writer.stats.batches) == (2, 1)
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried(
+        self, repository: SQLiteRepository, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A transient insert failure does not lose the batch."""
+        monkeypatch.setattr(write_behind, "_RETRY_DELAY_SECONDS", 0.0)
+        conversation_id = await _conversation_id(repository)
+        create_messages = repository.create_messages
+        calls = 0
+
+        async def flaky_create_messages(messages):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise ConnectionError("database is locked")
+            await create_messages(messages)
+
+        monkeypatch.setattr(repository, "create_messages", flaky_create_messages)
+        writer = WriteBehindMessageRepository(repository, flush_interval_seconds=0.0)
+
+        await writer.create_message(_message(conversation_id, MessageRole.USER, "Pergunta"))
+        await writer.flush()
+
+        assert len(await repository.get_conversation_messages(conversation_id)) == 1
+        assert (writer.stats.committed, writer.stats.dropped) == (1, 0)
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_and_later_writes_go_through(
+        self, repository: SQLiteRepository
+    ) -> None:
+        """Closing commits what is queued; afterwards writes are synchronous."""
+        conversation_id = await _conversation_id(repository)
+        writer = WriteBehindMessageRepository(repository, flush_interval_seconds=0.2)
+
+        await writer.create_message(_message(conversation_id, MessageRole.USER, "Antes"))
+        await writer.close()
+        assert len(await repository.get_conversation_messages(conversation_id)) == 1
+
+        await writer.create_message(_message(conversation_id, MessageRole.USER, "Depois"))
+        assert len(await repository.get_conversation_messages(conversation_id)) == 2
+        assert writer.pending == 0